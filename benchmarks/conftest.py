@@ -0,0 +1,51 @@
+"""pytest configuration of the benchmark suite (see test_storage_benchmarks.py)."""
+
+# The code below is subject to the license contained in the LICENSE.md file, which is part of the source code.
+
+from __future__ import annotations
+
+import importlib.util
+from typing import TYPE_CHECKING
+
+import pytest
+
+if TYPE_CHECKING:
+    from _pytest.config import Config
+    from _pytest.config.argparsing import Parser
+
+
+# Synthetic databases: name: (number of guids, snapshots per guid, payload size in bytes)
+SCALES = {
+    'small': (1_000, 4, 1_024),
+    'many-guids': (100_000, 1, 1_024),
+    'deep-history': (1_000, 100, 1_024),
+    'large-payloads': (20, 2, 5 * 1024 * 1024),
+}
+
+
+def pytest_addoption(parser: Parser) -> None:
+    group = parser.getgroup('webchanges storage benchmarks')
+    group.addoption(
+        '--storage-scale',
+        action='append',
+        choices=[*SCALES, 'all'],
+        help=f'size of the synthetic databases (can be repeated; default: small): {SCALES}',
+    )
+
+
+def pytest_configure(config: Config) -> None:
+    if importlib.util.find_spec('pytest_benchmark') is None:
+        raise pytest.UsageError("The benchmarks require the 'pytest-benchmark' package: pip install pytest-benchmark")
+    from pytest_benchmark.utils import get_tag
+
+    # Always keep the results as JSON (in .benchmarks/) so that runs can be compared with --benchmark-compare
+    if not config.getoption('benchmark_json') and not config.getoption('benchmark_save'):
+        config.option.benchmark_autosave = get_tag()
+
+
+def pytest_generate_tests(metafunc: pytest.Metafunc) -> None:
+    if 'scale' in metafunc.fixturenames:
+        scales = metafunc.config.getoption('storage_scale') or ['small']
+        if 'all' in scales:
+            scales = list(SCALES)
+        metafunc.parametrize('scale', [SCALES[scale] for scale in scales], ids=scales, scope='module')
@@ -0,0 +1,125 @@
+"""Benchmark of the throughput of CPU-heavy jobs with and without the global interpreter lock (GIL).
+
+Creates JOBS local HTML pages of SECTIONS sections each and a snapshot database with a different earlier version of
+each page, then measures how many jobs per second are retrieved, filtered (html2text and line filters) and diffed
+(unified differ, HTML report) with 1 and WORKERS threads, the same way as in a run of webchanges.  On a free-threaded
+build of Python (e.g. python3.14t) the benchmark is run twice, with the GIL enabled (PYTHON_GIL=1) and disabled
+(PYTHON_GIL=0), to compare the two.  Usage::
+
+   python3.14t benchmarks/free_threading.py [--jobs 64] [--sections 200] [--workers 8]
+"""
+
+# The code below is subject to the license contained in the LICENSE.md file, which is part of the source code.
+
+from __future__ import annotations
+
+import argparse
+import os
+import random
+import string
+import subprocess  # noqa: S404 Consider possible security implications associated with the subprocess module.
+import sys
+import sysconfig
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from webchanges.handler import JobState, Snapshot
+from webchanges.jobs import JobBase
+from webchanges.storage import SsdbSQLite3Storage
+from webchanges.util import gil_status
+
+FILTERS = [
+    {'html2text': {'method': 'lxml', 'pad_tables': True}},
+    {'delete_lines_containing': {'re': '^ *$'}},
+    'strip',
+]
+
+
+def page(rng: random.Random, sections: int) -> str:
+    """An HTML page with headings, paragraphs with links, lists and tables."""
+    words = [''.join(rng.choices(string.ascii_lowercase, k=rng.randint(2, 9))) for _ in range(500)]
+
+    def text(k: int) -> str:
+        return ' '.join(rng.choices(words, k=k))
+
+    parts = ['<html><body>']
+    for i in range(sections):
+        parts.append(f'<h2>{text(3)}</h2><p>{text(20)} <a href="/page/{i}">{text(2)}</a> <b>{text(2)}</b></p>')
+        parts.append('<ul>' + ''.join(f'<li>{text(4)}</li>' for _ in range(4)) + '</ul>')
+        if i % 10 == 0:
+            parts.append(f'<table><tr><td>{text(2)}</td><td>{text(3)}</td></tr></table>')
+    parts.append('</body></html>')
+    return '\n'.join(parts)
+
+
+def populate(ssdb_storage: SsdbSQLite3Storage, tmp_dir: Path, jobs: int, sections: int) -> list[JobBase]:
+    """Write the pages and save a snapshot of an earlier version of each in the database.
+
+    :returns: The list of jobs.
+    """
+    rng = random.Random(jobs)  # noqa: S311 not for crypto
+    job_list = []
+    for i in range(jobs):
+        html_file = tmp_dir.joinpath(f'page{i}.html')
+        html_file.write_text(page(rng, sections))
+        job = JobBase.unserialize({'url': html_file.as_uri(), 'filters': FILTERS, 'index_number': i + 1})
+        ssdb_storage.save(
+            guid=job.guid, snapshot=Snapshot(page(rng, sections), 1_600_000_000, 0, '', 'text/html', {})
+        )
+        job_list.append(job)
+    ssdb_storage.flush()
+    return job_list
+
+
+def run_job(ssdb_storage: SsdbSQLite3Storage, job: JobBase) -> None:
+    """Retrieve, filter and diff a job."""
+    with JobState(ssdb_storage, job) as job_state:
+        job_state.process()
+        if job_state.exception is not None:
+            raise job_state.exception
+        job_state.get_diff('html')
+
+
+def measure(ssdb_storage: SsdbSQLite3Storage, job_list: list[JobBase], workers: int) -> float:
+    """Run every job using a thread pool of 'workers' threads.
+
+    :returns: Jobs per second.
+    """
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        for _ in executor.map(lambda job: run_job(ssdb_storage, job), job_list):
+            pass
+    return len(job_list) / (time.perf_counter() - start)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--jobs', type=int, default=64)
+    parser.add_argument('--sections', type=int, default=200)
+    parser.add_argument('--workers', type=int, default=min(8, os.cpu_count() or 1))
+    parser.add_argument('--no-compare', action='store_true', help='only run with the GIL setting of this process')
+    args = parser.parse_args()
+
+    if sysconfig.get_config_var('Py_GIL_DISABLED') == 1 and not args.no_compare:
+        for gil in ('1', '0'):
+            subprocess.run(  # noqa: S603 subprocess call - check for execution of untrusted input.
+                [sys.executable, __file__, *sys.argv[1:], '--no-compare'],
+                env={**os.environ, 'PYTHON_GIL': gil},
+                check=True,
+            )
+        return
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        ssdb_storage = SsdbSQLite3Storage(Path(tmp_dir).joinpath('snapshots.db'), max_snapshots=0)
+        job_list = populate(ssdb_storage, Path(tmp_dir), args.jobs, args.sections)
+        print(f'{sys.version.split()[0]}, GIL {gil_status()}: {args.jobs} jobs of {args.sections} sections')
+        for workers in (1, args.workers):
+            measure(ssdb_storage, job_list, workers)  # warm up
+            print(f'{workers:>3} workers: {measure(ssdb_storage, job_list, workers):>8,.1f} jobs/s')
+        ssdb_storage.close()
+
+
+if __name__ == '__main__':
+    main()
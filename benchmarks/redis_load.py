@@ -0,0 +1,74 @@
+"""Benchmark of SsdbRedisStorage enumeration, load, history and save throughput.
+
+Flushes the Redis database at URI (use a scratch database!), fills it with GUIDS jobs of HISTORY snapshots each and
+times the main storage operations.  Usage::
+
+   python benchmarks/redis_load.py redis://localhost:6379/15 [--guids 10000] [--history 4] [--payload-size 2000]
+"""
+
+# The code below is subject to the license contained in the LICENSE.md file, which is part of the source code.
+
+from __future__ import annotations
+
+import argparse
+import random
+import string
+import time
+from typing import Callable
+
+from webchanges.handler import Snapshot
+from webchanges.storage import SsdbRedisStorage
+
+
+def timed(label: str, count: int, func: Callable[[], object]) -> None:
+    """Run 'func' once and print the number of operations per second."""
+    start = time.perf_counter()
+    func()
+    duration = time.perf_counter() - start
+    print(f'{label:<28} {duration:>8.3f} s {count / duration:>12,.0f} ops/s')
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('uri')
+    parser.add_argument('--guids', type=int, default=10_000)
+    parser.add_argument('--history', type=int, default=4)
+    parser.add_argument('--payload-size', type=int, default=2_000)
+    args = parser.parse_args()
+
+    ssdb_storage = SsdbRedisStorage(args.uri, max_snapshots=args.history)
+    ssdb_storage.flushdb()
+    payload = ''.join(random.choices(string.ascii_letters + '\n', k=args.payload_size))  # noqa: S311 not for crypto
+    guid_list = [f'{i:040x}' for i in range(args.guids)]
+    entries = [
+        (guid, payload, 1_600_000_000 + n, 0, '', 'text/plain', {}) for n in range(args.history) for guid in guid_list
+    ]
+    print(f'{args.guids:,} guids x {args.history} snapshots of {args.payload_size:,} bytes')
+
+    timed(
+        'restore (pipelined)',
+        len(entries),
+        lambda: ssdb_storage.restore(entries),  # ty:ignore[invalid-argument-type]
+    )
+    timed(
+        'save (one at a time)',
+        args.guids,
+        lambda: [
+            ssdb_storage.save(guid=guid, snapshot=Snapshot(payload, 1_700_000_000, 0, '', 'text/plain', {}))
+            for guid in guid_list
+        ],
+    )
+    timed('get_guids (SCAN)', args.guids, ssdb_storage.get_guids)
+    timed('load (one at a time)', args.guids, lambda: [ssdb_storage.load(guid) for guid in guid_list])
+    timed('load_many (pipelined)', args.guids, lambda: list(ssdb_storage.load_many(guid_list)))
+    timed(
+        'get_history_snapshots',
+        args.guids,
+        lambda: [ssdb_storage.get_history_snapshots(guid) for guid in guid_list],
+    )
+    ssdb_storage.flushdb()
+    ssdb_storage.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,70 @@
+"""Benchmark of concurrent SsdbSQLite3Storage.load() throughput.
+
+Creates a temporary sqlite3 snapshot database with GUIDS jobs of HISTORY snapshots each and measures how many
+``load()`` calls per second are served with 1 and WORKERS threads.  Usage::
+
+   python benchmarks/sqlite3_load.py [--guids 2000] [--history 4] [--payload-size 20000] [--workers 32]
+"""
+
+# The code below is subject to the license contained in the LICENSE.md file, which is part of the source code.
+
+from __future__ import annotations
+
+import argparse
+import random
+import string
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from webchanges.handler import Snapshot
+from webchanges.storage import SsdbSQLite3Storage
+
+
+def populate(ssdb_storage: SsdbSQLite3Storage, guids: int, history: int, payload_size: int) -> list[str]:
+    """Fill the database with synthetic snapshots.
+
+    :returns: The list of guids created.
+    """
+    payload = ''.join(random.choices(string.ascii_letters + '\n', k=payload_size))  # noqa: S311 not for crypto
+    guid_list = [f'{i:040x}' for i in range(guids)]
+    for n in range(history):
+        for guid in guid_list:
+            ssdb_storage.save(guid=guid, snapshot=Snapshot(payload, 1_600_000_000 + n, 0, '', 'text/plain', {}))
+    ssdb_storage.flush()
+    return guid_list
+
+
+def measure(ssdb_storage: SsdbSQLite3Storage, guid_list: list[str], workers: int) -> float:
+    """Load every guid using a thread pool of 'workers' threads.
+
+    :returns: Loads per second.
+    """
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        for _ in executor.map(ssdb_storage.load, guid_list):
+            pass
+    return len(guid_list) / (time.perf_counter() - start)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--guids', type=int, default=2000)
+    parser.add_argument('--history', type=int, default=4)
+    parser.add_argument('--payload-size', type=int, default=20_000)
+    parser.add_argument('--workers', type=int, default=32)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        ssdb_storage = SsdbSQLite3Storage(Path(tmp_dir).joinpath('snapshots.db'), max_snapshots=0)
+        guid_list = populate(ssdb_storage, args.guids, args.history, args.payload_size)
+        print(f'{args.guids:,} guids x {args.history} snapshots of {args.payload_size:,} bytes')
+        for workers in (1, args.workers):
+            measure(ssdb_storage, guid_list, workers)  # warm up
+            print(f'{workers:>3} workers: {measure(ssdb_storage, guid_list, workers):>10,.0f} loads/s')
+        ssdb_storage.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,106 @@
+"""Benchmark suite of filters (webchanges.filters) on multi-MB data.
+
+Times chains of line filters run by a CompiledFilterChain, both with consecutive line filters fused into a single pass
+over the lines of the data (the default) and applied one after the other, each splitting and joining the whole text,
+and the html2text filter's html2text and lxml methods converting a large HTML page to Markdown.  Usage::
+
+   pip install pytest-benchmark
+   python -m pytest benchmarks/test_filter_benchmarks.py [-k fused|html2text]
+"""
+
+# The code below is subject to the license contained in the LICENSE.md file, which is part of the source code.
+
+from __future__ import annotations
+
+import random
+import string
+from typing import TYPE_CHECKING, Any
+
+import pytest
+
+from webchanges.filters import CompiledFilterChain
+from webchanges.handler import JobState
+from webchanges.jobs import JobBase
+
+if TYPE_CHECKING:
+    from pytest_benchmark.fixture import BenchmarkFixture
+
+LINES = 100_000  # about 5 MB of text
+SECTIONS = 3_000  # about 1.5 MB of HTML
+
+CHAINS: dict[str, list[Any]] = {
+    'keep-delete-strip': [
+        {'keep_lines_containing': {'re': '[aeiou]{2}'}},
+        {'delete_lines_containing': 'zz'},
+        {'delete_lines_containing': {'re': '^ *q'}},
+        'strip',
+    ],
+    'strip-lines-dedup': [
+        {'strip': {'splitlines': True}},
+        'remove-duplicate-lines',
+        {'delete_lines_containing': {'re': '^$'}},
+    ],
+    'all-line-filters': [
+        {'keep_lines_containing': {'re': '[aeiou]{2}'}},
+        {'delete_lines_containing': 'zz'},
+        {'strip': {'splitlines': True}},
+        'remove-duplicate-lines',
+        {'delete_lines_containing': {'re': '^q'}},
+        'strip',
+    ],
+}
+
+
+@pytest.fixture(scope='module')
+def text() -> str:
+    rng = random.Random(LINES)  # noqa: S311 not for crypto
+    words = [''.join(rng.choices(string.ascii_lowercase, k=rng.randint(2, 9))) for _ in range(2_000)]
+    return '\n'.join(f'  {" ".join(rng.choices(words, k=rng.randint(3, 12)))} ' for _ in range(LINES))
+
+
+@pytest.fixture(scope='module')
+def page() -> str:
+    """An HTML page with headings, paragraphs with links and emphasis, lists and tables."""
+    rng = random.Random(SECTIONS)  # noqa: S311 not for crypto
+    words = [''.join(rng.choices(string.ascii_lowercase, k=rng.randint(2, 9))) for _ in range(2_000)]
+
+    def text(k: int) -> str:
+        return ' '.join(rng.choices(words, k=k))
+
+    parts = ['<html><head><title>Page</title><style>p { margin: 0; }</style></head><body>']
+    for i in range(SECTIONS):
+        parts.append(
+            f'<h2>{text(3)}</h2><p>{text(20)} <a href="/page/{i}">{text(2)}</a> <b>{text(2)}</b> &amp; {text(5)}</p>'
+        )
+        parts.append('<ul>' + ''.join(f'<li>{text(4)} <em>{text(1)}</em></li>' for _ in range(4)) + '</ul>')
+        if i % 10 == 0:
+            rows = ''.join(f'<tr><td>{text(2)}</td><td>{text(3)}</td></tr>' for _ in range(5))
+            parts.append(f'<table><tr><th>{text(1)}</th><th>{text(1)}</th></tr>{rows}</table>')
+    parts.append('</body></html>')
+    return '\n'.join(parts)
+
+
+@pytest.fixture(scope='module')
+def job_state() -> JobState:
+    return JobState(None, JobBase.unserialize({'url': 'https://example.com/'}))  # ty:ignore[invalid-argument-type]
+
+
+@pytest.mark.parametrize('fused', [True, False], ids=['fused', 'one-by-one'])
+@pytest.mark.parametrize('chain_name', list(CHAINS))
+def test_line_filters(
+    benchmark: BenchmarkFixture, text: str, job_state: JobState, chain_name: str, fused: bool
+) -> None:
+    chain = CompiledFilterChain(CHAINS[chain_name])
+    expected = chain.process(job_state, text, 'text/plain')
+    if not fused:
+        chain.fused = [False] * len(chain.fused)
+    benchmark.extra_info['megabytes'] = round(len(text) / 1e6, 1)
+    assert benchmark(chain.process, job_state, text, 'text/plain') == expected
+
+
+@pytest.mark.parametrize('method', ['html2text', 'lxml'])
+def test_html2text(benchmark: BenchmarkFixture, page: str, job_state: JobState, method: str) -> None:
+    chain = CompiledFilterChain([{'html2text': {'method': method, 'pad_tables': True}}])
+    benchmark.extra_info['megabytes'] = round(len(page) / 1e6, 1)
+    data, _ = benchmark(chain.process, job_state, page, 'text/html')
+    assert data == CompiledFilterChain([{'html2text': {'pad_tables': True}}]).process(job_state, page, 'text/html')[0]
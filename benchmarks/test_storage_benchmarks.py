@@ -0,0 +1,221 @@
+"""Benchmark suite of the snapshot database engines (webchanges.storage).
+
+Generates synthetic databases for each engine (sqlite3, textfiles, and lmdb and redis if available) and times the
+main storage operations with pytest-benchmark.  The size of the databases is chosen with --storage-scale (see SCALES
+in conftest.py).  Results are saved as JSON in .benchmarks/ (or to the file given with --benchmark-json) so that
+regressions can be found by comparing runs.  Usage::
+
+   pip install pytest-benchmark
+   python -m pytest benchmarks [--storage-scale small|many-guids|deep-history|large-payloads|all] [-k sqlite3]
+   python -m pytest benchmarks --benchmark-compare  # compare with the previous saved run
+
+To include Redis, set the REDIS_URI environment variable to a scratch database (it will be flushed!).
+"""
+
+# The code below is subject to the license contained in the LICENSE.md file, which is part of the source code.
+
+from __future__ import annotations
+
+import contextlib
+import importlib.util
+import io
+import os
+import random
+import string
+import tempfile
+from pathlib import Path
+from typing import TYPE_CHECKING, Callable, Iterator
+
+import pytest
+
+from webchanges.handler import Snapshot
+from webchanges.storage import SsdbDirStorage, SsdbLMDBStorage, SsdbRedisStorage, SsdbSQLite3Storage, SsdbStorage
+
+if TYPE_CHECKING:
+    from pytest_benchmark.fixture import BenchmarkFixture
+
+BASE_TIMESTAMP = 1_600_000_000
+SAMPLE_SIZE = 1_000  # maximum number of guids read or written by the per-guid benchmarks
+ROUNDS = 3  # rounds of the benchmarks that modify the database (each one on a newly generated database)
+
+# Engine name: (class, database file or directory name, or None for the REDIS_URI)
+ENGINES: dict[str, tuple[type[SsdbStorage], str | None]] = {
+    'sqlite3': (SsdbSQLite3Storage, 'snapshots.db'),
+    'textfiles': (SsdbDirStorage, 'snapshots'),
+}
+if importlib.util.find_spec('lmdb') is not None:
+    ENGINES['lmdb'] = (SsdbLMDBStorage, 'snapshots.lmdb')
+if os.getenv('REDIS_URI') and importlib.util.find_spec('redis') is not None:
+    ENGINES['redis'] = (SsdbRedisStorage, None)
+
+
+def open_database(engine: str, path: Path) -> SsdbStorage:
+    """Open a database of 'engine' in directory 'path', keeping all snapshots (max_snapshots=0)."""
+    ssdb_class, filename = ENGINES[engine]
+    location = path.joinpath(filename) if filename else os.getenv('REDIS_URI', '')
+    return ssdb_class(location, max_snapshots=0)  # ty:ignore[unknown-argument]
+
+
+def requires(engine: str, method: str) -> None:
+    """Skip the benchmark if the database engine does not implement 'method'."""
+    if not hasattr(ENGINES[engine][0], method):
+        pytest.skip(f'{ENGINES[engine][0].__name__} has no {method}()')
+
+
+def generate(ssdb_storage: SsdbStorage, scale: tuple[int, int, int]) -> list[str]:
+    """Fill an empty database with 'versions' snapshots of 'payload_size' bytes for each of 'guids' jobs, one day
+    apart.
+
+    :returns: The list of guids.
+    """
+    guids, versions, payload_size = scale
+    rng = random.Random(guids)  # noqa: S311 not for crypto
+    payload = ''.join(rng.choices(string.ascii_letters + '\n', k=payload_size))
+    guid_list = [f'{i:040x}' for i in range(guids)]
+    ssdb_storage.flushdb()
+    ssdb_storage.restore(
+        (guid, f'{n}{payload[len(str(n)) :]}', BASE_TIMESTAMP + n * 86_400, 0, '', 'text/plain', {})
+        for n in range(versions)
+        for guid in guid_list
+    )
+    if hasattr(ssdb_storage, 'flush'):
+        ssdb_storage.flush()
+    return guid_list
+
+
+def sample(guid_list: list[str]) -> list[str]:
+    return guid_list[:: max(1, len(guid_list) // SAMPLE_SIZE)][:SAMPLE_SIZE]
+
+
+@pytest.fixture(params=list(ENGINES))
+def engine(request: pytest.FixtureRequest) -> str:
+    return request.param
+
+
+@pytest.fixture
+def database(engine: str, scale: tuple[int, int, int], tmp_path: Path) -> Iterator[tuple[SsdbStorage, list[str]]]:
+    """A generated database (for the benchmarks that do not modify it) and its guids."""
+    ssdb_storage = open_database(engine, tmp_path)
+    guid_list = generate(ssdb_storage, scale)
+    yield ssdb_storage, guid_list
+    ssdb_storage.flushdb()
+    ssdb_storage.close()
+
+
+@pytest.fixture
+def fresh_database(
+    engine: str, scale: tuple[int, int, int], tmp_path: Path
+) -> Iterator[Callable[[], tuple[SsdbStorage, list[str]]]]:
+    """A factory of newly generated databases, for the benchmarks that modify them."""
+    databases: list[SsdbStorage] = []
+
+    def factory() -> tuple[SsdbStorage, list[str]]:
+        if databases and engine == 'redis':  # a single server: the previous database is replaced
+            databases.pop().close()
+        ssdb_storage = open_database(engine, Path(tempfile.mkdtemp(dir=tmp_path)))
+        databases.append(ssdb_storage)
+        return ssdb_storage, generate(ssdb_storage, scale)
+
+    yield factory
+    for ssdb_storage in databases:
+        with contextlib.suppress(AttributeError):  # already closed by the benchmark
+            ssdb_storage.flushdb()
+            ssdb_storage.close()
+
+
+def run_modifying(
+    benchmark: BenchmarkFixture,
+    fresh_database: Callable[[], tuple[SsdbStorage, list[str]]],
+    target: Callable[[SsdbStorage, list[str]], object],
+) -> None:
+    """Benchmark 'target' on a newly generated database in each round (the generation is not timed)."""
+
+    def setup() -> tuple[tuple[SsdbStorage, list[str]], dict]:
+        return fresh_database(), {}
+
+    benchmark.pedantic(target, setup=setup, rounds=ROUNDS, iterations=1)
+
+
+def test_load(benchmark: BenchmarkFixture, database: tuple[SsdbStorage, list[str]]) -> None:
+    ssdb_storage, guid_list = database
+    guids = sample(guid_list)
+    benchmark.extra_info['operations'] = len(guids)
+    benchmark(lambda: [ssdb_storage.load(guid) for guid in guids])
+
+
+def test_get_history_snapshots(benchmark: BenchmarkFixture, database: tuple[SsdbStorage, list[str]]) -> None:
+    ssdb_storage, guid_list = database
+    guids = sample(guid_list)
+    benchmark.extra_info['operations'] = len(guids)
+    benchmark(lambda: [ssdb_storage.get_history_snapshots(guid) for guid in guids])
+
+
+def test_save(benchmark: BenchmarkFixture, fresh_database: Callable[[], tuple[SsdbStorage, list[str]]]) -> None:
+    """Save (and flush) a new snapshot for each guid of the sample."""
+
+    def save(ssdb_storage: SsdbStorage, guid_list: list[str]) -> None:
+        data = ssdb_storage.load(guid_list[0]).data
+        for guid in sample(guid_list):
+            ssdb_storage.save(guid=guid, snapshot=Snapshot(data, BASE_TIMESTAMP - 1, 0, '', 'text/plain', {}))
+        if hasattr(ssdb_storage, 'flush'):
+            ssdb_storage.flush()
+
+    run_modifying(benchmark, fresh_database, save)
+
+
+def test_close(benchmark: BenchmarkFixture, fresh_database: Callable[[], tuple[SsdbStorage, list[str]]]) -> None:
+    """Close a database with a new snapshot for each guid of the sample queued for writing."""
+
+    def setup() -> tuple[tuple[SsdbStorage], dict]:
+        ssdb_storage, guid_list = fresh_database()
+        data = ssdb_storage.load(guid_list[0]).data
+        for guid in sample(guid_list):
+            ssdb_storage.save(guid=guid, snapshot=Snapshot(data, BASE_TIMESTAMP - 1, 0, '', 'text/plain', {}))
+        return (ssdb_storage,), {}
+
+    benchmark.pedantic(lambda ssdb_storage: ssdb_storage.close(), setup=setup, rounds=ROUNDS, iterations=1)
+
+
+def test_keep_latest(
+    benchmark: BenchmarkFixture, engine: str, fresh_database: Callable[[], tuple[SsdbStorage, list[str]]]
+) -> None:
+    requires(engine, 'keep_latest')
+    run_modifying(benchmark, fresh_database, lambda ssdb_storage, _: ssdb_storage.keep_latest(1))
+
+
+def test_clean_all(
+    benchmark: BenchmarkFixture, engine: str, fresh_database: Callable[[], tuple[SsdbStorage, list[str]]]
+) -> None:
+    """Keep only the latest snapshot of each guid, with clean_all() or else clean() of each guid."""
+
+    def clean_all(ssdb_storage: SsdbStorage, guid_list: list[str]) -> None:
+        if hasattr(ssdb_storage, 'clean_all'):
+            ssdb_storage.clean_all(1)
+        else:
+            for guid in guid_list:
+                ssdb_storage.clean(guid, 1)
+
+    run_modifying(benchmark, fresh_database, clean_all)
+
+
+def test_rollback(
+    benchmark: BenchmarkFixture,
+    engine: str,
+    scale: tuple[int, int, int],
+    fresh_database: Callable[[], tuple[SsdbStorage, list[str]]],
+) -> None:
+    """Roll back the most recent half of the versions."""
+    if engine == 'redis':
+        pytest.skip('Rolling back is not supported by the redis database engine')
+    timestamp = BASE_TIMESTAMP + (scale[1] - 1) // 2 * 86_400
+    run_modifying(benchmark, fresh_database, lambda ssdb_storage, _: ssdb_storage.rollback(timestamp))
+
+
+def test_gc(benchmark: BenchmarkFixture, fresh_database: Callable[[], tuple[SsdbStorage, list[str]]]) -> None:
+    """Garbage collect the database with half of the guids no longer tracked, keeping one snapshot of the others."""
+
+    def gc(ssdb_storage: SsdbStorage, guid_list: list[str]) -> None:
+        with contextlib.redirect_stdout(io.StringIO()):
+            ssdb_storage.gc(guid_list[::2], 1)
+
+    run_modifying(benchmark, fresh_database, gc)
@@ -633,6 +633,26 @@ def test_first_run_creates_default_config_and_jobs_files(tmp_path: Path, capsys:
     assert jobs_file.is_file()
 
 
+def test_at_requires_dump_history(tmp_path: Path, capsys: pytest.CaptureFixture[str]) -> None:
+    """``--at`` without ``--dump-history`` is an error rather than being ignored."""
+    kwargs = {
+        'config_path': tmp_path,
+        'config_file': tmp_path / 'config.yaml',
+        'jobs_def_file': tmp_path / 'jobs.yaml',
+        'hooks_def_file': tmp_path / 'hooks.py',
+        'ssdb_file': ':memory:',
+    }
+    with pytest.raises(SystemExit) as excinfo:
+        CommandConfig(args=['--at', '2024-06-11'], **kwargs)  # ty:ignore[invalid-argument-type]
+    assert excinfo.value.code == 2
+    assert '--at can only be used with --dump-history' in capsys.readouterr().err
+    cmd = CommandConfig(
+        args=['--dump-history', '1', '--at', '2024-06-11'],
+        **kwargs,  # ty:ignore[invalid-argument-type]
+    )
+    assert cmd.dump_history_at == '2024-06-11'
+
+
 def test_load_hooks_missing_file_warns_when_inputted(tmp_path: Path, recwarn: pytest.WarningsRecorder) -> None:
     """A missing hooks file emits a ``RuntimeWarning`` when not the default location."""
     missing = tmp_path / 'hooks_does_not_exist.py'
@@ -17,6 +17,7 @@ import pytest
 from tests.test_storage import DATABASE_ENGINES, prepare_storage_test
 from webchanges.command import UrlwatchCommand
 from webchanges.config import CommandConfig
+from webchanges.handler import Snapshot
 from webchanges.main import Urlwatch
 from webchanges.storage import SsdbSQLite3Storage, SsdbStorage, YamlConfigStorage, YamlJobsStorage
 from webchanges.util import import_module_from_source
@@ -43,6 +44,8 @@ def _silence_db_close(monkeypatch: pytest.MonkeyPatch) -> None:
     ``close()`` to release the file lock before unlinking — is not affected.
     """
     monkeypatch.setattr('webchanges.storage.SsdbSQLite3Storage.close', lambda _self: None)
+    monkeypatch.setattr('webchanges.storage.SsdbLMDBStorage.close', lambda _self: None)
+    monkeypatch.setattr('webchanges.storage.SsdbRedisStorage.close', lambda _self: None)
     monkeypatch.setattr('webchanges.storage_minidb.SsdbMiniDBStorage.close', lambda _self: None, raising=False)
 
 
@@ -305,7 +308,7 @@ def test_dump_history(time_jobs_urlwatcher: Urlwatch, capsys: pytest.CaptureFixt
     # run once
     urlwatcher.urlwatch_config.dump_history = None
     urlwatcher.run_jobs()
-    urlwatcher.ssdb_storage._copy_temp_to_permanent(delete=True)  # ty:ignore[unresolved-attribute]
+    urlwatcher.ssdb_storage.flush()  # ty:ignore[unresolved-attribute]
     urlwatcher.urlwatch_config.joblist = []
 
     urlwatcher.urlwatch_config.dump_history = '1'
@@ -325,6 +328,22 @@ def test_dump_history(time_jobs_urlwatcher: Urlwatch, capsys: pytest.CaptureFixt
         'Found 1 snapshot.\n'
     ) in message
 
+    # point in time
+    urlwatcher.urlwatch_config.dump_history_at = '0'
+    with pytest.raises(SystemExit) as pytest_wrapped_e:
+        urlwatch_command.handle_actions()
+    assert pytest_wrapped_e.value.code == 0
+    message = capsys.readouterr().out
+    assert message.startswith('Snapshot at ') and message.endswith('Found 0 snapshots.\n')
+
+    urlwatcher.urlwatch_config.dump_history_at = str(int(time.time()) + 60)
+    with pytest.raises(SystemExit) as pytest_wrapped_e:
+        urlwatch_command.handle_actions()
+    assert pytest_wrapped_e.value.code == 0
+    message = capsys.readouterr().out
+    assert message.startswith('Snapshot at ') and message.endswith('\n1\n\n' + '=' * 59 + ' \n\nFound 1 snapshot.\n')
+    urlwatcher.urlwatch_config.dump_history_at = None
+
 
 def test_test_differ_and_joblist(time_jobs_urlwatcher: Urlwatch, capsys: pytest.CaptureFixture[str]) -> None:
     urlwatcher = time_jobs_urlwatcher
@@ -344,7 +363,7 @@ def test_test_differ_and_joblist(time_jobs_urlwatcher: Urlwatch, capsys: pytest.
     urlwatcher.urlwatch_config.test_differ = None
     urlwatcher.urlwatch_config.joblist = ['1']
     urlwatcher.run_jobs()
-    urlwatcher.ssdb_storage._copy_temp_to_permanent(delete=True)  # ty:ignore[unresolved-attribute]
+    urlwatcher.ssdb_storage.flush()  # ty:ignore[unresolved-attribute]
     urlwatcher.urlwatch_config.joblist = []
 
     urlwatcher.urlwatch_config.test_differ = ['1', '1']
@@ -366,7 +385,7 @@ def test_test_differ_and_joblist(time_jobs_urlwatcher: Urlwatch, capsys: pytest.
     # run twice
     time.sleep(0.0001)
     urlwatcher.run_jobs()
-    urlwatcher.ssdb_storage._copy_temp_to_permanent(delete=True)  # ty:ignore[unresolved-attribute]
+    urlwatcher.ssdb_storage.flush()  # ty:ignore[unresolved-attribute]
     assert len(urlwatcher.ssdb_storage.get_history_data(urlwatcher.jobs[0].guid)) == 2
 
     # diff (unified) with diff_filter, tz, contextlines
@@ -530,8 +549,8 @@ def test_modify_urls_move_location(
     # run jobs to save
     command_config2.change_location = None
     urlwatcher2.run_jobs()
-    if hasattr(ssdb_storage2, '_copy_temp_to_permanent'):
-        ssdb_storage2._copy_temp_to_permanent(delete=True)  # ty:ignore[call-non-callable]
+    if hasattr(ssdb_storage2, 'flush'):
+        ssdb_storage2.flush()  # ty:ignore[call-non-callable]
 
     # change saved job's database location
     command_config2.change_location = old_loc, new_loc
@@ -594,14 +613,14 @@ def test_delete_snapshot(
     # run once
     urlwatcher.urlwatch_config.delete_snapshot = None
     urlwatcher.run_jobs()
-    urlwatcher.ssdb_storage._copy_temp_to_permanent(delete=True)  # ty:ignore[unresolved-attribute]
+    urlwatcher.ssdb_storage.flush()  # ty:ignore[unresolved-attribute]
     guid = urlwatcher.jobs[0].guid
     assert len(urlwatcher.ssdb_storage.get_history_data(guid)) == 1
 
     # run twice
     time.sleep(0.0001)
     urlwatcher.run_jobs()
-    urlwatcher.ssdb_storage._copy_temp_to_permanent(delete=True)  # ty:ignore[unresolved-attribute]
+    urlwatcher.ssdb_storage.flush()  # ty:ignore[unresolved-attribute]
     assert len(urlwatcher.ssdb_storage.get_history_data(guid)) == 2
 
     # delete once
@@ -642,7 +661,7 @@ def test_gc_database(
 
     # run once to save the job from 'jobs-time.yaml'
     urlwatcher.run_jobs()
-    urlwatcher.ssdb_storage._copy_temp_to_permanent(delete=True)  # ty:ignore[unresolved-attribute]
+    urlwatcher.ssdb_storage.flush()  # ty:ignore[unresolved-attribute]
     assert len(urlwatcher.ssdb_storage.get_history_data(guid)) == 1
 
     # build a second urlwatcher pointing at echo_test.yaml but sharing the same ssdb
@@ -695,8 +714,8 @@ def test_clean_database(
     for _ in range(3):
         time.sleep(0.0001)
         urlwatch_command2.urlwatcher.run_jobs()
-    if hasattr(ssdb_storage2, '_copy_temp_to_permanent'):
-        ssdb_storage2._copy_temp_to_permanent(delete=True)  # ty:ignore[call-non-callable]
+    if hasattr(ssdb_storage2, 'flush'):
+        ssdb_storage2.flush()  # ty:ignore[call-non-callable]
 
     urlwatch_command2.urlwatch_config.clean_database = 2
     urlwatcher2.ssdb_storage.clean_ssdb(
@@ -714,6 +733,19 @@ def test_clean_database(
     assert len(ssdb_storage2.get_history_snapshots(guid)) == 1
 
 
+def test_vacuum_database(
+    command_config: CommandConfig,
+    urlwatch_command: UrlwatchCommand,
+    capsys: pytest.CaptureFixture[str],
+) -> None:
+    """``--vacuum full`` on its own rebuilds the database and exits."""
+    command_config.vacuum = 'full'
+    with pytest.raises(SystemExit) as pytest_wrapped_se:
+        urlwatch_command.handle_actions()
+    assert pytest_wrapped_se.value.code == 0
+    assert capsys.readouterr().out == ''
+
+
 def test_rollback_database(
     command_config: CommandConfig,
     urlwatch_command: UrlwatchCommand,
@@ -740,6 +772,63 @@ def test_rollback_database(
     assert pytest_wrapped_ve.value.args[0] == 'Cannot parse "Thisisjunk" into a date/time.'
 
 
+def test_rollback_run(time_jobs_urlwatcher: Urlwatch, capsys: pytest.CaptureFixture[str]) -> None:
+    urlwatcher = time_jobs_urlwatcher
+    urlwatch_command = UrlwatchCommand(urlwatcher)
+    ssdb_storage = urlwatcher.ssdb_storage
+    guid = urlwatcher.jobs[0].guid
+    ssdb_storage.save(guid=guid, snapshot=Snapshot('old', 1000, 0, '', '', {}), temporary=False)
+    ssdb_storage.save(guid=guid, snapshot=Snapshot('new', 2000, 0, '', '', {}))
+    ssdb_storage.flush()  # ty:ignore[unresolved-attribute]
+    run_id = ssdb_storage.run_id  # ty:ignore[unresolved-attribute]
+
+    urlwatcher.urlwatch_config.rollback_run = run_id
+    with pytest.raises(SystemExit) as pytest_wrapped_se:
+        urlwatch_command.handle_actions()
+    assert pytest_wrapped_se.value.code == 0
+    assert capsys.readouterr().out == f'Deleted 1 snapshots saved by run {run_id}.\n'
+    assert ssdb_storage.load(guid).data == 'old'
+
+    with pytest.raises(SystemExit) as pytest_wrapped_se:
+        urlwatch_command.handle_actions()
+    assert pytest_wrapped_se.value.code == 0
+    assert capsys.readouterr().out == f'No snapshots found saved by run {run_id}.\n'
+
+
+def test_export_and_import_database(
+    time_jobs_urlwatcher: Urlwatch,
+    tmp_path: Path,
+    capsys: pytest.CaptureFixture[str],
+) -> None:
+    urlwatcher = time_jobs_urlwatcher
+    urlwatch_command = UrlwatchCommand(urlwatcher)
+    guid = urlwatcher.jobs[0].guid
+    for timestamp in (1000, 2000):
+        urlwatcher.ssdb_storage.save(guid=guid, snapshot=Snapshot(str(timestamp), timestamp, 0, '', '', {}))
+    export_file = tmp_path.joinpath('snapshots.zst')
+
+    urlwatcher.urlwatch_config.export_database = export_file
+    with pytest.raises(SystemExit) as pytest_wrapped_se:
+        urlwatch_command.handle_actions()
+    assert pytest_wrapped_se.value.code == 0
+    assert capsys.readouterr().out.startswith(f'Exported 2 snapshots to {export_file} in ')
+
+    urlwatcher.ssdb_storage.flushdb()
+    urlwatcher.urlwatch_config.export_database = None
+    urlwatcher.urlwatch_config.import_database = export_file
+    with pytest.raises(SystemExit) as pytest_wrapped_se:
+        urlwatch_command.handle_actions()
+    assert pytest_wrapped_se.value.code == 0
+    assert capsys.readouterr().out.startswith(f'Imported 2 snapshots from {export_file} in ')
+    assert [snapshot.data for snapshot in urlwatcher.ssdb_storage.get_history_snapshots(guid)] == ['2000', '1000']
+
+    urlwatcher.urlwatch_config.import_database = tmp_path.joinpath('nonexistent.zst')
+    with pytest.raises(SystemExit) as pytest_wrapped_se:
+        urlwatch_command.handle_actions()
+    assert pytest_wrapped_se.value.code == 1
+    assert capsys.readouterr().out.startswith('File ')
+
+
 # --- Reporter / notification checks ---
 
 
@@ -3,19 +3,32 @@
 from __future__ import annotations
 
 import importlib.util
+import io
 import logging
 import os
+import pickle
+import re
+import subprocess
 import sys
+import time
 from pathlib import Path
+from types import SimpleNamespace
 from typing import Any
 
 import pytest
 import yaml
 
-from webchanges.filters import FilterBase, Html2TextFilter
+from webchanges.filters import (
+    AutoMatchFilter,
+    CompiledFilterChain,
+    Coprocess,
+    FilterBase,
+    Html2TextFilter,
+    RegexMatchFilter,
+)
 from webchanges.handler import JobState
 from webchanges.jobs import JobBase, UrlJob
-from webchanges.storage import SsdbDirStorage
+from webchanges.storage import FilterCache, SsdbDirStorage
 from webchanges.util import mark_to_html
 
 logger = logging.getLogger(__name__)
@@ -195,6 +208,385 @@ def test_filter_requires_bytes() -> None:
     filtercls = FilterBase.__subclasses__.get('pdf2text')
     # noinspection PyTypeChecker
     assert filtercls(job_state).is_bytes_filter_kind('pdf2text') is True  # ty:ignore[call-non-callable]
+    assert FilterBase.is_bytes_filter_kind('html2text') is False
+    assert FilterBase.is_bytes_filter_kind('afilternamethatdoesnotexist') is False
+    assert FilterBase.filter_chain_needs_bytes(['pdf2text', 'strip']) is True
+    assert FilterBase.filter_chain_needs_bytes(['strip', 'pdf2text']) is False
+    assert FilterBase.filter_chain_needs_bytes(None) is False
+
+
+def test_element_by_unclosed_script_or_comment() -> None:
+    """An unclosed script or comment is not scanned again to the end from each later start tag."""
+    filtercls = FilterBase.__subclasses__.get('element-by-class')
+    for data in (
+        '<div class="c">a<br/>b</div><script>' + '<script>x' * 20_000,
+        '<div class="c">a<br/>b</div><!--' + '<!--x' * 20_000,
+    ):
+        start = time.perf_counter()
+        assert filtercls(job_state).filter(data, 'text/html', {'class': 'c'}) == (  # ty:ignore[call-non-callable]
+            '<div class="c">a<br></br>b</div>',
+            'text/html',
+        )
+        assert time.perf_counter() - start < 5
+
+
+def test_compiled_filter_chain() -> None:
+    filter_spec = [
+        {'css': {'selector': 'li', 'exclude': '.ad'}},
+        {'xpath': '//li/text()'},
+        {'keep_lines_containing': {'re': '[0-9]'}},
+        {'re.sub': {'pattern': '([a-z]+) ([0-9]+)', 'repl': r'\2 \1'}},
+    ]
+    data = '<ul><li>one 1</li><li class="ad">buy 2</li><li>three</li><li>four 4</li></ul>'
+    chain = CompiledFilterChain.get(filter_spec, 0)
+    assert CompiledFilterChain.get(list(filter_spec)) is chain
+    assert not chain.needs_bytes
+    assert [filter_kind for filter_kind, *_ in chain.steps] == ['css', 'xpath', 'keep_lines_containing', 're.sub']
+
+    for _ in range(2):
+        assert chain.process(job_state, data, 'text/html') == ('1 one\n4 four', 'text/html')
+    precompiled = [step[3] for step in chain.steps]
+    assert sorted(precompiled[0]) == ['css .ad', 'css li']
+    assert list(precompiled[1]) == ['xpath //li/text()']
+    assert precompiled[2]['re'].pattern == '[0-9]'
+    assert precompiled[3]['pattern'].pattern == '([a-z]+) ([0-9]+)'
+
+    with pytest.raises(ValueError, match='Job 7: Unknown filter kind: afilternamethatdoesnotexist'):
+        CompiledFilterChain.get(['afilternamethatdoesnotexist'], 7)
+
+
+def test_compiled_filter_chain_hands_over_parsed_document() -> None:
+    filter_spec = [
+        {'css': 'div'},
+        {'xpath': {'path': '//ul', 'exclude': '//li[@class="ad"] | //b'}},
+        {'css': 'ul'},
+        {'xpath': {'path': '//li', 'method': 'xml', 'maxitems': 2}},
+        'strip',
+    ]
+    data = '<div><ul><li>one <b>1</b></li><li class="ad">buy <b>2</b></li><li>three</li><li>four</li></ul></div>'
+    chain = CompiledFilterChain(filter_spec, 0)
+    assert chain.hand_over == [True, True, False, False, False]
+    expected = ('<li>one \n</li>\n<li>three</li>', 'text/html')
+    assert chain.process(job_state, data, 'text/html') == expected
+    chain.hand_over = [False] * len(filter_spec)
+    assert chain.process(job_state, data, 'text/html') == expected
+
+    # elements within excluded ones are dropped
+    chain = CompiledFilterChain([{'xpath': {'path': '//li | //b', 'exclude': '//li[@class="ad"]'}}], 0)
+    assert chain.process(job_state, data, 'text/html') == (
+        '<li>one <b>1</b>\n</li>\n<b>1</b>\n<li>three</li>\n<li>four</li>',
+        'text/html',
+    )
+
+    # the element-by-* filters take the document too, with the same result as parsing the serialized one
+    filter_spec = [{'css': 'ul'}, {'element-by-class': 'ad'}, {'element-by-tag': 'b'}]
+    chain = CompiledFilterChain(filter_spec, 0)
+    assert chain.hand_over == [True, True, False]
+    expected = ('<b>2</b>', 'text/html')
+    assert chain.process(job_state, data, 'text/html') == expected
+    chain.hand_over = [False] * len(filter_spec)
+    assert chain.process(job_state, data, 'text/html') == expected
+
+    # elements whose serialization adds whitespace (which the next filter may select) are serialized and parsed
+    filter_spec = [{'css': 'li'}, {'xpath': '//li/text()'}]
+    data = '<ul><li>1</li><li class="x">2<ul><li class="x">3</li></ul></li></ul>'
+    chain = CompiledFilterChain(filter_spec, 0)
+    assert chain.hand_over == [True, False]
+    expected = ('1\n2\n3\n\n\n3', 'text/html')
+    assert chain.process(job_state, data, 'text/html') == expected
+    chain.hand_over = [False] * len(filter_spec)
+    assert chain.process(job_state, data, 'text/html') == expected
+
+
+def test_fused_line_filters() -> None:
+    filter_spec = [
+        {'keep_lines_containing': {'re': r'\w|^$'}},
+        {'delete_lines_containing': 'skip'},
+        {'strip': {'splitlines': True, 'side': 'left'}},
+        'remove-duplicate-lines',
+        {'strip': {'chars': '\n-'}},
+        {'re.sub': {'pattern': '\n+', 'repl': '|'}},
+    ]
+    chain = CompiledFilterChain(filter_spec, 0)
+    assert chain.fused == [True, True, True, True, True, False]
+    for data in (
+        '',
+        'a\n',
+        '- a \n  b\r\nskip\n\n  a\r\n\n',
+        'a\rskip\n\nb\x0b\x0cc\u2028 a\n\r\n',
+        '\n\nb\n  b\n \n',
+    ):
+        chain.fused = [True, True, True, True, True, False]
+        result = chain.process(job_state, data, 'text/plain')
+        chain.fused = [False] * len(filter_spec)
+        assert chain.process(job_state, data, 'text/plain') == result
+
+
+def test_cached_filters(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    filter_spec = [{'html2text': {'pad_tables': True}}, 'strip', 'html2text']
+    chain = CompiledFilterChain(filter_spec, 0)
+    assert [cache_key is not None for cache_key in chain.cache_keys] == [True, False, True]
+    job = JobBase.unserialize({'url': 'https://example.com/cached', 'cache_filters': True})
+    job.guid = job.get_guid()
+    filter_cache = FilterCache(tmp_path.joinpath('filter_cache.db'), 1024)
+    cached_state = JobState(None, job, filter_cache)  # ty:ignore[invalid-argument-type]
+    data = '<p>a <b>b</b></p><table><tr><td>c</td><td>d</td></tr></table>'
+    expected = chain.process(cached_state, data, 'text/html')
+    assert job.markdown_padded_tables is True
+
+    # unchanged input: the output is taken from the cache, and the changes to the job are applied again
+    def fail(*args: Any) -> None:
+        raise AssertionError('filter applied')
+
+    monkeypatch.setattr(Html2TextFilter, 'filter', fail)
+    job.markdown_padded_tables = None
+    assert chain.process(cached_state, data, 'text/html') == expected
+    assert job.markdown_padded_tables is True
+    with pytest.raises(AssertionError, match='filter applied'):
+        chain.process(cached_state, data + ' ', 'text/html')
+    monkeypatch.undo()
+
+    # the least recently used entries are evicted when closed
+    filter_cache.save('other', 'step', 'input', 'x' * 1024, 'text/plain', {})
+    filter_cache.close()
+    filter_cache = FilterCache(tmp_path.joinpath('filter_cache.db'), 1024)
+    assert filter_cache.load('other', 'step', 'input') == ('x' * 1024, 'text/plain', {})
+    assert filter_cache.load(job.guid, chain.cache_keys[0], filter_cache.digest(data, 'text/html')) is None
+    filter_cache.close()
+
+    # entries saved by the processes applying filters, which share one FilterCache per database, are evicted too
+    unpickled = pickle.loads(pickle.dumps(filter_cache))
+    assert unpickled is not filter_cache
+    assert pickle.loads(pickle.dumps(filter_cache)) is unpickled
+    unpickled.save('another', 'step', 'input', 'y' * 1024, 'text/plain', {})
+    filter_cache.close()
+    filter_cache = FilterCache(tmp_path.joinpath('filter_cache.db'), 1024)
+    assert filter_cache.load('other', 'step', 'input') is None
+    filter_cache.close()
+    unpickled.close()
+    FilterCache(tmp_path.joinpath('unused.db'), 1024).close()
+    assert not tmp_path.joinpath('unused.db').exists()
+
+
+COPROCESS = """
+import json, os, sys, time
+
+def read_frame():
+    length = sys.stdin.buffer.readline()
+    return sys.stdin.buffer.read(int(length)) if length else None
+
+def write_frame(content):
+    sys.stdout.buffer.write(b'%d\\n' % len(content) + content)
+
+while (header := read_frame()) is not None:
+    job, data = json.loads(header), read_frame().decode()
+    if data == 'crash':
+        sys.exit(3)
+    if data == 'sleep':
+        time.sleep(10)
+    write_frame(json.dumps({'error': 'bad data'} if data == 'error' else {}).encode())
+    write_frame(f'{os.getpid()} {job["location"]} {data}'.encode())
+    sys.stdout.flush()
+"""
+
+
+def test_execute_persistent(tmp_path: Path) -> None:
+    script = tmp_path.joinpath('coprocess.py')
+    script.write_text(COPROCESS)
+    job_state.job = UrlJob(url='https://example.com/persistent')
+    filtercls = FilterBase.__subclasses__.get('execute')
+    subfilter = {'command': f'{Path(sys.executable).as_posix()} {script.as_posix()}', 'persistent': True, 'timeout': 5}
+
+    def run(data: str) -> str:
+        return filtercls(job_state).filter(data, 'text/plain', subfilter)[0]  # ty:ignore[call-non-callable]
+
+    try:
+        pid, location, data = run('one').split()
+        assert (location, data) == ('https://example.com/persistent', 'one')
+        assert run('two') == f'{pid} https://example.com/persistent two'  # the same process
+        with pytest.raises(RuntimeError, match='bad data'):
+            run('error')
+        with pytest.raises(subprocess.CalledProcessError) as e:
+            run('crash')
+        assert e.value.returncode == 3
+        new_pid = run('three').split()[0]  # restarted
+        assert new_pid != pid
+        with pytest.raises(subprocess.TimeoutExpired):
+            filtercls(job_state).filter('sleep', 'text/plain', {**subfilter, 'timeout': 0.5})  # ty:ignore[call-non-callable]
+        assert run('four').split()[0] not in {pid, new_pid}
+    finally:
+        Coprocess.close_all()
+
+
+def test_execute_persistent_streaming(tmp_path: Path) -> None:
+    """A coprocess responding while reading a request larger than the pipe buffers does not block."""
+    script = tmp_path.joinpath('coprocess.py')
+    script.write_text(
+        'import sys\n'
+        'while length := sys.stdin.buffer.readline():\n'
+        '    sys.stdin.buffer.read(int(length))\n'
+        '    remaining = int(sys.stdin.buffer.readline())\n'
+        "    sys.stdout.buffer.write(b'2\\n{}%d\\n' % remaining)\n"
+        '    while remaining:\n'
+        '        chunk = sys.stdin.buffer.read(min(remaining, 4096))\n'
+        '        sys.stdout.buffer.write(chunk.upper())\n'
+        '        remaining -= len(chunk)\n'
+        '    sys.stdout.flush()\n'
+    )
+    job_state.job = UrlJob(url='https://example.com/persistent')
+    filtercls = FilterBase.__subclasses__.get('execute')
+    subfilter = {'command': f'{Path(sys.executable).as_posix()} {script.as_posix()}', 'persistent': True, 'timeout': 10}
+    try:
+        data = 'abc\n' * 1_000_000
+        assert filtercls(job_state).filter(data, 'text/plain', subfilter)[0] == data.upper()  # ty:ignore[call-non-callable]
+    finally:
+        Coprocess.close_all()
+
+
+def test_pypdf_pages(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    pypdf = pytest.importorskip('pypdf')
+    data_path = Path(__file__).parent.joinpath('data')
+    writer = pypdf.PdfWriter()
+    for filename in ('pdf-test.pdf', 'pdf-test-multiple-spaces.pdf', 'pdf-test.pdf'):
+        writer.append(data_path.joinpath(filename))
+    pdf = tmp_path.joinpath('pages.pdf')
+    writer.write(pdf)
+    data = pdf.read_bytes()
+    expected = '\n'.join(page.extract_text() for page in pypdf.PdfReader(pdf).pages[1:])
+
+    job = JobBase.unserialize({'url': 'https://example.com/pages', 'cache_filters': True})
+    job.guid = job.get_guid()
+    filter_cache = FilterCache(tmp_path.joinpath('filter_cache.db'), 1024 * 1024)
+    job_state = JobState(None, job, filter_cache)  # ty:ignore[invalid-argument-type]
+    chain = CompiledFilterChain([{'pypdf': {'pages': '2-', 'processes': 2}}])
+    chain.cache_keys = [None]  # only the cache of pages
+    assert chain.process(job_state, data, '') == (expected, 'text/plain')
+
+    # only the pages not in the cache (none) are extracted
+    extracted = []
+    monkeypatch.setattr(
+        'webchanges.filters._document._pypdf_texts',
+        lambda data, password, indexes, **options: extracted.extend(indexes) or [],
+    )
+    assert chain.process(job_state, data, '')[0] == expected
+    assert extracted == []
+    filter_cache.close()
+
+    with pytest.raises(ValueError, match='Invalid page range'):
+        CompiledFilterChain([{'pypdf': {'pages': '3-2'}}]).process(job_state, data, '')
+
+
+def test_pdf2text_pages_without_pypdf(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    """Without pypdf, pdf2text extracts all the pages instead of caching their text."""
+
+    class PDF(list):
+        def __init__(self, stream: io.BytesIO, password: str, **options: Any) -> None:
+            super().__init__(stream.read().decode().split('|'))
+
+    monkeypatch.setattr('webchanges.filters._document.pdftotext', SimpleNamespace(PDF=PDF))
+    monkeypatch.setattr('webchanges.filters._document.PdfReader', "No module named 'pypdf'")
+    job = JobBase.unserialize({'url': 'https://example.com/pages', 'cache_filters': True})
+    job.guid = job.get_guid()
+    filter_cache = FilterCache(tmp_path.joinpath('filter_cache.db'), 1024 * 1024)
+    job_state = JobState(None, job, filter_cache)  # ty:ignore[invalid-argument-type]
+    chain = CompiledFilterChain([{'pdf2text': {'pages': '2-'}}])
+    chain.cache_keys = [None]
+    assert chain.process(job_state, b'one|two|three', '') == ('two\nthree', 'text/plain')
+    filter_cache.close()
+
+
+def test_ocr_image_tiles() -> None:
+    image_module = pytest.importorskip('PIL.Image')
+    from webchanges.filters._document import _image_digest, _image_tiles
+
+    image = image_module.new('L', (50, 1000), 255)
+    for y in range(0, 1000, 20):  # "lines of text" 15 pixels high separated by 5 blank rows
+        image.paste(0, (5, y, 45, y + 15))
+    tiles = _image_tiles(image, 300)
+    assert sum(tile.height for tile in tiles) == 1000
+    assert len(tiles) == 4
+    for tile in tiles[:-1]:  # cut at a blank row
+        assert tile.crop((0, tile.height - 1, 50, tile.height)).getextrema() == (255, 255)
+    assert _image_tiles(image, 1000) == [image]
+    assert _image_digest(tiles[0]) != _image_digest(tiles[1])
+    assert _image_digest(image) == _image_digest(image.copy())
+
+
+def test_ocr_cache(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    pytesseract = pytest.importorskip('pytesseract')
+    image_module = pytest.importorskip('PIL.Image')
+    image = image_module.new('RGB', (40, 90), 'white')
+    image.paste((0, 0, 0), (5, 35, 35, 55))
+    png, gif = io.BytesIO(), io.BytesIO()
+    image.save(png, 'PNG')
+    image.save(gif, 'GIF')
+    recognized = []
+
+    def image_to_string(tile: Any, **kwargs: Any) -> str:
+        recognized.append(tile.size)
+        return f'{tile.size}\n'
+
+    monkeypatch.setattr(pytesseract, 'image_to_string', image_to_string)
+    job = JobBase.unserialize({'url': 'https://example.com/ocr', 'cache_filters': True})
+    job.guid = job.get_guid()
+    filter_cache = FilterCache(tmp_path.joinpath('filter_cache.db'), 1024)
+    job_state = JobState(None, job, filter_cache)  # ty:ignore[invalid-argument-type]
+    subfilter = {'max_pixels': 900, 'tile_height': 15, 'processes': 2}
+    text, _ = FilterBase.process('ocr', subfilter, job_state, png.getvalue(), 'image/png')
+    assert text == '\n'.join(str(size) for size in recognized)
+    # downscaled by half, then split in bands
+    assert {width for width, _ in recognized} == {20}
+    assert sum(height for _, height in recognized) == 45
+    assert len(recognized) > 1
+
+    # the same pixels encoded differently are not recognized again
+    recognized.clear()
+    assert FilterBase.process('ocr', subfilter, job_state, gif.getvalue(), 'image/gif')[0] == text
+    assert recognized == []
+    filter_cache.close()
+
+
+def test_auto_match_filters() -> None:
+    class ExactMatch(AutoMatchFilter):
+        MATCH = {'url': 'https://auto.example.org/'}
+
+        def filter(self, data: str | bytes, mime_type: str, subfilter: dict[str, Any]) -> tuple[str | bytes, str]:
+            return f'{data}exact ', mime_type
+
+    class RegexMatch(RegexMatchFilter):
+        MATCH = {'url': re.compile('https://AUTO\\.', re.IGNORECASE), 'note': re.compile('regex')}
+
+        def filter(self, data: str | bytes, mime_type: str, subfilter: dict[str, Any]) -> tuple[str | bytes, str]:
+            return f'{data}regex ', mime_type
+
+    class BackReferenceMatch(RegexMatchFilter):  # cannot be combined with the other patterns
+        MATCH = {'url': re.compile(r'https://(a)\1uto\.')}
+
+        def filter(self, data: str | bytes, mime_type: str, subfilter: dict[str, Any]) -> tuple[str | bytes, str]:
+            return f'{data}backref ', mime_type
+
+    class MethodMatch(FilterBase):
+        def match(self) -> bool:
+            return self.job.url.endswith('/method')
+
+        def filter(self, data: str | bytes, mime_type: str, subfilter: dict[str, Any]) -> tuple[str | bytes, str]:
+            return f'{data}method ', mime_type
+
+    auto_filters = (ExactMatch, RegexMatch, BackReferenceMatch, MethodMatch)
+    try:
+        assert FilterBase.__subclass_index__.unindexed[-1:] == [MethodMatch]
+        for url, note, expected in (
+            ('https://auto.example.org/', None, 'exact regex '),
+            ('https://auto.example.org/', 'no match', 'exact '),
+            ('https://aauto.example.org/method', 'regex', 'backref method '),
+            ('https://example.org/', 'regex', ''),
+        ):
+            job = UrlJob(url=url, note=note)
+            with JobState(None, job) as state:  # ty:ignore[invalid-argument-type]
+                assert FilterBase.auto_process(state, '', 'text/plain') == (expected, 'text/plain')
+    finally:
+        for filtercls in auto_filters:
+            FilterBase.__subclass_index__.remove(filtercls)
 
 
 def test_deprecated_filters() -> None:
@@ -412,3 +804,52 @@ def test_html2text_roundtrip() -> None:
     ]
     html2 = '<br>'.join(html2_lines)
     assert html2 == html
+
+
+HTML2TEXT_CONFORMANCE_TESTDATA = [
+    '<html><body>This is some <a href="local_link">text</a></body></html>',
+    '<h1>Title</h1><p>Para <b>bold</b> and <i>it</i>alic, <strong>s</strong>x</p><p>Second</p>',
+    '<ul><li>one</li><li>two<ul><li>nested</li></ul></li></ul><ol start="3"><li>a</li><li>b<ul><li>c</li></ul></li></ol>',
+    '<ul>\n<li>unclosed\n<li>items\n</ul>\n<p>after',
+    '<table><tr><th>H1</th><th>H2</th></tr><tr><td>a</td><td>b</td></tr></table><p>after</p>',
+    '<table>\n<tr>\n<th>H1</th>\n<th>Header two</th>\n</tr>\n<tr>\n<td>a</td>\n<td>b</td>\n</tr>\n</table>',
+    '<table><tr><td>only one cell</td></tr></table>',
+    '<p>Link <a href="https://x.org/">https://x.org/</a> and <a href="#top">internal</a> <a href="mailto:a@b">mail</a>',
+    '<p><a href="/a?x=1&amp;y=2" title="T">a <b>b</b></a> <a href="/i"><img src="x.png"></a>text</p>',
+    '<h2><a href="/h">Heading link</a></h2><a href="/x"><h3>in link</h3></a>',
+    '<blockquote><p>quoted</p><p>two<br>lines</p></blockquote>',
+    '<pre>\ncode\n  indented &lt;tag&gt;\n</pre><p>1. not a list</p><p>- dash + plus \\ back</p>',
+    '<ul><li><p>para in li</p><pre>pre\nin li</pre></li></ul>',
+    '<dl><dt>term</dt><dd>def</dd></dl><hr><p><code>x*y</code> <kbd>k</kbd> <q>quote</q> <del>gone</del></p>',
+    '<head><title>T</title><style>p{}</style><script>var a=1;</script></head><body><p>x &amp; y &lt;z&gt;</p></body>',
+    'text before <html><head><title>T</title></head><body><p>Hi</p><title>U</title></body></html>',
+    '<p>x</p><head><title>T</title><meta name="a"></head><p>Hi</p><title>U</title>',
+    '<p>&nbsp;nbsp&nbsp;entity and\xa0literal&#160;ones, <b>25% &ndash;2X</b> &lt;A&gt; + B</p>',
+    '<abbr title="HyperText">HT</abbr> text <em> spaced </em>x foo<em>bar</em>baz',
+    '<p>x&nbsp;<em>y</em>&nbsp;z x&nbsp;<strong>y</strong>&nbsp;z x&nbsp;<del>y</del>&nbsp;z</p>',
+    '<p>a&nbsp;<b>b</b>c&nbsp;<i>d</i>&#160;<em>e</em>&nbsp;</p><p>&nbsp;<em>f</em> <code>g</code>&nbsp;<em>h</em></p>',
+    '<div>one</div><div>two <span>three</span></div>\n\n<p>\n  spaced   out\n  text\n</p><!-- comment -->tail',
+]
+
+
+@pytest.mark.parametrize('pad_tables', [False, True], ids=['', 'pad_tables'])
+@pytest.mark.parametrize('html', HTML2TEXT_CONFORMANCE_TESTDATA)
+def test_html2text_lxml_conformance(html: str, pad_tables: bool) -> None:
+    """The lxml method gives the same Markdown as the html2text package."""
+    expected, _ = Html2TextFilter(job_state).filter(html, 'text/html', {'pad_tables': pad_tables})
+    data, mime_type = Html2TextFilter(job_state).filter(html, 'text/html', {'method': 'lxml', 'pad_tables': pad_tables})
+    assert data == expected
+    assert mime_type == 'text/markdown'
+
+
+def test_html2text_lxml_options() -> None:
+    html = '<p><a href="/a">a</a> <em>b</em></p><table><tr><td>c</td><td>d</td></tr></table>'
+    options = {'ignore_links': True, 'ignore_emphasis': True, 'ignore_tables': True, 'body_width': 0}
+    expected, _ = Html2TextFilter(job_state).filter(html, 'text/html', options)
+    data, _ = Html2TextFilter(job_state).filter(html, 'text/html', {'method': 'lxml', **options})
+    assert data == expected == 'a b\ncd'
+
+    with pytest.raises(ValueError) as e:
+        Html2TextFilter(job_state).filter(html, 'text/html', {'method': 'lxml', 'body_width': 78, 'mark_code': True})
+    expected = "Filter html2text's method 'lxml' does not support sub-directive(s) body_width, mark_code; use the "
+    assert e.value.args[0][: len(expected)] == expected
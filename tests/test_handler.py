@@ -3,19 +3,25 @@
 from __future__ import annotations
 
 import importlib.util
+import json
+import multiprocessing
 import os
 import tempfile
 import warnings
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 from typing import Callable, cast
 
 import pytest
 
 from webchanges.config import CommandConfig
+from webchanges.handler import JobState
 from webchanges.jobs import JobBase, ShellJob, UrlJob
 from webchanges.main import Urlwatch
 from webchanges.storage import DEFAULT_CONFIG, SsdbSQLite3Storage, YamlConfigStorage, YamlJobsStorage
+from webchanges.tracing import Tracer
 from webchanges.util import import_module_from_source
+from webchanges.worker import load_hooks_files
 
 minidb_is_installed = importlib.util.find_spec('minidb') is not None
 
@@ -149,6 +155,116 @@ def test_load_hooks_py() -> None:
         warnings.warn(f'{hooks_file} not found', UserWarning, stacklevel=1)
 
 
+def test_filters_in_processes(tmp_path: Path) -> None:
+    """Filters applied in a pool of processes give the same result, including the changes to the job."""
+    html_file = tmp_path.joinpath('page.html')
+    html_file.write_text('<p>a <b>b</b></p><table><tr><td>c</td><td>d</td></tr></table>')
+    filters = [{'html2text': {'pad_tables': True}}, 'strip']
+    job = UrlJob(url=html_file.as_uri(), filters=filters, guid='filters_in_processes')
+    with JobState(ssdb_storage, job) as job_state:
+        job_state.process()
+    assert job_state.exception is None
+
+    spawn = multiprocessing.get_context('spawn')
+    with ProcessPoolExecutor(1, mp_context=spawn, initializer=load_hooks_files, initargs=([],)) as processes:
+        job = UrlJob(url=html_file.as_uri(), filters=filters, guid='filters_in_processes')
+        tracer = Tracer()
+        with JobState(ssdb_storage, job, None, processes, True, tracer) as process_job_state:
+            process_job_state.process()
+    assert process_job_state.exception is None
+    assert (process_job_state.new_data, process_job_state.new_mime_type) == (
+        job_state.new_data,
+        job_state.new_mime_type,
+    )
+    assert job.markdown_padded_tables is True
+
+    # the timings and spans of the filters are those recorded in the process
+    stages = {'filters.auto', 'filters.0.html2text', 'filters.1.strip'}
+    assert stages < set(process_job_state.timings)  # ty:ignore[invalid-argument-type]
+    spans = {span.name: span for span in tracer.spans}
+    assert all(spans[stage].parent is spans['filters'] for stage in stages)
+    assert spans['filters'].start_time <= spans['filters.auto'].start_time
+    assert spans['filters.1.strip'].end_time <= spans['filters'].end_time  # ty:ignore[unsupported-operator]
+
+
+def test_load_json_handoff() -> None:
+    """JSON deserialized by a filter is reused by the filters that follow it and by the deepdiff differ."""
+    data = '{"b": [1, 2], "a": {"c": "d"}}'
+    job = UrlJob(url='https://example.com/', filters=['format-json'], differ={'name': 'deepdiff'}, guid='load_json')
+    job_state = JobState(ssdb_storage, job)
+    parsed = job_state.load_json(data)
+    assert parsed == {'b': [1, 2], 'a': {'c': 'd'}}
+    assert job_state.load_json(data) is parsed
+
+    formatted, _ = job_state.apply_filters(data, 'application/json')
+    assert job_state.load_json(formatted) is parsed
+
+    job_state.old_data = '{"b": [1, 3], "a": {"c": "d"}}'
+    job_state.new_data = formatted
+    job_state.old_mime_type = job_state.new_mime_type = 'application/json'
+    job_state.new_timestamp = job_state.old_timestamp
+    assert 'Value of root[\'b\'][1] changed from "3" to "2".' in job_state.get_diff('plain')
+    assert len(job_state.parsed_json) == 3
+
+
+def test_job_state_timings(tmp_path: Path) -> None:
+    """With profiling, the time spent in each stage of a job is recorded; without, the hooks do nothing."""
+    page = tmp_path.joinpath('page.html')
+    page.write_text('<p>Hello</p>')
+    job = UrlJob(url=page.as_uri(), filters=['html2text', 'strip'], guid='timings')
+    job_state = JobState(ssdb_storage, job)
+    assert job_state.timings is None
+    assert job_state.timed('load') is JobState(ssdb_storage, job).timed('retrieve')
+
+    job_state = JobState(ssdb_storage, job, profile=True).process()
+    assert job_state.exception is None
+    assert set(job_state.timings) == {  # ty:ignore[invalid-argument-type]
+        'load',
+        'retrieve',
+        'filters',
+        'filters.auto',
+        'filters.0.html2text',
+        'filters.1.strip',
+    }
+    job_state.old_data = 'Bye'
+    job_state.get_diff('plain')
+    assert {'diff', 'diff.plain'} <= set(job_state.timings)  # ty:ignore[invalid-argument-type]
+    assert all(seconds >= 0 for seconds in job_state.timings.values())  # ty:ignore[possibly-missing-attribute]
+
+
+def test_run_watcher_profile(tmp_path: Path, capsys: pytest.CaptureFixture[str]) -> None:
+    """--profile prints the slowest jobs and stages and saves the timings as JSON."""
+    page = tmp_path.joinpath('page.html')
+    page.write_text('<p>Hello</p>')
+    jobs_file = tmp_path.joinpath('jobs.yaml')
+    jobs_file.write_text(f'url: {page.as_uri()}\nfilters:\n  - html2text\n')
+    profile_file = tmp_path.joinpath('profile.json')
+
+    config_storage = YamlConfigStorage(config_file)
+    config_storage.load()
+    jobs_storage = YamlJobsStorage([jobs_file])
+    ssdb_storage = SsdbSQLite3Storage(ssdb_file)  # ty:ignore[invalid-argument-type]
+    try:
+        urlwatch_config = CommandConfig(
+            ['--profile', str(profile_file)],
+            here,
+            config_file,
+            jobs_file,
+            hooks_file,
+            ssdb_file,  # ty:ignore[invalid-argument-type]
+        )
+        urlwatcher = Urlwatch(urlwatch_config, config_storage, ssdb_storage, jobs_storage)
+        urlwatcher.run_jobs()
+        urlwatcher.close()
+    finally:
+        ssdb_storage.close()
+
+    assert 'Slowest jobs (seconds):' in capsys.readouterr().out
+    profile = json.loads(profile_file.read_text())
+    assert [job['location'] for job in profile['jobs']] == [page.as_uri()]
+    assert 'filters.0.html2text' in profile['jobs'][0]['stages']
+
+
 def test_run_watcher_sqlite3() -> None:
     jobs_file = data_path.joinpath('jobs.yaml')
 
@@ -221,9 +337,9 @@ def test_number_of_tries_in_cache_is_increased_sqlite3() -> None:
         assert snapshot.tries == 0
 
         urlwatcher.run_jobs()
-        ssdb_storage._copy_temp_to_permanent(delete=True)
+        ssdb_storage.flush()
         urlwatcher.run_jobs()
-        ssdb_storage._copy_temp_to_permanent(delete=True)
+        ssdb_storage.flush()
 
         snapshot = ssdb_storage.load(guid)
 
@@ -241,9 +357,9 @@ def test_report_error_when_out_of_tries_sqlite3() -> None:
         assert snapshot.tries == 0
 
         urlwatcher.run_jobs()
-        ssdb_storage._copy_temp_to_permanent(delete=True)
+        ssdb_storage.flush()
         urlwatcher.run_jobs()
-        ssdb_storage._copy_temp_to_permanent(delete=True)
+        ssdb_storage.flush()
 
         report = urlwatcher.report
         assert report.job_states[-1].verb == 'error,repeated'
@@ -259,7 +375,7 @@ def test_reset_tries_to_zero_when_successful_sqlite3() -> None:
         assert snapshot.tries == 0
 
         urlwatcher.run_jobs()
-        ssdb_storage._copy_temp_to_permanent(delete=True)
+        ssdb_storage.flush()
 
         snapshot = ssdb_storage.load(guid)
         assert snapshot.tries == 1
@@ -270,7 +386,7 @@ def test_reset_tries_to_zero_when_successful_sqlite3() -> None:
         guid = job.guid
 
         urlwatcher.run_jobs()
-        ssdb_storage._copy_temp_to_permanent(delete=True)
+        ssdb_storage.flush()
 
         snapshot = ssdb_storage.load(guid)
         assert snapshot.tries == 0
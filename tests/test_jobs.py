@@ -3,11 +3,13 @@
 from __future__ import annotations
 
 import ftplib
+import hashlib
 import importlib.util
 import os
 import socket
 import subprocess
 import sys
+import time
 from pathlib import Path
 from typing import TYPE_CHECKING, Any, Callable, cast
 
@@ -17,12 +19,14 @@ from httpx import HTTPStatusError
 from requests import HTTPError
 
 from webchanges.config import CommandConfig
+from webchanges.filters import Coprocess
 from webchanges.handler import JobState, Snapshot
 from webchanges.jobs import (
     BrowserJob,
     BrowserResponseError,
     JobBase,
     NotModifiedError,
+    OutputTooLargeError,
     ShellJob,
     TransientHTTPError,
     UrlJob,
@@ -214,7 +218,7 @@ def test_check_429_transient_error(ssdb_storage: SsdbSQLite3Storage, mocker: pyt
         mocker.patch('httpx.Client.request', return_value=mock_response)
 
         job_state.save()
-        ssdb_storage._copy_temp_to_permanent(delete=True)
+        ssdb_storage.flush()
         job_state.load()
 
         job_state.process()
@@ -251,7 +255,7 @@ def test_check_429_transient_error_requests(
         mocker.patch('requests.sessions.Session.request', return_value=mock_response)
 
         job_state.save()
-        ssdb_storage._copy_temp_to_permanent(delete=True)
+        ssdb_storage.flush()
         job_state.load()
 
         job_state.process()
@@ -289,7 +293,7 @@ def test_check_429_transient_error_curl_cffi(
         mocker.patch('curl_cffi.requests.Session.request', return_value=mock_response)
 
         job_state.save()
-        ssdb_storage._copy_temp_to_permanent(delete=True)
+        ssdb_storage.flush()
         job_state.load()
 
         job_state.process()
@@ -513,7 +517,7 @@ def test_check_429_ignore_4xx(ssdb_storage: SsdbSQLite3Storage, mocker: pytest_m
         mocker.patch('httpx.Client.request', return_value=mock_response)
 
         job_state.save()
-        ssdb_storage._copy_temp_to_permanent(delete=True)
+        ssdb_storage.flush()
         job_state.load()
 
         job_state.process()
@@ -552,7 +556,7 @@ def test_check_429_ignore_4xx(ssdb_storage: SsdbSQLite3Storage, mocker: pytest_m
 #         )
 
 #         job_state.save()
-#         ssdb_storage._copy_temp_to_permanent(delete=True)
+#         ssdb_storage.flush()
 #         job_state.load()
 
 #         job_state.process()
@@ -567,7 +571,7 @@ def test_check_429_ignore_4xx(ssdb_storage: SsdbSQLite3Storage, mocker: pytest_m
 #         page.route(job.url, lambda route: route.abort('connectionclosed'))
 
 #         job_state.save()
-#         ssdb_storage._copy_temp_to_permanent(delete=True)
+#         ssdb_storage.flush()
 #         job_state.load()
 
 #         job_state.process()
@@ -968,6 +972,67 @@ def test_shell_job_without_kind() -> None:
     assert isinstance(job, ShellJob)
 
 
+@pytest.mark.skipif(sys.platform == 'win32', reason='POSIX shell commands')
+def test_shell_job_bounded(ssdb_storage: SsdbSQLite3Storage) -> None:
+    job = JobBase.unserialize({'command': 'echo out; echo err >&2'})
+    with JobState(ssdb_storage, job) as job_state:
+        assert job.retrieve(job_state) == ('out\n', '', 'text/plain')
+    assert job_state.command_cpu_time is not None
+    assert job_state.command_max_rss
+
+    # the process group, including the background command, is killed at the timeout
+    job = JobBase.unserialize({'command': 'sleep 10 & sleep 10', 'timeout': 0.5})
+    with JobState(ssdb_storage, job) as job_state:
+        with pytest.raises(subprocess.TimeoutExpired):
+            job.retrieve(job_state)
+
+    # a command closing its standard output and error early does not escape the timeout
+    job = JobBase.unserialize({'command': 'echo hi; exec 1>&- 2>&-; sleep 10', 'timeout': 0.5})
+    with JobState(ssdb_storage, job) as job_state:
+        start = time.perf_counter()
+        with pytest.raises(subprocess.TimeoutExpired):
+            job.retrieve(job_state)
+        assert time.perf_counter() - start < 5
+
+    job = JobBase.unserialize({'command': 'yes', 'max_output': 100_000})
+    with JobState(ssdb_storage, job) as job_state:
+        with pytest.raises(OutputTooLargeError):
+            job.retrieve(job_state)
+
+    job = JobBase.unserialize({'command': 'yes | head -c 1000000', 'output_digest': 'sha256', 'max_output': 1000})
+    with JobState(ssdb_storage, job) as job_state:
+        assert job.retrieve(job_state)[0] == hashlib.sha256(b'y\n' * 500_000).hexdigest()
+
+
+def test_shell_job_persistent(ssdb_storage: SsdbSQLite3Storage, tmp_path: Path) -> None:
+    script = tmp_path.joinpath('coprocess.py')
+    script.write_text(
+        'import json, sys\n'
+        'while length := sys.stdin.buffer.readline():\n'
+        '    header = json.loads(sys.stdin.buffer.read(int(length)))\n'
+        '    sys.stdin.buffer.read(int(sys.stdin.buffer.readline()))\n'
+        '    output = f\'job {header["index_number"]}\'.encode()\n'
+        "    sys.stdout.buffer.write(b'2\\n{}' + b'%d\\n' % len(output) + output)\n"
+        '    sys.stdout.flush()\n'
+    )
+    job = JobBase.unserialize(
+        {'command': f'"{Path(sys.executable).as_posix()}" "{script.as_posix()}"', 'persistent': True, 'index_number': 7}
+    )
+    try:
+        with JobState(ssdb_storage, job) as job_state:
+            assert job.retrieve(job_state) == ('job 7', '', 'text/plain')
+            assert job.retrieve(job_state) == ('job 7', '', 'text/plain')
+        job.output_digest = 'sha256'
+        with JobState(ssdb_storage, job) as job_state:
+            assert job.retrieve(job_state)[0] == hashlib.sha256(b'job 7').hexdigest()
+        job.max_output = 3
+        with JobState(ssdb_storage, job) as job_state:
+            with pytest.raises(OutputTooLargeError):
+                job.retrieve(job_state)
+    finally:
+        Coprocess.close_all()
+
+
 def test_with_defaults() -> None:
     job_data = {'url': 'https://www.example.com'}
     job = JobBase.unserialize(job_data)
@@ -1061,7 +1126,7 @@ def test_compared_versions(ssdb_storage: SsdbSQLite3Storage) -> None:
     results = set()
     for _ in range(20):
         urlwatcher.run_jobs()
-        ssdb_storage._copy_temp_to_permanent(delete=True)
+        ssdb_storage.flush()
         if urlwatcher.report.job_states[-1].new_data in results:
             assert urlwatcher.report.job_states[-1].verb == 'unchanged'
         else:
@@ -1075,7 +1140,7 @@ def test_compared_versions(ssdb_storage: SsdbSQLite3Storage) -> None:
     results = set()
     for _ in range(20):
         urlwatcher.run_jobs()
-        ssdb_storage._copy_temp_to_permanent(delete=True)
+        ssdb_storage.flush()
         if urlwatcher.report.job_states[-1].new_data in results:
             assert urlwatcher.report.job_states[-1].verb == 'unchanged'
         else:
@@ -1104,7 +1169,7 @@ def time_jobs_urlwatcher(
     """``Urlwatch`` built from ``jobs-time.yaml`` with the job command set to ``echo TEST``.
 
     Used by the job-state ``verb`` tests below; gives every test a fresh in-memory ssdb that
-    supports the ``_copy_temp_to_permanent`` lifecycle.
+    supports the ``flush`` lifecycle.
     """
     jobs_path = workspace / 'jobs-time.yaml'
     cmd = CommandConfig(
@@ -1126,7 +1191,7 @@ def test_job_states_verb(time_jobs_urlwatcher: Urlwatch) -> None:
     """First run produces ``new``; second run with no change produces ``unchanged``."""
     urlwatcher = time_jobs_urlwatcher
     urlwatcher.run_jobs()
-    urlwatcher.ssdb_storage._copy_temp_to_permanent(delete=True)  # ty:ignore[unresolved-attribute]
+    urlwatcher.ssdb_storage.flush()  # ty:ignore[unresolved-attribute]
     assert urlwatcher.report.job_states[-1].verb == 'new'
 
     urlwatcher.run_jobs()
@@ -1137,7 +1202,7 @@ def test_job_states_verb_notimestamp_unchanged(time_jobs_urlwatcher: Urlwatch) -
     """A snapshot with ``timestamp=0`` and a re-run still classifies as ``unchanged``."""
     urlwatcher = time_jobs_urlwatcher
     urlwatcher.run_jobs()
-    urlwatcher.ssdb_storage._copy_temp_to_permanent(delete=True)  # ty:ignore[unresolved-attribute]
+    urlwatcher.ssdb_storage.flush()  # ty:ignore[unresolved-attribute]
     assert urlwatcher.report.job_states[-1].verb == 'new'
 
     guid = urlwatcher.ssdb_storage.get_guids()[0]
@@ -1154,7 +1219,7 @@ def test_job_states_verb_notimestamp_unchanged(time_jobs_urlwatcher: Urlwatch) -
             error_data=snapshot.error_data,
         ),
     )
-    urlwatcher.ssdb_storage._copy_temp_to_permanent(delete=True)  # ty:ignore[unresolved-attribute]
+    urlwatcher.ssdb_storage.flush()  # ty:ignore[unresolved-attribute]
 
     urlwatcher.run_jobs()
     assert urlwatcher.report.job_states[-1].verb == 'unchanged'
@@ -1164,41 +1229,41 @@ def test_job_states_verb_notimestamp_changed(time_jobs_urlwatcher: Urlwatch) ->
     """Multiple snapshot rewrites (no timestamp / 1 try / both) all stay ``unchanged`` for the same data."""
     urlwatcher = time_jobs_urlwatcher
     urlwatcher.run_jobs()
-    urlwatcher.ssdb_storage._copy_temp_to_permanent(delete=True)  # ty:ignore[unresolved-attribute]
+    urlwatcher.ssdb_storage.flush()  # ty:ignore[unresolved-attribute]
     assert urlwatcher.report.job_states[-1].verb == 'new'
 
     guid = urlwatcher.jobs[0].guid
     snapshot = urlwatcher.ssdb_storage.load(guid)
     urlwatcher.ssdb_storage.delete(guid)
     urlwatcher.ssdb_storage.save(guid=guid, snapshot=snapshot)
-    urlwatcher.ssdb_storage._copy_temp_to_permanent(delete=True)  # ty:ignore[unresolved-attribute]
+    urlwatcher.ssdb_storage.flush()  # ty:ignore[unresolved-attribute]
 
     urlwatcher.run_jobs()
-    urlwatcher.ssdb_storage._copy_temp_to_permanent(delete=True)  # ty:ignore[unresolved-attribute]
+    urlwatcher.ssdb_storage.flush()  # ty:ignore[unresolved-attribute]
     assert urlwatcher.report.job_states[-1].verb == 'unchanged'
 
     snapshot = urlwatcher.ssdb_storage.load(guid)
     urlwatcher.ssdb_storage.delete(guid)
     urlwatcher.ssdb_storage.save(guid=guid, snapshot=snapshot)
-    urlwatcher.ssdb_storage._copy_temp_to_permanent(delete=True)  # ty:ignore[unresolved-attribute]
+    urlwatcher.ssdb_storage.flush()  # ty:ignore[unresolved-attribute]
     urlwatcher.run_jobs()
-    urlwatcher.ssdb_storage._copy_temp_to_permanent(delete=True)  # ty:ignore[unresolved-attribute]
+    urlwatcher.ssdb_storage.flush()  # ty:ignore[unresolved-attribute]
     assert urlwatcher.report.job_states[-1].verb == 'unchanged'
 
     urlwatcher.ssdb_storage.delete(guid)
     new_snapshot = Snapshot(snapshot.data, 0, snapshot.tries, snapshot.etag, snapshot.mime_type, snapshot.error_data)
     urlwatcher.ssdb_storage.save(guid=guid, snapshot=new_snapshot)
-    urlwatcher.ssdb_storage._copy_temp_to_permanent(delete=True)  # ty:ignore[unresolved-attribute]
+    urlwatcher.ssdb_storage.flush()  # ty:ignore[unresolved-attribute]
     urlwatcher.run_jobs()
-    urlwatcher.ssdb_storage._copy_temp_to_permanent(delete=True)  # ty:ignore[unresolved-attribute]
+    urlwatcher.ssdb_storage.flush()  # ty:ignore[unresolved-attribute]
     assert urlwatcher.report.job_states[-1].verb == 'unchanged'
 
     urlwatcher.ssdb_storage.delete(guid)
     new_snapshot = Snapshot(snapshot.data, 0, 1, snapshot.etag, snapshot.mime_type, {})
     urlwatcher.ssdb_storage.save(guid=guid, snapshot=new_snapshot)
-    urlwatcher.ssdb_storage._copy_temp_to_permanent(delete=True)  # ty:ignore[unresolved-attribute]
+    urlwatcher.ssdb_storage.flush()  # ty:ignore[unresolved-attribute]
     urlwatcher.run_jobs()
-    urlwatcher.ssdb_storage._copy_temp_to_permanent(delete=True)  # ty:ignore[unresolved-attribute]
+    urlwatcher.ssdb_storage.flush()  # ty:ignore[unresolved-attribute]
     assert urlwatcher.report.job_states[-1].verb == 'unchanged'
 
 
@@ -1216,11 +1281,11 @@ def test_job_states_verb_notimestamp_changed(time_jobs_urlwatcher: Urlwatch) ->
 #     urlwatcher.jobs[0].suppress_repeated_errors = True
 #     urlwatcher.run_jobs()
 #     urlwatcher.close()
-#     ssdb_storage._copy_temp_to_permanent(delete=True)
+#     ssdb_storage.flush()
 #     history = ssdb_storage.get_history_snapshots(urlwatcher.jobs[0].get_guid())
 #     assert len(history) == 1
 #     urlwatcher.run_jobs()
-#     ssdb_storage._copy_temp_to_permanent()
+#     ssdb_storage.flush()
 #     history = ssdb_storage.get_history_snapshots(urlwatcher.jobs[0].get_guid())
 #     print()
 #     assert len(history) == 2
@@ -13,10 +13,13 @@ import copy
 import importlib.util
 import os
 import shutil
+import sqlite3
+import subprocess
 import sys
 import tempfile
 import time
 from abc import ABC
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
 from pathlib import Path
 
@@ -29,11 +32,14 @@ from webchanges.handler import Snapshot
 from webchanges.storage import (
     BaseTextualFileStorage,
     SsdbDirStorage,
+    SsdbLMDBStorage,
     SsdbRedisStorage,
     SsdbSQLite3Storage,
     SsdbStorage,
     YamlConfigStorage,
     YamlJobsStorage,
+    export_snapshots,
+    import_snapshots,
 )
 from webchanges.util import import_module_from_source
 
@@ -59,6 +65,9 @@ DATABASE_ENGINES: tuple[SsdbStorage, ...] = (
 if os.getenv('REDIS_URI') and importlib.util.find_spec('redis') is not None:
     DATABASE_ENGINES += (SsdbRedisStorage(os.getenv('REDIS_URI', '')),)
 
+if importlib.util.find_spec('lmdb') is not None:
+    DATABASE_ENGINES += (SsdbLMDBStorage(_storage_tmp.joinpath('snapshots.lmdb')),)
+
 if importlib.util.find_spec('minidb') is not None:
     from webchanges.storage_minidb import SsdbMiniDBStorage
 
@@ -245,15 +254,15 @@ def test_keep_latest(database_engine: SsdbStorage) -> None:
 
         # run once
         urlwatcher.run_jobs()
-        if hasattr(ssdb_storage, '_copy_temp_to_permanent'):
-            ssdb_storage._copy_temp_to_permanent(delete=True)  # ty:ignore[call-non-callable]
+        if hasattr(ssdb_storage, 'flush'):
+            ssdb_storage.flush()  # ty:ignore[call-non-callable]
 
         # run twice
         if isinstance(database_engine, SsdbSQLite3Storage):
             time.sleep(0.0003)
         urlwatcher.run_jobs()
-        if hasattr(ssdb_storage, '_copy_temp_to_permanent'):
-            ssdb_storage._copy_temp_to_permanent(delete=True)  # ty:ignore[call-non-callable]
+        if hasattr(ssdb_storage, 'flush'):
+            ssdb_storage.flush()  # ty:ignore[call-non-callable]
         guid = urlwatcher.jobs[0].get_guid()
         history = ssdb_storage.get_history_data(guid)
         assert len(history) == 2
@@ -282,41 +291,38 @@ def test_keep_latest(database_engine: SsdbStorage) -> None:
     ids=(type(v).__name__ for v in DATABASE_ENGINES),
 )
 def test_clean(database_engine: SsdbStorage) -> None:
-    if isinstance(database_engine, SsdbDirStorage):
-        pytest.skip(f'database_engine {database_engine.__class__.__name__} can only save one snapshot at a time')
-    else:
-        urlwatcher, ssdb_storage, _ = prepare_storage_test(database_engine)
+    urlwatcher, ssdb_storage, _ = prepare_storage_test(database_engine)
 
-        # run once
-        urlwatcher.run_jobs()
-        if hasattr(ssdb_storage, '_copy_temp_to_permanent'):
-            ssdb_storage._copy_temp_to_permanent(delete=True)  # ty:ignore[call-non-callable]
+    # run once
+    urlwatcher.run_jobs()
+    if hasattr(ssdb_storage, 'flush'):
+        ssdb_storage.flush()  # ty:ignore[call-non-callable]
 
-        # run twice
-        if isinstance(database_engine, SsdbSQLite3Storage):
-            time.sleep(0.0001)
-        urlwatcher.run_jobs()
-        if hasattr(ssdb_storage, '_copy_temp_to_permanent'):
-            ssdb_storage._copy_temp_to_permanent(delete=True)  # ty:ignore[call-non-callable]
-        guid = urlwatcher.jobs[0].get_guid()
-        history = ssdb_storage.get_history_data(guid)
-        assert len(history) == 2
-        timestamps = list(history.values())
-        # returned in reverse order
-        if not isinstance(database_engine, SsdbMiniDBStorage):  # rounds to the closest second
-            assert timestamps[1] < timestamps[0]
+    # run twice
+    if isinstance(database_engine, SsdbSQLite3Storage):
+        time.sleep(0.0001)
+    urlwatcher.run_jobs()
+    if hasattr(ssdb_storage, 'flush'):
+        ssdb_storage.flush()  # ty:ignore[call-non-callable]
+    guid = urlwatcher.jobs[0].get_guid()
+    history = ssdb_storage.get_history_data(guid)
+    assert len(history) == 2
+    timestamps = list(history.values())
+    # returned in reverse order
+    if not isinstance(database_engine, SsdbMiniDBStorage):  # rounds to the closest second
+        assert timestamps[1] < timestamps[0]
 
-        # check that history matches load
-        snapshot = ssdb_storage.load(guid)
-        assert snapshot.data == next(iter(history.keys()))
-        assert snapshot.timestamp == next(iter(history.values()))
+    # check that history matches load
+    snapshot = ssdb_storage.load(guid)
+    assert snapshot.data == next(iter(history.keys()))
+    assert snapshot.timestamp == next(iter(history.values()))
 
-        ssdb_storage.clean(guid, 1)
-        history = ssdb_storage.get_history_data(guid)
-        assert len(history) == 1
-        timestamp = next(iter(history.values()))
-        # is it the most recent?
-        assert timestamp == timestamps[0]
+    ssdb_storage.clean(guid, 1)
+    history = ssdb_storage.get_history_data(guid)
+    assert len(history) == 1
+    timestamp = next(iter(history.values()))
+    # is it the most recent?
+    assert timestamp == timestamps[0]
 
 
 @pytest.mark.parametrize(
@@ -329,8 +335,8 @@ def test_gc(database_engine: SsdbStorage) -> None:
 
     # run once
     urlwatcher.run_jobs()
-    if hasattr(ssdb_storage, '_copy_temp_to_permanent'):
-        ssdb_storage._copy_temp_to_permanent(delete=True)  # ty:ignore[call-non-callable]
+    if hasattr(ssdb_storage, 'flush'):
+        ssdb_storage.flush()  # ty:ignore[call-non-callable]
 
     ssdb_storage.gc([])
     guid = urlwatcher.jobs[0].get_guid()
@@ -356,8 +362,8 @@ def test_gc_delete_1_of_2(database_engine: SsdbStorage) -> None:
         if isinstance(database_engine, SsdbSQLite3Storage):
             time.sleep(0.0001)
         urlwatcher.run_jobs()
-    if hasattr(ssdb_storage, '_copy_temp_to_permanent'):
-        ssdb_storage._copy_temp_to_permanent(delete=True)  # ty:ignore[call-non-callable]
+    if hasattr(ssdb_storage, 'flush'):
+        ssdb_storage.flush()  # ty:ignore[call-non-callable]
 
     guid = urlwatcher.jobs[0].get_guid()
     ssdb_storage.gc([guid])
@@ -375,10 +381,6 @@ def test_gc_delete_1_of_2(database_engine: SsdbStorage) -> None:
     ids=(type(v).__name__ for v in DATABASE_ENGINES),
 )
 def test_gc_delete_2_of_4(database_engine: SsdbStorage) -> None:
-    if isinstance(database_engine, SsdbDirStorage):
-        pytest.skip(f'database_engine {database_engine.__class__.__name__} can only save one snapshot at a time')
-    if isinstance(database_engine, SsdbRedisStorage):
-        pytest.skip(f'database_engine {database_engine.__class__.__name__} does not support this')
     if isinstance(database_engine, SsdbMiniDBStorage):
         pytest.skip(f'database_engine {database_engine.__class__.__name__} not implemented')
 
@@ -394,8 +396,8 @@ def test_gc_delete_2_of_4(database_engine: SsdbStorage) -> None:
         if isinstance(database_engine, SsdbSQLite3Storage):
             time.sleep(0.0001)
         urlwatcher.run_jobs()
-    if hasattr(ssdb_storage, '_copy_temp_to_permanent'):
-        ssdb_storage._copy_temp_to_permanent(delete=True)  # ty:ignore[call-non-callable]
+    if hasattr(ssdb_storage, 'flush'):
+        ssdb_storage.flush()  # ty:ignore[call-non-callable]
 
     guid = urlwatcher.jobs[0].get_guid()
     ssdb_storage.gc([guid], 2)
@@ -413,44 +415,42 @@ def test_gc_delete_2_of_4(database_engine: SsdbStorage) -> None:
     ids=(type(v).__name__ for v in DATABASE_ENGINES),
 )
 def test_clean_ssdb(database_engine: SsdbStorage) -> None:
-    if isinstance(database_engine, SsdbDirStorage):
-        pytest.skip(f'database_engine {database_engine.__class__.__name__} can only save one snapshot at a time')
-    else:
-        urlwatcher, ssdb_storage, _ = prepare_storage_test(database_engine)
+    urlwatcher, ssdb_storage, _ = prepare_storage_test(database_engine)
 
-        # run five times
-        for _ in range(5):
-            if isinstance(database_engine, SsdbSQLite3Storage):
-                time.sleep(0.0001)
-            urlwatcher.run_jobs()
-        if hasattr(ssdb_storage, '_copy_temp_to_permanent'):
-            ssdb_storage._copy_temp_to_permanent(delete=True)  # ty:ignore[call-non-callable]
+    # run five times
+    for _ in range(5):
+        if isinstance(database_engine, SsdbSQLite3Storage):
+            time.sleep(0.0001)
+        urlwatcher.run_jobs()
+    if hasattr(ssdb_storage, 'flush'):
+        ssdb_storage.flush()  # ty:ignore[call-non-callable]
 
-        guid = urlwatcher.jobs[0].get_guid()
-        history = ssdb_storage.get_history_data(guid)
+    guid = urlwatcher.jobs[0].get_guid()
+    history = ssdb_storage.get_history_data(guid)
+    if isinstance(database_engine, SsdbDirStorage):  # trimmed to max_snapshots on save
+        assert len(history) == database_engine.max_snapshots == 4
+    elif isinstance(database_engine, SsdbRedisStorage):  # trimmed to max_snapshots + 1 on save, as not closed
+        assert len(history) == database_engine.max_snapshots + 1 == 5
+    else:
         assert len(history) == 5
-        timestamps = list(history.values())
-        # returned in reverse order
-        if not isinstance(database_engine, SsdbMiniDBStorage):  # rounds to the closest second
-            assert timestamps[1] < timestamps[0]
+    timestamps = list(history.values())
+    # returned in reverse order
+    if not isinstance(database_engine, SsdbMiniDBStorage):  # rounds to the closest second
+        assert timestamps[1] < timestamps[0]
 
-        # clean ssdb, leaving 3
-        if isinstance(database_engine, (SsdbSQLite3Storage, SsdbMiniDBStorage)):
-            ssdb_storage.clean_ssdb([guid], 3)
-            history = ssdb_storage.get_history_data(guid)
-            assert len(history) == 3
-        else:
-            with pytest.raises(NotImplementedError):
-                ssdb_storage.clean_ssdb([guid], 3)
+    # clean ssdb, leaving 3
+    ssdb_storage.clean_ssdb([guid], 3)
+    history = ssdb_storage.get_history_data(guid)
+    assert len(history) == 3
 
-        # clean ssdb, leaving 1
-        ssdb_storage.clean_ssdb([guid])
-        history = ssdb_storage.get_history_data(guid)
-        assert len(history) == 1
+    # clean ssdb, leaving 1
+    ssdb_storage.clean_ssdb([guid])
+    history = ssdb_storage.get_history_data(guid)
+    assert len(history) == 1
 
-        timestamp = next(iter(history.values()))
-        # is it the most recent?
-        assert timestamp == timestamps[0]
+    timestamp = next(iter(history.values()))
+    # is it the most recent?
+    assert timestamp == timestamps[0]
 
 
 @pytest.mark.parametrize(
@@ -463,8 +463,8 @@ def test_clean_and_delete(database_engine: SsdbStorage) -> None:
 
     # run once
     urlwatcher.run_jobs()
-    if hasattr(ssdb_storage, '_copy_temp_to_permanent'):
-        ssdb_storage._copy_temp_to_permanent(delete=True)  # ty:ignore[call-non-callable]
+    if hasattr(ssdb_storage, 'flush'):
+        ssdb_storage.flush()  # ty:ignore[call-non-callable]
 
     # clean guid
     guid = urlwatcher.jobs[0].get_guid()
@@ -498,15 +498,15 @@ def test_clean_all(database_engine: SsdbStorage) -> None:
 
         # run once
         urlwatcher.run_jobs()
-        if hasattr(ssdb_storage, '_copy_temp_to_permanent'):
-            ssdb_storage._copy_temp_to_permanent(delete=True)  # ty:ignore[call-non-callable]
+        if hasattr(ssdb_storage, 'flush'):
+            ssdb_storage.flush()  # ty:ignore[call-non-callable]
 
         # run twice
         if isinstance(database_engine, SsdbSQLite3Storage):
             time.sleep(0.0001)
         urlwatcher.run_jobs()
-        if hasattr(ssdb_storage, '_copy_temp_to_permanent'):
-            ssdb_storage._copy_temp_to_permanent(delete=True)  # ty:ignore[call-non-callable]
+        if hasattr(ssdb_storage, 'flush'):
+            ssdb_storage.flush()  # ty:ignore[call-non-callable]
         guid = urlwatcher.jobs[0].get_guid()
         history = ssdb_storage.get_history_data(guid)
         assert len(history) == 2
@@ -531,38 +531,35 @@ def test_clean_all(database_engine: SsdbStorage) -> None:
     ids=(type(v).__name__ for v in DATABASE_ENGINES),
 )
 def test_clean_ssdb_no_clean_all(database_engine: SsdbStorage) -> None:
-    if isinstance(database_engine, SsdbDirStorage):
-        pytest.skip(f'database_engine {database_engine.__class__.__name__} can only save one snapshot at a time')
-    else:
-        urlwatcher, ssdb_storage, _ = prepare_storage_test(database_engine)
+    urlwatcher, ssdb_storage, _ = prepare_storage_test(database_engine)
 
-        # run once
-        urlwatcher.run_jobs()
-        if hasattr(ssdb_storage, '_copy_temp_to_permanent'):
-            ssdb_storage._copy_temp_to_permanent(delete=True)  # ty:ignore[call-non-callable]
+    # run once
+    urlwatcher.run_jobs()
+    if hasattr(ssdb_storage, 'flush'):
+        ssdb_storage.flush()  # ty:ignore[call-non-callable]
 
-        # run twice
-        if isinstance(database_engine, SsdbSQLite3Storage):
-            time.sleep(0.0001)
-        urlwatcher.run_jobs()
-        if hasattr(ssdb_storage, '_copy_temp_to_permanent'):
-            ssdb_storage._copy_temp_to_permanent(delete=True)  # ty:ignore[call-non-callable]
-        guid = urlwatcher.jobs[0].get_guid()
-        history = ssdb_storage.get_history_data(guid)
-        assert len(history) == 2
-        timestamps = list(history.values())
-        # returned in reverse order
-        if not isinstance(database_engine, SsdbMiniDBStorage):  # rounds to the closest second
-            assert timestamps[1] < timestamps[0]
+    # run twice
+    if isinstance(database_engine, SsdbSQLite3Storage):
+        time.sleep(0.0001)
+    urlwatcher.run_jobs()
+    if hasattr(ssdb_storage, 'flush'):
+        ssdb_storage.flush()  # ty:ignore[call-non-callable]
+    guid = urlwatcher.jobs[0].get_guid()
+    history = ssdb_storage.get_history_data(guid)
+    assert len(history) == 2
+    timestamps = list(history.values())
+    # returned in reverse order
+    if not isinstance(database_engine, SsdbMiniDBStorage):  # rounds to the closest second
+        assert timestamps[1] < timestamps[0]
 
-        # clean ssdb without using clean_all
-        # delattr(SsdbSQLite3Storage, 'clean_all')
-        ssdb_storage.clean_ssdb([guid])
-        history = ssdb_storage.get_history_data(guid)
-        assert len(history) == 1
-        timestamp = next(iter(history.values()))
-        # is it the most recent?
-        assert timestamp == timestamps[0]
+    # clean ssdb without using clean_all
+    # delattr(SsdbSQLite3Storage, 'clean_all')
+    ssdb_storage.clean_ssdb([guid])
+    history = ssdb_storage.get_history_data(guid)
+    assert len(history) == 1
+    timestamp = next(iter(history.values()))
+    # is it the most recent?
+    assert timestamp == timestamps[0]
 
 
 @pytest.mark.parametrize(
@@ -571,37 +568,34 @@ def test_clean_ssdb_no_clean_all(database_engine: SsdbStorage) -> None:
     ids=(type(v).__name__ for v in DATABASE_ENGINES),
 )
 def test_delete_latest(database_engine: SsdbStorage) -> None:
-    if isinstance(database_engine, SsdbDirStorage):
-        pytest.skip(f'database_engine {database_engine.__class__.__name__} can only save one snapshot at a time')
-    else:
-        urlwatcher, ssdb_storage, _ = prepare_storage_test(database_engine)
+    urlwatcher, ssdb_storage, _ = prepare_storage_test(database_engine)
 
-        # run once
-        urlwatcher.run_jobs()
-        if hasattr(ssdb_storage, '_copy_temp_to_permanent'):
-            ssdb_storage._copy_temp_to_permanent(delete=True)  # ty:ignore[call-non-callable]
+    # run once
+    urlwatcher.run_jobs()
+    if hasattr(ssdb_storage, 'flush'):
+        ssdb_storage.flush()  # ty:ignore[call-non-callable]
 
-        # run twice
-        if isinstance(database_engine, SsdbSQLite3Storage):
-            time.sleep(0.0001)
-        urlwatcher.run_jobs()
-        if hasattr(ssdb_storage, '_copy_temp_to_permanent'):
-            ssdb_storage._copy_temp_to_permanent(delete=True)  # ty:ignore[call-non-callable]
-        guid = urlwatcher.jobs[0].get_guid()
-        history = ssdb_storage.get_history_data(guid)
-        assert len(history) == 2
+    # run twice
+    if isinstance(database_engine, SsdbSQLite3Storage):
+        time.sleep(0.0001)
+    urlwatcher.run_jobs()
+    if hasattr(ssdb_storage, 'flush'):
+        ssdb_storage.flush()  # ty:ignore[call-non-callable]
+    guid = urlwatcher.jobs[0].get_guid()
+    history = ssdb_storage.get_history_data(guid)
+    assert len(history) == 2
 
-        # rollback
-        try:
-            num_del = ssdb_storage.delete_latest(guid)
-        except NotImplementedError:
-            pytest.skip(f'database_engine {database_engine.__class__.__name__} does not implement delete_latest')
+    # rollback
+    try:
+        num_del = ssdb_storage.delete_latest(guid)
+    except NotImplementedError:
+        pytest.skip(f'database_engine {database_engine.__class__.__name__} does not implement delete_latest')
 
-        assert num_del == 1
-        if hasattr(ssdb_storage, '_copy_temp_to_permanent'):
-            ssdb_storage._copy_temp_to_permanent(delete=True)  # ty:ignore[call-non-callable]
-        history = ssdb_storage.get_history_data(guid)
-        assert len(history) == 1
+    assert num_del == 1
+    if hasattr(ssdb_storage, 'flush'):
+        ssdb_storage.flush()  # ty:ignore[call-non-callable]
+    history = ssdb_storage.get_history_data(guid)
+    assert len(history) == 1
 
 
 @pytest.mark.parametrize(
@@ -610,38 +604,54 @@ def test_delete_latest(database_engine: SsdbStorage) -> None:
     ids=(type(v).__name__ for v in DATABASE_ENGINES),
 )
 def test_rollback_ssdb(database_engine: SsdbStorage) -> None:
-    if isinstance(database_engine, SsdbDirStorage):
-        pytest.skip(f'database_engine {database_engine.__class__.__name__} can only save one snapshot at a time')
-    else:
-        urlwatcher, ssdb_storage, _ = prepare_storage_test(database_engine)
+    urlwatcher, ssdb_storage, _ = prepare_storage_test(database_engine)
 
-        # run once
-        urlwatcher.run_jobs()
-        if hasattr(ssdb_storage, '_copy_temp_to_permanent'):
-            ssdb_storage._copy_temp_to_permanent(delete=True)  # ty:ignore[call-non-callable]
-        run_time = time.time()
+    # run once
+    urlwatcher.run_jobs()
+    if hasattr(ssdb_storage, 'flush'):
+        ssdb_storage.flush()  # ty:ignore[call-non-callable]
+    run_time = time.time()
 
-        # run twice
-        if isinstance(database_engine, SsdbSQLite3Storage):
-            time.sleep(0.0001)
-        urlwatcher.run_jobs()
-        if hasattr(ssdb_storage, '_copy_temp_to_permanent'):
-            ssdb_storage._copy_temp_to_permanent(delete=True)  # ty:ignore[call-non-callable]
-        guid = urlwatcher.jobs[0].get_guid()
-        history = ssdb_storage.get_history_data(guid)
-        assert len(history) == 2
+    # run twice
+    if isinstance(database_engine, SsdbSQLite3Storage):
+        time.sleep(0.0001)
+    urlwatcher.run_jobs()
+    if hasattr(ssdb_storage, 'flush'):
+        ssdb_storage.flush()  # ty:ignore[call-non-callable]
+    guid = urlwatcher.jobs[0].get_guid()
+    history = ssdb_storage.get_history_data(guid)
+    assert len(history) == 2
 
-        # rollback
-        try:
-            num_del = ssdb_storage.rollback(run_time)
-        except NotImplementedError:
-            pytest.skip(f'database_engine {database_engine.__class__.__name__} does not implement rollback')
+    # rollback
+    try:
+        num_del = ssdb_storage.rollback(run_time)
+    except NotImplementedError:
+        pytest.skip(f'database_engine {database_engine.__class__.__name__} does not implement rollback')
 
-        assert num_del == 1
-        if hasattr(ssdb_storage, '_copy_temp_to_permanent'):
-            ssdb_storage._copy_temp_to_permanent(delete=True)  # ty:ignore[call-non-callable]
-        history = ssdb_storage.get_history_data(guid)
-        assert len(history) == 1
+    assert num_del == 1
+    if hasattr(ssdb_storage, 'flush'):
+        ssdb_storage.flush()  # ty:ignore[call-non-callable]
+    history = ssdb_storage.get_history_data(guid)
+    assert len(history) == 1
+
+
+@pytest.mark.parametrize(
+    'database_engine',
+    DATABASE_ENGINES,
+    ids=(type(v).__name__ for v in DATABASE_ENGINES),
+)
+def test_get_snapshot_at(database_engine: SsdbStorage) -> None:
+    _, ssdb_storage, _ = prepare_storage_test(database_engine)
+
+    for timestamp in (1000, 2000, 3000):
+        snapshot = Snapshot(f'data {timestamp}', timestamp, 0, '', '', {})
+        ssdb_storage.save(guid='myguid', snapshot=snapshot, temporary=False)
+
+    assert ssdb_storage.get_snapshot_at('myguid', 999).timestamp == 0
+    assert ssdb_storage.get_snapshot_at('myguid', 1000).data == 'data 1000'
+    assert ssdb_storage.get_snapshot_at('myguid', 2500).data == 'data 2000'
+    assert ssdb_storage.get_snapshot_at('myguid', 9999).data == 'data 3000'
+    assert ssdb_storage.get_snapshot_at('otherguid', 9999).timestamp == 0
 
 
 @pytest.mark.parametrize(
@@ -655,8 +665,8 @@ def test_restore_and_backup(database_engine: SsdbStorage) -> None:
     mime_type = 'text/plain' if isinstance(database_engine, (SsdbSQLite3Storage, SsdbRedisStorage)) else ''
 
     ssdb_storage.restore((('myguid', 'mydata', 1618105974, 0, '', mime_type, {}),))  # ty:ignore[invalid-argument-type]
-    if hasattr(ssdb_storage, '_copy_temp_to_permanent'):
-        ssdb_storage._copy_temp_to_permanent(delete=True)  # ty:ignore[call-non-callable]
+    if hasattr(ssdb_storage, 'flush'):
+        ssdb_storage.flush()  # ty:ignore[call-non-callable]
 
     entry = ssdb_storage.load('myguid')
     assert entry == Snapshot('mydata', 1618105974, 0, '', mime_type, {})
@@ -666,6 +676,66 @@ def test_restore_and_backup(database_engine: SsdbStorage) -> None:
     assert backup_entry == ('myguid', 'mydata', 1618105974, 0, '', mime_type, {})
 
 
+@pytest.mark.parametrize(
+    'database_engine',
+    DATABASE_ENGINES,
+    ids=(type(v).__name__ for v in DATABASE_ENGINES),
+)
+def test_backup_history_with_errors(database_engine: SsdbStorage) -> None:
+    """The full history is backed up as stored, including the snapshots of errors and those without a timestamp."""
+    if isinstance(database_engine, SsdbMiniDBStorage):
+        pytest.skip(f'database_engine {database_engine.__class__.__name__} does not store ETags and media types')
+
+    _, ssdb_storage, _ = prepare_storage_test(database_engine)
+    entries = [
+        ('guid', '', 0, 0, '', '', {}),
+        ('guid', 'data', 1_700_000_000, 0, 'etag', 'text/plain', {}),
+        ('guid', 'data', 1_700_000_001, 2, 'etag', 'text/plain', {'type': 'ValueError', 'message': 'x'}),
+    ]
+    ssdb_storage.restore(entries)  # ty:ignore[invalid-argument-type]
+    if hasattr(ssdb_storage, 'flush'):
+        ssdb_storage.flush()  # ty:ignore[call-non-callable]
+    history = list(ssdb_storage.backup(history=True))
+    assert history == entries
+
+    ssdb_storage.flushdb()
+    ssdb_storage.restore(history)
+    if hasattr(ssdb_storage, 'flush'):
+        ssdb_storage.flush()  # ty:ignore[call-non-callable]
+    assert list(ssdb_storage.backup(history=True)) == entries
+
+
+@pytest.mark.parametrize(
+    'database_engine',
+    DATABASE_ENGINES,
+    ids=(type(v).__name__ for v in DATABASE_ENGINES),
+)
+@pytest.mark.parametrize('suffix', ['.bin', '.zst'])
+def test_export_and_import_snapshots(database_engine: SsdbStorage, suffix: str, tmp_path: Path) -> None:
+    _, ssdb_storage, _ = prepare_storage_test(database_engine)
+
+    entries = [(f'guid{i % 2}', f'data {i}' if i % 3 else b'\x00', 1_700_000_000 + i, 0, '', '', {}) for i in range(6)]
+    ssdb_storage.restore(entries)  # ty:ignore[invalid-argument-type]
+    if hasattr(ssdb_storage, 'flush'):
+        ssdb_storage.flush()  # ty:ignore[call-non-callable]
+    history = sorted(ssdb_storage.backup(history=True), key=lambda entry: (entry[0], entry[2]))
+    assert len(history) == 6
+    assert [entry[2] for entry in history if entry[0] == 'guid1'] == [1_700_000_001, 1_700_000_003, 1_700_000_005]
+
+    export_file = tmp_path.joinpath(f'snapshots{suffix}')
+    assert export_snapshots(ssdb_storage, export_file) == 6
+    ssdb_storage.flushdb()
+    assert import_snapshots(ssdb_storage, export_file) == 6
+    if hasattr(ssdb_storage, 'flush'):
+        ssdb_storage.flush()  # ty:ignore[call-non-callable]
+    assert sorted(ssdb_storage.backup(history=True), key=lambda entry: (entry[0], entry[2])) == history
+
+    export_file.write_bytes(export_file.read_bytes()[:-3])
+    with pytest.raises(ValueError, match='truncated'):
+        import_snapshots(SsdbSQLite3Storage(':memory:'), export_file)  # ty:ignore[invalid-argument-type]
+    ssdb_storage.flushdb()
+
+
 @pytest.mark.parametrize(
     'database_engine',
     DATABASE_ENGINES,
@@ -676,8 +746,8 @@ def test_get_empty_history_and_no_max_snapshots(database_engine: SsdbStorage) ->
 
     # run once
     urlwatcher.run_jobs()
-    if hasattr(ssdb_storage, '_copy_temp_to_permanent'):
-        ssdb_storage._copy_temp_to_permanent(delete=True)  # ty:ignore[call-non-callable]
+    if hasattr(ssdb_storage, 'flush'):
+        ssdb_storage.flush()  # ty:ignore[call-non-callable]
 
     # get rich_history
     guid = urlwatcher.jobs[0].get_guid()
@@ -699,39 +769,36 @@ def test_get_empty_history_and_no_max_snapshots(database_engine: SsdbStorage) ->
     ids=(type(v).__name__ for v in DATABASE_ENGINES),
 )
 def test_clean_and_history_data(database_engine: SsdbStorage) -> None:
-    if isinstance(database_engine, SsdbDirStorage):
-        pytest.skip(f'database_engine {database_engine.__class__.__name__} can only save one snapshot at a time')
-    else:
-        urlwatcher, ssdb_storage, _ = prepare_storage_test(database_engine)
+    urlwatcher, ssdb_storage, _ = prepare_storage_test(database_engine)
 
-        # run once
-        urlwatcher.run_jobs()
-        if hasattr(ssdb_storage, '_copy_temp_to_permanent'):
-            ssdb_storage._copy_temp_to_permanent(delete=True)  # ty:ignore[call-non-callable]
+    # run once
+    urlwatcher.run_jobs()
+    if hasattr(ssdb_storage, 'flush'):
+        ssdb_storage.flush()  # ty:ignore[call-non-callable]
 
-        # run twice
-        if isinstance(database_engine, SsdbSQLite3Storage):
-            time.sleep(0.0001)
-        urlwatcher.run_jobs()
-        if hasattr(ssdb_storage, '_copy_temp_to_permanent'):
-            ssdb_storage._copy_temp_to_permanent(delete=True)  # ty:ignore[call-non-callable]
-        guid = urlwatcher.jobs[0].get_guid()
-        history = ssdb_storage.get_history_data(guid)
-        assert len(history) == 2
+    # run twice
+    if isinstance(database_engine, SsdbSQLite3Storage):
+        time.sleep(0.0001)
+    urlwatcher.run_jobs()
+    if hasattr(ssdb_storage, 'flush'):
+        ssdb_storage.flush()  # ty:ignore[call-non-callable]
+    guid = urlwatcher.jobs[0].get_guid()
+    history = ssdb_storage.get_history_data(guid)
+    assert len(history) == 2
 
-        # clean
-        ssdb_storage.clean(guid)
-        history = ssdb_storage.get_history_data(guid)
-        assert len(history) == 1
+    # clean
+    ssdb_storage.clean(guid)
+    history = ssdb_storage.get_history_data(guid)
+    assert len(history) == 1
 
-        # get history with zero count
-        history = ssdb_storage.get_history_data(guid, count=0)
-        assert history == {}
+    # get history with zero count
+    history = ssdb_storage.get_history_data(guid, count=0)
+    assert history == {}
 
-        # delete
-        ssdb_storage.delete(guid)
-        history = ssdb_storage.get_history_data(guid)
-        assert len(history) == 0
+    # delete
+    ssdb_storage.delete(guid)
+    history = ssdb_storage.get_history_data(guid)
+    assert len(history) == 0
 
 
 def test_migrate_urlwatch_legacy_db(tmp_path: Path, capsys: pytest.CaptureFixture[str]) -> None:
@@ -772,6 +839,307 @@ def test_max_snapshots() -> None:
     ssdb_storage.close()
 
 
+def test_sqlite3_wal_concurrent_load(tmp_path: Path) -> None:
+    """File databases use WAL and serve concurrent loads from a pool of read-only connections."""
+    ssdb_storage = SsdbSQLite3Storage(tmp_path.joinpath('snapshots.db'))
+    try:
+        assert ssdb_storage._execute('PRAGMA journal_mode').fetchone()[0] == 'wal'
+        for i in range(20):
+            ssdb_storage.save(
+                guid=f'guid{i}', snapshot=Snapshot(f'data{i}', 1618105974 + i, 0, '', 'text/plain', {}), temporary=False
+            )
+        ssdb_storage.save(guid='guid0', snapshot=Snapshot('temp', 1718105974, 0, '', '', {}))
+        ssdb_storage.flush()
+
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            snapshots = list(executor.map(ssdb_storage.load, (f'guid{i}' for i in range(20))))
+        assert snapshots[0].data == 'temp'
+        assert [s.data for s in snapshots[1:]] == [f'data{i}' for i in range(1, 20)]
+        assert 1 <= len(ssdb_storage._all_readers) <= 8
+        assert sorted(ssdb_storage.get_guids()) == sorted(f'guid{i}' for i in range(20))
+    finally:
+        ssdb_storage.close()
+
+
+def test_sqlite3_checkpoint_and_rollback_run(tmp_path: Path) -> None:
+    """Queued snapshots are checkpointed to disk during the run, and a run can be rolled back as a unit."""
+    ssdb_file = tmp_path.joinpath('snapshots.db')
+    ssdb_storage = SsdbSQLite3Storage(ssdb_file)
+    ssdb_storage.checkpoint_rows = 3
+    ssdb_storage.save(guid='old', snapshot=Snapshot('old', 1618105974, 0, '', '', {}), temporary=False)
+    for i in range(4):
+        ssdb_storage.save(guid=f'guid{i}', snapshot=Snapshot(f'data{i}', 1718105974, 0, '', '', {}))
+
+    # the first three were checkpointed and are visible to another connection, the fourth is still queued
+    other = SsdbSQLite3Storage(ssdb_file)
+    assert sorted(other.get_guids()) == ['guid0', 'guid1', 'guid2', 'old']
+    other.close()
+    assert len(ssdb_storage._pending) == 1
+
+    # delete_latest(temporary=True) only deletes snapshots of this run, whether queued or checkpointed
+    assert ssdb_storage.delete_latest('guid3', temporary=True) == 1
+    assert ssdb_storage.delete_latest('guid2', temporary=True) == 1
+    assert ssdb_storage.delete_latest('old', temporary=True) == 0
+
+    ssdb_storage.save(guid='guid4', snapshot=Snapshot('data4', 1718105974, 0, '', '', {}))
+    assert ssdb_storage.rollback_run() == 3
+    assert ssdb_storage.get_guids() == ['old']
+    ssdb_storage.close()
+
+
+def test_sqlite3_interrupted_run_and_schema_upgrade(tmp_path: Path, caplog: pytest.LogCaptureFixture) -> None:
+    """Databases without the run_id column are upgraded, and snapshots of interrupted runs survive."""
+    ssdb_file = tmp_path.joinpath('snapshots.db')
+    db = sqlite3.connect(ssdb_file)
+    db.execute('CREATE TABLE webchanges (uuid TEXT, timestamp REAL, msgpack_data BLOB)')
+    db.execute('CREATE INDEX idx_uuid_time ON webchanges(uuid, timestamp)')
+    db.commit()
+    db.close()
+
+    ssdb_storage = SsdbSQLite3Storage(ssdb_file)
+    ssdb_storage.save(guid='guid', snapshot=Snapshot('data', 1718105974, 0, '', '', {}))
+    ssdb_storage.flush()
+    run_id = ssdb_storage.run_id
+    assert run_id is not None
+    # simulate a crash: the process ends without close()
+    ssdb_storage.db.close()
+
+    ssdb_storage = SsdbSQLite3Storage(ssdb_file)
+    assert f'Found snapshots saved by run {run_id}' in caplog.text
+    assert f'run with --rollback-run {run_id}' in caplog.text
+    # the run started no later than its first snapshot
+    assert ssdb_storage._execute('SELECT started FROM runs WHERE run_id = ?', (run_id,)).fetchone()[0] == 1718105974
+    assert ssdb_storage.load('guid').data == 'data'
+    assert ssdb_storage.rollback_run(run_id) == 1
+    assert ssdb_storage.load('guid').data == ''
+    ssdb_storage.close()
+
+
+def test_sqlite3_run_of_other_process_in_progress(tmp_path: Path, caplog: pytest.LogCaptureFixture) -> None:
+    """The unfinished runs of processes still running are not reported as interrupted nor marked as finished."""
+    ssdb_file = tmp_path.joinpath('snapshots.db')
+    SsdbSQLite3Storage(ssdb_file).close()
+    process = subprocess.Popen([sys.executable, '-c', 'import time; time.sleep(60)'])  # noqa: S603 untrusted input
+    try:
+        db = sqlite3.connect(ssdb_file)
+        db.execute('INSERT INTO runs (run_id, started, pid) VALUES (1, 1718105974, ?)', (process.pid,))
+        db.commit()
+        SsdbSQLite3Storage(ssdb_file).close()
+        assert 'Found snapshots saved by run 1' not in caplog.text
+        assert db.execute('SELECT finished FROM runs WHERE run_id = 1').fetchone() == (None,)
+    finally:
+        process.kill()
+        process.wait()
+
+    SsdbSQLite3Storage(ssdb_file).close()
+    assert 'Found snapshots saved by run 1' in caplog.text
+    assert db.execute('SELECT finished FROM runs WHERE run_id = 1').fetchone() == (1718105974,)
+    db.close()
+
+
+def test_sqlite3_incremental_vacuum(tmp_path: Path) -> None:
+    """New databases use incremental auto-vacuum; legacy ones are converted by their first vacuum."""
+    ssdb_storage = SsdbSQLite3Storage(tmp_path.joinpath('snapshots.db'))
+    assert ssdb_storage._execute('PRAGMA auto_vacuum').fetchone()[0] == 2
+    for i in range(200):
+        ssdb_storage.save(guid=f'guid{i % 10}', snapshot=Snapshot('x' * 10_000, i, 0, '', '', {}))
+    ssdb_storage.flush()
+    ssdb_storage.clean_ssdb([], 1)
+    assert ssdb_storage._execute('PRAGMA freelist_count').fetchone()[0] == 0
+    assert len(ssdb_storage.get_guids()) == 10
+    ssdb_storage.close()
+
+    legacy_file = tmp_path.joinpath('legacy.db')
+    db = sqlite3.connect(legacy_file)
+    db.execute('CREATE TABLE webchanges (uuid TEXT, timestamp REAL, msgpack_data BLOB)')
+    db.close()
+    ssdb_storage = SsdbSQLite3Storage(legacy_file)
+    assert ssdb_storage._execute('PRAGMA auto_vacuum').fetchone()[0] == 0
+    ssdb_storage.vacuum()
+    assert ssdb_storage._execute('PRAGMA auto_vacuum').fetchone()[0] == 2
+    ssdb_storage.vacuum('full')
+    ssdb_storage.close()
+
+
+def test_sqlite3_indexed_rollback_and_move() -> None:
+    """rollback() only removes the snapshots newer than the timestamp and move() only touches the old guid's rows."""
+    ssdb_storage = SsdbSQLite3Storage(':memory:')  # ty:ignore[invalid-argument-type]
+    for i in range(30):
+        ssdb_storage.save(guid=f'guid{i % 3}', snapshot=Snapshot(str(i), i, 0, '', '', {}), temporary=False)
+    assert ssdb_storage.rollback(19.5, count=True) == 10
+    assert ssdb_storage.rollback(19.5) == 10
+    assert ssdb_storage.rollback(19.5) == 0
+    assert {guid: ssdb_storage.load(guid).data for guid in ssdb_storage.get_guids()} == {
+        'guid0': '18',
+        'guid1': '19',
+        'guid2': '17',
+    }
+
+    assert ssdb_storage.move('guid1', 'guid10') == 7
+    assert sorted(ssdb_storage.get_guids()) == ['guid0', 'guid10', 'guid2']
+    assert ssdb_storage.get_snapshot_at('guid10', 5).data == '4'
+    ssdb_storage.close()
+
+
+def test_textfiles_sharded_index_and_legacy_migration(tmp_path: Path) -> None:
+    """Flat files of earlier versions are moved into shards, and the index survives (or is rebuilt) across runs."""
+    legacy_guid = 'a' * 40
+    tmp_path.joinpath(legacy_guid).write_text('legacy')
+    os.utime(tmp_path.joinpath(legacy_guid), times=(1_600_000_000, 1_600_000_000))
+    ssdb_storage = SsdbDirStorage(tmp_path, max_snapshots=2)
+    assert ssdb_storage.load(legacy_guid) == Snapshot('legacy', 1_600_000_000, 0, '', '', {})
+    for i in range(3):
+        snapshot = Snapshot(f'new {i}', 1_700_000_000 + i, 0, 'etag', 'text/plain', {})
+        ssdb_storage.save(guid=legacy_guid, snapshot=snapshot)
+    ssdb_storage.save(guid='b' * 40, snapshot=Snapshot(b'\x89PNG', 1_700_000_000, 0, '', 'image/png', {}))
+    ssdb_storage.close()
+    assert sorted(path.relative_to(tmp_path).as_posix() for path in tmp_path.rglob('*') if path.is_file()) == [
+        '.index.json',
+        f'aa/aa/{legacy_guid}.3',
+        f'aa/aa/{legacy_guid}.4',
+        f'bb/bb/{"b" * 40}.1',
+    ]
+
+    ssdb_storage = SsdbDirStorage(tmp_path)
+    assert [snapshot.data for snapshot in ssdb_storage.get_history_snapshots(legacy_guid)] == ['new 2', 'new 1']
+    assert ssdb_storage.load(legacy_guid).etag == 'etag'
+    assert ssdb_storage.load('b' * 40).data == b'\x89PNG'
+
+    tmp_path.joinpath('.index.json').unlink()
+    ssdb_storage = SsdbDirStorage(tmp_path)
+    assert sorted(ssdb_storage.get_guids()) == [legacy_guid, 'b' * 40]
+    assert ssdb_storage.load(legacy_guid).timestamp == 1_700_000_002
+
+
+def test_textfiles_crash_before_close(tmp_path: Path) -> None:
+    """The files of deleted snapshots are only removed once the index is written, so that after a crash the index on
+    disk lists no missing file."""
+    ssdb_storage = SsdbDirStorage(tmp_path, max_snapshots=1)
+    ssdb_storage.save(guid='d' * 40, snapshot=Snapshot('old', 1_700_000_000, 0, '', '', {}))
+    ssdb_storage.close()
+
+    ssdb_storage = SsdbDirStorage(tmp_path, max_snapshots=1)
+    ssdb_storage.save(guid='d' * 40, snapshot=Snapshot('new', 1_700_000_001, 0, '', '', {}))
+    assert ssdb_storage.delete_latest('d' * 40) == 1
+    ssdb_storage.save(guid='d' * 40, snapshot=Snapshot('newer', 1_700_000_002, 0, '', '', {}))
+    # crash: the process ends without close()
+    assert SsdbDirStorage(tmp_path, max_snapshots=1).load('d' * 40).data == 'old'
+
+    ssdb_storage.close()
+    assert SsdbDirStorage(tmp_path, max_snapshots=1).load('d' * 40).data == 'newer'
+    assert len(list(tmp_path.glob('dd/dd/*'))) == 1
+
+
+def test_textfiles_index_flushed_to_disk(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    """The index is written to a temporary file flushed to disk before replacing the previous one."""
+    fsynced: list[int] = []
+    fsync = os.fsync
+    monkeypatch.setattr(os, 'fsync', lambda fd: fsynced.append(fd) or fsync(fd))
+    ssdb_storage = SsdbDirStorage(tmp_path)
+    ssdb_storage.save(guid='c' * 40, snapshot=Snapshot('data', 1_700_000_000, 0, '', '', {}))
+    assert not fsynced  # snapshot files are not flushed to disk
+    ssdb_storage.flush()
+    assert len(fsynced) == (1 if os.name == 'nt' else 2)  # the index file, then its directory
+    assert [path.name for path in tmp_path.iterdir() if path.is_file()] == ['.index.json']
+    assert SsdbDirStorage(tmp_path).load('c' * 40).data == 'data'
+
+
+@pytest.mark.skipif(importlib.util.find_spec('lmdb') is None, reason="requires 'lmdb' package to be installed")
+def test_lmdb_migrate_from_sqlite3_and_ordering(tmp_path: Path) -> None:
+    """Entries are kept in chronological order (even with equal or negative timestamps), read concurrently, trimmed
+    to max_snapshots on close, and can be migrated from sqlite3 with backup() and restore()."""
+    sqlite3_storage = SsdbSQLite3Storage(':memory:')  # ty:ignore[invalid-argument-type]
+    for i in range(20):
+        snapshot = Snapshot(str(i), i, 0, '', 'text/plain', {})
+        sqlite3_storage.save(guid=f'guid{i % 4}', snapshot=snapshot, temporary=False)
+    lmdb_storage = SsdbLMDBStorage(tmp_path.joinpath('snapshots.lmdb'), max_snapshots=2)
+    lmdb_storage.restore(sqlite3_storage.backup())
+    assert sorted(lmdb_storage.get_guids()) == sorted(sqlite3_storage.get_guids())
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        assert list(executor.map(lmdb_storage.load, sqlite3_storage.get_guids())) == list(
+            map(sqlite3_storage.load, sqlite3_storage.get_guids())
+        )
+    sqlite3_storage.close()
+
+    for timestamp, data in ((-5, 'a'), (-1.5, 'b'), (0, 'c'), (0, 'd'), (7, 'e')):
+        lmdb_storage.save(guid='other', snapshot=Snapshot(data, timestamp, 0, '', '', {}))
+    lmdb_storage.flush()
+    assert [snapshot.data for snapshot in lmdb_storage.get_history_snapshots('other')] == ['e', 'd', 'c', 'b', 'a']
+    assert lmdb_storage.get_snapshot_at('other', -2).data == 'a'
+    assert lmdb_storage.get_snapshot_at('other', 0).data == 'd'
+    lmdb_storage.close()
+
+    lmdb_storage = SsdbLMDBStorage(tmp_path.joinpath('snapshots.lmdb'))
+    assert [snapshot.data for snapshot in lmdb_storage.get_history_snapshots('other')] == ['e', 'd']
+    lmdb_storage.close()
+
+
+@pytest.mark.skipif(importlib.util.find_spec('lmdb') is None, reason="requires 'lmdb' package to be installed")
+def test_lmdb_map_grows(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    """The memory map starts small and is doubled when full, also while other threads read."""
+    monkeypatch.setattr(SsdbLMDBStorage, 'map_size', 1024 * 1024)
+    lmdb_storage = SsdbLMDBStorage(tmp_path.joinpath('snapshots.lmdb'), max_snapshots=0)
+    data = os.urandom(100_000).hex()
+
+    def save(guid: str) -> None:
+        for i in range(10):
+            lmdb_storage.save(guid=guid, snapshot=Snapshot(data, i, 0, '', '', {}), temporary=False)
+            assert lmdb_storage.load(guid).timestamp == i
+
+    with ThreadPoolExecutor(4) as executor:
+        list(executor.map(save, ('a', 'b', 'c', 'd')))
+    assert lmdb_storage.env.info()['map_size'] >= 8 * 1024 * 1024
+    assert [len(lmdb_storage.get_history_snapshots(guid)) for guid in lmdb_storage.get_guids()] == [10] * 4
+    lmdb_storage.close()
+
+
+@pytest.mark.skipif(importlib.util.find_spec('lmdb') is None, reason="requires 'lmdb' package to be installed")
+def test_lmdb_delete_latest_temporary_after_checkpoint(tmp_path: Path) -> None:
+    """delete_latest(temporary=True) deletes the snapshots of this run, whether queued or checkpointed."""
+    lmdb_storage = SsdbLMDBStorage(tmp_path.joinpath('snapshots.lmdb'))
+    lmdb_storage.save(guid='guid', snapshot=Snapshot('old', 1618105974, 0, '', '', {}), temporary=False)
+    lmdb_storage.save(guid='guid', snapshot=Snapshot('new', 1718105974, 0, '', '', {}))
+    lmdb_storage.flush()
+    lmdb_storage.save(guid='guid', snapshot=Snapshot('newer', 1718105975, 0, '', '', {}))
+
+    assert lmdb_storage.delete_latest('guid', delete_entries=2, temporary=True) == 2
+    assert lmdb_storage.delete_latest('guid', temporary=True) == 0
+    lmdb_storage.flush()
+    assert [snapshot.data for snapshot in lmdb_storage.get_history_snapshots('guid')] == ['old']
+    lmdb_storage.close()
+
+
+@pytest.mark.skipif(
+    not os.getenv('REDIS_URI') or importlib.util.find_spec('redis') is None,
+    reason='The REDIS_URI environment variable is not set or the redis package is not installed',
+)
+def test_redis_pipelines_and_trim() -> None:
+    """Lists are trimmed on save (or close), histories are paged with LRANGE and backup/restore are pipelined."""
+    ssdb_storage = SsdbRedisStorage(os.getenv('REDIS_URI', ''), max_snapshots=3)
+    ssdb_storage.flushdb()
+    ssdb_storage.pipeline_size = 7
+    ssdb_storage.history_page_size = 2
+    ssdb_storage.restore(
+        (f'guid{i % 10}', str(i), i, 0, '', 'text/plain', {}) for i in range(50)  # ty:ignore[invalid-argument-type]
+    )
+    assert sorted(ssdb_storage.get_guids()) == [f'guid{i}' for i in range(10)]
+    assert [snapshot.data for snapshot in ssdb_storage.get_history_snapshots('guid4')] == ['44', '34', '24']
+    assert list(ssdb_storage.get_history_data('guid4', count=2).values()) == [44, 34]
+    assert sorted(entry[1] for entry in ssdb_storage.backup()) == [str(i) for i in range(40, 50)]
+    assert ssdb_storage.clean('guid4', 1) == 2
+
+    # the saves of a run keep one more entry until closed, so that deleting the snapshot of the run keeps the others
+    ssdb_storage.save(guid='guid5', snapshot=Snapshot('run', 50, 0, '', 'text/plain', {}))
+    assert ssdb_storage.delete_latest('guid5') == 1
+    assert [snapshot.data for snapshot in ssdb_storage.get_history_snapshots('guid5')] == ['45', '35', '25']
+    ssdb_storage.save(guid='guid5', snapshot=Snapshot('run', 50, 0, '', 'text/plain', {}))
+    ssdb_storage.close()
+    ssdb_storage = SsdbRedisStorage(os.getenv('REDIS_URI', ''), max_snapshots=3)
+    assert [snapshot.data for snapshot in ssdb_storage.get_history_snapshots('guid5')] == ['run', '45', '35']
+    ssdb_storage.flushdb()
+    ssdb_storage.close()
+
+
 def test_abstractmethods() -> None:
     BaseTextualFileStorage.__abstractmethods__ = frozenset()
 
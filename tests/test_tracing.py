@@ -0,0 +1,114 @@
+"""Test the tracing of runs."""
+
+from __future__ import annotations
+
+import http.server
+import json
+import threading
+from pathlib import Path
+from typing import Any
+
+import pytest
+
+from webchanges.handler import JobState
+from webchanges.jobs import UrlJob
+from webchanges.storage import SsdbSQLite3Storage
+from webchanges.tracing import Tracer, current_span, otlp_attributes
+
+ssdb_storage = SsdbSQLite3Storage(':memory:')  # ty:ignore[invalid-argument-type]
+
+
+def spans_by_name(tracer: Tracer) -> dict[str, dict[str, Any]]:
+    spans = tracer.otlp()['resourceSpans'][0]['scopeSpans'][0]['spans']
+    return {span['name']: span for span in spans}
+
+
+def test_otlp_attributes() -> None:
+    assert otlp_attributes({'s': 'a', 'b': True, 'i': 3, 'f': 0.5}) == [
+        {'key': 's', 'value': {'stringValue': 'a'}},
+        {'key': 'b', 'value': {'boolValue': True}},
+        {'key': 'i', 'value': {'intValue': '3'}},
+        {'key': 'f', 'value': {'doubleValue': 0.5}},
+    ]
+
+
+def test_tracer_spans() -> None:
+    """Spans started without a parent are children of the span of the current context, else of the root span."""
+    tracer = Tracer()
+    with tracer.span('report stdout') as report_span:
+        assert current_span() is report_span
+        tracer.start_span('diff', None).end()
+    assert current_span() is None
+    with pytest.raises(ValueError), tracer.span('report email'):
+        raise ValueError('no server')
+    tracer.finish()
+
+    spans = spans_by_name(tracer)
+    assert 'parentSpanId' not in spans['run']
+    assert spans['report stdout']['parentSpanId'] == spans['run']['spanId']
+    assert spans['diff']['parentSpanId'] == spans['report stdout']['spanId']
+    assert spans['report email']['status'] == {'code': 2, 'message': 'ValueError: no server'}
+    assert {span['traceId'] for span in spans.values()} == {tracer.trace_id}
+    assert all(int(span['startTimeUnixNano']) <= int(span['endTimeUnixNano']) for span in spans.values())
+
+
+def test_job_state_spans(tmp_path: Path) -> None:
+    """A job is traced as a span, starting with its time in the queue, with a child span for each stage but 'save'."""
+    page = tmp_path.joinpath('page.html')
+    page.write_text('<p>Hello</p>')
+    tracer = Tracer()
+    job = UrlJob(url=page.as_uri(), filters=['html2text', 'strip'], guid='tracing', index_number=1)
+    job_state = JobState(ssdb_storage, job, tracer=tracer).process()
+    job_state.save()
+    assert job_state.timings is None
+
+    spans = spans_by_name(tracer)
+    assert spans['job 1']['parentSpanId'] == spans['run']['spanId']
+    for name in ('queue', 'load', 'retrieve', 'filters'):
+        assert spans[name]['parentSpanId'] == spans['job 1']['spanId']
+    # the snapshot is saved once the job has been processed, within the run
+    assert spans['save']['parentSpanId'] == spans['run']['spanId']
+    assert int(spans['save']['startTimeUnixNano']) >= int(spans['job 1']['endTimeUnixNano'])
+    for name in ('filters.auto', 'filters.0.html2text', 'filters.1.strip'):
+        assert spans[name]['parentSpanId'] == spans['filters']['spanId']
+    assert {'key': 'webchanges.job.location', 'value': {'stringValue': page.as_uri()}} in spans['job 1']['attributes']
+
+
+def test_job_state_span_error(tmp_path: Path) -> None:
+    tracer = Tracer()
+    job = UrlJob(url=tmp_path.joinpath('missing.html').as_uri(), guid='tracing_error', index_number=2)
+    JobState(ssdb_storage, job, tracer=tracer).process()
+    spans = spans_by_name(tracer)
+    assert spans['job 2']['status']['message'].startswith('FileNotFoundError')
+    assert spans['retrieve']['status']['message'].startswith('FileNotFoundError')
+
+
+def test_tracer_write_and_export(tmp_path: Path) -> None:
+    tracer = Tracer()
+    tracer.start_span('job 1', tracer.root).end()
+    tracer.finish()
+    trace_file = tmp_path.joinpath('trace.json')
+    tracer.write(trace_file)
+    assert json.loads(trace_file.read_text()) == tracer.otlp()
+
+    received: list[tuple[str, dict[str, Any]]] = []
+
+    class Handler(http.server.BaseHTTPRequestHandler):
+        def do_POST(self) -> None:  # noqa: N802 Function name should be lowercase.
+            body = self.rfile.read(int(self.headers['Content-Length']))
+            received.append((self.path, json.loads(body)))
+            self.send_response(200)
+            self.end_headers()
+
+        def log_message(self, *args: Any) -> None:  # noqa: ANN401 Dynamically typed expressions Any are disallowed
+            pass
+
+    server = http.server.HTTPServer(('127.0.0.1', 0), Handler)
+    thread = threading.Thread(target=server.handle_request, daemon=True)
+    thread.start()
+    try:
+        tracer.export(f'http://127.0.0.1:{server.server_port}/v1/traces')
+    finally:
+        thread.join(5)
+        server.server_close()
+    assert received == [('/v1/traces', tracer.otlp())]
@@ -2,9 +2,13 @@
 
 from __future__ import annotations
 
+import json
+import sys
+import sysconfig
+
 import pytest
 
-from webchanges.util import chunk_string, get_new_version_number, linkify
+from webchanges.util import chunk_string, get_new_version_number, gil_status, json_loads, linkify
 
 CHUNK_TEST_DATA = [
     # Numbering for just one item doesn't add the numbers
@@ -81,3 +85,32 @@ def test_linkify() -> None:
 def test_get_new_version_number() -> None:
     version = get_new_version_number(timeout=1)
     assert not version  # this version should be equal to or higher than the one in PyPi!
+
+
+def test_gil_status() -> None:
+    if sysconfig.get_config_var('Py_GIL_DISABLED') == 1:
+        assert gil_status() == ('re-enabled' if sys._is_gil_enabled() else 'disabled')  # ty:ignore[unresolved-attribute]
+    else:
+        assert gil_status() == 'enabled'
+
+
+@pytest.mark.parametrize(
+    'data',
+    [
+        '{"a": [1, 2.5, -0, "\u00e9", null, true], "a": {"b": 0.0012345678901234567}}',
+        '[18446744073709551615, -9223372036854775809, 123456789012345678901234567890]',
+        '"12345678901234567890"',
+        '[NaN, Infinity, 1e400]',
+        '"\\ud800"',
+    ],
+)
+def test_json_loads(data: str) -> None:
+    """json_loads() returns the same as json.loads(), including for what orjson handles differently."""
+    assert repr(json_loads(data)) == repr(json.loads(data))
+    assert repr(json_loads(data.encode())) == repr(json.loads(data.encode()))
+
+
+def test_json_loads_errors() -> None:
+    assert json_loads('[1]'.encode('utf-16')) == [1]
+    with pytest.raises(json.JSONDecodeError, match='Expecting value'):
+        json_loads('[1, ]')
@@ -22,7 +22,13 @@ import platformdirs
 
 from webchanges import __copyright__, __docs_url__, __min_python_version__, __project_name__, __version__
 from webchanges.config import CommandConfig
-from webchanges.util import edit_file, file_ownership_checks, get_new_version_number, import_module_from_source
+from webchanges.util import (
+    edit_file,
+    file_ownership_checks,
+    get_new_version_number,
+    gil_status,
+    import_module_from_source,
+)
 
 # Restore the default system behavior for the SIGPIPE signal, which is ignored by Python by default.
 # This prevents a BrokenPipeError when piping output to a command like `less` that may close the pipe before reading all
@@ -608,10 +614,12 @@ def show_detailed_versions() -> int:
             'jq',
             'jsbeautifier',
             'keyring',
+            'lmdb',
             'lxml',
             'markdown2',
             'matrix_client',
             'msgpack',
+            'orjson',
             'packaging',
             'pdftotext',
             'Pillow',
@@ -641,6 +649,7 @@ def show_detailed_versions() -> int:
         f'• {platform.python_implementation()}: {platform.python_version()} '
         f'{platform.python_build()} {platform.python_compiler()}'
     )
+    print(f'• GIL: {gil_status()}')
     print(f'• SQLite: {sqlite3.sqlite_version}')
 
     try:
@@ -853,7 +862,9 @@ def main() -> None:  # pragma: no cover
     from webchanges.command import UrlwatchCommand
     from webchanges.main import Urlwatch
     from webchanges.storage import (
+        FilterCache,
         SsdbDirStorage,
+        SsdbLMDBStorage,
         SsdbRedisStorage,
         SsdbSQLite3Storage,
         SsdbStorage,
@@ -910,11 +921,13 @@ def main() -> None:  # pragma: no cover
     if database_engine == 'sqlite3':
         ssdb_storage: SsdbStorage = SsdbSQLite3Storage(command_config.ssdb_file, max_snapshots)  # storage.py
     elif any(str(command_config.ssdb_file).startswith(prefix) for prefix in ('redis://', 'rediss://')):
-        ssdb_storage = SsdbRedisStorage(command_config.ssdb_file)  # storage.py
+        ssdb_storage = SsdbRedisStorage(command_config.ssdb_file, max_snapshots)  # storage.py
     elif database_engine.startswith('redis'):
-        ssdb_storage = SsdbRedisStorage(database_engine)
+        ssdb_storage = SsdbRedisStorage(database_engine, max_snapshots)
+    elif database_engine == 'lmdb':
+        ssdb_storage = SsdbLMDBStorage(command_config.ssdb_file.with_suffix('.lmdb'), max_snapshots)  # storage.py
     elif database_engine == 'textfiles':
-        ssdb_storage = SsdbDirStorage(command_config.ssdb_file)  # storage.py
+        ssdb_storage = SsdbDirStorage(command_config.ssdb_file, max_snapshots)  # storage.py
     elif database_engine == 'minidb':
         # legacy code imported only if needed (requires minidb, which is not a dependency)
         from webchanges.storage_minidb import SsdbMiniDBStorage
@@ -928,6 +941,16 @@ def main() -> None:  # pragma: no cover
 
     # Setup 'webchanges'
     urlwatcher = Urlwatch(command_config, config_storage, ssdb_storage, jobs_storage)  # main.py
+
+    # Setup the cache of the output of filters (used by jobs with 'cache_filters'), next to the snapshot database
+    if str(command_config.ssdb_file).startswith('redis'):
+        filter_cache_dir = data_path
+    else:
+        filter_cache_dir = Path(command_config.ssdb_file).parent
+    filter_cache_max_mb = config_storage.config.get('database', {}).get('filter_cache_max_mb', 100)
+    urlwatcher.filter_cache = FilterCache(
+        filter_cache_dir.joinpath('filter_cache.db'), int(filter_cache_max_mb * 1024 * 1024)
+    )  # storage.py
     urlwatch_command = UrlwatchCommand(urlwatcher)  # command.py
 
     # Run 'webchanges', starting with processing command line arguments
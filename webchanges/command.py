@@ -25,6 +25,7 @@ from zoneinfo import ZoneInfo
 from webchanges import __docs_url__, __project_name__
 from webchanges.handler import JobState, Report
 from webchanges.jobs import JobBase, NotModifiedError, UrlJob
+from webchanges.storage import export_snapshots, import_snapshots
 from webchanges.util import dur_text
 
 try:
@@ -64,6 +65,8 @@ class UrlwatchCommand:
         logger.info(f'Exiting with exit code {arg}')
 
         self.urlwatcher.ssdb_storage.close()
+        if self.urlwatcher.filter_cache is not None:
+            self.urlwatcher.filter_cache.close()
         sys.exit(arg)
 
     def jobs_from_joblist(self) -> Iterator[JobBase]:
@@ -350,10 +353,12 @@ class UrlwatchCommand:
 
         return 0
 
-    def dump_history(self, job_id: str) -> int:
+    def dump_history(self, job_id: str, timespec: str | None = None) -> int:
         """Displays the historical data stored in the snapshot database for a job.
 
         :param job_id: The Job ID.
+        :param timespec: If set, display only the snapshot that was current at this date/time (see
+           rollback_database() for the format).
         :return: An argument to be used in sys.exit.
         """
         try:
@@ -362,9 +367,16 @@ class UrlwatchCommand:
             print(f"No Job found matching '{job_id}'. Searching database using calculated GUID.")
             job = JobBase.unserialize({'url': job_id})
 
-        history_data = self.urlwatcher.ssdb_storage.get_history_snapshots(job.guid)
-
-        title = f'History for {job.get_indexed_location()}'
+        tz = self.urlwatcher.report.config['report']['tz']
+        tz_info = ZoneInfo(tz) if tz else datetime.now().astimezone().tzinfo  # from machine
+        if timespec:
+            dt = self._convert_to_datetime(timespec, tz_info)
+            snapshot = self.urlwatcher.ssdb_storage.get_snapshot_at(job.guid, dt.timestamp())
+            history_data = [snapshot] if snapshot.timestamp else []
+            title = f'Snapshot at {email.utils.format_datetime(dt)} for {job.get_indexed_location()}'
+        else:
+            history_data = self.urlwatcher.ssdb_storage.get_history_snapshots(job.guid)
+            title = f'History for {job.get_indexed_location()}'
         print(f'{title}\nGUID: {job.guid}')
         if history_data:
             print('=' * max(len(title), 46))
@@ -374,8 +386,6 @@ class UrlwatchCommand:
             etag = f' | ETag: {snapshot.etag}' if snapshot.etag else ''
             tries = f' | Error run (number {snapshot.tries})' if snapshot.tries else ''
             total_failed += snapshot.tries > 0
-            tz = self.urlwatcher.report.config['report']['tz']
-            tz_info = ZoneInfo(tz) if tz else datetime.now().astimezone().tzinfo  # from machine
             dt = datetime.fromtimestamp(snapshot.timestamp, tz_info)
             header = f'{i + 1}) {email.utils.format_datetime(dt)}{mime_type}{etag}{tries}'
             sep_len = max(50, len(header))
@@ -566,66 +576,66 @@ class UrlwatchCommand:
 
         return 0
 
-    def rollback_database(self, timespec: str) -> int:
-        """Issues a warning, calls rollback() and prints out the result.
+    @staticmethod
+    def _convert_to_datetime(timespec: str, tz_info: ZoneInfo | tzinfo | None) -> datetime:
+        """Converts inputted string to a datetime object, using dateutil if installed.
 
-        :param timestamp: A timespec that if numeric is interpreted as a Unix timestamp otherwise it's passed to
-          dateutil.parser (if datetime is installed) or datetime.fromisoformat to be converted into a date.
+        :param timespec: The string.
+        :param tz_info: The timezone.
 
-        :return: A sys.exit code (0 for succcess, 1 for failure)
+        :return: The datetime object.
         """
+        # --- 1. Try parsing as a numeric timestamp ---
+        # This is the fastest check and should come first.
+        if timespec.isnumeric() or (timespec.startswith('-') and timespec[1:].isnumeric()):
+            try:
+                timestamp = float(timespec)
+                return datetime.fromtimestamp(timestamp, tz=tz_info)
+            except (ValueError, TypeError):
+                # Pass to the next method if it's not a valid float (e.g., "123a")
+                pass
 
-        def _convert_to_datetime(timespec: str, tz_info: ZoneInfo | tzinfo | None) -> datetime:
-            """Converts inputted string to a datetime object, using dateutil if installed.
+        # --- 2. Try parsing as ISO 8601 format ---
+        # datetime.fromisoformat is very efficient for standard formats.
+        try:
+            dt = datetime.fromisoformat(timespec)
+            # If the parsed datetime is naive (no timezone), apply the provided one.
+            if dt.tzinfo is None:
+                return dt.replace(tzinfo=tz_info)
+            return dt
+        except ValueError:
+            # Pass to the next method if it's not a valid ISO string.
+            pass
 
-            :param timespec: The string.
-            :param tz_info: The timezone.
+        # --- 3. Try parsing with the flexible but slower dateutil library ---
+        try:
+            from dateutil import parser as dateutil_parser
 
-            :return: The datetime object.
-            """
-            # --- 1. Try parsing as a numeric timestamp ---
-            # This is the fastest check and should come first.
-            if timespec.isnumeric() or (timespec.startswith('-') and timespec[1:].isnumeric()):
-                try:
-                    timestamp = float(timespec)
-                    return datetime.fromtimestamp(timestamp, tz=tz_info)
-                except (ValueError, TypeError):
-                    # Pass to the next method if it's not a valid float (e.g., "123a")
-                    pass
-
-            # --- 2. Try parsing as ISO 8601 format ---
-            # datetime.fromisoformat is very efficient for standard formats.
             try:
-                dt = datetime.fromisoformat(timespec)
-                # If the parsed datetime is naive (no timezone), apply the provided one.
-                if dt.tzinfo is None:
-                    return dt.replace(tzinfo=tz_info)
-                return dt
-            except ValueError:
-                # Pass to the next method if it's not a valid ISO string.
+                # Set a default datetime to provide context and timezone for ambiguous strings like "Sunday at 4pm".
+                default_dt_with_tz = datetime.now(tz_info).replace(second=0, microsecond=0)
+                return dateutil_parser.parse(timespec, default=default_dt_with_tz)  # bug
+            except (ValueError, OverflowError):
+                # Pass to the next method if datetutil cannot parse.
                 pass
+        except ImportError:
+            # Pass to the next method if datetutil is not installed.
+            pass
 
-            # --- 3. Try parsing with the flexible but slower dateutil library ---
-            try:
-                from dateutil import parser as dateutil_parser
+        # --- 4. If all parsing attempts fail ---
+        raise ValueError(f'Cannot parse "{timespec}" into a date/time.')
 
-                try:
-                    # Set a default datetime to provide context and timezone for ambiguous strings like "Sunday at 4pm".
-                    default_dt_with_tz = datetime.now(tz_info).replace(second=0, microsecond=0)
-                    return dateutil_parser.parse(timespec, default=default_dt_with_tz)  # bug
-                except (ValueError, OverflowError):
-                    # Pass to the next method if datetutil cannot parse.
-                    pass
-            except ImportError:
-                # Pass to the next method if datetutil is not installed.
-                pass
+    def rollback_database(self, timespec: str) -> int:
+        """Issues a warning, calls rollback() and prints out the result.
 
-            # --- 4. If all parsing attempts fail ---
-            raise ValueError(f'Cannot parse "{timespec}" into a date/time.')
+        :param timestamp: A timespec that if numeric is interpreted as a Unix timestamp otherwise it's passed to
+          dateutil.parser (if datetime is installed) or datetime.fromisoformat to be converted into a date.
 
+        :return: A sys.exit code (0 for succcess, 1 for failure)
+        """
         tz = self.urlwatcher.report.config['report']['tz']
         tz_info = ZoneInfo(tz) if tz else datetime.now().astimezone().tzinfo  # from machine
-        dt = _convert_to_datetime(timespec, tz_info)
+        dt = self._convert_to_datetime(timespec, tz_info)
         timestamp_date = email.utils.format_datetime(dt)
         count = self.urlwatcher.ssdb_storage.rollback(dt.timestamp())
         print(f'Rolling back database to {timestamp_date}.')
@@ -642,11 +652,30 @@ class UrlwatchCommand:
                 return 1
         count = self.urlwatcher.ssdb_storage.rollback(dt.timestamp())
         if count:
+            self.urlwatcher.ssdb_storage.vacuum(self.urlwatch_config.vacuum or 'incremental')
             print(f'Deleted {count} snapshots taken after {timestamp_date}.')
         else:
             print(f'No snapshots found after {timestamp_date}')
         return 0
 
+    def rollback_run(self, run_id: int) -> int:
+        """Deletes the snapshots saved by a run (see SsdbSQLite3Storage.rollback_run()) and prints out the result.
+
+        :param run_id: The run ID, as logged when a run was interrupted.
+
+        :return: A sys.exit code (0 for succcess, 1 for failure)
+        """
+        if not hasattr(self.urlwatcher.ssdb_storage, 'rollback_run'):
+            print(f'--rollback-run is not supported by the {self.urlwatch_config.database_engine} database engine.')
+            return 1
+        count = self.urlwatcher.ssdb_storage.rollback_run(run_id)  # ty:ignore[call-non-callable]
+        if count:
+            self.urlwatcher.ssdb_storage.vacuum(self.urlwatch_config.vacuum or 'incremental')
+            print(f'Deleted {count} snapshots saved by run {run_id}.')
+        else:
+            print(f'No snapshots found saved by run {run_id}.')
+        return 0
+
     def delete_snapshot(self, job_id: str | int) -> int:
         job = self._find_job_with_defaults(job_id)
         history = self.urlwatcher.ssdb_storage.get_history_snapshots(job.guid)
@@ -679,6 +708,25 @@ class UrlwatchCommand:
         print(f'No snapshots found for {job.get_indexed_location()}.')
         return 1
 
+    def export_database(self, filename: Path) -> int:
+        start = time.perf_counter()
+        count = export_snapshots(self.urlwatcher.ssdb_storage, filename)
+        print(f'Exported {count} snapshots to {filename} in {dur_text(time.perf_counter() - start)}.')
+        return 0
+
+    def import_database(self, filename: Path) -> int:
+        if not filename.is_file():
+            print(f'File {filename} not found.')
+            return 1
+        start = time.perf_counter()
+        try:
+            count = import_snapshots(self.urlwatcher.ssdb_storage, filename)
+        except ValueError as e:
+            print(f'Error importing snapshots: {e}')
+            return 1
+        print(f'Imported {count} snapshots from {filename} in {dur_text(time.perf_counter() - start)}.')
+        return 0
+
     def modify_urls(self) -> int:
         if self.urlwatch_config.delete is not None:
             job = self._find_job(self.urlwatch_config.delete)
@@ -1075,7 +1123,7 @@ class UrlwatchCommand:
             self._exit(self.test_differ(self.urlwatch_config.test_differ))
 
         if self.urlwatch_config.dump_history:
-            self._exit(self.dump_history(self.urlwatch_config.dump_history))
+            self._exit(self.dump_history(self.urlwatch_config.dump_history, self.urlwatch_config.dump_history_at))
 
         if self.urlwatch_config.add or self.urlwatch_config.delete or self.urlwatch_config.change_location:
             self._exit(self.modify_urls())
@@ -1097,13 +1145,17 @@ class UrlwatchCommand:
 
         if self.urlwatch_config.gc_database:
             self.urlwatcher.ssdb_storage.gc(
-                [job.guid for job in self.urlwatcher.jobs], self.urlwatch_config.gc_database
+                [job.guid for job in self.urlwatcher.jobs],
+                self.urlwatch_config.gc_database,
+                self.urlwatch_config.vacuum or 'incremental',
             )
             self._exit(0)
 
         if self.urlwatch_config.clean_database:
             self.urlwatcher.ssdb_storage.clean_ssdb(
-                [job.guid for job in self.urlwatcher.jobs], self.urlwatch_config.clean_database
+                [job.guid for job in self.urlwatcher.jobs],
+                self.urlwatch_config.clean_database,
+                self.urlwatch_config.vacuum or 'incremental',
             )
             self._exit(0)
 
@@ -1111,9 +1163,22 @@ class UrlwatchCommand:
             exit_arg = self.rollback_database(self.urlwatch_config.rollback_database)
             self._exit(exit_arg)
 
+        if self.urlwatch_config.rollback_run is not None:
+            self._exit(self.rollback_run(self.urlwatch_config.rollback_run))
+
         if self.urlwatch_config.delete_snapshot:
             self._exit(self.delete_snapshot(self.urlwatch_config.delete_snapshot))
 
+        if self.urlwatch_config.export_database:
+            self._exit(self.export_database(self.urlwatch_config.export_database))
+
+        if self.urlwatch_config.import_database:
+            self._exit(self.import_database(self.urlwatch_config.import_database))
+
+        if self.urlwatch_config.vacuum:
+            self.urlwatcher.ssdb_storage.vacuum(self.urlwatch_config.vacuum)
+            self._exit(0)
+
         if self.urlwatch_config.features:
             self._exit(self.show_features())
 
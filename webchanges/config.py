@@ -11,6 +11,7 @@ import textwrap
 # import os
 from dataclasses import dataclass, field
 from pathlib import Path
+from typing import Literal
 
 from webchanges import __doc__ as doc
 from webchanges import __docs_url__, __project_name__, __version__
@@ -36,20 +37,25 @@ class CommandConfig(BaseConfig):
     change_location: tuple[int | str, str] | None
     check_new: bool
     clean_database: int | None
+    command_workers: int | None
     database_engine: str | None
     delete: str | None
     delete_snapshot: str | None
     detailed_versions: bool
     dump_history: str | None
+    dump_history_at: str | None
     edit: bool
     edit_config: bool
     edit_hooks: bool
     errors: str | None
+    export_database: Path | None
     features: bool
+    filter_processes: int | None
     footnote: str | None
     gc_database: int | None
     hooks_files: list[Path]
     hooks_files_inputted: bool
+    import_database: Path | None
     install_chrome: bool
     joblist: list[str | int]
     jobs_files: list[Path]
@@ -59,12 +65,17 @@ class CommandConfig(BaseConfig):
     max_workers: int | None
     no_headless: bool
     prepare_jobs: bool
+    profile: bool | Path | None
     rollback_database: str | None
+    rollback_run: int | None
     smtp_login: bool
     telegram_chats: bool
     test_differ: list[str] | None
     test_job: bool | str | None
     test_reporter: str | None
+    trace: Path | None
+    trace_endpoint: str | None
+    vacuum: Literal['incremental', 'full'] | None
     verbose: int | None
     xmpp_login: bool
 
@@ -262,12 +273,54 @@ class CommandConfig(BaseConfig):
             help='print all saved changed snapshots for a JOB (by index or URL/command)',
             metavar='JOB',
         )
+        group.add_argument(
+            '--at',
+            help='with --dump-history, print only the snapshot that was current at TIMESTAMP',
+            metavar='TIMESTAMP',
+            dest='dump_history_at',
+        )
         group.add_argument(
             '--max-workers',
             type=int,
             help='maximum number of parallel threads',
             metavar='WORKERS',
         )
+        group.add_argument(
+            '--command-workers',
+            type=int,
+            help='maximum number of parallel threads running command jobs, separately from the other jobs (default: '
+            'the number of CPUs)',
+            metavar='WORKERS',
+        )
+        group.add_argument(
+            '--filter-processes',
+            type=int,
+            help='apply the filters of jobs in PROCESSES separate processes to use multiple CPU cores (default: 0, in '
+            'the threads running the jobs)',
+            metavar='PROCESSES',
+        )
+        group.add_argument(
+            '--profile',
+            nargs='?',
+            const=True,
+            type=Path,
+            help='time the stages of each job and the reporters and print the slowest ones at the end of the run; '
+            'optionally save all timings to FILE as JSON',
+            metavar='FILE',
+        )
+        group.add_argument(
+            '--trace',
+            type=Path,
+            help='save a trace of the run, with a span for each job, stage and reporter, to FILE as OpenTelemetry '
+            '(OTLP) JSON',
+            metavar='FILE',
+        )
+        group.add_argument(
+            '--trace-endpoint',
+            help='send the trace of the run to the OpenTelemetry (OTLP/HTTP) endpoint at URL, e.g. '
+            'http://localhost:4318/v1/traces',
+            metavar='URL',
+        )
 
         group = parser.add_argument_group('reporters')
         group.add_argument(
@@ -358,6 +411,12 @@ class CommandConfig(BaseConfig):
             help='delete changed snapshots added since TIMESTAMP',
             metavar='TIMESTAMP',
         )
+        group.add_argument(
+            '--rollback-run',
+            type=int,
+            help='delete the snapshots saved by the run RUN_ID (e.g. one that was interrupted; sqlite3 only)',
+            metavar='RUN_ID',
+        )
         group.add_argument(
             '--rollback-cache',  # deprecated --rollback-database
             type=str,
@@ -369,6 +428,25 @@ class CommandConfig(BaseConfig):
             help='delete the last saved changed snapshot of JOB (index or URL/command)',
             metavar='JOB',
         )
+        group.add_argument(
+            '--export-database',
+            type=Path,
+            help='export all snapshots (full history) to FILE, compressed if its name ends in .zst',
+            metavar='FILE',
+        )
+        group.add_argument(
+            '--import-database',
+            type=Path,
+            help='import all snapshots from FILE created with --export-database (e.g. by another database engine)',
+            metavar='FILE',
+        )
+        group.add_argument(
+            '--vacuum',
+            choices=['incremental', 'full'],
+            help='reclaim the space freed by the other database commands incrementally (default) or by rebuilding the '
+            'whole database (full); if used alone, vacuum the database',
+            metavar='MODE',
+        )
         group.add_argument(
             '--prepare-jobs',
             action='store_true',
@@ -406,7 +484,7 @@ class CommandConfig(BaseConfig):
         group = parser.add_argument_group('override configuration file')
         group.add_argument(
             '--database-engine',
-            # choices=['sqlite3', 'redis', 'minidb', 'textfiles'],
+            # choices=['sqlite3', 'lmdb', 'redis', 'minidb', 'textfiles'],
             help='override database engine to use',
         )
         group.add_argument(
@@ -432,6 +510,8 @@ class CommandConfig(BaseConfig):
         )
 
         args = parser.parse_args(cmdline_args)
+        if args.dump_history_at is not None and args.dump_history is None:
+            parser.error('--at can only be used with --dump-history')
 
         for arg in vars(args):
             argval = getattr(args, arg)
@@ -1113,7 +1113,7 @@ class DeepdiffDiffer(DifferBase):
             deserialize_method = data_type or _serialize_method(media_type, data_label)
             if deserialize_method == 'json':
                 try:
-                    return json.loads(data), None
+                    return self.state.load_json(data), None
                 except json.JSONDecodeError as e:
                     self.state.exception = e
                     self.state.traceback = self.job.format_error(e, traceback.format_exc())
@@ -3,7 +3,7 @@
 # The code below is subject to the license contained in the LICENSE file, with the exception of the
 # the SOURCE CODE REDISTRIBUTION NOTICE since this code does not include any redistributed code.
 
-from webchanges.filters._base import AutoMatchFilter, FilterBase, RegexMatchFilter
+from webchanges.filters._base import AutoMatchFilter, CompiledFilterChain, FilterBase, RegexMatchFilter
 from webchanges.filters._document import (
     Csv2TextFilter,
     FormatJsonFilter,
@@ -31,7 +31,7 @@ from webchanges.filters._html import (
     PrettyXMLFilter,
     XPathFilter,
 )
-from webchanges.filters._shell import ExecuteFilter, ShellPipeFilter
+from webchanges.filters._shell import Coprocess, ExecuteFilter, ShellPipeFilter
 from webchanges.filters._text import (
     DeleteLinesContainingFilter,
     GrepFilter,
@@ -54,6 +54,8 @@ __all__ = [
     'Base64',
     'BeautifyFilter',
     'CSSFilter',
+    'CompiledFilterChain',
+    'Coprocess',
     'Csv2TextFilter',
     'DeleteLinesContainingFilter',
     'ElementByClassFilter',
@@ -4,22 +4,29 @@
 
 from __future__ import annotations
 
+import hashlib
 import itertools
+import json
 import logging
+import re
+import threading
 import warnings
-from typing import TYPE_CHECKING, Any, Iterator, Literal
+from typing import TYPE_CHECKING, Any, Callable, Iterator, Literal, TypeVar
 
 import yaml
 
+from webchanges import __version__
 from webchanges.util import TrackSubClasses
 
 if TYPE_CHECKING:
-    import re
-
     from webchanges.handler import JobState
+    from webchanges.jobs import JobBase
+    from webchanges.storage import FilterCache
 
 logger = logging.getLogger(__name__)
 
+T = TypeVar('T')
+
 
 FiltersList = Literal[
     'absolute_links',
@@ -41,11 +48,176 @@ FiltersList = Literal[
 ]
 
 
+class AutoMatchIndex:
+    """The filters that apply automatically to the jobs matching their MATCH directives (see FilterBase.auto_process()),
+    indexed when their class is defined so that those matching a job are found without instantiating every filter.
+
+    The AutoMatchFilter subclasses are indexed by the value of one of their directives (a dict lookup per directive of
+    the job), and the patterns of the RegexMatchFilter subclasses are combined into a single regular expression per
+    directive. Filters with their own match() method are tried on every job.
+    """
+
+    # Flags that can be set on a group of a combined regular expression (see _combine())
+    COMBINABLE_FLAGS = re.IGNORECASE | re.MULTILINE | re.DOTALL | re.ASCII | re.UNICODE
+    # Patterns with references to groups by number or name cannot be combined
+    GROUP_REFERENCE = re.compile(r'\\(?:[1-9]|g<)|\(\?P[<=]|\(\?\(')
+
+    def __init__(self) -> None:
+        # Sort keys that order the filters like FilterBase.__subclasses__ (by kind), then in order of definition
+        self.order: dict[type[FilterBase], tuple[int, str | int]] = {}
+        self.definitions = itertools.count()
+        self.kinds: dict[str, type[FilterBase]] = {}
+        # AutoMatchFilter subclasses by one of their (directive, value)
+        self.by_value: dict[tuple[str, Any], list[type[FilterBase]]] = {}
+        # RegexMatchFilter subclasses' patterns by directive, and their combined regular expressions (built on use)
+        self.by_regex: dict[str, list[tuple[type[FilterBase], re.Pattern]]] = {}
+        self.combined: dict[str, tuple[re.Pattern | None, dict[str, type[FilterBase]], list]] = {}
+        # Filters that are not indexed (e.g. with their own match() method), which are matched by instantiating them
+        self.unindexed: list[type[FilterBase]] = []
+
+    def add(self, filtercls: type[FilterBase]) -> None:
+        """Index a new filter class (called by TrackSubClasses).
+
+        :param filtercls: The filter class.
+        """
+        kind = filtercls.__kind__
+        if kind:
+            if kind in self.kinds:  # replaces the filter of the same kind in FilterBase.__subclasses__
+                self.remove(self.kinds.pop(kind))
+        match_by = self._match_by(filtercls)
+        if match_by is None:
+            return
+        if kind:
+            self.kinds[kind] = filtercls
+            self.order[filtercls] = (0, kind)
+        else:
+            self.order[filtercls] = (1, next(self.definitions))
+        if match_by == 'value':
+            match: dict[str, Any] = filtercls.MATCH  # ty:ignore[unresolved-attribute]
+            key = next(((k, v) for k, v in match.items() if v and isinstance(v, (str, int, float, bool))), None)
+            if key is None:  # e.g. an empty MATCH, which matches all jobs
+                self.unindexed.append(filtercls)
+            else:
+                self.by_value.setdefault(key, []).append(filtercls)
+        elif match_by == 'regex':
+            for directive, pattern in filtercls.MATCH.items():  # ty:ignore[unresolved-attribute]
+                self.by_regex.setdefault(directive, []).append((filtercls, pattern))
+                self.combined.pop(directive, None)
+        else:
+            self.unindexed.append(filtercls)
+
+    def remove(self, filtercls: type[FilterBase]) -> None:
+        """Remove a filter class from the index.
+
+        :param filtercls: The filter class.
+        """
+        self.order.pop(filtercls, None)
+        for filters in self.by_value.values():
+            if filtercls in filters:
+                filters.remove(filtercls)
+        for directive, patterns in self.by_regex.items():
+            if any(cls is filtercls for cls, _ in patterns):
+                patterns[:] = [(cls, pattern) for cls, pattern in patterns if cls is not filtercls]
+                self.combined.pop(directive, None)
+        if filtercls in self.unindexed:
+            self.unindexed.remove(filtercls)
+
+    @staticmethod
+    def _match_by(filtercls: type[FilterBase]) -> str | None:
+        """Return how the filter matches jobs: 'value' (AutoMatchFilter), 'regex' (RegexMatchFilter), 'method' (its
+        own match() method) or None if it never does.
+        """
+        if filtercls.match is FilterBase.match:
+            return None
+        owner = next((cls for cls in filtercls.__mro__ if '__match_by__' in cls.__dict__), None)
+        if owner is None or filtercls.match is not owner.__dict__['match']:
+            return 'method'
+        if getattr(filtercls, 'MATCH', None) is None:
+            return None
+        return owner.__dict__['__match_by__']
+
+    def _combine(self, directive: str) -> tuple[re.Pattern | None, dict[str, type[FilterBase]], list]:
+        """Combine the patterns of a directive into a single regular expression with one optional lookahead group per
+        pattern, so that one match() tells which patterns match. Patterns that cannot be combined (bytes, references
+        to groups, verbose or locale flags, etc.) are returned separately.
+
+        :returns: The combined regular expression (or None), the filter of each of its groups, and the list of
+           (filter, pattern) that are matched separately.
+        """
+        groups: dict[str, type[FilterBase]] = {}
+        parts: list[str] = []
+        separate = []
+        for filtercls, pattern in self.by_regex[directive]:
+            flags = ''.join(
+                letter for flag, letter in ((re.I, 'i'), (re.M, 'm'), (re.S, 's'), (re.A, 'a')) if pattern.flags & flag
+            )
+            scoped = f'(?{flags}:{pattern.pattern})' if flags else pattern.pattern
+            part = f'(?:(?=(?P<_{len(groups)}>{scoped})))?'
+            if (
+                not isinstance(pattern.pattern, str)
+                or pattern.flags & ~self.COMBINABLE_FLAGS
+                or self.GROUP_REFERENCE.search(pattern.pattern)
+            ):
+                separate.append((filtercls, pattern))
+                continue
+            try:
+                re.compile(part)
+            except re.error:  # e.g. global inline flags not at the start of the combined expression
+                separate.append((filtercls, pattern))
+                continue
+            groups[f'_{len(groups)}'] = filtercls
+            parts.append(part)
+        return (re.compile(''.join(parts)) if parts else None), groups, separate
+
+    def matching(self, job: JobBase) -> list[tuple[type[FilterBase], bool]]:
+        """Find the filters that may apply automatically to a job.
+
+        :param job: The job.
+        :returns: The filter classes in the order in which to apply them, each with whether it is known to match (else
+           its match() method is to be called).
+        """
+        if not self.order:
+            return []
+        d = job.to_dict()
+        found: dict[type[FilterBase], bool] = dict.fromkeys(self.unindexed, False)
+        for key in d.items():
+            try:
+                filters = self.by_value.get(key, ())
+            except TypeError:  # unhashable value
+                continue
+            for filtercls in filters:
+                if all(d.get(k) == v for k, v in filtercls.MATCH.items()):  # ty:ignore[unresolved-attribute]
+                    found[filtercls] = True
+
+        # A RegexMatchFilter matches if at least one of its directives is in the job and all of those match
+        regex_matches: dict[type[FilterBase], bool] = {}
+        for directive, patterns in self.by_regex.items():
+            if directive not in d or not patterns:
+                continue
+            value = d[directive]
+            combined = self.combined.get(directive)
+            if combined is None:
+                combined = self.combined[directive] = self._combine(directive)
+            regex, groups, separate = combined
+            if regex is not None and isinstance(value, str):
+                matched = regex.match(value).groupdict()  # ty:ignore[possibly-missing-attribute]
+                for group, filtercls in groups.items():
+                    regex_matches[filtercls] = regex_matches.get(filtercls, True) and matched[group] is not None
+            else:
+                separate = patterns
+            for filtercls, pattern in separate:
+                regex_matches[filtercls] = regex_matches.get(filtercls, True) and bool(pattern.match(value))
+        found.update((filtercls, True) for filtercls, result in regex_matches.items() if result)
+
+        return sorted(found.items(), key=lambda filtercls_known: self.order[filtercls_known[0]])
+
+
 class FilterBase(metaclass=TrackSubClasses):
     """The base class for filters."""
 
     __subclasses__: dict[str, type[FilterBase]] = {}
     __anonymous_subclasses__: list[type[FilterBase]] = []
+    __subclass_index__ = AutoMatchIndex()
 
     __kind__: str = ''
 
@@ -54,12 +226,17 @@ class FilterBase(metaclass=TrackSubClasses):
     __default_subfilter__: str
     __no_subfilter__: bool
     __uses_bytes__: bool
+    __cacheable__: bool  # whether the output is cached for jobs with 'cache_filters' (see CompiledFilterChain)
     method: str
 
     def __init__(self, state: JobState) -> None:
         """:param state: the JobState."""
         self.job = state.job
         self.state = state
+        # Objects compiled from the subfilter (see cached()); a CompiledFilterChain replaces it with its step's own
+        self.precompiled: dict[str, Any] = {}
+        # Set by a CompiledFilterChain when the next filter takes the parsed document (see parsed_method())
+        self.hand_over_parsed = False
 
     @classmethod
     def filter_documentation(cls) -> str:
@@ -88,14 +265,9 @@ class FilterBase(metaclass=TrackSubClasses):
         :param data: The data to be processed (filtered).
         :returns: The output from the chain of filters (filtered data).
         """
-        filters = itertools.chain(
-            (filtercls for _, filtercls in sorted(cls.__subclasses__.items(), key=lambda k_v: k_v[0])),
-            cls.__anonymous_subclasses__,
-        )
-
-        for filtercls in filters:
+        for filtercls, known_match in cls.__subclass_index__.matching(state.job):
             filter_instance = filtercls(state)
-            if filter_instance.match():
+            if known_match or filter_instance.match():
                 logger.info(f'Job {state.job.index_number}: Auto-applying filter {filter_instance}')
                 data, mime_type = filter_instance.filter(data, mime_type, {})  # All filters take a subfilter
 
@@ -225,12 +397,7 @@ class FilterBase(metaclass=TrackSubClasses):
         :param filter_name: The filter.
         :returns: True if the first filter requires data in bytes.
         """
-        first_filter = next(cls.normalize_filter_list(filter_name), None)
-        if first_filter is not None:
-            filter_kind, _ = first_filter
-            return cls.is_bytes_filter_kind(filter_kind)
-
-        return False
+        return CompiledFilterChain.get(filter_name).needs_bytes
 
     @classmethod
     def is_bytes_filter_kind(cls, filter_kind: str) -> bool:
@@ -239,9 +406,60 @@ class FilterBase(metaclass=TrackSubClasses):
         :param filter_kind: The filter name.
         :returns: True if the filter requires data in bytes.
         """
-        return filter_kind in (
-            name for name, class_ in cls.__subclasses__.items() if getattr(class_, '__uses_bytes__', False)
-        )
+        return getattr(cls.__subclasses__.get(filter_kind), '__uses_bytes__', False)
+
+    @classmethod
+    def parsed_method(cls, subfilter: dict[str, Any]) -> str | None:
+        """Return the method ('html' or 'xml') of the documents parsed by the filter if it can take such a document
+        as data instead of a string and, when its 'hand_over_parsed' attribute is set, return one instead of
+        serializing its result, or None if it cannot. A CompiledFilterChain hands the parsed document over between
+        consecutive filters with the same method.
+
+        :param subfilter: The subfilter information.
+        :returns: The method or None.
+        """
+        return None
+
+    def line_stage(self, subfilter: dict[str, Any]) -> Callable[[list[str]], list[str]] | None:
+        """Return the filter as a function of the lines of the data (as split by str.splitlines(keepends=True)) that
+        returns the lines of the result, or None if it cannot be applied to lines with this subfilter. A
+        CompiledFilterChain runs consecutive line filters as such functions, so that the data is split into lines
+        and joined again only once.
+
+        :param subfilter: The subfilter information.
+        :returns: The function or None.
+        """
+        return None
+
+    def cached(self, key: str, factory: Callable[[], T]) -> T:
+        """Return an object derived from the subfilter only (e.g. a compiled regular expression), creating it with
+        'factory' the first time. When the filter is run by a CompiledFilterChain, the object is kept with the chain
+        and therefore reused across runs.
+
+        :param key: The name of the object.
+        :param factory: A function creating the object.
+        :returns: The object.
+        """
+        try:
+            return self.precompiled[key]
+        except KeyError:
+            return self.precompiled.setdefault(key, factory())
+        except AttributeError:  # subclass not calling FilterBase.__init__()
+            self.precompiled = {}
+            return self.precompiled.setdefault(key, factory())
+
+    def cached_regex(self, subfilter: dict[str, Any], key: str) -> re.Pattern:
+        """Return the compiled regular expression of subfilter 'key' (see cached()).
+
+        :param subfilter: The subfilter information.
+        :param key: The subfilter containing the regular expression.
+        :returns: The compiled regular expression.
+        """
+        try:
+            return self.cached(key, lambda: re.compile(subfilter[key]))
+        except re.error as e:  # FIXIT: Python version 3.13+ change to re.PatternError
+            e.args = (f'{e.args[0]} (pattern: "{subfilter[key]}")', *e.args[1:])
+            raise
 
     def match(self) -> bool:
         """Method used by automatch filters.
@@ -279,6 +497,8 @@ class AutoMatchFilter(FilterBase):
     MATCH is a dict of {directive: text to match}.
     """
 
+    __match_by__ = 'value'  # see AutoMatchIndex
+
     MATCH: dict[str, str] | None = None
 
     def match(self) -> bool:
@@ -311,6 +531,8 @@ class RegexMatchFilter(FilterBase):
     Expression Object is a compiled regex.
     """
 
+    __match_by__ = 'regex'  # see AutoMatchIndex
+
     MATCH: dict[str, re.Pattern] | None = None
 
     def match(self) -> bool:
@@ -338,3 +560,171 @@ class RegexMatchFilter(FilterBase):
         :returns: The data and media type (fka MIME type) of the data after the filter has been applied.
         """
         raise NotImplementedError
+
+
+class CompiledFilterChain:
+    """A list of filters (e.g. a job's 'filters' or 'diff_filters' directive) normalized and validated once, with
+    the class of each filter resolved.
+
+    Chains are obtained with get(), which keeps them for the life of the process keyed by their specification, so
+    that the specification is not normalized again at every use and the objects that the filters precompile from
+    their subfilters (regular expressions, CSS selectors, XPath expressions; see FilterBase.cached()) are built only
+    once per job.
+
+    Consecutive filters working on the same parsed document (e.g. 'css' and 'xpath'; see FilterBase.parsed_method())
+    hand it over to each other, so that it is serialized only once, for the next text filter or the result.
+    Likewise, consecutive line filters (e.g. 'keep_lines_containing' and 'strip'; see FilterBase.line_stage()) are
+    applied to the list of lines of the data, which is split and joined only once.
+
+    For jobs with the 'cache_filters' directive, the output of the expensive filters (those with __cacheable__) is
+    saved in the JobState's FilterCache and reused at the next run if their input is unchanged.
+    """
+
+    max_cached = 4096  # maximum number of chains kept by get() (the cache is emptied when exceeded)
+
+    _cache: dict[str, CompiledFilterChain] = {}
+    _cache_lock = threading.Lock()
+
+    def __init__(
+        self,
+        filter_spec: str | list[str | dict[str, Any]] | None,
+        job_index_number: int | None = None,
+    ) -> None:
+        """:param filter_spec: A list of either filter_kind, subfilter (where subfilter is a dict) or a legacy
+           string-based filter list specification.
+        :param job_index_number: The job index number (for error messages).
+        :raises ValueError: If the specification is invalid.
+        """
+        self.steps: list[tuple[str, dict[str, Any], type[FilterBase], dict[str, Any]]] = [
+            (filter_kind, subfilter, FilterBase.__subclasses__[filter_kind], {})
+            for filter_kind, subfilter in FilterBase.normalize_filter_list(filter_spec, job_index_number)
+        ]
+        self.needs_bytes: bool = bool(self.steps) and getattr(self.steps[0][2], '__uses_bytes__', False)
+        # Whether each filter hands its parsed document over to the next one instead of serializing it
+        methods = [filtercls.parsed_method(subfilter) for _, subfilter, filtercls, _ in self.steps]
+        self.hand_over: list[bool] = [
+            method is not None and method == next_method for method, next_method in zip(methods, methods[1:])
+        ] + [False] * bool(methods)
+        # Whether each filter is applied to lines together with the previous or next one (see line_stage())
+        line_filters = [filtercls.line_stage is not FilterBase.line_stage for _, _, filtercls, _ in self.steps]
+        self.fused: list[bool] = [
+            line_filter and (previous or following)
+            for line_filter, previous, following in zip(
+                line_filters, [False, *line_filters], [*line_filters[1:], False]
+            )
+        ]
+        # The key in the FilterCache of the output of each cacheable filter (None for the others)
+        self.cache_keys: list[str | None] = [
+            hashlib.blake2b(
+                json.dumps([__version__, i, filter_kind, subfilter], sort_keys=True, default=repr).encode(),
+                digest_size=20,
+            ).hexdigest()
+            if getattr(filtercls, '__cacheable__', False) and not hand_over
+            else None
+            for i, ((filter_kind, subfilter, filtercls, _), hand_over) in enumerate(zip(self.steps, self.hand_over))
+        ]
+        # The name of each filter's part of the stage of the job in which it is applied (see process())
+        self.stage_names: list[str] = [f'{i}.{filter_kind}' for i, (filter_kind, _, _, _) in enumerate(self.steps)]
+
+    @classmethod
+    def get(
+        cls,
+        filter_spec: str | list[str | dict[str, Any]] | None,
+        job_index_number: int | None = None,
+    ) -> CompiledFilterChain:
+        """Return the chain of a filter specification, compiling it the first time.
+
+        :param filter_spec: A list of either filter_kind, subfilter (where subfilter is a dict) or a legacy
+           string-based filter list specification.
+        :param job_index_number: The job index number (for error messages).
+        :returns: The CompiledFilterChain.
+        :raises ValueError: If the specification is invalid.
+        """
+        key = json.dumps(filter_spec, sort_keys=True, default=repr)
+        chain = cls._cache.get(key)
+        if chain is None:
+            chain = cls(filter_spec, job_index_number)
+            with cls._cache_lock:
+                if len(cls._cache) >= cls.max_cached:
+                    cls._cache.clear()
+                chain = cls._cache.setdefault(key, chain)
+        return chain
+
+    def process(
+        self, job_state: JobState, data: str | bytes, mime_type: str, stage: str = 'filters'
+    ) -> tuple[str | bytes, str]:
+        """Apply the filters to the data.
+
+        :param job_state: The JobState object (containing the Job).
+        :param data: The data upon which to apply the filters.
+        :param mime_type: The media type (fka MIME type) of the data.
+        :param stage: The stage of the job under which the time spent in each filter is recorded, if profiling or
+           tracing (see JobState.timed()).
+        :returns: The data and media type (fka MIME type) of the data after the filters have been applied.
+        """
+        lines: list[str] | None = None  # the lines of the data while applying fused line filters
+        filter_cache = job_state.filter_cache if job_state.job.cache_filters else None
+        for (filter_kind, subfilter, filtercls, precompiled), hand_over, fused, cache_key, stage_name in zip(
+            self.steps, self.hand_over, self.fused, self.cache_keys, self.stage_names
+        ):
+            logger.info(f'Job {job_state.job.index_number}: Applying filter {filter_kind}, subfilter(s) {subfilter}')
+            with job_state.timed(stage, stage_name):
+                filter_instance = filtercls(job_state)
+                filter_instance.precompiled = precompiled
+                filter_instance.hand_over_parsed = hand_over
+                line_stage = filter_instance.line_stage(subfilter) if fused and isinstance(data, str) else None
+                if line_stage is not None:
+                    if lines is None:
+                        lines = data.splitlines(keepends=True)  # ty:ignore[possibly-missing-attribute]
+                    lines = line_stage(lines)
+                    continue
+                if lines is not None:
+                    data = ''.join(lines)
+                    lines = None
+                if filter_cache is not None and cache_key is not None and isinstance(data, (str, bytes)):
+                    data, mime_type = self._cached_filter(
+                        filter_cache, cache_key, filter_instance, data, mime_type, subfilter
+                    )
+                else:
+                    data, mime_type = filter_instance.filter(data, mime_type, subfilter)
+        if lines is not None:
+            data = ''.join(lines)
+        return data, mime_type
+
+    @staticmethod
+    def _cached_filter(
+        filter_cache: FilterCache,
+        cache_key: str,
+        filter_instance: FilterBase,
+        data: str | bytes,
+        mime_type: str,
+        subfilter: dict[str, Any],
+    ) -> tuple[str | bytes, str]:
+        """Apply a filter, or take its output from the FilterCache if it was last applied to the same data.
+
+        :param filter_cache: The FilterCache.
+        :param cache_key: The key of the filter's output in the FilterCache.
+        :param filter_instance: The filter.
+        :param data: The data upon which to apply the filter.
+        :param mime_type: The media type (fka MIME type) of the data.
+        :param subfilter: The subfilter information.
+        :returns: The data and media type (fka MIME type) of the data after the filter has been applied.
+        """
+        job = filter_instance.job
+        input_digest = filter_cache.digest(data, mime_type)
+        cached = filter_cache.load(job.guid, cache_key, input_digest)
+        if cached is not None:
+            logger.info(f'Job {job.index_number}: Input of filter {filter_instance.__kind__} unchanged; using cache')
+            data, mime_type, job_changes = cached
+            for attr, value in job_changes.items():
+                setattr(job, attr, value)
+            return data, mime_type
+        before = vars(job).copy()
+        data, mime_type = filter_instance.filter(data, mime_type, subfilter)
+        job_changes = {
+            k: v
+            for k, v in vars(job).items()
+            if (k not in before or before[k] is not v) and isinstance(v, (str, int, float, bool, type(None)))
+        }
+        filter_cache.save(job.guid, cache_key, input_digest, data, mime_type, job_changes)
+        return data, mime_type
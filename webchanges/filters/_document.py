@@ -5,17 +5,24 @@
 from __future__ import annotations
 
 import csv
+import functools
+import hashlib
 import io
 import json
 import logging
-from typing import Any, Literal
+import math
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from typing import TYPE_CHECKING, Any, Callable, Literal
 
 import yaml
 
+from webchanges import __version__
 from webchanges.filters._base import FilterBase
 
 try:
     from pypdf import PdfReader
+    from pypdf.generic import ArrayObject, DictionaryObject, IndirectObject, StreamObject
 except ImportError as e:  # pragma: no cover
     PdfReader = str(e)  # ty:ignore[invalid-assignment]
 
@@ -44,6 +51,10 @@ try:
 except ImportError as e:  # pragma: has-jq
     jq = str(e)
 
+if TYPE_CHECKING:
+    from PIL.Image import Image as ImageType
+    from pypdf import PageObject
+
 logger = logging.getLogger(__name__)
 
 
@@ -93,6 +104,169 @@ class Csv2TextFilter(FilterBase):
         return '\n'.join(lines), 'text/plain'
 
 
+def _page_indexes(pages: int | str | None, count: int) -> list[int]:
+    """Return the (0-based) indexes of the pages of a PDF selected by the 'pages' sub-directive.
+
+    :param pages: The 1-based page numbers and ranges, separated by commas (e.g. '1-3, 7, 10-'), or None for all.
+    :param count: The number of pages in the PDF.
+    :returns: The indexes of the existing pages selected, in order.
+    :raises ValueError: If 'pages' is invalid.
+    """
+    if pages is None:
+        return list(range(count))
+    selected: set[int] = set()
+    for part in str(pages).split(','):
+        first, dash, last = part.partition('-')
+        try:
+            start = int(first) if first.strip() else 1
+            end = start if not dash else int(last) if last.strip() else max(count, start)
+        except ValueError:
+            raise ValueError(f"Invalid 'pages' sub-directive {pages!r}: expected e.g. '1-3, 7, 10-'") from None
+        if start < 1 or end < start:
+            raise ValueError(f"Invalid page range {part.strip()!r} in 'pages' sub-directive {pages!r}")
+        selected.update(range(start - 1, min(end, count)))
+    return sorted(selected)
+
+
+def _pypdf_texts(
+    data: bytes | PdfReader, password: str | None, indexes: list[int], extraction_mode: str
+) -> list[str]:
+    """Extract the text of pages of a PDF with pypdf (run in a separate process if the filter has 'processes').
+
+    :param data: The PDF, or its reader if already open.
+    :param password: The password of the PDF.
+    :param indexes: The indexes of the pages.
+    :param extraction_mode: The pypdf extraction mode.
+    :returns: The text of each page.
+    """
+    reader = data if isinstance(data, PdfReader) else PdfReader(io.BytesIO(data), password=password)
+    return [reader.pages[i].extract_text(extraction_mode=extraction_mode) for i in indexes]  # ty:ignore[invalid-argument-type]
+
+
+def _pdftotext_texts(data: bytes, password: str | None, indexes: list[int], raw: bool, physical: bool) -> list[str]:
+    """Extract the text of pages of a PDF with pdftotext (run in a separate process if the filter has 'processes').
+
+    :param data: The PDF.
+    :param password: The password of the PDF.
+    :param indexes: The indexes of the pages.
+    :param raw: Whether to output the text in content stream order.
+    :param physical: Whether to reproduce the physical layout.
+    :returns: The text of each page.
+    """
+    pdf = pdftotext.PDF(  # ty:ignore[unresolved-attribute]
+        io.BytesIO(data), password=password or '', raw=raw, physical=physical
+    )
+    return [pdf[i] for i in indexes]
+
+
+def _pdf_page_digest(page: PageObject) -> str:
+    """Return a digest of what the text of a PDF page is extracted from: its content stream and the resources it uses
+    (fonts, form XObjects, etc.), but not the data of its images.
+
+    :param page: The pypdf page.
+    :returns: The hexadecimal digest.
+    """
+    h = hashlib.blake2b(digest_size=20)
+    seen: set[tuple[int, int]] = set()
+
+    def update(obj: Any) -> None:
+        if isinstance(obj, IndirectObject):
+            if (obj.idnum, obj.generation) in seen:
+                h.update(f'R{obj.idnum}'.encode())
+                return
+            seen.add((obj.idnum, obj.generation))
+            obj = obj.get_object()
+        if isinstance(obj, DictionaryObject):
+            h.update(b'<<')
+            for key in sorted(obj):
+                if key not in {'/Parent', '/Annots', '/Thumb'}:
+                    h.update(key.encode())
+                    update(obj.raw_get(key))
+            h.update(b'>>')
+            if isinstance(obj, StreamObject) and obj.get('/Subtype') != '/Image':
+                h.update(obj.get_data())
+        elif isinstance(obj, ArrayObject):
+            h.update(b'[')
+            for item in obj:
+                update(item)
+            h.update(b']')
+        else:
+            h.update(repr(obj).encode())
+
+    update(page)
+    return h.hexdigest()
+
+
+def _extract_pdf_pages(
+    filter_instance: FilterBase,
+    extract: Callable[..., list[str]],
+    data: bytes,
+    subfilter: dict[str, Any],
+    **options: Any,
+) -> str:
+    """Extract the text of the pages of a PDF selected by the 'pages' sub-directive, in a pool of separate processes
+    if the 'processes' sub-directive is greater than 1. If the job has the 'cache_filters' directive, the text of each
+    page is kept in the FilterCache, keyed by the digest of its content (see _pdf_page_digest()), so that only the
+    pages that changed since the last run are extracted again; this needs pypdf, without which pdf2text extracts all
+    the pages.
+
+    :param filter_instance: The PDF filter.
+    :param extract: The function extracting the text of pages (_pypdf_texts() or _pdftotext_texts()).
+    :param data: The PDF.
+    :param subfilter: The subfilter information.
+    :param options: The keyword arguments of 'extract' other than data, password and indexes.
+    :returns: The text of the pages, separated by newlines.
+    """
+    job = filter_instance.job
+    password = subfilter.get('password')
+    filter_cache = filter_instance.state.filter_cache if job.cache_filters else None
+    if filter_cache is not None and isinstance(PdfReader, str):
+        logger.info(f'Job {job.index_number}: Not caching the text of PDF pages as pypdf is not installed')
+        filter_cache = None
+    source: bytes | PdfReader = data
+    if extract is _pypdf_texts or filter_cache is not None:
+        source = reader = PdfReader(io.BytesIO(data), password=password)
+        logger.info(f'Job {job.index_number}: Found {reader.pdf_header} file')
+        digests: list[str | None] = [
+            _pdf_page_digest(page) if filter_cache is not None else None for page in reader.pages
+        ]
+    else:
+        digests = [None] * len(pdftotext.PDF(io.BytesIO(data), password=password or ''))  # ty:ignore[unresolved-attribute]
+    indexes = _page_indexes(subfilter.get('pages'), len(digests))
+
+    texts: dict[int, str] = {}
+    steps: dict[int, str] = {}
+    if filter_cache is not None:
+        for i in indexes:
+            steps[i] = hashlib.blake2b(
+                json.dumps([__version__, filter_instance.__kind__, options, digests[i]], sort_keys=True).encode(),
+                digest_size=20,
+            ).hexdigest()
+            cached = filter_cache.load(job.guid, steps[i], digests[i])  # ty:ignore[invalid-argument-type]
+            if cached is not None:
+                texts[i] = cached[0]  # ty:ignore[invalid-assignment]
+        logger.info(f'Job {job.index_number}: {len(texts)} of {len(indexes)} PDF pages unchanged; using cache')
+    missing = [i for i in indexes if i not in texts]
+
+    processes = min(subfilter.get('processes') or 1, len(missing))
+    if processes > 1:
+        logger.info(f'Job {job.index_number}: Extracting the text of {len(missing)} PDF pages in {processes} processes')
+        chunks = [missing[n::processes] for n in range(processes)]
+        with ProcessPoolExecutor(processes, mp_context=multiprocessing.get_context('spawn')) as executor:
+            futures = [executor.submit(extract, data, password, chunk, **options) for chunk in chunks]
+            for chunk, future in zip(chunks, futures, strict=True):
+                texts.update(zip(chunk, future.result(), strict=True))
+    elif missing:
+        if extract is not _pypdf_texts:
+            source = data
+        texts.update(zip(missing, extract(source, password, missing, **options), strict=True))
+
+    if filter_cache is not None:
+        for i in missing:
+            filter_cache.save(job.guid, steps[i], digests[i], texts[i], 'text/plain', {})  # ty:ignore[invalid-argument-type]
+    return '\n'.join(texts[i] for i in indexes)
+
+
 class PypdfFilter(FilterBase):
     """Convert PDF to plaintext (requires Python package ``pypdf``)."""
 
@@ -102,10 +276,13 @@ class PypdfFilter(FilterBase):
 
     __kind__ = 'pypdf'
     __uses_bytes__ = True
+    __cacheable__ = True
 
     __supported_subfilters__: dict[str, str] = {
         'password': 'PDF password for decryption',
         'extraction_mode': '"layout" for experimental layout mode functionality',
+        'pages': 'Pages to extract, e.g. "1-3, 7, 10-" (default: all)',
+        'processes': 'Number of processes extracting pages in parallel (default: 1)',
     }
 
     __default_subfilter__ = 'password'
@@ -146,11 +323,7 @@ class PypdfFilter(FilterBase):
                     "Please install with 'uv pip install --upgrade webchanges[pypdf_crypto]'",
                 )
 
-        reader = PdfReader(io.BytesIO(data), password=password)
-        logger.info(f'Job {self.job.index_number}: Found {reader.pdf_header} file')
-        text = [page.extract_text(extraction_mode=extraction_mode) for page in reader.pages]
-
-        return '\n'.join(text), 'text/plain'
+        return _extract_pdf_pages(self, _pypdf_texts, data, subfilter, extraction_mode=extraction_mode), 'text/plain'
 
 
 class Pdf2TextFilter(FilterBase):  # pragma: has-pdftotext
@@ -162,11 +335,14 @@ class Pdf2TextFilter(FilterBase):  # pragma: has-pdftotext
 
     __kind__ = 'pdf2text'
     __uses_bytes__ = True
+    __cacheable__ = True
 
     __supported_subfilters__: dict[str, str] = {
         'password': 'PDF password for decryption',
         'raw': 'If true, output text in same order as in PDF content stream',
         'physical': 'If true, try to format text to look the same (columns etc.)',
+        'pages': 'Pages to extract, e.g. "1-3, 7, 10-" (default: all)',
+        'processes': 'Number of processes extracting pages in parallel (default: 1)',
     }
 
     __default_subfilter__ = 'password'
@@ -183,13 +359,13 @@ class Pdf2TextFilter(FilterBase):  # pragma: has-pdftotext
             self.raise_import_error('pdftotext', self.__kind__, pdftotext)
 
         return (
-            '\n'.join(
-                pdftotext.PDF(  # ty:ignore[unresolved-attribute]
-                    io.BytesIO(data),
-                    password=subfilter.get('password', ''),
-                    raw=subfilter.get('method', False),
-                    physical=subfilter.get('physical', True),
-                ),
+            _extract_pdf_pages(
+                self,
+                _pdftotext_texts,
+                data,
+                subfilter,
+                raw=subfilter.get('raw', False),
+                physical=subfilter.get('physical', True),
             ),
             'text/plain',
         )
@@ -231,15 +407,65 @@ class Ical2TextFilter(FilterBase):
         return '\n'.join(result), 'text/plain'
 
 
+def _image_digest(image: ImageType) -> str:
+    """Return a digest of the pixels of an image, which unlike a digest of its file does not change when an identical
+    image is encoded differently (e.g. a screenshot saved with another compression level or timestamp).
+
+    :param image: The image.
+    :returns: The hexadecimal digest.
+    """
+    h = hashlib.blake2b(f'{image.mode}{image.size}'.encode(), digest_size=20)
+    h.update(image.tobytes())
+    return h.hexdigest()
+
+
+def _image_tiles(image: ImageType, tile_height: int) -> list[ImageType]:
+    """Split an image into horizontal bands of about 'tile_height' pixels. Each band is cut at the uniform row (e.g.
+    the blank space between lines of text) nearest to its target height, if any within a quarter of 'tile_height', so
+    as not to cut through text.
+
+    :param image: The image.
+    :param tile_height: The target height of the bands, in pixels.
+    :returns: The bands, from top to bottom.
+    """
+    gray = image.convert('L')
+    width, height = image.size
+    tiles = []
+    top = 0
+    while height - top > tile_height:
+        target = top + tile_height
+        cut = target
+        for offset in range(tile_height // 4):
+            row = next(
+                (
+                    y
+                    for y in (target - offset, target + offset)
+                    if top < y < height and len(set(gray.crop((0, y, width, y + 1)).getextrema())) == 1
+                ),
+                None,
+            )
+            if row is not None:
+                cut = row
+                break
+        tiles.append(image.crop((0, top, width, cut)))
+        top = cut
+    tiles.append(image.crop((0, top, width, height)))
+    return tiles
+
+
 class OCRFilter(FilterBase):  # pragma: has-pytesseract
     """Convert text in images to plaintext (requires Python packages ``pytesseract`` and ``Pillow``)."""
 
     __kind__ = 'ocr'
     __uses_bytes__ = True
+    __cacheable__ = True
 
     __supported_subfilters__: dict[str, str] = {
         'language': 'Language of the text (e.g. "fra" or "eng+fra")',
         'timeout': 'Timeout (in seconds) for OCR (default 10 seconds)',
+        'max_pixels': 'Downscale larger images to this number of pixels (default: no downscaling)',
+        'tile_height': 'Recognize the image in horizontal bands of about this height in pixels (default: whole)',
+        'processes': 'Number of Tesseract processes recognizing bands in parallel (default: 1)',
     }
 
     def filter(self, data: str | bytes, mime_type: str, subfilter: dict[str, Any]) -> tuple[str | bytes, str]:
@@ -258,10 +484,57 @@ class OCRFilter(FilterBase):  # pragma: has-pytesseract
         if isinstance(pytesseract, str):
             self.raise_import_error('pytesseract', self.__kind__, pytesseract)
 
-        return (
-            pytesseract.image_to_string(Image.open(io.BytesIO(data)), lang=language, timeout=timeout).strip(),  # ty:ignore[unresolved-attribute]
-            'text/plain',
-        )
+        image = Image.open(io.BytesIO(data))
+        if image.mode not in {'1', 'L', 'RGB', 'RGBA'}:  # e.g. palette (GIF), so that the same pixels have one digest
+            image = image.convert('RGBA' if image.has_transparency_data else 'RGB')
+        max_pixels = subfilter.get('max_pixels')
+        if max_pixels and image.width * image.height > max_pixels:
+            scale = math.sqrt(max_pixels / (image.width * image.height))
+            size = (max(1, int(image.width * scale)), max(1, int(image.height * scale)))
+            logger.info(f'Job {self.job.index_number}: Downscaling image from {image.size} to {size} for OCR')
+            image = image.resize(size, Image.Resampling.LANCZOS)
+
+        processes = subfilter.get('processes') or 1
+        tile_height = subfilter.get('tile_height') or (math.ceil(image.height / processes) if processes > 1 else None)
+        tiles = _image_tiles(image, tile_height) if tile_height else [image]
+
+        # With the 'cache_filters' directive, the text of each band is cached by the digest of its pixels
+        filter_cache = self.state.filter_cache if self.job.cache_filters else None
+        texts: dict[int, str] = {}
+        keys: dict[int, tuple[str, str]] = {}
+        if filter_cache is not None:
+            for i, tile in enumerate(tiles):
+                digest = _image_digest(tile)
+                step = hashlib.blake2b(
+                    json.dumps([__version__, self.__kind__, language, digest]).encode(), digest_size=20
+                ).hexdigest()
+                keys[i] = (step, digest)
+                cached = filter_cache.load(self.job.guid, step, digest)
+                if cached is not None:
+                    texts[i] = cached[0]  # ty:ignore[invalid-assignment]
+            logger.info(f'Job {self.job.index_number}: {len(texts)} of {len(tiles)} image bands unchanged; using cache')
+        missing = [i for i in range(len(tiles)) if i not in texts]
+
+        def recognize(i: int) -> str:
+            return pytesseract.image_to_string(tiles[i], lang=language, timeout=timeout).strip()  # ty:ignore[unresolved-attribute]
+
+        # pytesseract runs Tesseract in a subprocess, so threads are enough to recognize bands in parallel
+        if min(processes, len(missing)) > 1:
+            with ThreadPoolExecutor(min(processes, len(missing))) as executor:
+                texts.update(zip(missing, executor.map(recognize, missing), strict=True))
+        else:
+            texts.update((i, recognize(i)) for i in missing)
+
+        if filter_cache is not None:
+            for i in missing:
+                filter_cache.save(self.job.guid, *keys[i], texts[i], 'text/plain', {})
+        return '\n'.join(text for _, text in sorted(texts.items()) if text), 'text/plain'
+
+
+@functools.lru_cache(maxsize=256)
+def _jq_program(query: str) -> Any:  # noqa: ANN401 Dynamically typed expressions Any are disallowed
+    """Compile a jq query once per run (jq programs can be used by multiple threads)."""
+    return jq.compile(query)  # ty:ignore[unresolved-attribute]
 
 
 class JQFilter(FilterBase):  # pragma: has-jq
@@ -281,14 +554,14 @@ class JQFilter(FilterBase):  # pragma: has-jq
         if 'query' not in subfilter:
             raise ValueError(f"The 'jq' filter needs a query. ({self.job.get_indexed_location()})")
         try:
-            jsondata = json.loads(data)
+            jsondata = self.state.load_json(data)
         except ValueError:
             raise ValueError(f"The 'jq' filter needs valid JSON. ({self.job.get_indexed_location()})")  # noqa: B904
 
         if isinstance(jq, str):
             self.raise_import_error('jq', self.__kind__, jq)
 
-        return jq.text(subfilter['query'], jsondata), 'text/plain'  # ty:ignore[unresolved-attribute]
+        return _jq_program(subfilter['query']).input_value(jsondata).text(), 'text/plain'
         # Unicode solution is below https://github.com/mwilliamson/jq.py/issues/59
         # however it aborts execution(!) during testing
         # return '\n'.join(json.dumps(v, ensure_ascii=False) for v in (jq.compile(subfilter['query'], jsondata)))
@@ -311,7 +584,7 @@ class FormatJsonFilter(FilterBase):
         sort_keys = subfilter.get('sort_keys', False)
         indentation = int(subfilter.get('indentation', 4))
         try:
-            parsed_json = json.loads(data)
+            parsed_json = self.state.load_json(data)
         except json.JSONDecodeError as e:
             return (
                 json.dumps(
@@ -323,7 +596,11 @@ class FormatJsonFilter(FilterBase):
             )
         if not mime_type.endswith('json'):
             mime_type = 'application/json'
-        return json.dumps(parsed_json, ensure_ascii=False, sort_keys=sort_keys, indent=indentation), mime_type
+        formatted = json.dumps(parsed_json, ensure_ascii=False, sort_keys=sort_keys, indent=indentation)
+        if not sort_keys:
+            # deserializing the output gives back parsed_json (with the keys in the same order)
+            self.state.remember_json(formatted, parsed_json)
+        return formatted, mime_type
 
 
 class JsontoYamlFilter(FilterBase):
@@ -341,7 +618,7 @@ class JsontoYamlFilter(FilterBase):
         self.job.set_to_monospace()
         indentation = int(subfilter.get('indentation', 2))
         try:
-            parsed_json = json.loads(data)
+            parsed_json = self.state.load_json(data)
         except json.JSONDecodeError as e:
             return f"Filter '{self.__kind__}' returned JSONDecodeError: {e}\n\n{data!s}", mime_type
         if isinstance(parsed_json, list):
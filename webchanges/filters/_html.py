@@ -8,15 +8,17 @@ import html
 import importlib.util
 import logging
 import re
+import string
 import warnings
-from abc import ABC
 from enum import Enum
-from html.parser import HTMLParser
-from typing import TYPE_CHECKING, Any
+from typing import TYPE_CHECKING, Any, Callable
 from urllib.parse import urljoin
 from xml.dom import minidom
 
 import html2text
+from html2text import config as html2text_config
+from html2text.elements import ListElement
+from html2text.utils import escape_md, hn, list_numbering_start, pad_tables_in_text
 from lxml import etree
 from lxml.cssselect import CSSSelector
 
@@ -54,6 +56,7 @@ class BeautifyFilter(FilterBase):
     """
 
     __kind__ = 'beautify'
+    __cacheable__ = True
 
     __supported_subfilters__: dict[str, str] = {
         'absolute_links': 'Convert relative links to absolute ones.',
@@ -126,13 +129,606 @@ class AbsoluteLinksFilter(FilterBase):
         return etree.tostring(tree, encoding='unicode', method='html'), mime_type
 
 
+class LxmlMarkdownConverter:
+    """Convert an HTML document parsed by lxml into Markdown by walking its tree.
+
+    Produces the same Markdown as the html2text package with the options set by Html2TextFilter (headings, paragraphs,
+    emphasis, inline links, lists, blockquotes, preformatted text, definition lists and tables, padded with the
+    ``pad_tables`` option), but without its pure-Python HTML tokenizer and per-tag handling of the many options that
+    do not apply.  Images are ignored.  The output may differ for HTML that lxml restructures, e.g. with stray end tags
+    or with optional end tags (like ``</li>``) left out in some places only.
+
+    An instance converts a single document.
+    """
+
+    # Options of html2text supported, with their default values as set by Html2TextFilter
+    OPTIONS: dict[str, Any] = {
+        'close_quote': '"',
+        'emphasis_mark': '_',
+        'ignore_emphasis': False,
+        'ignore_links': False,
+        'ignore_mailto_links': False,
+        'ignore_tables': False,
+        'open_quote': '"',
+        'pad_tables': False,
+        'single_line_break': True,
+        'skip_internal_links': True,
+        'strong_mark': '**',
+        'ul_item_mark': '*',
+        'use_automatic_links': True,
+    }
+    # Options of html2text that can only have the value set by Html2TextFilter (or its default)
+    FIXED_OPTIONS: dict[str, Any] = {
+        'body_width': 0,
+        'ignore_images': True,
+        'inline_links': True,
+        'unicode_snob': True,
+        'wrap_links': False,
+    }
+    ABSOLUTE_URL = re.compile(r'[a-zA-Z+]+://')
+    LETTER_OR_COMMON_PUNCTUATION = re.compile(r'[^][(){}\s.!?]')
+    # html2text's tokenizer passes the text before, of and after each character reference separately (see
+    # handle_data()), so parse() marks them with a noncharacter before and after
+    REFERENCE = re.compile(r'&(?:#[0-9]+|#[xX][0-9a-fA-F]+|[a-zA-Z][-.a-zA-Z0-9]*);?')
+    REFERENCE_MARK = '\ufdd1'
+    # and keeps the non-breaking spaces of &nbsp; but collapses literal ones with other whitespace
+    NBSP_REFERENCE = re.compile(r'&nbsp(?![-.a-zA-Z0-9]);?')
+    NBSP_PLACEHOLDER = '\ufdd0'
+    # html2text's tokenizer only reports the tags that are in the HTML, not the ones that lxml adds when they are
+    # implied or that it closes
+    TAG = re.compile(r'<(/?[a-zA-Z][a-zA-Z0-9]*)')
+    IMPLIED_TAGS = frozenset({'html', 'head', 'body'})
+    # html2text outputs nothing within <head>, whose <title> lxml may place in <body> (e.g. after text)
+    HEAD = re.compile(r'<head\b.*?(?:</head\s*>|\Z)', re.IGNORECASE | re.DOTALL)
+    TITLE = re.compile(r'<title\b', re.IGNORECASE)
+
+    def __init__(self, baseurl: str = '', **options: Any) -> None:  # noqa: ANN401 Dynamically typed expressions Any are disallowed
+        """:param baseurl: The URL that relative links are relative to.
+        :param options: The html2text options (see OPTIONS and unsupported_options()).
+        """
+        self.baseurl = baseurl
+        for key, value in self.OPTIONS.items():
+            setattr(self, key, options.get(key, value))
+        self.handlers: dict[str, Callable[[str, etree._Attrib | None], bool | None]] = {
+            'a': self._a,
+            'abbr': self._abbr,
+            'blockquote': self._blockquote,
+            'body': self._body,
+            'br': self._br,
+            'dd': self._dd,
+            'dl': self._dl,
+            'dt': self._dt,
+            'head': self._quiet,
+            'hr': self._hr,
+            'li': self._li,
+            'ol': self._list,
+            'pre': self._pre,
+            'q': self._q,
+            'script': self._quiet,
+            'style': self._quiet,
+            'title': self._title,
+            'ul': self._list,
+        }
+        for tag in ('h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'h7', 'h8', 'h9'):
+            self.handlers[tag] = self._heading
+        for tag in ('p', 'div'):
+            self.handlers[tag] = self._paragraph
+        if not self.ignore_emphasis:
+            for tag in ('em', 'i', 'u'):
+                self.handlers[tag] = self._emphasis
+            for tag in ('strong', 'b'):
+                self.handlers[tag] = self._strong
+        for tag in ('del', 'strike', 's'):
+            self.handlers[tag] = self._strikethrough
+        for tag in ('kbd', 'code', 'tt'):
+            self.handlers[tag] = self._code
+        for tag in ('table', 'tr', 'td', 'th'):
+            self.handlers[tag] = self._table
+        if self.ignore_links:
+            del self.handlers['a']
+
+        self.implied: frozenset[str] = frozenset()
+        self.unclosed: set[str] = set()
+        self.head_titles = 0  # number of the (next) title elements that are in <head> in the HTML
+        self.quiet_title = False
+        self.outtextlist: list[str] = []
+        self.out = self.outtextlist.append
+        self.quiet = 0
+        self.p_p = 0  # number of newlines to output before the next output
+        self.start = True
+        self.space = False
+        self.astack: list[dict[str, str] | None] = []
+        self.maybe_automatic_link: str | None = None
+        self.empty_link = False
+        self.lists: list[ListElement] = []
+        self.last_was_list = False
+        self.blockquote = 0
+        self.pre = False
+        self.startpre = False
+        self.list_code_indent = ''
+        self.code = False
+        self.quote = False
+        self.br_toggle = ''
+        self.stressed = False
+        self.preceding_stressed = False
+        self.preceding_data = ''
+        self.current_tag = ''
+        self.abbr_title: str | None = None
+        self.abbr_data: str | None = None
+        self.abbr_list: dict[str, str] = {}
+        self.split_next_td = False
+        self.td_count = 0
+        self.table_start = False
+
+    @classmethod
+    def unsupported_options(cls, options: dict[str, Any]) -> list[str]:
+        """Return the names of the options that are not supported (or have a value that is not supported)."""
+        return [
+            key
+            for key, value in options.items()
+            if key not in cls.OPTIONS and (key not in cls.FIXED_OPTIONS or value != cls.FIXED_OPTIONS[key])
+        ]
+
+    def parse(self, data: str) -> etree._Element | None:
+        """Parse HTML with lxml, marking the character references and noting the tags that are in the HTML.
+
+        :param data: The HTML.
+        :returns: The root element of the document (None for an empty document).
+        """
+        if data.startswith('<?xml'):  # lxml does not parse Unicode strings with an encoding declaration
+            data = data.split('>', maxsplit=1)[1]
+        tags = {tag.lower() for tag in set(self.TAG.findall(data))}
+        self.implied = self.IMPLIED_TAGS - tags
+        self.unclosed = {tag for tag in tags if tag[0] != '/' and '/' + tag not in tags}
+        if 'head' in tags and 'title' in tags and (head := self.HEAD.search(data)):
+            self.head_titles = len(self.TITLE.findall(head.group()))
+        if '&' in data:
+            mark = self.REFERENCE_MARK
+            data = self.NBSP_REFERENCE.sub(mark + self.NBSP_PLACEHOLDER + mark, data)
+            data = self.REFERENCE.sub(mark + r'\g<0>' + mark, data)
+        return etree.HTML(data)
+
+    def convert(self, data: str) -> str:
+        """Convert HTML.
+
+        :param data: The HTML.
+        :returns: The Markdown.
+        """
+        root = self.parse(data)
+        if root is not None:
+            self._walk(root)
+        self.pbr()
+        self.o('', force='end')
+        markdown = ''.join(self.outtextlist).replace(self.NBSP_PLACEHOLDER, '\xa0')
+        if self.pad_tables:
+            return pad_tables_in_text(markdown)
+        return markdown
+
+    def _walk(self, root: etree._Element) -> None:
+        """Handle the elements and text of the tree in document order."""
+        handle_tag = self.handle_tag
+        handle_data = self.handle_data
+        for event, element in etree.iterwalk(root, events=('start', 'end', 'comment', 'pi')):
+            if event == 'start':
+                handle_tag(element.tag, element.attrib, True)
+                if element.text:
+                    handle_data(element.text)
+                continue
+            if event == 'end':
+                handle_tag(element.tag, None, False)
+            if element.tail and element is not root:
+                handle_data(element.tail)
+
+    def handle_tag(self, tag: str, attrs: etree._Attrib | None, start: bool) -> None:
+        """Handle the start (with its attributes) or the end of an element, like html2text's HTML2Text.handle_tag."""
+        if tag in self.implied or (not start and tag in self.unclosed):
+            return
+        self.current_tag = tag
+        if start and self.maybe_automatic_link is not None and tag not in {'p', 'div', 'style', 'dl', 'dt'}:
+            # first thing inside the anchor tag is another tag that produces some output
+            self.o('[')
+            self.maybe_automatic_link = None
+            self.empty_link = False
+        handler = self.handlers.get(tag)
+        if handler is not None and handler(tag, attrs) is True:
+            return
+        if tag not in {'ol', 'ul'}:
+            self.last_was_list = False
+
+    def handle_data(self, data: str) -> None:
+        """Handle text, like html2text's HTML2Text.handle_data, which its tokenizer calls separately for the text
+        before and after each character reference, and for the (unescaped) character referenced.
+        """
+        if self.REFERENCE_MARK not in data:
+            self.handle_chunk(data)
+            return
+        if self.quiet:
+            self.handle_chunk(data.replace(self.REFERENCE_MARK, ''))
+            return
+        for i, chunk in enumerate(data.split(self.REFERENCE_MARK)):
+            if chunk:
+                self.handle_chunk(chunk, entity_char=bool(i % 2))
+
+    def handle_chunk(self, data: str, entity_char: bool = False) -> None:
+        if self.stressed:
+            data = data.strip()
+            self.stressed = False
+            self.preceding_stressed = True
+        elif self.preceding_stressed:
+            if (
+                self.LETTER_OR_COMMON_PUNCTUATION.match(data[0])
+                and not hn(self.current_tag)
+                and self.current_tag not in {'a', 'code', 'pre'}
+            ):
+                data = ' ' + data
+            self.preceding_stressed = False
+
+        if self.maybe_automatic_link is not None:
+            href = self.maybe_automatic_link
+            if href == data and self.use_automatic_links and self.ABSOLUTE_URL.match(href):
+                self.o('<' + data + '>')
+                self.empty_link = False
+                return
+            self.o('[')
+            self.maybe_automatic_link = None
+            self.empty_link = False
+
+        if self.quiet:  # e.g. the contents of <script>; only the last character matters
+            self.preceding_data = data
+            if self.abbr_data is not None:
+                self.abbr_data += data
+            return
+        if not self.code and not self.pre and not entity_char:
+            data = self.escape_md_section(data)
+        self.preceding_data = data
+        self.o(data, puredata=True)
+
+    def attribute(self, attrs: etree._Attrib, name: str) -> str | None:
+        """Return the value of an attribute without the marks of its character references (see parse())."""
+        value = attrs.get(name)
+        if value is not None:
+            return value.replace(self.REFERENCE_MARK, '')
+        return value
+
+    @staticmethod
+    def escape_md_section(text: str) -> str:
+        """Escape the Markdown in text like html2text's utils.escape_md_section, skipping the regular expressions that
+        cannot match.
+        """
+        if '\\' in text:
+            text = html2text_config.RE_MD_BACKSLASH_MATCHER.sub(r'\\\1', text)
+        if '.' in text:
+            text = html2text_config.RE_MD_DOT_MATCHER.sub(r'\1\\\2', text)
+        if '+' in text:
+            text = html2text_config.RE_MD_PLUS_MATCHER.sub(r'\1\\\2', text)
+        if '-' in text:
+            text = html2text_config.RE_MD_DASH_MATCHER.sub(r'\1\\\2', text)
+        return text
+
+    def last_was_nl(self) -> bool:
+        """Whether the output so far ends with a newline."""
+        for s in reversed(self.outtextlist):
+            if s:
+                return s[-1] == '\n'
+        return False
+
+    def pbr(self) -> None:
+        if self.p_p == 0:
+            self.p_p = 1
+
+    def p(self) -> None:
+        self.p_p = 1 if self.single_line_break else 2
+
+    def soft_br(self) -> None:
+        self.pbr()
+        self.br_toggle = '  '
+
+    def o(self, data: str, puredata: bool = False, force: bool | str = False) -> None:
+        """Output data, dealing with indentation and whitespace, like html2text's HTML2Text.o."""
+        if self.abbr_data is not None:
+            self.abbr_data += data
+        if self.quiet:
+            return
+        if puredata and not self.pre and data:
+            # collapse whitespace, keeping a space after but not before the data (see below)
+            collapsed = ' '.join(data.split())
+            if data[0].isspace():
+                self.space = True
+            if collapsed and data[-1].isspace():
+                collapsed += ' '
+            data = collapsed
+        if not data and not force:
+            return
+
+        if not (self.pre or self.blockquote or self.start or force):  # the common case of what follows
+            if self.p_p:
+                self.out((self.br_toggle + '\n') * self.p_p)
+                self.p_p = 0
+                self.br_toggle = ''
+                self.space = False
+            elif self.space:
+                if not self.last_was_nl():
+                    self.out(' ')
+                self.space = False
+            self.out(data)
+            return
+        if self.startpre and not data.startswith(('\n', '\r\n')):
+            data = '\n' + data
+        bq = '>' * self.blockquote
+        if self.blockquote and not (force and data and data[0] == '>'):
+            bq += ' '
+        if self.pre:
+            if self.lists:
+                bq += self.list_code_indent
+            bq += '    '
+            data = data.replace('\n', '\n' + bq)
+        if self.startpre:
+            self.startpre = False
+            if self.lists:
+                data = data.lstrip('\n' + bq)  # use existing initial indentation
+        if self.start:
+            self.space = False
+            self.p_p = 0
+            self.start = False
+        if force == 'end':
+            self.p_p = 0
+            self.out('\n')
+            self.space = False
+        if self.p_p:
+            self.out((self.br_toggle + '\n' + bq) * self.p_p)
+            self.space = False
+            self.br_toggle = ''
+        if self.space:
+            if not self.last_was_nl():
+                self.out(' ')
+            self.space = False
+        if self.abbr_list and force == 'end':
+            for abbr, definition in self.abbr_list.items():
+                self.out(f'  *[{abbr}]: {definition}\n')
+        self.p_p = 0
+        self.out(data)
+
+    # Handlers of the elements, returning True to skip the handling common to all elements
+
+    def _a(self, tag: str, attrs: etree._Attrib | None) -> None:
+        if attrs is not None:
+            href = self.attribute(attrs, 'href')
+            if (
+                href is not None
+                and not (self.skip_internal_links and href.startswith('#'))
+                and not (self.ignore_mailto_links and href.startswith('mailto:'))
+            ):
+                self.astack.append({'href': href, 'title': self.attribute(attrs, 'title') or ''})
+                self.maybe_automatic_link = href
+                self.empty_link = True
+            else:
+                self.astack.append(None)
+        elif self.astack:
+            a = self.astack.pop()
+            if self.maybe_automatic_link and not self.empty_link:
+                self.maybe_automatic_link = None
+            elif a:
+                if self.empty_link:
+                    self.o('[')
+                    self.empty_link = False
+                    self.maybe_automatic_link = None
+                self.p_p = 0
+                title = escape_md(a['title'])
+                title = f' "{title}"' if title.strip() else ''
+                self.o('](' + escape_md(urljoin(self.baseurl, a['href'])) + f'{title})')
+
+    def _abbr(self, tag: str, attrs: etree._Attrib | None) -> None:
+        if attrs is not None:
+            self.abbr_title = self.attribute(attrs, 'title')
+            self.abbr_data = ''
+        else:
+            if self.abbr_title is not None and self.abbr_data is not None:
+                self.abbr_list[self.abbr_data] = self.abbr_title
+                self.abbr_title = None
+            self.abbr_data = None
+
+    def _blockquote(self, tag: str, attrs: etree._Attrib | None) -> None:
+        if attrs is not None:
+            self.p()
+            self.o('> ', force=True)
+            self.start = True
+            self.blockquote += 1
+        else:
+            self.blockquote -= 1
+            self.p()
+
+    def _body(self, tag: str, attrs: etree._Attrib | None) -> None:
+        self.quiet = 0  # sites like 9rules.com never close <head>
+
+    def _br(self, tag: str, attrs: etree._Attrib | None) -> None:
+        if attrs is not None:
+            self.o('  \n> ' if self.blockquote > 0 else '  \n')
+
+    def _code(self, tag: str, attrs: etree._Attrib | None) -> None:
+        if not self.pre:
+            self.o('`')
+            self.code = not self.code
+
+    def _dd(self, tag: str, attrs: etree._Attrib | None) -> None:
+        if attrs is not None:
+            self.o('    ')
+        else:
+            self.pbr()
+
+    def _dl(self, tag: str, attrs: etree._Attrib | None) -> None:
+        if attrs is not None:
+            self.p()
+
+    def _dt(self, tag: str, attrs: etree._Attrib | None) -> None:
+        if attrs is None:
+            self.pbr()
+
+    def _emphasis(self, tag: str, attrs: etree._Attrib | None) -> None:
+        # Separate with a space if immediately following an alphanumeric character, since otherwise Markdown won't
+        # render the emphasis marks (html2text's placeholder of &nbsp; ends with ';', so not after one)
+        if (
+            attrs is not None
+            and self.preceding_data
+            and self.preceding_data[-1] not in string.whitespace
+            and self.preceding_data[-1] not in string.punctuation
+            and self.preceding_data[-1] != self.NBSP_PLACEHOLDER
+        ):
+            self.o(' ' + self.emphasis_mark)
+            self.preceding_data += ' '
+        else:
+            self.o(self.emphasis_mark)
+        if attrs is not None:
+            self.stressed = True
+
+    def _heading(self, tag: str, attrs: etree._Attrib | None) -> bool:
+        if self.astack:  # inside a link (incorrect but found in the wild)
+            if attrs is not None:
+                # only add the '#' if it can appear before the '['
+                if self.outtextlist and self.outtextlist[-1] == '[':
+                    self.outtextlist.pop()
+                    self.space = False
+                    self.o('#' * hn(tag) + ' ')
+                    self.o('[')
+                return False
+            self.p_p = 0  # don't break up link name
+            return True
+        self.p()
+        if attrs is not None:
+            self.o('#' * hn(tag) + ' ')
+            return False
+        return True
+
+    def _hr(self, tag: str, attrs: etree._Attrib | None) -> None:
+        if attrs is not None:
+            self.p()
+            self.o('* * *')
+            self.p()
+
+    def _li(self, tag: str, attrs: etree._Attrib | None) -> None:
+        self.list_code_indent = ''
+        self.pbr()
+        if attrs is not None:
+            li = self.lists[-1] if self.lists else ListElement('ul', 0)
+            # Indent two spaces per list, except use three spaces for an unordered list inside an ordered list
+            parent_list = None
+            for list_element in self.lists:
+                self.list_code_indent += '   ' if parent_list == 'ol' else '  '
+                parent_list = list_element.name
+            self.o(self.list_code_indent)
+            if li.name == 'ul':
+                self.list_code_indent += '  '
+                self.o(self.ul_item_mark + ' ')
+            elif li.name == 'ol':
+                li.num += 1
+                self.list_code_indent += '   '
+                self.o(f'{li.num}. ')
+            self.start = True
+
+    def _list(self, tag: str, attrs: etree._Attrib | None) -> None:
+        if not self.lists and not self.last_was_list:
+            self.p()
+        if attrs is not None:
+            start = self.attribute(attrs, 'start')
+            self.lists.append(ListElement(tag, list_numbering_start({} if start is None else {'start': start})))
+        elif self.lists:
+            self.lists.pop()
+            if not self.lists:
+                self.o('\n')
+        self.last_was_list = True
+
+    def _paragraph(self, tag: str, attrs: etree._Attrib | None) -> None:
+        if not self.astack and not self.split_next_td:
+            self.p()
+
+    def _pre(self, tag: str, attrs: etree._Attrib | None) -> None:
+        if attrs is not None:
+            self.startpre = True
+            self.pre = True
+        else:
+            self.pre = False
+        self.p()
+
+    def _q(self, tag: str, attrs: etree._Attrib | None) -> None:
+        self.o(self.close_quote if self.quote else self.open_quote)
+        self.quote = not self.quote
+
+    def _quiet(self, tag: str, attrs: etree._Attrib | None) -> None:
+        self.quiet += 1 if attrs is not None else -1
+
+    def _title(self, tag: str, attrs: etree._Attrib | None) -> None:
+        """Output nothing within the titles that are in <head> in the HTML, wherever lxml placed them."""
+        if attrs is not None and self.head_titles:
+            self.head_titles -= 1
+            self.quiet_title = True
+            self.quiet += 1
+        elif attrs is None and self.quiet_title:
+            self.quiet_title = False
+            self.quiet -= 1
+
+    def _strikethrough(self, tag: str, attrs: etree._Attrib | None) -> None:
+        if attrs is not None and self.preceding_data and self.preceding_data[-1] == '~':
+            self.o(' ~~')
+            self.preceding_data += ' '
+        else:
+            self.o('~~')
+        if attrs is not None:
+            self.stressed = True
+
+    def _strong(self, tag: str, attrs: etree._Attrib | None) -> None:
+        # Separate with a space if immediately following a '*', since Markdown won't render '***' correctly
+        if (
+            attrs is not None
+            and self.preceding_data
+            and self.strong_mark
+            and self.preceding_data[-1] == self.strong_mark[0]
+        ):
+            self.o(' ' + self.strong_mark)
+            self.preceding_data += ' '
+        else:
+            self.o(self.strong_mark)
+        if attrs is not None:
+            self.stressed = True
+
+    def _table(self, tag: str, attrs: etree._Attrib | None) -> None:
+        start = attrs is not None
+        if self.ignore_tables:
+            if tag == 'tr' and not start:
+                self.soft_br()
+        elif tag == 'table':
+            if start:
+                self.table_start = True
+                if self.pad_tables:
+                    self.o(f'<{html2text_config.TABLE_MARKER_FOR_PAD}>')
+                    self.o('  \n')
+            elif self.pad_tables:
+                self.soft_br()  # in case the table is empty or has only one row
+                self.o(f'</{html2text_config.TABLE_MARKER_FOR_PAD}>')
+                self.o('  \n')
+        elif tag == 'tr':
+            if start:
+                self.td_count = 0
+            else:
+                self.split_next_td = False
+                self.soft_br()
+                if self.table_start:  # underline the table header
+                    self.o('|'.join(['---'] * self.td_count))
+                    self.soft_br()
+                    self.table_start = False
+        elif start:  # td and th
+            if self.split_next_td:
+                self.o('| ')
+            self.split_next_td = True
+            self.td_count += 1
+
+
 class Html2TextFilter(FilterBase):
     """Convert a string consisting of HTML to Unicode plain text for easy difference checking."""
 
     __kind__ = 'html2text'
+    __cacheable__ = True
 
     __supported_subfilters__: dict[str, str] = {
-        'method': 'Method to use for conversion (html2text [default], bs4, or strip_tags)',
+        'method': 'Method to use for conversion (html2text [default], lxml, bs4, or strip_tags)',
         'separator': 'bs4: Strings will be concatenated using this separator',
         'strip': 'bs4: If True, strings will be stripped before being concatenated',
         '<any>': 'html2text: Library-specific options (see '
@@ -159,6 +755,11 @@ class Html2TextFilter(FilterBase):
             * ``single_line_break = True``
             * ``wrap_links = False``
 
+        * ``lxml``: Walk the tree parsed by lxml to produce the same Markdown as ``html2text`` much faster (see
+          LxmlMarkdownConverter).
+
+          * options: The ``html2text`` options in LxmlMarkdownConverter.OPTIONS.
+
         * ``bs4``: Use Beautiful Soup Python library to extract plain text.
 
           * options:
@@ -179,11 +780,25 @@ class Html2TextFilter(FilterBase):
         :returns: The data and media type (fka MIME type) of the data after the filter has been applied.
         """
         # extract method and options from subfilter, defaulting to method html2text
-        if not isinstance(data, str):
-            raise ValueError
         options = subfilter.copy()
         method = options.pop('method', 'html2text')
 
+        if method == 'lxml':
+            if unsupported := LxmlMarkdownConverter.unsupported_options(options):
+                raise ValueError(
+                    f"Filter html2text's method 'lxml' does not support sub-directive(s) {', '.join(unsupported)}; "
+                    f'use the default method instead. ({self.job.get_indexed_location()})'
+                )
+            if not isinstance(data, str):
+                raise ValueError
+            if 'pad_tables' in options:
+                self.job.markdown_padded_tables = options['pad_tables']
+            converter = LxmlMarkdownConverter(getattr(self.job, 'url', None) or '', **options)
+            return '\n'.join(line.rstrip() for line in converter.convert(data).splitlines()), 'text/markdown'
+
+        if not isinstance(data, str):
+            raise ValueError
+
         if method in {'html2text', 'pyhtml2text'}:  # pythtml2text for backward compatibility
             if method == 'pyhtml2text':
                 warnings.warn(
@@ -290,49 +905,113 @@ class FilterBy(Enum):
     TAG = 2
 
 
-class ElementsBy(HTMLParser, ABC):
-    def __init__(self, filter_by: FilterBy, name: str, value: Any = None) -> None:  # noqa: ANN401 Dynamically typed expressions Any are disallowed
-        super().__init__()
+class ElementsBy:
+    """Select the HTML elements with an attribute of a given value, or with a given tag, except those inside another
+    selected element, from the document parsed by lxml (or handed over by a 'css' or 'xpath' filter; see
+    ParsedDocument).
 
-        self._filter_by = filter_by
-        if self._filter_by == FilterBy.ATTRIBUTE:
-            self._attributes = {name: value}
-        else:
-            # FilterBy.TAG
-            self._name = name
+    The elements are serialized as when they were selected with an html.parser.HTMLParser, so that the output of the
+    'element-by-*' filters is unchanged: the elements are concatenated, the character references in text and attribute
+    values are replaced, attributes are written as name="value", comments are removed, and void elements have no end
+    tag unless they were self-closed in the HTML (e.g. <br/> is output as <br></br>).
+    """
 
-        self._result: list[str] = []
-        self._inside: bool = False
-        self._elts: list[str] = []
+    # Elements that have no end tag
+    VOID_TAGS = frozenset(
+        {'area', 'base', 'br', 'col', 'embed', 'hr', 'img', 'input', 'link', 'meta', 'param', 'source', 'track', 'wbr'}
+    )
+    # The start tags of void elements, skipping those in comments, scripts and styles; group 3 is '/' if self-closed.
+    # An unclosed comment, script, style, quoted attribute value or tag runs to the end of the data, as when parsing
+    # HTML, so that the data is not scanned again from each later start tag (possessive quantifiers do not backtrack).
+    VOID_TAG_RE = re.compile(
+        r'<!--.*?(?:-->|\Z)|<(script|style)\b.*?(?:</\1\s*>|\Z)'
+        rf'|<({"|".join(sorted(VOID_TAGS))})\b'
+        r'(?:[^>"\'/]|/(?!>)|"[^"]*+(?:"|\Z)|\'[^\']*+(?:\'|\Z))*+(/)?(?:>|\Z)',
+        re.IGNORECASE | re.DOTALL,
+    )
+    EXPRESSIONS = {
+        FilterBy.ATTRIBUTE: '//*[@*[name()=$name]=$value][not(ancestor::*[@*[name()=$name]=$value])]',
+        FilterBy.TAG: '//*[name()=$name][not(ancestor::*[name()=$name])]',
+    }
 
-    def get_html(self) -> str:
-        return ''.join(self._result)
+    def __init__(
+        self,
+        filter_by: FilterBy,
+        name: str,
+        value: Any = None,  # noqa: ANN401 Dynamically typed expressions Any are disallowed
+        cache: dict[str, Any] | None = None,
+    ) -> None:
+        """:param filter_by: Whether to select the elements by attribute or by tag.
+        :param name: The name of the attribute or the tag.
+        :param value: The value of the attribute.
+        :param cache: Where the compiled XPath expression is kept to be reused (e.g. the filter's 'precompiled').
+        """
+        self._filter_by = filter_by
+        self._name = name
+        self._value = value
+        self.cache = {} if cache is None else cache
+        self.data = ''
+        self.document: ParsedDocument | None = None
+        self._self_closed: set[etree._Element] = set()
 
-    def handle_starttag(self, tag: str, attrs: list[tuple[str, str | None]]) -> None:
-        ad = dict(attrs)
+    def feed(self, data: str) -> None:
+        self.data += data
 
-        if (self._filter_by == FilterBy.ATTRIBUTE and all(ad.get(k) == v for k, v in self._attributes.items())) or (
-            self._filter_by == FilterBy.TAG and tag == self._name
-        ):
-            self._inside = True
-
-        if self._inside:
-            self._result.append(f'<{tag}{" " if attrs else ""}%s>' % ' '.join(f'{k}="{v}"' for k, v in attrs))
-            self._elts.append(tag)
-
-    def handle_endtag(self, tag: str) -> None:
-        if self._inside:
-            self._result.append(f'</{tag}>')
-            if tag in self._elts:
-                t = self._elts.pop()
-                while t != tag and self._elts:
-                    t = self._elts.pop()
-            if not self._elts:
-                self._inside = False
+    def feed_document(self, document: ParsedDocument) -> None:
+        """Use a document already parsed (e.g. by the previous filter) instead of parsing the data."""
+        self.document = document
+
+    def _parse(self) -> etree._Element | None:
+        if self.document is not None:
+            return self.document.root
+        # handle legacy https://stackoverflow.com/questions/37592045/
+        data = self.data.split('>', maxsplit=1)[1] if self.data.startswith('<?xml') else self.data
+        root = etree.HTML(data)
+        if root is not None and '/>' in data:
+            self._find_self_closed(root, data)
+        return root
+
+    def _find_self_closed(self, root: etree._Element, data: str) -> None:
+        """Record the void elements that are self-closed in the HTML, which html.parser reported with an end tag.
+
+        The start tags found in the HTML are matched in document order with the elements of the same tag; if lxml
+        dropped or added any (e.g. in malformed HTML), the elements of that tag are output without an end tag.
+        """
+        self_closed: dict[str, list[bool]] = {}
+        for match in self.VOID_TAG_RE.finditer(data):
+            if match.group(2):
+                self_closed.setdefault(match.group(2).lower(), []).append(bool(match.group(3)))
+        for tag, flags in self_closed.items():
+            if any(flags):
+                elements = list(root.iter(tag))
+                if len(elements) == len(flags):
+                    self._self_closed.update(el for el, flag in zip(elements, flags) if flag)
+
+    def _serialize(self, element: etree._Element, parts: list[str]) -> None:
+        append = parts.append
+        for event, el in etree.iterwalk(element, events=('start', 'end', 'comment', 'pi')):
+            if event == 'start':
+                attributes = ' '.join(f'{k}="{v}"' for k, v in el.attrib.items())
+                append(f'<{el.tag} {attributes}>' if attributes else f'<{el.tag}>')
+                if el.text:
+                    append(el.text)
+                continue
+            if event == 'end' and (el.tag not in self.VOID_TAGS or el in self._self_closed):
+                append(f'</{el.tag}>')
+            if el.tail and el is not element:  # the comments and processing instructions are removed, not their tail
+                append(el.tail)
 
-    def handle_data(self, data: str) -> None:
-        if self._inside:
-            self._result.append(data)
+    def get_html(self) -> str:
+        root = self._parse()
+        if root is None:
+            return ''
+        xpath = self.cache.get('elements-by')
+        if xpath is None:
+            xpath = self.cache['elements-by'] = etree.XPath(self.EXPRESSIONS[self._filter_by])
+        parts: list[str] = []
+        for element in xpath(root, name=self._name, value=str(self._value)):
+            self._serialize(element, parts)
+        return ''.join(parts)
 
 
 class ElementByIdFilter(FilterBase):
@@ -346,16 +1025,25 @@ class ElementByIdFilter(FilterBase):
 
     __default_subfilter__ = 'id'
 
-    def filter(self, data: str | bytes, mime_type: str, subfilter: dict[str, Any]) -> tuple[str | bytes, str]:
-        if not isinstance(data, str):
+    @classmethod
+    def parsed_method(cls, subfilter: dict[str, Any]) -> str | None:
+        return 'html'
+
+    def filter(
+        self, data: str | bytes | ParsedDocument, mime_type: str, subfilter: dict[str, Any]
+    ) -> tuple[str | bytes, str]:
+        if not isinstance(data, (str, ParsedDocument)):
             raise ValueError
         if 'id' not in subfilter:
             raise ValueError(
                 f"The 'element-by-id' filter needs an id for filtering. ({self.job.get_indexed_location()})"
             )
 
-        element_by_id = ElementsBy(FilterBy.ATTRIBUTE, 'id', subfilter['id'])
-        element_by_id.feed(data)
+        element_by_id = ElementsBy(FilterBy.ATTRIBUTE, 'id', subfilter['id'], cache=self.precompiled)
+        if isinstance(data, ParsedDocument):
+            element_by_id.feed_document(data)
+        else:
+            element_by_id.feed(data)
         return element_by_id.get_html(), mime_type
 
 
@@ -370,16 +1058,25 @@ class ElementByClassFilter(FilterBase):
 
     __default_subfilter__ = 'class'
 
-    def filter(self, data: str | bytes, mime_type: str, subfilter: dict[str, Any]) -> tuple[str | bytes, str]:
-        if not isinstance(data, str):
+    @classmethod
+    def parsed_method(cls, subfilter: dict[str, Any]) -> str | None:
+        return 'html'
+
+    def filter(
+        self, data: str | bytes | ParsedDocument, mime_type: str, subfilter: dict[str, Any]
+    ) -> tuple[str | bytes, str]:
+        if not isinstance(data, (str, ParsedDocument)):
             raise ValueError
         if 'class' not in subfilter:
             raise ValueError(
                 f"The 'element-by-class' filter needs a class for filtering. ({self.job.get_indexed_location()})"
             )
 
-        element_by_class = ElementsBy(FilterBy.ATTRIBUTE, 'class', subfilter['class'])
-        element_by_class.feed(data)
+        element_by_class = ElementsBy(FilterBy.ATTRIBUTE, 'class', subfilter['class'], cache=self.precompiled)
+        if isinstance(data, ParsedDocument):
+            element_by_class.feed_document(data)
+        else:
+            element_by_class.feed(data)
         return element_by_class.get_html(), mime_type
 
 
@@ -394,16 +1091,25 @@ class ElementByStyleFilter(FilterBase):
 
     __default_subfilter__ = 'style'
 
-    def filter(self, data: str | bytes, mime_type: str, subfilter: dict[str, Any]) -> tuple[str | bytes, str]:
-        if not isinstance(data, str):
+    @classmethod
+    def parsed_method(cls, subfilter: dict[str, Any]) -> str | None:
+        return 'html'
+
+    def filter(
+        self, data: str | bytes | ParsedDocument, mime_type: str, subfilter: dict[str, Any]
+    ) -> tuple[str | bytes, str]:
+        if not isinstance(data, (str, ParsedDocument)):
             raise ValueError
         if 'style' not in subfilter:
             raise ValueError(
                 f"The 'element-by-style' filter needs a style for filtering. ({self.job.get_indexed_location()})"
             )
 
-        element_by_style = ElementsBy(FilterBy.ATTRIBUTE, 'style', subfilter['style'])
-        element_by_style.feed(data)
+        element_by_style = ElementsBy(FilterBy.ATTRIBUTE, 'style', subfilter['style'], cache=self.precompiled)
+        if isinstance(data, ParsedDocument):
+            element_by_style.feed_document(data)
+        else:
+            element_by_style.feed(data)
         return element_by_style.get_html(), mime_type
 
 
@@ -418,25 +1124,51 @@ class ElementByTagFilter(FilterBase):
 
     __default_subfilter__ = 'tag'
 
-    def filter(self, data: str | bytes, mime_type: str, subfilter: dict[str, Any]) -> tuple[str | bytes, str]:
-        if not isinstance(data, str):
+    @classmethod
+    def parsed_method(cls, subfilter: dict[str, Any]) -> str | None:
+        return 'html'
+
+    def filter(
+        self, data: str | bytes | ParsedDocument, mime_type: str, subfilter: dict[str, Any]
+    ) -> tuple[str | bytes, str]:
+        if not isinstance(data, (str, ParsedDocument)):
             raise ValueError
         if 'tag' not in subfilter:
             raise ValueError(
                 f"The 'element-by-tag' filter needs a tag for filtering. ({self.job.get_indexed_location()})"
             )
 
-        element_by_tag = ElementsBy(FilterBy.TAG, subfilter['tag'])
-        element_by_tag.feed(data)
+        element_by_tag = ElementsBy(FilterBy.TAG, subfilter['tag'], cache=self.precompiled)
+        if isinstance(data, ParsedDocument):
+            element_by_tag.feed_document(data)
+        else:
+            element_by_tag.feed(data)
         return element_by_tag.get_html(), mime_type
 
 
+class ParsedDocument:
+    """A document parsed by lxml that a 'css' or 'xpath' filter hands over to the next one in a CompiledFilterChain
+    instead of serializing its result to be parsed again."""
+
+    __slots__ = ('method', 'root')
+
+    def __init__(self, root: etree._Element | None, method: str) -> None:
+        """:param root: The root element (None for an empty document).
+        :param method: The method ('html' or 'xml') of the document.
+        """
+        self.root = root
+        self.method = method
+
+
 class LxmlParser:
     EXPR_NAMES: dict[str, str] = {
         'css': 'a CSS selector',
         'xpath': 'an XPath expression',
     }
+    # Elements that lxml's HTML parser places in <head> when they come before any other element
+    HEAD_TAGS = frozenset({'base', 'link', 'meta', 'noscript', 'script', 'style', 'title'})
 
+    document: ParsedDocument | None
     expression: str
     method: str
     namespaces: dict[str, str] | None
@@ -449,8 +1181,16 @@ class LxmlParser:
         subfilter: dict[str, Any],
         expr_key: str,
         job: JobBase,
+        cache: dict[str, Any] | None = None,
     ) -> None:
+        """:param filter_kind: 'css' or 'xpath'.
+        :param subfilter: The subfilter information.
+        :param expr_key: The subfilter containing the CSS selector or XPath expression.
+        :param job: The job.
+        :param cache: Where compiled selectors and expressions are kept to be reused (e.g. the filter's 'precompiled').
+        """
         self.filter_kind = filter_kind
+        self.cache = {} if cache is None else cache
         self.method = subfilter.get('method', 'html')
         if self.method not in {'html', 'xml'}:
             raise ValueError(
@@ -474,10 +1214,27 @@ class LxmlParser:
                 f'({job.get_indexed_location()})'
             )
         self.data = ''
+        self.document = None
 
     def feed(self, data: str) -> None:
         self.data += data
 
+    def feed_document(self, document: ParsedDocument) -> None:
+        """Use a document already parsed (e.g. by the previous filter) instead of parsing the data."""
+        self.document = document
+
+    def _compile(self, expression: str) -> etree.XPath:
+        """Return the compiled CSS selector or XPath expression, reusing the one in the cache if present."""
+        key = f'{self.filter_kind} {expression}'
+        compiled = self.cache.get(key)
+        if compiled is None:
+            if self.filter_kind == 'css':
+                compiled = CSSSelector(expression, namespaces=self.namespaces)
+            else:
+                compiled = etree.XPath(expression, namespaces=self.namespaces)
+            self.cache[key] = compiled
+        return compiled
+
     @staticmethod
     def _to_string(element: etree._Element | str, method: str) -> str:
         # Handle "/text()" selector, which returns lxml.etree._ElementUnicodeResult
@@ -509,8 +1266,9 @@ class LxmlParser:
                     parent.text = parent.text + element.tail if parent.text else element.tail
             parent.remove(element)
 
-    def _reevaluate(self, element: etree._Element) -> etree._Element | str | None:
-        if self._orphaned(element):
+    @staticmethod
+    def _reevaluate(element: etree._Element, removed: set[etree._Element]) -> etree._Element | str | None:
+        if LxmlParser._orphaned(element, removed):
             return None
         if isinstance(element, etree._ElementUnicodeResult):
             parent = element.getparent()
@@ -525,7 +1283,12 @@ class LxmlParser:
             return element
         return element
 
-    def _orphaned(self, element: etree._Element) -> bool:
+    @staticmethod
+    def _orphaned(element: etree._Element, removed: set[etree._Element]) -> bool:
+        """Whether the element (or the text or attribute) was removed by the exclusions.
+
+        :param removed: All the elements of the subtrees removed, so that the test does not depend on their depth.
+        """
         if isinstance(element, etree._ElementUnicodeResult):
             parent = element.getparent()
             if (
@@ -535,17 +1298,12 @@ class LxmlParser:
             ):
                 return True
             element = parent  # ty:ignore[invalid-assignment]
-        try:
-            tree = element.getroottree()
-            path = tree.getpath(element)
-            return element is not tree.xpath(path, namespaces=self.namespaces)[0]  # ty:ignore[not-subscriptable]
-        except (ValueError, IndexError):
-            return True
+        return element in removed
 
-    def _get_filtered_elements(
-        self,
-        job_index_number: int | None = None,
-    ) -> list[etree._Element | str]:
+    def _parse(self) -> etree._Element | None:
+        """Return the root of the document handed over with feed_document(), or else of the data parsed."""
+        if self.document is not None:
+            return self.document.root
         if self.method == 'xml' and isinstance(self.data, str):
             # see https://lxml.de/FAQ.html#why-can-t-lxml-parse-my-xml-from-unicode-strings
             data: str | bytes = self.data.encode(errors='xmlcharrefreplace')
@@ -555,45 +1313,124 @@ class LxmlParser:
         else:
             data = self.data
         try:
-            root = etree.XML(data) if self.method == 'xml' else etree.HTML(data)
+            return etree.XML(data) if self.method == 'xml' else etree.HTML(data)
         except ValueError as e:
             args = (
                 f"Filter '{self.filter_kind}' encountered the following error when parsing the data. Check that "
                 f"'method: {self.method}' is the correct one.\n    {type(e).__name__}: {e}"
             )
             raise RuntimeError(args) from None
+
+    def _get_filtered_elements(
+        self,
+        job_index_number: int | None = None,
+    ) -> list[etree._Element | str]:
+        root = self._parse()
         if root is None:
             return []
         selected_elems: list[etree._Element] | None = None
         excluded_elems: list[etree._Element] | None = None
         try:
-            if self.filter_kind == 'css':
-                selected_elems = CSSSelector(self.expression, namespaces=self.namespaces)(root)  # ty:ignore[invalid-assignment]
-                excluded_elems = CSSSelector(self.exclude, namespaces=self.namespaces)(root) if self.exclude else None  # ty:ignore[invalid-assignment]
-
-            elif self.filter_kind == 'xpath':
-                selected_elems = root.xpath(self.expression, namespaces=self.namespaces)  # ty:ignore[invalid-assignment]
-                excluded_elems = root.xpath(self.exclude, namespaces=self.namespaces) if self.exclude else None  # ty:ignore[invalid-assignment]
+            if self.filter_kind in {'css', 'xpath'}:
+                selected_elems = self._compile(self.expression)(root)  # ty:ignore[invalid-assignment]
+                excluded_elems = self._compile(self.exclude)(root) if self.exclude else None  # ty:ignore[invalid-assignment]
         except (etree.ParserError, etree.XMLSchemaError, etree.XPathError) as e:
             raise ValueError(f'Job {job_index_number} {type(e).__name__}: {e} {self.expression}') from e
+        removed: set[etree._Element] = set()
         if excluded_elems is not None:
             for el in excluded_elems:
+                if el in removed:
+                    continue
+                if isinstance(el, etree._Element) and el.getparent() is not None:
+                    removed.update(el.iter())
                 self._remove_element(el)
         if isinstance(selected_elems, str):
             return [selected_elems]
         if selected_elems is not None:
-            return [el for el in map(self._reevaluate, selected_elems) if el is not None]
+            return [el for el in (self._reevaluate(el, removed) for el in selected_elems) if el is not None]
         return []
 
-    def get_filtered_data(self, job_index_number: int | None = None) -> str:
+    def _get_selected_elements(self, job_index_number: int | None = None) -> list[etree._Element | str]:
         elements = self._get_filtered_elements(job_index_number)
         if self.skip:
             elements = elements[self.skip :]
         if self.maxitems:
             elements = elements[: self.maxitems]
+        return elements
+
+    def _join(self, elements: list[etree._Element | str]) -> str:
         elementstrs = (self._to_string(element, self.method) for element in elements)
         return '\n'.join(sorted(elementstrs) if self.sort_items else elementstrs)
 
+    def _adds_whitespace(self, element: etree._Element) -> bool:
+        """Whether serializing the element with pretty_print (see _to_string()) may add whitespace within it, which
+        parsing the result would turn into text nodes that a copy of the element does not have. Following libxml2's
+        serializers, with 'method: html' a newline may be added around the child elements of an element not separated
+        from each other or from its start and end tags by text, and with 'method: xml' an element whose children are
+        all elements is indented.
+        """
+        for el in element.iter():
+            if not len(el):
+                continue
+            if self.method == 'xml':
+                if el.text is None and all(child.tail is None for child in el):
+                    return True
+            elif (len(el) > 1 or el.text is not None or el[0].tail is not None) and (
+                el.text is None or any(child.tail is None for child in el)
+            ):
+                return True
+        return False
+
+    def _to_document(self, elements: list[etree._Element | str]) -> ParsedDocument | None:
+        """Build the document that parsing the result (the elements joined by newlines) would give, from copies of
+        the elements, or return None if it cannot be built without parsing (text results, elements whose
+        serialization adds whitespace, more than one root element with 'method: xml', or html/head/body elements or
+        comments with 'method: html').
+        """
+        if any(not isinstance(element, etree._Element) or not isinstance(element.tag, str) for element in elements):
+            return None
+        if any(self._adds_whitespace(element) for element in elements):
+            return None
+        if self.method == 'xml':
+            if len(elements) != 1:  # not well-formed: the error is raised by the next filter when parsing
+                return None
+            element = elements[0]
+            # keeps the namespace declarations in scope, as serializing does
+            root = etree.Element(element.tag, element.attrib, nsmap=element.nsmap)  # ty:ignore[invalid-argument-type]
+            root.text = element.text
+            root.extend(child.__copy__() for child in element)  # deep copies
+            return ParsedDocument(root, self.method)
+        if not elements:
+            return ParsedDocument(None, self.method)
+        if any(element.tag in {'html', 'head', 'body'} for element in elements):  # ty:ignore[unresolved-attribute]
+            return None
+        root = etree.Element('html')
+        head = body = None
+        for element in elements:
+            if body is None and element.tag in self.HEAD_TAGS:  # ty:ignore[unresolved-attribute]
+                if head is None:
+                    head = etree.SubElement(root, 'head')
+                parent = head
+            else:
+                if body is None:
+                    body = etree.SubElement(root, 'body')
+                parent = body
+            element_copy = element.__copy__()  # a deep copy
+            element_copy.tail = '\n'
+            parent.append(element_copy)
+        element_copy.tail = None
+        return ParsedDocument(root, self.method)
+
+    def get_filtered_data(self, job_index_number: int | None = None) -> str:
+        return self._join(self._get_selected_elements(job_index_number))
+
+    def get_filtered_document(self, job_index_number: int | None = None) -> ParsedDocument | str:
+        """Return the result as a document to hand over to the next filter, or as a string if it must be parsed."""
+        elements = self._get_selected_elements(job_index_number)
+        if not self.sort_items and (document := self._to_document(elements)) is not None:
+            return document
+        return self._join(elements)
+
 
 LXML_PARSER_COMMON_SUBFILTERS = {
     'method': 'The method (html or xml) used for parsing',
@@ -624,11 +1461,22 @@ class CSSFilter(FilterBase):
     skip: int
     maxitems: int
 
-    def filter(self, data: str | bytes, mime_type: str, subfilter: dict[str, Any]) -> tuple[str | bytes, str]:
-        if not isinstance(data, str):
+    @classmethod
+    def parsed_method(cls, subfilter: dict[str, Any]) -> str | None:
+        return subfilter.get('method', 'html')
+
+    def filter(
+        self, data: str | bytes | ParsedDocument, mime_type: str, subfilter: dict[str, Any]
+    ) -> tuple[str | bytes | ParsedDocument, str]:
+        lxml_parser = LxmlParser('css', subfilter, 'selector', self.job, self.precompiled)
+        if isinstance(data, ParsedDocument):
+            lxml_parser.feed_document(data)
+        elif isinstance(data, str):
+            lxml_parser.feed(data)
+        else:
             raise ValueError
-        lxml_parser = LxmlParser('css', subfilter, 'selector', self.job)
-        lxml_parser.feed(data)
+        if self.hand_over_parsed:
+            return lxml_parser.get_filtered_document(self.job.index_number), mime_type
         return lxml_parser.get_filtered_data(self.job.index_number), mime_type
 
 
@@ -651,9 +1499,20 @@ class XPathFilter(FilterBase):
     skip: int
     maxitems: int
 
-    def filter(self, data: str | bytes, mime_type: str, subfilter: dict[str, Any]) -> tuple[str | bytes, str]:
-        if not isinstance(data, str):
+    @classmethod
+    def parsed_method(cls, subfilter: dict[str, Any]) -> str | None:
+        return subfilter.get('method', 'html')
+
+    def filter(
+        self, data: str | bytes | ParsedDocument, mime_type: str, subfilter: dict[str, Any]
+    ) -> tuple[str | bytes | ParsedDocument, str]:
+        lxml_parser = LxmlParser('xpath', subfilter, 'path', self.job, self.precompiled)
+        if isinstance(data, ParsedDocument):
+            lxml_parser.feed_document(data)
+        elif isinstance(data, str):
+            lxml_parser.feed(data)
+        else:
             raise ValueError
-        lxml_parser = LxmlParser('xpath', subfilter, 'path', self.job)
-        lxml_parser.feed(data)
+        if self.hand_over_parsed:
+            return lxml_parser.get_filtered_document(self.job.index_number), mime_type
         return lxml_parser.get_filtered_data(self.job.index_number), mime_type
@@ -4,6 +4,8 @@
 
 from __future__ import annotations
 
+import atexit
+import collections
 import json
 import logging
 import os
@@ -11,31 +13,217 @@ import re
 import shlex
 import subprocess
 import sys
-from typing import Any
+import threading
+from typing import IO, TYPE_CHECKING, Any
 
 from webchanges import __project_name__
 from webchanges.filters._base import FilterBase
 
+if TYPE_CHECKING:
+    from webchanges.jobs import JobBase
+
 logger = logging.getLogger(__name__)
 
 
+class Coprocess:
+    """A long-lived process running a command (of a filter or job with the 'persistent' directive) to which requests
+    are sent one after the other, instead of starting the command anew for each job and run.
+
+    Requests and responses both consist of two frames, each being the length of its content in bytes (as decimal ASCII
+    digits) and a newline, followed by the content: a header, which is a JSON object, and the data. The header of a
+    request contains the job's metadata ('job', its directives, and its 'name', 'location' and 'index_number'); the
+    header of a response is an empty object ({}) or has an 'error' message. Text is encoded in UTF-8.
+
+    The process is started at the first request and again if it exits; if a request times out (after
+    'default_timeout' seconds unless specified), the process is killed. The request is written by a separate thread, so
+    that a process that starts responding before having read all of it does not block. All processes are closed at
+    exit, by closing their standard input.
+    """
+
+    default_timeout = 300  # seconds to wait for a response if no timeout is specified
+    _running: dict[tuple[str, bool], Coprocess] = {}
+    _running_lock = threading.Lock()
+
+    def __init__(self, command: str | list[str], shell: bool) -> None:
+        """:param command: The command.
+        :param shell: Whether to run the command through the shell.
+        """
+        self.command = command
+        self.shell = shell
+        self.lock = threading.Lock()
+        self.process: subprocess.Popen | None = None
+        self.stderr: collections.deque[str] = collections.deque(maxlen=50)
+
+    @classmethod
+    def get(cls, command: str | list[str], shell: bool = False) -> Coprocess:
+        """Return the coprocess running a command, creating it the first time.
+
+        :param command: The command.
+        :param shell: Whether to run the command through the shell.
+        :returns: The Coprocess.
+        """
+        key = (json.dumps(command), shell)
+        with cls._running_lock:
+            if key not in cls._running:
+                cls._running[key] = cls(command, shell)
+            return cls._running[key]
+
+    @classmethod
+    def close_all(cls) -> None:
+        """Close all coprocesses (called at exit)."""
+        with cls._running_lock:
+            coprocesses = list(cls._running.values())
+            cls._running.clear()
+        for coprocess in coprocesses:
+            coprocess.close()
+
+    @staticmethod
+    def job_header(job: JobBase) -> dict[str, Any]:
+        """Return the header of a request with the metadata of a job.
+
+        :param job: The job.
+        :returns: The header.
+        """
+        return {
+            'job': job.to_dict(),
+            'name': job.pretty_name(),
+            'location': job.get_location(),
+            'index_number': job.index_number,
+        }
+
+    def _start(self) -> subprocess.Popen:
+        logger.info(f'Starting persistent coprocess {self.command}')
+        process = subprocess.Popen(  # noqa: S603 Check for untrusted input
+            self.command,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            shell=self.shell,
+        )
+        threading.Thread(target=self._collect_stderr, args=(process,), daemon=True).start()
+        return process
+
+    def _collect_stderr(self, process: subprocess.Popen) -> None:
+        """Keep the last lines of the standard error of the process for error messages (and so that the process does
+        not block writing to it).
+        """
+        for line in process.stderr:  # ty:ignore[not-iterable]
+            self.stderr.append(line.decode(errors='replace'))
+
+    @staticmethod
+    def _write_frame(stream: IO[bytes], content: bytes) -> None:
+        stream.write(f'{len(content)}\n'.encode())
+        stream.write(content)
+
+    @staticmethod
+    def _read_frame(stream: IO[bytes], max_size: int | None = None) -> bytes:
+        length = stream.readline()
+        if not length:
+            raise EOFError('The coprocess closed its output')
+        if max_size and int(length) > max_size:
+            raise OverflowError(int(length))
+        content = stream.read(int(length))
+        if len(content) != int(length):
+            raise EOFError('The coprocess closed its output')
+        return content
+
+    def _write_request(self, stream: IO[bytes], header: dict[str, Any], data: str | bytes) -> None:
+        """Write a request (in the thread started by request()); errors, e.g. if the process exits, are ignored as
+        they are reported by the reading of the response.
+        """
+        try:
+            self._write_frame(stream, json.dumps(header).encode())
+            self._write_frame(stream, data.encode() if isinstance(data, str) else data)
+            stream.flush()
+        except OSError:
+            pass
+
+    def request(
+        self, header: dict[str, Any], data: str | bytes, timeout: float | None = None, max_output: int | None = None
+    ) -> bytes:
+        """Send a request to the coprocess and return its response.
+
+        :param header: The header of the request (see job_header()).
+        :param data: The data of the request.
+        :param timeout: The time (in seconds) to wait for the response (default: 'default_timeout').
+        :param max_output: The maximum size of the data of the response, in bytes, if any.
+        :returns: The data of the response.
+        :raises subprocess.TimeoutExpired: If the response takes more than 'timeout' seconds (the process is killed).
+        :raises subprocess.CalledProcessError: If the process exits (e.g. crashes) before responding, or its response
+           is malformed (the process is killed).
+        :raises OutputTooLargeError: If the data of the response exceeds 'max_output' (the process is killed).
+        :raises RuntimeError: If the header of the response has an error.
+        """
+        if timeout is None:
+            timeout = self.default_timeout
+        with self.lock:
+            if self.process is not None and self.process.poll() is not None:
+                logger.warning(
+                    f'Persistent coprocess {self.command} exited with code {self.process.returncode}; restarting it'
+                )
+                self.process = None
+            if self.process is None:
+                self.stderr.clear()
+                self.process = self._start()
+            process = self.process
+            timed_out = threading.Event()
+
+            def kill() -> None:
+                timed_out.set()
+                process.kill()
+
+            timer = threading.Timer(timeout, kill) if timeout else None
+            if timer is not None:
+                timer.start()
+            writer = threading.Thread(target=self._write_request, args=(process.stdin, header, data), daemon=True)
+            writer.start()
+            try:
+                response_header = json.loads(self._read_frame(process.stdout))  # ty:ignore[invalid-argument-type]
+                response = self._read_frame(process.stdout, max_output)  # ty:ignore[invalid-argument-type]
+                writer.join()  # the process has read the whole request, unless it is killed on timeout
+                if timed_out.is_set():
+                    raise EOFError('The coprocess was killed')
+            except (OSError, EOFError, ValueError, OverflowError) as e:
+                process.kill()
+                returncode = process.wait()
+                self.process = None
+                if timed_out.is_set():
+                    raise subprocess.TimeoutExpired(self.command, timeout) from None  # ty:ignore[invalid-argument-type]
+                if isinstance(e, OverflowError):
+                    from webchanges.jobs import OutputTooLargeError  # here, as webchanges.jobs imports this module
+
+                    raise OutputTooLargeError(str(self.command), max_output) from None  # ty:ignore[invalid-argument-type]
+                raise subprocess.CalledProcessError(
+                    returncode, self.command, output=str(e), stderr=''.join(self.stderr)
+                ) from None
+            finally:
+                if timer is not None:
+                    timer.cancel()
+        if response_header.get('error'):
+            raise RuntimeError(f'Persistent coprocess {self.command} returned error: {response_header["error"]}')
+        return response
+
+    def close(self) -> None:
+        """Close the standard input of the process, and kill it if it does not then exit within 5 seconds."""
+        with self.lock:
+            if self.process is None:
+                return
+            try:
+                self.process.stdin.close()  # ty:ignore[possibly-missing-attribute]
+                self.process.wait(5)
+            except (OSError, subprocess.TimeoutExpired):
+                self.process.kill()
+                self.process.wait()
+            self.process = None
+
+
+atexit.register(Coprocess.close_all)
+
+
 def _pipe_filter(f_cls: FilterBase, data: str | bytes, subfilter: dict[str, Any]) -> str:
     if 'command' not in subfilter:
         raise ValueError(f"The '{f_cls.__kind__}' filter needs a command. ({f_cls.job.get_indexed_location()})")
 
-    # Work on a copy of the environment as not to modify the outside environment
-    env = os.environ.copy()
-    env.update(
-        {
-            f'{__project_name__.upper()}_JOB_JSON': json.dumps(f_cls.job.to_dict()),
-            f'{__project_name__.upper()}_JOB_NAME': f_cls.job.pretty_name(),
-            f'{__project_name__.upper()}_JOB_LOCATION': f_cls.job.get_location(),
-            f'{__project_name__.upper()}_JOB_INDEX_NUMBER': str(f_cls.job.index_number),
-            'URLWATCH_JOB_NAME': f_cls.job.pretty_name(),  # urlwatch 2 compatibility
-            'URLWATCH_JOB_LOCATION': f_cls.job.get_location(),  # urlwatch 2 compatibility
-        }
-    )
-
     if subfilter.get('escape_characters') and sys.platform == 'win32':
         escaped_command = re.sub(r'([()!^"<>&|])', r'^\1', subfilter['command']).replace('%', '%%')
         # escaped_command = _windows_escape_cmd(subfilter['command'])
@@ -49,6 +237,35 @@ def _pipe_filter(f_cls: FilterBase, data: str | bytes, subfilter: dict[str, Any]
         command = escaped_command
         shell = True
 
+    timeout = subfilter.get('timeout')
+    if subfilter.get('persistent'):
+        try:
+            return (
+                Coprocess.get(command, shell).request(Coprocess.job_header(f_cls.job), data, timeout).decode()
+            )
+        except subprocess.CalledProcessError as e:
+            logger.error(
+                f"The persistent '{f_cls.__kind__}' filter exited with code {e.returncode} "
+                f'({f_cls.job.get_indexed_location()}):\n{e.stderr}\n---\n{e.stdout}'
+            )
+            raise
+        except FileNotFoundError as e:
+            logger.error(f"The '{f_cls.__kind__}' filter returned error ({f_cls.job.get_indexed_location()}):\n{e}")
+            raise FileNotFoundError(e, f'with command {command}') from None
+
+    # Work on a copy of the environment as not to modify the outside environment
+    env = os.environ.copy()
+    env.update(
+        {
+            f'{__project_name__.upper()}_JOB_JSON': json.dumps(f_cls.job.to_dict()),
+            f'{__project_name__.upper()}_JOB_NAME': f_cls.job.pretty_name(),
+            f'{__project_name__.upper()}_JOB_LOCATION': f_cls.job.get_location(),
+            f'{__project_name__.upper()}_JOB_INDEX_NUMBER': str(f_cls.job.index_number),
+            'URLWATCH_JOB_NAME': f_cls.job.pretty_name(),  # urlwatch 2 compatibility
+            'URLWATCH_JOB_LOCATION': f_cls.job.get_location(),  # urlwatch 2 compatibility
+        }
+    )
+
     try:
         return subprocess.run(  # noqa: S603 Check for untrusted input
             command,
@@ -58,6 +275,7 @@ def _pipe_filter(f_cls: FilterBase, data: str | bytes, subfilter: dict[str, Any]
             check=True,
             text=True,
             env=env,
+            timeout=timeout,
         ).stdout
     except subprocess.CalledProcessError as e:
         logger.error(
@@ -78,6 +296,8 @@ class ExecuteFilter(FilterBase):
     __supported_subfilters__: dict[str, str] = {
         'command': 'Command to execute for filtering (required)',
         'escape_characters': 'Whether to escape characters when running in Windows',
+        'persistent': 'Whether to keep running the command and send it the data of each job (see Coprocess)',
+        'timeout': 'Timeout (in seconds) for the command to return the data',
     }
 
     __default_subfilter__ = 'command'
@@ -96,6 +316,8 @@ class ShellPipeFilter(FilterBase):
     __supported_subfilters__: dict[str, str] = {
         'command': 'Shell command to execute for filtering (required)',
         'escape_characters': 'Whether to escape characters when running in Windows',
+        'persistent': 'Whether to keep running the command and send it the data of each job (see Coprocess)',
+        'timeout': 'Timeout (in seconds) for the command to return the data',
     }
 
     __default_subfilter__ = 'command'
@@ -4,15 +4,68 @@
 
 from __future__ import annotations
 
+import itertools
 import logging
 import re
 import warnings
-from typing import Any, Iterator
+from typing import Any, Callable, Iterable, Iterator
 
 from webchanges.filters._base import FilterBase
 
 logger = logging.getLogger(__name__)
 
+# The line boundaries of str.splitlines()
+LINE_BOUNDARIES = '\n\r\x0b\x0c\x1c\x1d\x1e\x85\u2028\u2029'
+
+# Helpers of the line_stage() of the filters, which work on the lines of the text as split by
+# str.splitlines(keepends=True) and return lines split in the same way, so that the result is identical to that of
+# filter().
+
+
+def _join_crlf(lines: list[str]) -> list[str]:
+    """Merge a line ending in '\\r' with a following empty line ending in '\\n' (once the lines that were between
+    them have been removed), as splitting the joined lines would.
+    """
+    if '\n' not in lines:
+        return lines
+    merged: list[str] = []
+    for line in lines:
+        if line == '\n' and merged and merged[-1][-1:] == '\r':
+            merged[-1] += line
+        else:
+            merged.append(line)
+    return merged
+
+
+def _lstrip_lines(lines: list[str], chars: str | None = None) -> list[str]:
+    """Apply str.lstrip(chars) to the text made of the lines."""
+    start = 0
+    while start < len(lines) and not lines[start].lstrip(chars):
+        start += 1
+    del lines[:start]
+    if lines:
+        lines[0] = lines[0].lstrip(chars)
+    return lines
+
+
+def _rstrip_lines(lines: list[str], chars: str | None = None) -> list[str]:
+    """Apply str.rstrip(chars) to the text made of the lines."""
+    while lines and not lines[-1].rstrip(chars):
+        lines.pop()
+    if lines:
+        lines[-1] = lines[-1].rstrip(chars)
+    return lines
+
+
+def _split_items(lines: list[str]) -> list[str]:
+    """Split the text made of the lines at '\\n' (as str.split('\\n'))."""
+    return ''.join(lines).split('\n')
+
+
+def _join_items(items: list[str]) -> list[str]:
+    """Return the lines of the text made of the items joined by '\\n'."""
+    return '\n'.join(items).splitlines(keepends=True)
+
 
 class KeepLinesContainingFilter(FilterBase):
     """Filter only lines matching a regular expression."""
@@ -46,16 +99,11 @@ class KeepLinesContainingFilter(FilterBase):
             )
         if 're' in subfilter:
             if isinstance(subfilter['re'], str):
-                try:
-                    return (
-                        ''.join(
-                            line for line in data.splitlines(keepends=True) if re.search(subfilter['re'], line)
-                        ).rstrip(),
-                        mime_type,
-                    )
-                except re.error as e:  # FIXIT: Python version 3.13+ change to re.PatternError
-                    e.args = (f'{e.args[0]} (pattern: "{subfilter["pattern"]}")', *e.args[1:])
-                    raise
+                pattern = self.cached_regex(subfilter, 're')
+                return (
+                    ''.join(line for line in data.splitlines(keepends=True) if pattern.search(line)).rstrip(),
+                    mime_type,
+                )
             raise TypeError(
                 f"The '{self.__kind__}' filter requires a string but you provided a "
                 f'{type(subfilter["re"]).__name__}. ({self.job.get_indexed_location()})'
@@ -64,6 +112,15 @@ class KeepLinesContainingFilter(FilterBase):
             f"The '{self.__kind__}' filter requires a 'text' or 're' sub-directive. ({self.job.get_indexed_location()})"
         )
 
+    def line_stage(self, subfilter: dict[str, Any]) -> Callable[[list[str]], list[str]] | None:
+        if isinstance(subfilter.get('text'), str):
+            text = subfilter['text']
+            return lambda lines: _rstrip_lines(_join_crlf([line for line in lines if text in line]))
+        if 'text' not in subfilter and isinstance(subfilter.get('re'), str):
+            pattern = self.cached_regex(subfilter, 're')
+            return lambda lines: _rstrip_lines(_join_crlf([line for line in lines if pattern.search(line)]))
+        return None
+
 
 class GrepFilter(FilterBase):
     """Deprecated; use ``keep_lines_containing`` instead."""
@@ -124,16 +181,11 @@ class DeleteLinesContainingFilter(FilterBase):
             )
         if 're' in subfilter:
             if isinstance(subfilter['re'], str):
-                try:
-                    return (
-                        ''.join(
-                            line for line in data.splitlines(keepends=True) if re.search(subfilter['re'], line) is None
-                        ).rstrip(),
-                        mime_type,
-                    )
-                except re.error as e:  # FIXIT: Python version 3.13+ change to re.PatternError
-                    e.args = (f'{e.args[0]} (pattern: "{subfilter["pattern"]}")', *e.args[1:])
-                    raise
+                pattern = self.cached_regex(subfilter, 're')
+                return (
+                    ''.join(line for line in data.splitlines(keepends=True) if pattern.search(line) is None).rstrip(),
+                    mime_type,
+                )
             raise TypeError(
                 f"The '{self.__kind__}' filter requires a string but you provided a "
                 f'{type(subfilter["re"]).__name__}. ({self.job.get_indexed_location()})'
@@ -142,6 +194,15 @@ class DeleteLinesContainingFilter(FilterBase):
             f"The '{self.__kind__}' filter requires a 'text' or 're' sub-directive. ({self.job.get_indexed_location()})"
         )
 
+    def line_stage(self, subfilter: dict[str, Any]) -> Callable[[list[str]], list[str]] | None:
+        if isinstance(subfilter.get('text'), str):
+            text = subfilter['text']
+            return lambda lines: _rstrip_lines(_join_crlf([line for line in lines if text not in line]))
+        if 'text' not in subfilter and isinstance(subfilter.get('re'), str):
+            pattern = self.cached_regex(subfilter, 're')
+            return lambda lines: _rstrip_lines(_join_crlf([line for line in lines if pattern.search(line) is None]))
+        return None
+
 
 class GrepIFilter(FilterBase):
     """Deprecated; use ``delete_lines_containing`` instead."""
@@ -209,6 +270,32 @@ class StripFilter(FilterBase):
 
         return data.strip(subfilter.get('chars')), mime_type
 
+    def line_stage(self, subfilter: dict[str, Any]) -> Callable[[list[str]], list[str]] | None:
+        chars = subfilter.get('chars')
+        side = subfilter.get('side')
+        if side not in {None, 'left', 'right'}:
+            return None
+        if subfilter.get('splitlines'):
+            strip = {'left': str.lstrip, 'right': str.rstrip}.get(side, str.strip)  # ty:ignore[no-matching-overload]
+
+            def strip_each_line(lines: list[str]) -> list[str]:
+                if chars is None and side != 'left':  # line boundaries are whitespace, stripped with the rest
+                    lines = [strip(line) + '\n' for line in lines]
+                else:
+                    lines = [strip(line.rstrip(LINE_BOUNDARIES), chars) + '\n' for line in lines]
+                if lines:  # as '\n'.join()
+                    lines[-1] = lines[-1][:-1]
+                    if not lines[-1]:
+                        lines.pop()
+                return lines
+
+            return strip_each_line
+        if side == 'left':
+            return lambda lines: _lstrip_lines(lines, chars)
+        if side == 'right':
+            return lambda lines: _rstrip_lines(lines, chars)
+        return lambda lines: _rstrip_lines(_lstrip_lines(lines, chars), chars)
+
 
 class StripLinesFilter(FilterBase):
     """Deprecated; use ``strip`` with subfilter ``splitlines`` instead."""
@@ -228,6 +315,15 @@ class StripLinesFilter(FilterBase):
             raise ValueError
         return '\n'.join([line.strip() for line in data.splitlines()]), mime_type
 
+    def line_stage(self, subfilter: dict[str, Any]) -> Callable[[list[str]], list[str]] | None:
+        warnings.warn(
+            f"The 'strip_each_line' filter is deprecated; replace with 'strip' and sub-directive 'splitlines: "
+            f"true' ({self.job.get_indexed_location()})",
+            DeprecationWarning,
+            stacklevel=1,
+        )
+        return StripFilter.line_stage(self, {'splitlines': True})  # ty:ignore[invalid-argument-type]
+
 
 class ReSubFilter(FilterBase):
     """Replace text with regular expressions using Python's re.sub."""
@@ -246,8 +342,9 @@ class ReSubFilter(FilterBase):
             raise ValueError(f"The '{self.__kind__}' filter needs a pattern. ({self.job.get_indexed_location()})")
 
         # Default: Replace with empty string if no "repl" value is set
+        pattern = self.cached_regex(subfilter, 'pattern')
         try:
-            return re.sub(subfilter['pattern'], subfilter.get('repl', ''), data), mime_type
+            return pattern.sub(subfilter.get('repl', ''), data), mime_type
         except re.error as e:  # FIXIT: Python version 3.13+ change to re.PatternError
             e.args = (f'{e.args[0]} (pattern: "{subfilter["pattern"]}")', *e.args[1:])
             raise
@@ -272,13 +369,10 @@ class RegexFindall(FilterBase):
             raise ValueError(f"The '{self.__kind__}' filter needs a pattern. ({self.job.get_indexed_location()})")
 
         # Default: Replace with full match if no "repl" value is set
+        pattern = self.cached_regex(subfilter, 'pattern')
+        repl = subfilter.get('repl', r'\g<0>')
         try:
-            return (
-                '\n'.join(
-                    [match.expand(subfilter.get('repl', r'\g<0>')) for match in re.finditer(subfilter['pattern'], data)]
-                ),
-                mime_type,
-            )
+            return '\n'.join([match.expand(repl) for match in pattern.finditer(data)]), mime_type
         except re.error as e:  # FIXIT: Python version 3.13+ change to re.PatternError
             e.args = (f'{e.args[0]} (pattern: "{subfilter["pattern"]}")', *e.args[1:])
             raise
@@ -327,9 +421,31 @@ class RemoveRepeatedFilter(FilterBase):
         if not isinstance(data, str):
             raise ValueError
         separator = subfilter.get('separator', '\n')
+        uniq_lines = self.remove_repeated(
+            data.split(separator), subfilter.get('ignore_case', False), subfilter.get('adjacent', True)
+        )
+        return separator.join(uniq_lines), mime_type
+
+    def line_stage(self, subfilter: dict[str, Any]) -> Callable[[list[str]], list[str]] | None:
+        if subfilter.get('separator', '\n') != '\n':
+            return None
         ignore_case = subfilter.get('ignore_case', False)
         consecutive = subfilter.get('adjacent', True)
-        data_lines = data.split(separator)
+
+        def remove_repeated_lines(lines: list[str]) -> list[str]:
+            return _join_items(self.remove_repeated(_split_items(lines), ignore_case, consecutive))
+
+        return remove_repeated_lines
+
+    @staticmethod
+    def remove_repeated(data_lines: list[str], ignore_case: bool, consecutive: bool) -> list[str]:
+        """Return the items that are not repeated.
+
+        :param data_lines: The items.
+        :param ignore_case: Whether to ignore differences in case when comparing.
+        :param consecutive: Whether to remove only adjacent items.
+        :returns: The items without repetitions.
+        """
         uniq_lines = [data_lines[0]]
         if not ignore_case:
             for line in data_lines[1:]:
@@ -343,8 +459,7 @@ class RemoveRepeatedFilter(FilterBase):
                 ) or line.strip().lower() not in past_lines:
                     past_lines.append(line.strip().lower())
                     uniq_lines.append(line)
-
-        return separator.join(uniq_lines), mime_type
+        return uniq_lines
 
 
 class RemoveDuplicateLinesFilter(FilterBase):
@@ -362,16 +477,45 @@ class RemoveDuplicateLinesFilter(FilterBase):
         if not isinstance(data, str):
             raise ValueError
         separator = subfilter.get('separator', '\n')
-        data_lines = data.split(separator)
-
-        def get_unique_lines(lines: list[str]) -> Iterator[str]:
-            seen = set()
-            for line in lines:
-                if line not in seen:
-                    yield line
-                    seen.add(line)
-
-        return separator.join(get_unique_lines(data_lines)), mime_type
+        return separator.join(self.unique_lines(data.split(separator))), mime_type
+
+    def line_stage(self, subfilter: dict[str, Any]) -> Callable[[list[str]], list[str]] | None:
+        if subfilter.get('separator', '\n') != '\n':
+            return None
+
+        def remove_duplicate_lines(lines: list[str]) -> list[str]:
+            if not lines:
+                return lines
+            # The last item is what follows the last '\n' ('' if the text ends with one)
+            body, last = (lines, '') if lines[-1][-1:] == '\n' else (lines[:-1], lines[-1])
+            if sum(map(str.endswith, body, itertools.repeat('\n'))) < len(body):  # other line boundaries
+                return _join_items(list(self.unique_lines(_split_items(lines))))
+            # Each line is then an item followed by '\n'
+            unique = dict.fromkeys(body)
+            lines = list(unique)
+            if last + '\n' not in unique:
+                if last:
+                    lines.append(last)
+            elif lines[-1] == '\n':  # the last item is a duplicate: the text ends with the previous item
+                lines.pop()
+            else:
+                lines[-1] = lines[-1][:-1]
+            return lines
+
+        return remove_duplicate_lines
+
+    @staticmethod
+    def unique_lines(lines: Iterable[str]) -> Iterator[str]:
+        """Generate the items that were not seen before.
+
+        :param lines: The items.
+        :returns: The first occurrence of each item.
+        """
+        seen = set()
+        for line in lines:
+            if line not in seen:
+                yield line
+                seen.add(line)
 
 
 class ReverseFilter(FilterBase):
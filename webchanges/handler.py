@@ -4,32 +4,84 @@
 
 from __future__ import annotations
 
+import contextlib
+import json
 import logging
 import os
 import subprocess
 import sys
+import threading
 import time
 import traceback
 from typing import TYPE_CHECKING, Any, ContextManager, Iterator, Literal, NamedTuple, Self, TypedDict
 from zoneinfo import ZoneInfo
 
 from webchanges.differs import DifferBase, ReportKind
-from webchanges.filters import FilterBase
+from webchanges.filters import CompiledFilterChain, FilterBase
 from webchanges.jobs import NotModifiedError
 from webchanges.reporters import ReporterBase
+from webchanges.tracing import Tracer, current_span
+from webchanges.util import json_loads
 
 # https://stackoverflow.com/questions/39740632
 if TYPE_CHECKING:
-    from concurrent.futures import Future
+    from concurrent.futures import Executor, Future
     from pathlib import Path
     from types import TracebackType
 
     from webchanges.jobs import JobBase
     from webchanges.main import Urlwatch
-    from webchanges.storage import SsdbStorage, _Config, _ConfigDifferDefaults
+    from webchanges.storage import FilterCache, SsdbStorage, _Config, _ConfigDifferDefaults
+    from webchanges.tracing import Span
 
 logger = logging.getLogger(__name__)
 
+_NOT_TIMED = contextlib.nullcontext()  # returned by JobState.timed() when neither profiling nor tracing
+
+
+class _StageTimer:
+    """Context manager adding the time spent in its body to a stage of a JobState's timings, if profiling, and
+    recording it as a span of the job, if tracing."""
+
+    __slots__ = ('job_state', 'span', 'stage', 'start')
+
+    def __init__(self, job_state: JobState, stage: str) -> None:
+        self.job_state = job_state
+        self.stage = stage
+        self.span: Span | None = None
+        self.start = 0.0
+
+    def __enter__(self) -> None:
+        job_state = self.job_state
+        if job_state.tracer is not None:
+            # stages started outside of another one, e.g. a diff generated by a reporter, are children of the span of
+            # the current context if any (e.g. the reporter's), else of the job's span while it lasts, else of the
+            # run's span (e.g. 'save', which runs in the main thread once the job has been processed)
+            open_spans = job_state.open_spans
+            parent = open_spans[-1] if open_spans else current_span()
+            if parent is None and job_state.span is not None and job_state.span.end_time is None:
+                parent = job_state.span
+            self.span = job_state.tracer.start_span(
+                self.stage, parent, {'webchanges.job.index_number': job_state.job.index_number}
+            )
+            open_spans.append(self.span)
+        self.start = time.perf_counter()
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc_value: BaseException | None,
+        tb: TracebackType | None,
+    ) -> None:
+        timings = self.job_state.timings
+        if timings is not None:
+            timings[self.stage] = timings.get(self.stage, 0.0) + time.perf_counter() - self.start
+        if self.span is not None:
+            if exc_value is not None:
+                self.span.error = f'{type(exc_value).__name__}: {exc_value}'
+            self.span.end()
+            self.job_state.open_spans.remove(self.span)
+
 
 class Snapshot(NamedTuple):
     """Type for Snapshot named tuple.
@@ -66,8 +118,12 @@ class JobState(ContextManager):
     """The JobState class, which contains run information about a job."""
 
     _http_client_used: Literal['httpx', 'requests', 'curl_cffi', 'playwright'] | None = None
+    command_cpu_time: float | None = None  # CPU time (in seconds) used by the command of a ShellJob
+    command_max_rss: int | None = None  # maximum resident set size (in bytes) of the command of a ShellJob
     error_ignored: bool
     exception: Exception | None = None
+    filter_cache: FilterCache | None = None
+    filter_executor: Executor | None = None
     generated_diff: dict[ReportKind, str]
     history_dic_snapshots: dict[str | bytes, Snapshot]
     new_data: str | bytes = ''
@@ -88,23 +144,50 @@ class JobState(ContextManager):
     old_etag: str = ''
     old_mime_type: str = 'text/plain'
     old_timestamp: float = 1605147837.511478  # initialized to the first release of webchanges!
+    open_spans: list[Span]  # the spans of the stages being timed, innermost last, if tracing (see timed())
+    parsed_json: dict[int, tuple[str | bytes, Any]]  # see load_json()
+    span: Span | None = None  # the span of the job, if tracing (see process())
+    timings: dict[str, float] | None = None  # seconds spent in each stage of the job, if profiling (see timed())
     traceback: str
+    tracer: Tracer | None = None  # the Tracer of the run, if tracing
     tries: int = 0  # if >1, an error; value is the consecutive number of runs leading to an error
     unfiltered_diff: dict[ReportKind, str]
     verb: Verb
 
-    def __init__(self, snapshots_db: SsdbStorage, job: JobBase) -> None:
+    def __init__(
+        self,
+        snapshots_db: SsdbStorage,
+        job: JobBase,
+        filter_cache: FilterCache | None = None,
+        filter_executor: Executor | None = None,
+        profile: bool = False,
+        tracer: Tracer | None = None,
+    ) -> None:
         """Initializes the class
 
         :param snapshots_db: The SsdbStorage object with the snapshot database methods.
         :param job: A JobBase object with the job information.
+        :param filter_cache: The FilterCache used if the job has the 'cache_filters' directive.
+        :param filter_executor: The executor (e.g. a ProcessPoolExecutor) in which to apply the filters (see
+           filter_in_process()), or None to apply them in the calling thread.
+        :param profile: Whether to record the time spent in each stage of the job in 'timings' (see timed()).
+        :param tracer: The Tracer of the run, to record the job and its stages as spans, or None.
         """
         self.snapshots_db = snapshots_db
         self.job: JobBase = job
+        self.filter_cache = filter_cache
+        self.filter_executor = filter_executor
+        if profile:
+            self.timings = {}
+        if tracer is not None:
+            self.tracer = tracer
+            self.open_spans = []
+            self._queued_time = time.time_ns()  # the job waits in the queue of its pool of threads until process()
 
         self.generated_diff = {}
         self.unfiltered_diff = {}
         self.history_dic_snapshots = {}
+        self.parsed_json = {}
 
     def __enter__(self) -> Self:
         """Context manager invoked on entry to the body of a with statement to make it possible to factor out standard
@@ -159,6 +242,31 @@ class JobState(ContextManager):
         attrs = ('error_ignored', 'exception', 'new_data', 'new_etag', 'new_timestamp')
         return {attr: getattr(self, attr) for attr in attrs if hasattr(self, attr)}
 
+    def timed(self, stage: str, part: str | None = None) -> ContextManager:
+        """Returns a context manager adding the time spent in its body to the stage in 'timings', if profiling, and
+        recording it as a span of the job, if tracing (else one that does nothing).
+
+        Stages are named 'load', 'retrieve', 'filters', 'diff' and 'save', whose sum is the time spent on the job,
+        and their parts are named by appending a dot and the name of the part (e.g. 'retrieve.tls',
+        'filters.2.html2text' or 'diff.html').
+
+        :param stage: The name of the stage.
+        :param part: The name of the part of the stage, if timing a part.
+        :returns: The context manager.
+        """
+        if self.timings is None and self.tracer is None:
+            return _NOT_TIMED
+        return _StageTimer(self, stage if part is None else f'{stage}.{part}')
+
+    def add_timing(self, stage: str, seconds: float) -> None:
+        """Adds time to the stage in 'timings', if profiling (see timed()).
+
+        :param stage: The name of the stage.
+        :param seconds: The time spent in the stage.
+        """
+        if self.timings is not None:
+            self.timings[stage] = self.timings.get(stage, 0.0) + seconds
+
     def load(self) -> None:
         """Loads form the database the last snapshot(s) for the job."""
         guid = self.job.guid
@@ -179,6 +287,11 @@ class JobState(ContextManager):
 
     def save(self) -> None:
         """Saves new data retrieved by the job into the snapshot database."""
+        with self.timed('save'):
+            self._save()
+
+    def _save(self) -> None:
+        """Saves new data retrieved by the job into the snapshot database (see save())."""
         if self.new_error_data:  # have encountered an exception, so save the old data
             new_snapshot = Snapshot(
                 data=self.old_data,
@@ -205,10 +318,34 @@ class JobState(ContextManager):
         self.snapshots_db.delete_latest(guid=self.job.guid, temporary=temporary)
 
     def process(self, headless: bool = True) -> JobState:
-        """Processes the job: loads it (i.e. runs it) and handles Exceptions (errors).
+        """Processes the job: loads it (i.e. runs it) and handles Exceptions (errors). If tracing, this is recorded as
+        the span of the job, starting with the time it waited in the queue of its pool of threads.
 
         :returns: a JobState object containing information of the job run.
         """
+        if self.tracer is None:
+            return self._process(headless)
+        self.span = self.tracer.start_span(
+            f'job {self.job.index_number}',
+            self.tracer.root,
+            {
+                'webchanges.job.index_number': self.job.index_number,
+                'webchanges.job.kind': self.job.__kind__,
+                'webchanges.job.location': self.job.get_location(),
+                'thread.name': threading.current_thread().name,
+            },
+            start_time=self._queued_time,
+        )
+        self.tracer.start_span('queue', self.span, start_time=self._queued_time).end()
+        try:
+            return self._process(headless)
+        finally:
+            if self.exception is not None and not isinstance(self.exception, NotModifiedError):
+                self.span.error = f'{type(self.exception).__name__}: {self.exception}'
+            self.span.end()
+
+    def _process(self, headless: bool) -> JobState:
+        """Processes the job (see process())."""
         logger.info(f'{self.job.get_indexed_location()} started processing ({type(self.job).__name__})')
         logger.debug(f'Job {self.job.index_number}: {self.job}')
 
@@ -219,25 +356,45 @@ class JobState(ContextManager):
             return self
 
         try:
-            self.load()
+            with self.timed('load'):
+                self.load()
 
             self.new_timestamp = time.time()
-            data, self.new_etag, mime_type = self.job.retrieve(self, headless)
+            with self.timed('retrieve'):
+                data, self.new_etag, mime_type = self.job.retrieve(self, headless)
             logger.info(f'Job {self.job.index_number}: Retrieved {len(data)} bytes of {mime_type} content.')
 
             logger.debug(
                 f'Job {self.job.index_number}: Retrieved data={data!r} | etag={self.new_etag} | mime_type={mime_type}'
             )
 
-            # Apply automatic filters first
-            filtered_data, mime_type = FilterBase.auto_process(self, data, mime_type)
-
-            # Apply any specified filters
-            for filter_kind, subfilter in FilterBase.normalize_filter_list(self.job.filters, self.job.index_number):  # ty:ignore[invalid-argument-type]
-                filtered_data, mime_type = FilterBase.process(filter_kind, subfilter, self, filtered_data, mime_type)
+            with self.timed('filters'):
+                if self.filter_executor is not None:
+                    filtered_data, mime_type, job_changes, timings, spans = self.filter_executor.submit(
+                        filter_in_process,
+                        self.job,
+                        data,
+                        mime_type,
+                        self.filter_cache,
+                        self.timings is not None,
+                        self.tracer is not None,
+                    ).result()
+                    for attr, value in job_changes.items():
+                        setattr(self.job, attr, value)
+                    for stage, seconds in (timings or {}).items():
+                        self.add_timing(stage, seconds)
+                    if spans:
+                        self.tracer.adopt(spans, self.open_spans[-1])  # ty:ignore[possibly-missing-attribute]
+                else:
+                    filtered_data, mime_type = self.apply_filters(data, mime_type)
 
             self.new_data = filtered_data
             self.new_mime_type = mime_type
+            # only the deepdiff differ can reuse a deserialization of the filtered data
+            if (self.job.differ or {}).get('name') == 'deepdiff' and id(filtered_data) in self.parsed_json:
+                self.parsed_json = {id(filtered_data): self.parsed_json[id(filtered_data)]}
+            else:
+                self.parsed_json = {}
 
         except NotModifiedError as e:
             # HTTP 304 response has been received
@@ -280,6 +437,46 @@ class JobState(ContextManager):
         logger.info(f'{self.job.get_indexed_location()} ended processing')
         return self
 
+    def apply_filters(self, data: str | bytes, mime_type: str) -> tuple[str | bytes, str]:
+        """Apply the automatic filters and then the job's filters to the retrieved data.
+
+        :param data: The data retrieved.
+        :param mime_type: The media type (fka MIME type) of the data.
+        :returns: The filtered data and its media type (fka MIME type).
+        """
+        # Apply automatic filters first
+        with self.timed('filters.auto'):
+            filtered_data, mime_type = FilterBase.auto_process(self, data, mime_type)
+
+        # Apply any specified filters
+        filter_chain = CompiledFilterChain.get(self.job.filters, self.job.index_number)  # ty:ignore[invalid-argument-type]
+        return filter_chain.process(self, filtered_data, mime_type)
+
+    def load_json(self, data: str | bytes) -> Any:  # noqa: ANN401 Dynamically typed expressions Any are disallowed
+        """Deserializes JSON data (see json_loads()), or returns the result of the previous deserialization of the same
+        data object (e.g. by a filter of this job, or by the deepdiff differ for another kind of report) so that large
+        documents are not parsed again.
+
+        :param data: The JSON data.
+        :returns: The deserialized data.
+        :raises json.JSONDecodeError: If the data is not valid JSON.
+        """
+        cached = self.parsed_json.get(id(data))
+        if cached is not None and cached[0] is data:
+            return cached[1]
+        parsed = json_loads(data)
+        self.remember_json(data, parsed)
+        return parsed
+
+    def remember_json(self, data: str | bytes, parsed: Any) -> None:  # noqa: ANN401 Dynamically typed expressions Any are disallowed
+        """Records that the JSON data deserializes to 'parsed', which load_json() will then return for it. Used by
+        filters that serialize a document they have already deserialized (e.g. format-json).
+
+        :param data: The JSON data, which is kept referenced.
+        :param parsed: The result of deserializing the data; it must not be modified.
+        """
+        self.parsed_json[id(data)] = (data, parsed)
+
     def get_diff(
         self,
         report_kind: ReportKind = 'plain',
@@ -297,6 +494,17 @@ class JobState(ContextManager):
         if report_kind in self.generated_diff:
             return self.generated_diff[report_kind]
 
+        with self.timed('diff'), self.timed('diff', report_kind):
+            return self._get_diff(report_kind, differ, differ_defaults, tz)
+
+    def _get_diff(
+        self,
+        report_kind: ReportKind,
+        differ: dict[str, Any] | None,
+        differ_defaults: _ConfigDifferDefaults | None,
+        tz: ZoneInfo | None,
+    ) -> str:
+        """Generates the job's diff for get_diff()."""
         if report_kind not in self.unfiltered_diff:
             differ_kind, subdiffer = DifferBase.normalize_differ(
                 differ or self.job.differ,
@@ -308,13 +516,10 @@ class JobState(ContextManager):
         _generated_diff = self.unfiltered_diff[report_kind]
         if _generated_diff:
             # Apply any specified diff_filters
-            _mime_type = 'text/plain'
-            for filter_kind, subfilter in FilterBase.normalize_filter_list(
-                self.job.diff_filters, self.job.index_number
-            ):
-                _generated_diff, _mime_type = FilterBase.process(
-                    filter_kind, subfilter, self, _generated_diff, _mime_type
-                )
+            diff_filter_chain = CompiledFilterChain.get(self.job.diff_filters, self.job.index_number)
+            _generated_diff, _mime_type = diff_filter_chain.process(
+                self, _generated_diff, 'text/plain', stage='diff.filters'
+            )
         self.generated_diff[report_kind] = str(_generated_diff)
 
         return self.generated_diff[report_kind]
@@ -324,15 +529,50 @@ class JobState(ContextManager):
         return self.new_mime_type == 'text/markdown' or bool(self.job.is_markdown)
 
 
+def filter_in_process(
+    job: JobBase,
+    data: str | bytes,
+    mime_type: str,
+    filter_cache: FilterCache | None = None,
+    profile: bool = False,
+    trace: bool = False,
+) -> tuple[str | bytes, str, dict[str, Any], dict[str, float] | None, list[Span] | None]:
+    """Apply the filters to the data retrieved by a job (see JobState.apply_filters()) in a process of a
+    ProcessPoolExecutor, where the filters get a JobState with only the job (and the FilterCache).
+
+    :param job: The job (a copy of the one of the calling process).
+    :param data: The data retrieved.
+    :param mime_type: The media type (fka MIME type) of the data.
+    :param filter_cache: The FilterCache used if the job has the 'cache_filters' directive.
+    :param profile: Whether to time the filters (see JobState.timed()).
+    :param trace: Whether to record the spans of the filters.
+    :returns: The filtered data, its media type (fka MIME type), the job's attributes changed by the filters (e.g.
+       'markdown_padded_tables'), to be set on the job of the calling process, and, if requested, the timings of the
+       filters, to be added to those of the job, and their spans, to be adopted by the Tracer of the run (see
+       Tracer.adopt()).
+    """
+    before = vars(job).copy()
+    tracer = Tracer() if trace else None
+    job_state = JobState(None, job, filter_cache, profile=profile, tracer=tracer)  # ty:ignore[invalid-argument-type]
+    data, mime_type = job_state.apply_filters(data, mime_type)
+    changes = {k: v for k, v in vars(job).items() if k not in before or before[k] is not v}
+    return data, mime_type, changes, job_state.timings, tracer.spans[1:] if tracer is not None else None
+
+
 class Report:
     """The base class for reporting."""
 
-    job_states: list[JobState] = []
+    job_states: list[JobState]
     new_release_future: Future[str | bool] | None = None
+    profiled_job_states: list[JobState]  # the job states with timings, including those not reported
     start: float = time.perf_counter()
+    timings: dict[str, float] | None = None  # seconds spent by each reporter, if profiling (set to {} by Urlwatch)
+    tracer: Tracer | None = None  # the Tracer of the run, if tracing (set by Urlwatch)
 
     def __init__(self, urlwatch: Urlwatch) -> None:
         """:param urlwatch: The Urlwatch object with the program configuration information."""
+        self.job_states = []
+        self.profiled_job_states = []
         self.config: _Config = urlwatch.config_storage.config
         self.tz = (
             ZoneInfo(self.config['report']['tz'])
@@ -475,6 +715,88 @@ class Report:
             if job_is_reportable(self, job_state):
                 yield job_state
 
+    def timed(self, reporter_name: str) -> ContextManager:
+        """Returns a context manager adding the time spent in its body to the reporter in 'timings', if profiling, and
+        recording it as a span of the run, if tracing (else one that does nothing).
+
+        :param reporter_name: The name of the reporter.
+        :returns: The context manager.
+        """
+        if self.timings is None and self.tracer is None:
+            return _NOT_TIMED
+        return self._timed(reporter_name)
+
+    @contextlib.contextmanager
+    def _timed(self, reporter_name: str) -> Iterator[None]:
+        start = time.perf_counter()
+        with (
+            self.tracer.span(f'report {reporter_name}', {'webchanges.reporter': reporter_name})
+            if self.tracer is not None
+            else _NOT_TIMED
+        ):
+            try:
+                yield
+            finally:
+                if self.timings is not None:
+                    self.timings[reporter_name] = self.timings.get(reporter_name, 0.0) + time.perf_counter() - start
+
+    def profile(self) -> dict[str, Any]:
+        """Returns the timings of the jobs (slowest first) and of the reporters of the run, if profiling (see
+        --profile).
+
+        :returns: A JSON-serializable dict.
+        """
+        jobs = [
+            {
+                'index_number': job_state.job.index_number,
+                'location': job_state.job.get_location(),
+                'total': sum(seconds for stage, seconds in job_state.timings.items() if '.' not in stage),
+                'stages': dict(sorted(job_state.timings.items())),
+            }
+            for job_state in self.profiled_job_states
+            if job_state.timings is not None
+        ]
+        return {
+            'duration': time.perf_counter() - self.start,
+            'jobs': sorted(jobs, key=lambda job: job['total'], reverse=True),
+            'reporters': self.timings or {},
+        }
+
+    def print_profile(self, profile_file: Path | None = None, top: int = 10) -> None:
+        """Prints a summary of the timings of the run (see profile()): the 'top' slowest jobs with the time spent in
+        each of their stages, and the 'top' slowest parts of stages of jobs and reporters. The full timings are
+        saved as JSON in 'profile_file', if given.
+
+        :param profile_file: The path of the JSON file.
+        :param top: The number of jobs and stages listed.
+        """
+        profile = self.profile()
+        if profile_file:
+            profile_file.write_text(json.dumps(profile, indent=2))
+            logger.info(f'Wrote the timings of the run to {profile_file}')
+        columns = ('load', 'retrieve', 'filters', 'diff')
+        lines = [
+            f'Profile of {len(profile["jobs"])} jobs run in {profile["duration"]:.3f} s',
+            '',
+            f'Slowest jobs (seconds):\n{"total":>9}' + ''.join(f'{column:>9}' for column in columns) + '  job',
+        ]
+        for job in profile['jobs'][:top]:
+            lines.append(
+                f'{job["total"]:9.3f}'
+                + ''.join(f'{job["stages"].get(column, 0.0):9.3f}' for column in columns)
+                + f'  {job["index_number"]}: {job["location"]}'
+            )
+        stages = [
+            (seconds, f'job {job["index_number"]}', stage)
+            for job in profile['jobs']
+            for stage, seconds in job['stages'].items()
+            if '.' in stage
+        ] + [(seconds, 'reporter', name) for name, seconds in profile['reporters'].items()]
+        lines.extend(['', f'Slowest stages (seconds):\n{"time":>9}  stage'])
+        for seconds, owner, stage in sorted(stages, reverse=True)[:top]:
+            lines.append(f'{seconds:9.3f}  {owner}: {stage}')
+        print('\n'.join(lines))
+
     def finish(self, jobs_file: list[Path]) -> None:
         """Finish job run: determine its duration and generate reports by submitting job_states to
         :py:Class:`ReporterBase` :py:func:`submit_all`.
@@ -14,6 +14,7 @@ from webchanges.jobs._browser import BrowserJob
 from webchanges.jobs._exceptions import (
     BrowserResponseError,
     NotModifiedError,
+    OutputTooLargeError,
     TransientBrowserError,
     TransientHTTPError,
 )
@@ -27,6 +28,7 @@ __all__ = [
     'Job',
     'JobBase',
     'NotModifiedError',
+    'OutputTooLargeError',
     'ShellJob',
     'TransientBrowserError',
     'TransientHTTPError',
@@ -89,6 +89,7 @@ class JobBase(metaclass=TrackSubClasses):
     _delay: float | None = None  # TODO: WIP experiment
     additions_only: bool | float | str | None = None
     block_elements: list[str] | None = None  # BrowserJob
+    cache_filters: bool | None = None
     compared_versions: int | None = None
     contextlines: int | None = None
     cookies: dict[str, str] | None = None  # UrlJobBase
@@ -125,6 +126,7 @@ class JobBase(metaclass=TrackSubClasses):
     kind: str | None = None  # hooks.py
     loop: asyncio.AbstractEventLoop | None = None
     markdown_padded_tables: bool | None = None
+    max_output: int | None = None  # ShellJob
     max_tries: int | None = None
     method: Literal['GET', 'OPTIONS', 'HEAD', 'POST', 'PUT', 'PATCH', 'DELETE'] | None = None  # UrlJobBase
     mime_type: str | None = None
@@ -134,7 +136,9 @@ class JobBase(metaclass=TrackSubClasses):
     no_conditional_request: bool | None = None
     no_redirects: bool | None = None  # UrlJob
     note: str | None = None
+    output_digest: str | None = None  # ShellJob
     params: str | list | dict[str, str] | None = None  # UrlJobBase
+    persistent: bool | None = None  # ShellJob
     proxy: str | None = None  # UrlJobBase
     referer: str | None = None  # BrowserJob
     retries: int | None = None  # UrlJob
@@ -586,6 +590,7 @@ class Job(JobBase):
     __required__: tuple[str, ...] = ()
     __optional__: tuple[str, ...] = (
         'additions_only',
+        'cache_filters',
         'compared_versions',
         'contextlines',
         'deletions_only',
@@ -222,6 +222,89 @@ class BrowserJob(UrlJobBase):
         except PlaywrightError:
             Path(html_filename).unlink()
 
+    @staticmethod
+    def _add_request_timings(timings: dict[str, float], timing: dict[str, float]) -> None:
+        """Add the retrieval stages of the navigation request, as measured by the browser, to the JobState's timings.
+        Playwright gives the milliseconds elapsed from the start of the request until the start and end of each phase
+        (see https://playwright.dev/python/docs/api/class-request#request-timing), or -1 if not applicable (e.g. when
+        a connection is reused).
+
+        :param timings: The JobState's timings.
+        :param timing: The 'timing' of the Playwright request.
+        """
+        tls_start = timing['secureConnectionStart']
+        for stage, start, end in (
+            ('retrieve.dns', timing['domainLookupStart'], timing['domainLookupEnd']),
+            ('retrieve.connect', timing['connectStart'], tls_start if tls_start >= 0 else timing['connectEnd']),
+            ('retrieve.tls', tls_start, timing['connectEnd']),
+            ('retrieve.server', timing['requestStart'], timing['responseStart']),
+            ('retrieve.download', timing['responseStart'], timing['responseEnd']),
+        ):
+            if start >= 0 and end >= start:
+                timings[stage] = (end - start) / 1000
+
+    def _wait_for(self, page: Page, timeout: float) -> None:
+        """Wait, after navigating, for what the 'wait_for_url', 'wait_for_selector', 'wait_for_function' and
+        'wait_for_timeout' directives specify.
+
+        :param page: The Playwright page.
+        :param timeout: The timeout of waiting for 'wait_for_url' (in milliseconds).
+        :raises ValueError: If a directive has a value of the wrong type.
+        """
+        if self.wait_for_url:
+            logger.info(f'Job {self.index_number}: Waiting for page to navigate to {self.wait_for_url}')
+            if isinstance(self.wait_for_url, str):
+                page.wait_for_url(
+                    self.wait_for_url,
+                    wait_until=self.wait_until,
+                    timeout=timeout,
+                )
+            elif isinstance(self.wait_for_url, dict):
+                page.wait_for_url(**self.wait_for_url)
+            else:
+                raise ValueError(
+                    f"Job {self.index_number}: Directive 'wait_for_url' can only be a string or a "
+                    f'dictionary; found a {type(self.wait_for_url.__name__)} '
+                    f'( {self.get_indexed_location()} ).'
+                )
+        if self.wait_for_selector:
+            logger.info(f'Job {self.index_number}: Waiting for selector {self.wait_for_selector}')
+            if not isinstance(self.wait_for_selector, list):
+                self.wait_for_selector = [self.wait_for_selector]
+            for selector in self.wait_for_selector:
+                if isinstance(selector, str):
+                    page.wait_for_selector(selector)
+                elif isinstance(selector, dict):
+                    page.wait_for_selector(**selector)
+                else:
+                    raise ValueError(
+                        f"Job {self.index_number}: Directive 'wait_for_selector' can only be a "
+                        f'string or a dictionary, or a list of these; found a '
+                        f'{type(self.wait_for_selector).__name__} ( {self.get_indexed_location()} ).'
+                    )
+        if self.wait_for_function:
+            logger.info(f'Job {self.index_number}: Waiting for function {self.wait_for_function}')
+            if isinstance(self.wait_for_function, str):
+                page.wait_for_function(self.wait_for_function)
+            elif isinstance(self.wait_for_function, dict):
+                page.wait_for_function(**self.wait_for_function)
+            else:
+                raise ValueError(
+                    f"Job {self.index_number}: Directive 'wait_for_function' can only be a string "
+                    f'or a dictionary; found a {type(self.wait_for_function).__name__}'
+                    f' ( {self.get_indexed_location()} ).'
+                )
+        if self.wait_for_timeout:
+            logger.info(f'Job {self.index_number}: Waiting for timeout {self.wait_for_timeout}')
+            if isinstance(self.wait_for_timeout, (int, float)) and not isinstance(self.wait_for_timeout, bool):
+                page.wait_for_timeout(self.wait_for_timeout * 1000)
+            else:
+                raise ValueError(
+                    f"Job {self.index_number}: Directive 'wait_for_timeout' can only be a number; "
+                    f'found a {type(self.wait_for_timeout).__name__}'
+                    f' ( {self.get_indexed_location()} ).'
+                )
+
     def retrieve(  # noqa: C901 mccabe complexity too high
         self,
         job_state: JobState,
@@ -630,71 +713,22 @@ class BrowserJob(UrlJobBase):
                     logger.info(f"Job {self.index_number}: Using the 'response_handler' Callable")
                     response = response_handler(page, url, self.wait_until, self.referer)  # ty:ignore[invalid-argument-type]
                 else:
-                    response = page.goto(url, wait_until=self.wait_until, referer=self.referer)
+                    with job_state.timed('retrieve.navigate'):
+                        response = page.goto(url, wait_until=self.wait_until, referer=self.referer)
 
                 if not response:
                     raise BrowserResponseError(('No response received from browser on navigation',))
 
+                if job_state.timings is not None:
+                    self._add_request_timings(job_state.timings, response.request.timing)
+
                 if response.status == 304:
                     logger.debug(f'Job {self.index_number}: Intercepted response with {response.status} status')
                     raise NotModifiedError(response.status)
 
                 if response.ok:
-                    if self.wait_for_url:
-                        logger.info(f'Job {self.index_number}: Waiting for page to navigate to {self.wait_for_url}')
-                        if isinstance(self.wait_for_url, str):
-                            page.wait_for_url(
-                                self.wait_for_url,
-                                wait_until=self.wait_until,
-                                timeout=timeout,
-                            )
-                        elif isinstance(self.wait_for_url, dict):
-                            page.wait_for_url(**self.wait_for_url)
-                        else:
-                            raise ValueError(
-                                f"Job {job_state.job.index_number}: Directive 'wait_for_url' can only be a string or a "
-                                f'dictionary; found a {type(self.wait_for_url.__name__)} '
-                                f'( {self.get_indexed_location()} ).'
-                            )
-                    if self.wait_for_selector:
-                        logger.info(f'Job {self.index_number}: Waiting for selector {self.wait_for_selector}')
-                        if not isinstance(self.wait_for_selector, list):
-                            self.wait_for_selector = [self.wait_for_selector]
-                        for selector in self.wait_for_selector:
-                            if isinstance(selector, str):
-                                page.wait_for_selector(selector)
-                            elif isinstance(selector, dict):
-                                page.wait_for_selector(**selector)
-                            else:
-                                raise ValueError(
-                                    f"Job {job_state.job.index_number}: Directive 'wait_for_selector' can only be a "
-                                    f'string or a dictionary, or a list of these; found a '
-                                    f'{type(self.wait_for_selector).__name__} ( {self.get_indexed_location()} ).'
-                                )
-                    if self.wait_for_function:
-                        logger.info(f'Job {self.index_number}: Waiting for function {self.wait_for_function}')
-                        if isinstance(self.wait_for_function, str):
-                            page.wait_for_function(self.wait_for_function)
-                        elif isinstance(self.wait_for_function, dict):
-                            page.wait_for_function(**self.wait_for_function)
-                        else:
-                            raise ValueError(
-                                f"Job {job_state.job.index_number}: Directive 'wait_for_function' can only be a string "
-                                f'or a dictionary; found a {type(self.wait_for_function).__name__}'
-                                f' ( {self.get_indexed_location()} ).'
-                            )
-                    if self.wait_for_timeout:
-                        logger.info(f'Job {self.index_number}: Waiting for timeout {self.wait_for_timeout}')
-                        if isinstance(self.wait_for_timeout, (int, float)) and not isinstance(
-                            self.wait_for_timeout, bool
-                        ):
-                            page.wait_for_timeout(self.wait_for_timeout * 1000)
-                        else:
-                            raise ValueError(
-                                f"Job {job_state.job.index_number}: Directive 'wait_for_timeout' can only be a number; "
-                                f'found a {type(self.wait_for_timeout).__name__}'
-                                f' ( {self.get_indexed_location()} ).'
-                            )
+                    with job_state.timed('retrieve.wait'):
+                        self._wait_for(page, timeout)
 
                 else:
                     logger.info(
@@ -4,6 +4,7 @@
 
 from __future__ import annotations
 
+import subprocess
 from http.client import responses as http_response_names
 from typing import Any
 
@@ -31,6 +32,18 @@ class TransientHTTPError(Exception):
         self.status_code = status_code
 
 
+class OutputTooLargeError(subprocess.SubprocessError):
+    """Raised by ShellJob when the output of the command exceeds the job's 'max_output' (the command is stopped)."""
+
+    def __init__(self, cmd: str, max_output: int) -> None:
+        """:param cmd: The command.
+        :param max_output: The maximum size of the output, in bytes.
+        """
+        self.cmd = cmd
+        self.max_output = max_output
+        super().__init__(f'Output of command exceeded max_output of {max_output:,} bytes; command stopped')
+
+
 class TransientBrowserError(Exception):
     """Raised by BrowserJob when a transient error is returned by the browser, either as a PlaywrightTimeoutError or
     as a browser error listed in the 100-199 Connection related errors.
@@ -4,18 +4,29 @@
 
 from __future__ import annotations
 
+import hashlib
+import locale
 import logging
+import os
+import signal
 import subprocess
-from typing import TYPE_CHECKING
+import sys
+import threading
+from typing import IO, TYPE_CHECKING
 
-from webchanges.filters import FilterBase
+from webchanges.filters import Coprocess, FilterBase
 from webchanges.jobs._base import Job
+from webchanges.jobs._exceptions import OutputTooLargeError
 
 if TYPE_CHECKING:
     from webchanges.handler import JobState
 
 logger = logging.getLogger(__name__)
 
+MAX_OUTPUT = 100 * 1024 * 1024  # default 'max_output' (bytes)
+MAX_STDERR = 64 * 1024  # bytes of the standard error kept for error messages
+CHUNK_SIZE = 64 * 1024
+
 
 class ShellJob(Job):
     """Run a shell command and get its standard output."""
@@ -24,7 +35,11 @@ class ShellJob(Job):
 
     __required__: tuple[str, ...] = ('command',)
     __optional__: tuple[str, ...] = (
+        'max_output',
+        'output_digest',
+        'persistent',
         'stderr',  # ignored; here for backwards compatibility
+        'timeout',
     )
 
     def get_location(self) -> str:
@@ -49,6 +64,7 @@ class ShellJob(Job):
            exit status.
         :raises subprocess.TimeoutExpired: Subclass of SubprocessError, raised when a timeout expires while waiting for
            a child process.
+        :raises OutputTooLargeError: Subclass of SubprocessError, raised when the output exceeds 'max_output'.
         """
         logger.info(f'Job {self.index_number}: Running shell command: {self.command}')
         needs_bytes = FilterBase.filter_chain_needs_bytes(self.filters)  # ty:ignore[invalid-argument-type]
@@ -57,21 +73,130 @@ class ShellJob(Job):
         if self.stderr:
             raise ValueError(f"Job {job_state.job.index_number}: Directive 'stderr' is deprecated and does nothing.")
 
-        try:
-            response = subprocess.run(  # noqa: S602 `shell=True`, security issue
-                self.command,
-                capture_output=True,
-                shell=True,
-                check=True,
-                text=(not needs_bytes),
+        if self.persistent:
+            max_output = MAX_OUTPUT if self.max_output is None else self.max_output
+            data = Coprocess.get(self.command, shell=True).request(
+                Coprocess.job_header(self), b'', self.timeout, max_output
             )
+            if self.output_digest:
+                return hashlib.new(self.output_digest, data).hexdigest(), '', 'text/plain'
+            if needs_bytes:
+                return data, '', 'application/octet-stream'
+            return data.decode(), '', 'text/plain'
+
+        try:
+            output = self._run(job_state)
         except subprocess.CalledProcessError as e:
             logger.info(f'Job {self.index_number}: Command: {e.cmd} ')
             logger.info(f'Job {self.index_number}: Failed with returncode {e.returncode}')
             logger.info(f'Job {self.index_number}: stderr : {e.stderr}')
             logger.info(f'Job {self.index_number}: stdout : {e.stdout}')
             raise
-        return (response.stdout, '', 'application/octet-stream' if needs_bytes else 'text/plain')
+        if self.output_digest:
+            return output, '', 'text/plain'
+        if needs_bytes:
+            return output, '', 'application/octet-stream'
+        return self._decode(output), '', 'text/plain'
+
+    @staticmethod
+    def _decode(output: bytes) -> str:
+        """Decode the output like subprocess.run(text=True) does, i.e. with the locale's encoding and universal
+        newlines.
+        """
+        return output.decode(locale.getpreferredencoding(False)).replace('\r\n', '\n').replace('\r', '\n')
+
+    def _run(self, job_state: JobState) -> bytes | str:
+        """Run the command in a new process group, streaming its standard output into a buffer of at most
+        'max_output' bytes (or, with 'output_digest', into the digest, returned instead). The whole process group is
+        killed if the command takes longer than 'timeout' seconds or its output exceeds 'max_output'. The CPU time
+        and maximum resident set size of the command are recorded in the JobState (not on Windows).
+
+        :param job_state: The JobState object.
+        :returns: The output, or its hexadecimal digest.
+        """
+        digest = hashlib.new(self.output_digest) if self.output_digest else None
+        max_output = MAX_OUTPUT if self.max_output is None else self.max_output
+        if sys.platform == 'win32':
+            group: dict = {'creationflags': subprocess.CREATE_NEW_PROCESS_GROUP}  # ty:ignore[unresolved-attribute]
+        else:
+            group = {'start_new_session': True}
+        process = subprocess.Popen(  # noqa: S602 `shell=True`, security issue
+            self.command,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            shell=True,
+            **group,
+        )
+
+        stderr = bytearray()
+
+        def read_stderr(stream: IO[bytes]) -> None:
+            for chunk in iter(lambda: stream.read1(CHUNK_SIZE), b''):  # ty:ignore[unresolved-attribute]
+                stderr.extend(chunk[: MAX_STDERR - len(stderr)])
+
+        stopped = threading.Event()
+
+        def kill_group() -> None:
+            stopped.set()
+            if sys.platform == 'win32':
+                subprocess.run(['taskkill', '/F', '/T', '/PID', str(process.pid)], capture_output=True)  # noqa: S607
+            else:
+                try:
+                    os.killpg(process.pid, signal.SIGKILL)
+                except ProcessLookupError:
+                    pass
+
+        stderr_thread = threading.Thread(target=read_stderr, args=(process.stderr,), daemon=True)
+        stderr_thread.start()
+        timer = threading.Timer(self.timeout, kill_group) if self.timeout else None
+        if timer is not None:
+            timer.start()
+        output = bytearray()
+        too_large = False
+        try:
+            for chunk in iter(lambda: process.stdout.read1(CHUNK_SIZE), b''):  # ty:ignore[possibly-missing-attribute]
+                if digest is not None:
+                    digest.update(chunk)
+                    continue
+                output.extend(chunk)
+                if max_output and len(output) > max_output:
+                    too_large = True
+                    kill_group()
+                    break
+        finally:
+            # the timer is only cancelled once the command has exited, as it may close its standard output and error
+            # and keep running
+            process.stdout.close()  # ty:ignore[possibly-missing-attribute]
+            stderr_thread.join()
+            self._wait(process, job_state)
+            if timer is not None:
+                timer.cancel()
+
+        if too_large:
+            raise OutputTooLargeError(self.command, max_output)
+        if stopped.is_set():
+            raise subprocess.TimeoutExpired(self.command, self.timeout, bytes(output), bytes(stderr))  # ty:ignore[invalid-argument-type]
+        if process.returncode:
+            raise subprocess.CalledProcessError(
+                process.returncode, self.command, output.decode(errors='replace'), stderr.decode(errors='replace')
+            )
+        return digest.hexdigest() if digest is not None else bytes(output)
+
+    def _wait(self, process: subprocess.Popen, job_state: JobState) -> None:
+        """Wait for the command to exit and record its resource usage in the JobState."""
+        if sys.platform == 'win32':
+            process.wait()
+            return
+        _, status, rusage = os.wait4(process.pid, 0)
+        process.returncode = os.waitstatus_to_exitcode(status)
+        job_state.command_cpu_time = rusage.ru_utime + rusage.ru_stime
+        # ru_maxrss is in kilobytes on Linux and in bytes on macOS; it includes the memory of this process at the time
+        # the command was started, as it is forked from it
+        job_state.command_max_rss = rusage.ru_maxrss * (1 if sys.platform == 'darwin' else 1024)
+        logger.info(
+            f'Job {self.index_number}: Command used {job_state.command_cpu_time:.2f} s of CPU time and '
+            f'{job_state.command_max_rss / 1024 / 1024:,.1f} MiB of memory'
+        )
 
     def format_error(self, exception: Exception, tb: str) -> str:
         """Format the error of the job if one is encountered.
@@ -86,6 +211,10 @@ class ShellJob(Job):
                 f'Error: Exit status {exception.returncode} returned from subprocess:\n'
                 f'{(exception.stderr or exception.stdout).strip()}'
             )
+        if isinstance(exception, subprocess.TimeoutExpired):
+            return f'Error: Command timed out after {exception.timeout} seconds and was stopped'
+        if isinstance(exception, OutputTooLargeError):
+            return f'Error: {exception}'
         if isinstance(exception, FileNotFoundError):
             return f'Error returned by OS: {str(exception).strip()}'
         return tb
@@ -13,7 +13,7 @@ import sys
 import time
 from ftplib import FTP
 from pathlib import Path
-from typing import TYPE_CHECKING, Any, Mapping, Sequence
+from typing import TYPE_CHECKING, Any, Callable, Mapping, Sequence
 from urllib.parse import parse_qsl, urlencode, urlparse, urlsplit
 
 import html2text
@@ -46,9 +46,11 @@ except ImportError as e:  # pragma: no cover
     urllib3 = str(e)  # ty:ignore[invalid-assignment]
 
 try:
+    from curl_cffi import CurlInfo
     from curl_cffi import requests as curl_cffi_requests
     from curl_cffi.requests import exceptions as curl_cffi_exceptions
 except ImportError as e:  # pragma: no cover
+    CurlInfo = str(e)  # ty:ignore[invalid-assignment]
     curl_cffi_requests = str(e)  # ty:ignore[invalid-assignment]
     curl_cffi_exceptions = str(e)  # ty:ignore[invalid-assignment]
 
@@ -63,6 +65,39 @@ _HTTPX_HTTP_VERSIONS: dict[str, tuple[bool, bool]] = {
 }
 _CURL_CFFI_HTTP_VERSIONS: tuple[str, ...] = ('v1', 'v2', 'v2tls', 'v2_prior_knowledge', 'v3', 'v3only')
 
+# The retrieval stage (see JobState.timings) of the operations traced by httpx (httpcore), by operation name
+_HTTPX_TRACE_STAGES: dict[str, str] = {
+    'connect_tcp': 'retrieve.connect',
+    'start_tls': 'retrieve.tls',
+    'send_request_headers': 'retrieve.server',
+    'send_request_body': 'retrieve.server',
+    'receive_response_headers': 'retrieve.server',
+    'receive_response_body': 'retrieve.download',
+}
+
+
+def _httpx_trace(timings: dict[str, float]) -> Callable[[str, dict[str, Any]], None]:
+    """Return a callback for the 'trace' request extension of httpx (see
+    https://www.encode.io/httpcore/extensions/#trace) adding the time spent connecting, in the TLS handshake, waiting
+    for the server's response and downloading its body to the retrieval stages in 'timings'.
+
+    :param timings: The JobState's timings.
+    :returns: The callback.
+    """
+    started: dict[str, float] = {}
+
+    def trace(event_name: str, info: dict[str, Any]) -> None:
+        operation, _, event = event_name.rpartition('.')
+        stage = _HTTPX_TRACE_STAGES.get(operation.partition('.')[2])
+        if stage is None:
+            return
+        if event == 'started':
+            started[operation] = time.perf_counter()
+        elif operation in started:  # 'complete' or 'failed'
+            timings[stage] = timings.get(stage, 0.0) + time.perf_counter() - started.pop(operation)
+
+    return trace
+
 
 class UrlJob(UrlJobBase):
     """Retrieve a URL from a web server."""
@@ -123,9 +158,11 @@ class UrlJob(UrlJobBase):
             Mapping[str, str] | Mapping[bytes, bytes] | Sequence[tuple[str, str]] | Sequence[tuple[bytes, bytes]] | None
         ),
         timeout: float | None,
+        timings: dict[str, float] | None = None,
     ) -> tuple[str | bytes, str, str]:
         """Retrieves the data and Etag using the HTTPX library.
 
+        :param timings: The JobState's timings, to which the retrieval stages are added if profiling.
         :return: The data retrieved and the ETag.
         :raises NotModifiedError: If an HTTP 304 response is received.
         """
@@ -198,6 +235,7 @@ class UrlJob(UrlJobBase):
                     url=url,
                     data=self.data,  # ty:ignore[invalid-argument-type]
                     params=self.params,
+                    extensions={'trace': _httpx_trace(timings)} if timings is not None else None,
                 )
             except httpx.HTTPError as e:
                 logger.info(f'Job {self.index_number}: httpx error: {e}')
@@ -278,10 +316,12 @@ class UrlJob(UrlJobBase):
         return data, etag, mime_type
 
     def _retrieve_requests(
-        self, headers: Mapping[str, str | bytes] | None, timeout: float | None
+        self, headers: Mapping[str, str | bytes] | None, timeout: float | None, timings: dict[str, float] | None = None
     ) -> tuple[str | bytes, str, str]:
         """Retrieves the data and Etag using the requests library.
 
+        :param timings: The JobState's timings, to which the time waiting for the server's response is added if
+           profiling.
         :return: The data retrieved and the ETag.
         :raises NotModifiedError: If an HTTP 304 response is received.
         """
@@ -342,6 +382,9 @@ class UrlJob(UrlJobBase):
                 timeout=timeout,
                 allow_redirects=(not self.no_redirects),
             )
+            if timings is not None:
+                # from sending the request to having parsed the response headers
+                timings['retrieve.server'] = response.elapsed.total_seconds()
 
         if 400 <= response.status_code < 600:
             # Custom version of request.raise_for_status() to include returned text.
@@ -434,10 +477,12 @@ class UrlJob(UrlJobBase):
         return data, etag, mime_type
 
     def _retrieve_curl_cffi(
-        self, headers: Mapping[str, str | bytes] | None, timeout: float | None
+        self, headers: Mapping[str, str | bytes] | None, timeout: float | None, timings: dict[str, float] | None = None
     ) -> tuple[str | bytes, str, str]:
         """Retrieves the data, Etag, and media type using the curl_cffi library (browser TLS/JA3 impersonation).
 
+        :param timings: The JobState's timings, to which the retrieval stages measured by libcurl are added if
+           profiling.
         :return: The data retrieved, the ETag and media type.
         :raises NotModifiedError: If an HTTP 304 response is received.
         """
@@ -490,6 +535,16 @@ class UrlJob(UrlJobBase):
                     session_kwargs[key] = self.fingerprints[key]
             logger.info(f'Job {self.index_number}: curl_cffi fingerprints applied: {sorted(self.fingerprints)}')
 
+        if timings is not None:
+            session_kwargs['curl_infos'] = [
+                CurlInfo.NAMELOOKUP_TIME,
+                CurlInfo.CONNECT_TIME,
+                CurlInfo.APPCONNECT_TIME,
+                CurlInfo.PRETRANSFER_TIME,
+                CurlInfo.STARTTRANSFER_TIME,
+                CurlInfo.TOTAL_TIME,
+            ]
+
         with curl_cffi_requests.Session(**session_kwargs) as session:
             url = self.url
             if self.initialization_url:
@@ -504,6 +559,8 @@ class UrlJob(UrlJobBase):
                 data=self.data,
                 allow_redirects=(not self.no_redirects),
             )
+            if timings is not None:
+                self._add_curl_timings(timings, response.infos)
 
         if 400 <= response.status_code < 600:
             # Custom version of request.raise_for_status() to include returned text.
@@ -587,6 +644,24 @@ class UrlJob(UrlJobBase):
 
         return data, etag, mime_type
 
+    @staticmethod
+    def _add_curl_timings(timings: dict[str, float], infos: dict[Any, Any]) -> None:
+        """Add the retrieval stages of a transfer by curl_cffi to the JobState's timings. libcurl measures the time
+        elapsed from the start of the transfer until the end of each phase (see
+        https://curl.se/libcurl/c/curl_easy_getinfo.html#TIMES).
+
+        :param timings: The JobState's timings.
+        :param infos: The 'infos' of the curl_cffi response.
+        """
+        dns = infos[CurlInfo.NAMELOOKUP_TIME]
+        connect = infos[CurlInfo.CONNECT_TIME]
+        tls = infos[CurlInfo.APPCONNECT_TIME]  # 0 if not https
+        timings['retrieve.dns'] = dns
+        timings['retrieve.connect'] = max(connect - dns, 0.0)
+        timings['retrieve.tls'] = max(tls - connect, 0.0)
+        timings['retrieve.server'] = max(infos[CurlInfo.STARTTRANSFER_TIME] - infos[CurlInfo.PRETRANSFER_TIME], 0.0)
+        timings['retrieve.download'] = max(infos[CurlInfo.TOTAL_TIME] - infos[CurlInfo.STARTTRANSFER_TIME], 0.0)
+
     def retrieve(  # noqa: C901 mccabe complexity too high
         self, job_state: JobState, headless: bool = True
     ) -> tuple[str | bytes, str, str]:
@@ -697,7 +772,9 @@ class UrlJob(UrlJobBase):
                 )
                 raise ImportError(message)
             job_state._http_client_used = 'curl_cffi'
-            data, etag, mime_type = self._retrieve_curl_cffi(headers=headers, timeout=timeout)
+            data, etag, mime_type = self._retrieve_curl_cffi(
+                headers=headers, timeout=timeout, timings=job_state.timings
+            )
         elif self.http_client == 'requests' or not httpx:
             if isinstance(requests, str):
                 message = f'Job {job_state.job.index_number} cannot be run '
@@ -715,7 +792,9 @@ class UrlJob(UrlJobBase):
                     f'( {self.get_indexed_location()} ).'
                 )
             job_state._http_client_used = 'requests'
-            data, etag, mime_type = self._retrieve_requests(headers=headers, timeout=timeout)
+            data, etag, mime_type = self._retrieve_requests(
+                headers=headers, timeout=timeout, timings=job_state.timings
+            )
         elif not self.http_client or self.http_client == 'httpx':
             if isinstance(httpx, str):
                 message = f'Job {job_state.job.index_number} cannot be run '
@@ -727,7 +806,9 @@ class UrlJob(UrlJobBase):
                 )
                 raise ImportError(message)
             job_state._http_client_used = 'httpx'
-            data, etag, mime_type = self._retrieve_httpx(headers=headers, timeout=timeout)
+            data, etag, mime_type = self._retrieve_httpx(
+                headers=headers, timeout=timeout, timings=job_state.timings
+            )
         else:
             raise ValueError(
                 f"Job {job_state.job.index_number}: http_client '{self.http_client}' is not supported; cannot run job "
@@ -12,13 +12,14 @@ from typing import TYPE_CHECKING
 
 from webchanges import __project_name__
 from webchanges.handler import Report
+from webchanges.tracing import Tracer
 from webchanges.util import get_new_version_number
 from webchanges.worker import run_jobs
 
 if TYPE_CHECKING:
     from webchanges.config import CommandConfig
     from webchanges.jobs import JobBase
-    from webchanges.storage import SsdbStorage, YamlConfigStorage, YamlJobsStorage
+    from webchanges.storage import FilterCache, SsdbStorage, YamlConfigStorage, YamlJobsStorage
 
 
 logger = logging.getLogger(__name__)
@@ -29,6 +30,7 @@ class Urlwatch:
 
     config_storage: YamlConfigStorage
     ssdb_storage: SsdbStorage
+    filter_cache: FilterCache | None = None
     jobs_storage: YamlJobsStorage
     jobs: list[JobBase]
     report: Report
@@ -52,6 +54,10 @@ class Urlwatch:
         self.jobs_storage = jobs_storage
 
         self.report = Report(self)
+        if urlwatch_config.profile is not None:
+            self.report.timings = {}
+        if urlwatch_config.trace or urlwatch_config.trace_endpoint:
+            self.report.tracer = Tracer()
         self.jobs: list[JobBase] = []
 
         self._latest_release: str | bool | None = None
@@ -109,7 +115,27 @@ class Urlwatch:
         """
         run_jobs(self, read_only=read_only)
 
+    def save_trace(self, tracer: Tracer) -> None:
+        """End the trace of the run and save it to the file of --trace and/or send it to the endpoint of
+        --trace-endpoint. Failing to send it is logged as an error, but does not make the run fail.
+
+        :param tracer: The Tracer of the run.
+        """
+        tracer.finish()
+        if self.urlwatch_config.trace:
+            tracer.write(self.urlwatch_config.trace)
+        if self.urlwatch_config.trace_endpoint:
+            try:
+                tracer.export(self.urlwatch_config.trace_endpoint)
+            except Exception as e:
+                logger.error(f'Could not send the trace of the run to {self.urlwatch_config.trace_endpoint}: {e}')
+
     def close(self) -> None:
         """Finalizer. Create reports ands close snapshots database."""
         self.report.finish(jobs_file=self.jobs_storage.filename)
+        if self.report.timings is not None:
+            profile = self.urlwatch_config.profile
+            self.report.print_profile(None if profile is True else profile)  # ty:ignore[invalid-argument-type]
+        if self.report.tracer is not None:
+            self.save_trace(self.report.tracer)
         # self.ssdb_storage.close()
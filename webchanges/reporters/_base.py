@@ -207,11 +207,12 @@ class ReporterBase(metaclass=TrackSubClasses):
         if cfg.get('enabled', False) or not check_enabled:
             logger.info(f'Submitting with {name} ({subclass})')
             base_config = subclass.get_base_config(report)
-            if base_config.get('separate', False):
-                for job_state in job_states:
-                    subclass(report, cfg, [job_state], duration, jobs_files, differ_config=differ_config).submit()
-            else:
-                subclass(report, cfg, job_states, duration, jobs_files, differ_config=differ_config).submit()
+            with report.timed(name):
+                if base_config.get('separate', False):
+                    for job_state in job_states:
+                        subclass(report, cfg, [job_state], duration, jobs_files, differ_config=differ_config).submit()
+                else:
+                    subclass(report, cfg, job_states, duration, jobs_files, differ_config=differ_config).submit()
         else:
             raise ValueError(f'Reporter not enabled: {name}')
 
@@ -241,11 +242,14 @@ class ReporterBase(metaclass=TrackSubClasses):
                 any_enabled = True
                 logger.info(f'Submitting with {name} ({subclass})')
                 base_config = subclass.get_base_config(report)
-                if base_config.get('separate', False):
-                    for job_state in job_states:
-                        subclass(report, cfg, [job_state], duration, jobs_files, differ_config=differ_config).submit()
-                else:
-                    subclass(report, cfg, job_states, duration, jobs_files, differ_config=differ_config).submit()
+                with report.timed(name):
+                    if base_config.get('separate', False):
+                        for job_state in job_states:
+                            subclass(
+                                report, cfg, [job_state], duration, jobs_files, differ_config=differ_config
+                            ).submit()
+                    else:
+                        subclass(report, cfg, job_states, duration, jobs_files, differ_config=differ_config).submit()
 
         if not any_enabled:
             logger.warning('No reporters enabled.')
@@ -42,6 +42,9 @@ from webchanges.storage._config import (
     _ConfigReportWebhook,
     _ConfigReportXmpp,
 )
+from webchanges.storage._export import export_snapshots, import_snapshots
+from webchanges.storage._filter_cache import FilterCache
+from webchanges.storage._lmdb import SsdbLMDBStorage
 from webchanges.storage._redis import SsdbRedisStorage
 from webchanges.storage._sqlite3 import SsdbSQLite3Storage
 from webchanges.storage._ssdb import SsdbDirStorage, SsdbStorage
@@ -53,8 +56,10 @@ __all__ = [
     'BaseStorage',
     'BaseTextualFileStorage',
     'BaseYamlFileStorage',
+    'FilterCache',
     'JobsBaseFileStorage',
     'SsdbDirStorage',
+    'SsdbLMDBStorage',
     'SsdbRedisStorage',
     'SsdbSQLite3Storage',
     'SsdbStorage',
@@ -89,4 +94,6 @@ __all__ = [
     '_ConfigReportText',
     '_ConfigReportWebhook',
     '_ConfigReportXmpp',
+    'export_snapshots',
+    'import_snapshots',
 ]
@@ -248,8 +248,9 @@ class _ConfigDifferDefaults(TypedDict, total=False):
 
 
 class _ConfigDatabase(TypedDict):
-    engine: Literal['sqlite3', 'redis', 'minidb', 'textfiles']
+    engine: Literal['sqlite3', 'lmdb', 'redis', 'minidb', 'textfiles']
     max_snapshots: int
+    filter_cache_max_mb: float
 
 
 class _Config(TypedDict):
@@ -451,6 +452,7 @@ DEFAULT_CONFIG: _Config = {
     'database': {
         'engine': 'sqlite3',
         'max_snapshots': 4,
+        'filter_cache_max_mb': 100,
     },
     'footnote': None,
 }
@@ -0,0 +1,180 @@
+"""Export and import of the full snapshot history of a database, e.g. to migrate between database engines."""
+
+# The code below is subject to the license contained in the LICENSE.md file, which is part of the source code.
+
+from __future__ import annotations
+
+import logging
+import queue
+import struct
+import sys
+import threading
+from itertools import islice
+from typing import IO, TYPE_CHECKING, Iterable, Iterator, TypeVar
+
+import msgpack
+
+from webchanges import __project_name__
+from webchanges.handler import ErrorData
+
+if sys.version_info >= (3, 14):
+    from compression import zstd
+else:
+    try:
+        import zstandard as zstd
+    except ImportError as e:  # pragma: no cover
+        zstd = str(e)  # ty:ignore[invalid-assignment]
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+    from webchanges.storage._ssdb import SsdbStorage
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar('T')
+Entry = tuple[str, str | bytes, float, int, str, str, ErrorData]
+
+# File format: MAGIC, then one record per snapshot made of its length as a 4-byte big-endian unsigned integer followed
+# by the msgpack array [guid, data, timestamp, tries, etag, mime_type, error_data], then a zero length as end marker
+# (so that a truncated file is detected).  Files whose name ends in '.zst' are Zstandard-compressed.
+MAGIC = b'WCSNAPS\x01'
+_LENGTH = struct.Struct('>I')
+BATCH_SIZE = 1_000  # number of entries handed over at a time between the reading and the writing threads
+QUEUE_BATCHES = 8  # maximum number of batches waiting to be written (bounds memory use)
+
+
+def _open(filename: Path, mode: str) -> IO[bytes]:
+    """Open an export file, (de)compressing with Zstandard if its name ends in '.zst'."""
+    if filename.suffix == '.zst':
+        if isinstance(zstd, str):
+            raise ImportError(f"Python package 'zstandard' cannot be imported.\n{zstd}")
+        return zstd.open(filename, mode)  # ty:ignore[invalid-return-type]
+    return filename.open(mode)
+
+
+def _prefetch(batches: Iterable[list[T]], maxsize: int = QUEUE_BATCHES) -> Iterator[list[T]]:
+    """Produce 'batches' in a background thread, up to 'maxsize' batches ahead of the consumer, so that reading and
+    writing overlap. Exceptions raised by the producer are re-raised in the consumer.
+    """
+    handover: queue.Queue[list[T] | BaseException | None] = queue.Queue(maxsize)
+    stop = threading.Event()
+
+    def produce() -> None:
+        try:
+            for batch in batches:
+                if stop.is_set():
+                    return
+                handover.put(batch)
+        except BaseException as exc:  # noqa: BLE001 re-raised in the consumer
+            handover.put(exc)
+        else:
+            handover.put(None)
+
+    thread = threading.Thread(target=produce, name='snapshots-prefetch', daemon=True)
+    thread.start()
+    try:
+        while (item := handover.get()) is not None:
+            if isinstance(item, BaseException):
+                raise item
+            yield item
+    finally:
+        stop.set()
+        while thread.is_alive():  # unblock the producer if the consumer stopped early
+            try:
+                handover.get_nowait()
+            except queue.Empty:
+                thread.join(0.01)
+
+
+def _batched(entries: Iterable[T], size: int = BATCH_SIZE) -> Iterator[list[T]]:
+    iterator = iter(entries)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+def write_export(filename: Path, entries: Iterable[Entry]) -> int:
+    """Write entries to an export file, streaming (memory use does not depend on the number of entries).
+
+    :param filename: The export file; Zstandard-compressed if its name ends in '.zst'.
+    :param entries: The (guid, data, timestamp, tries, etag, mime_type, error_data) tuples to export.
+
+    :returns: The number of entries written.
+    """
+    count = 0
+    pack = msgpack.Packer().pack
+    with _open(filename, 'wb') as f:
+        f.write(MAGIC)
+        for batch in _prefetch(_batched(entries)):
+            for entry in batch:
+                record = pack(list(entry))
+                f.write(_LENGTH.pack(len(record)))
+                f.write(record)
+            count += len(batch)
+        f.write(_LENGTH.pack(0))
+    logger.info(f'Exported {count} snapshots to {filename}')
+    return count
+
+
+def read_export(filename: Path) -> Iterator[Entry]:
+    """Read the entries of an export file, streaming.
+
+    :param filename: The export file; Zstandard-compressed if its name ends in '.zst'.
+
+    :returns: A generator of (guid, data, timestamp, tries, etag, mime_type, error_data) tuples.
+    :raises ValueError: If the file is not an export file or is truncated.
+    """
+    with _open(filename, 'rb') as f:
+        magic = f.read(len(MAGIC))
+        if magic != MAGIC:
+            if MAGIC.startswith(magic):
+                raise ValueError(f'{filename} is truncated')
+            raise ValueError(f'{filename} is not a {__project_name__} snapshots export file')
+        while True:
+            header = f.read(_LENGTH.size)
+            if len(header) < _LENGTH.size:
+                raise ValueError(f'{filename} is truncated')
+            (length,) = _LENGTH.unpack(header)
+            if not length:
+                return
+            record = f.read(length)
+            if len(record) < length:
+                raise ValueError(f'{filename} is truncated')
+            yield tuple(msgpack.unpackb(record))  # ty:ignore[invalid-yield]
+
+
+def export_snapshots(ssdb_storage: SsdbStorage, filename: Path) -> int:
+    """Export all the snapshots (full history) of a database to an export file.
+
+    The database is read in a background thread while the previous batch is being packed and written.
+
+    :param ssdb_storage: The database.
+    :param filename: The export file; Zstandard-compressed if its name ends in '.zst'.
+
+    :returns: The number of snapshots exported.
+    """
+    return write_export(filename, ssdb_storage.backup(history=True))
+
+
+def import_snapshots(ssdb_storage: SsdbStorage, filename: Path) -> int:
+    """Import all the snapshots of an export file into a database (in addition to those already there).
+
+    The file is read and decoded in a background thread while the previous batch is written with the batched
+    'restore()' of the database engine.
+
+    :param ssdb_storage: The database.
+    :param filename: The export file; Zstandard-compressed if its name ends in '.zst'.
+
+    :returns: The number of snapshots imported.
+    """
+    count = 0
+
+    def counted(batches: Iterable[list[Entry]]) -> Iterator[Entry]:
+        nonlocal count
+        for batch in batches:
+            yield from batch
+            count += len(batch)
+
+    ssdb_storage.restore(counted(_prefetch(_batched(read_export(filename)))))
+    logger.info(f'Imported {count} snapshots from {filename}')
+    return count
@@ -0,0 +1,172 @@
+"""FilterCache: the persistent cache of the output of filters (see CompiledFilterChain)."""
+
+# The code below is subject to the license contained in the LICENSE.md file, which is part of the source code.
+
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import sqlite3
+import threading
+import time
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+# The FilterCache of each database in a process applying filters (see FilterCache.__reduce__())
+_process_filter_caches: dict[tuple[Path, int], FilterCache] = {}
+_process_filter_caches_lock = threading.Lock()
+
+
+def _process_filter_cache(filename: Path, max_size: int) -> FilterCache:
+    """Return the FilterCache of a database for this process, created when first unpickled in it."""
+    with _process_filter_caches_lock:
+        filter_cache = _process_filter_caches.get((filename, max_size))
+        if filter_cache is None:
+            filter_cache = _process_filter_caches[filename, max_size] = FilterCache(filename, max_size)
+        return filter_cache
+
+
+class FilterCache:
+    """Handles the cache of the output of the filters of the jobs with the 'cache_filters' directive, stored as a
+    SQLite database in the 'filename' file (next to the snapshot database).
+
+    For each job and filter of its chain (the 'step', i.e. a digest of the filter's position and specification), the
+    cache keeps the digest of the data that the filter was last applied to together with its output, so that the
+    filter does not need to be applied again if its input is unchanged at the next run. The 'filter_cache' table has
+    the following columns:
+
+    * guid: unique hash of the "location" of the job
+    * step: digest of the position and specification of the filter in the job's chain
+    * input: digest of the data (and its media type) that the filter was applied to
+    * data: the output of the filter (TEXT or BLOB, as returned by the filter)
+    * mime_type: the media type of the output
+    * job_changes: JSON of the job's attributes changed by the filter (e.g. 'markdown_padded_tables'), which are set
+      again when the output is taken from the cache
+    * size: the size of 'data'
+    * used: the Unix timestamp of when the entry was last saved or used
+
+    The database is only opened when first used. When it is closed, the least recently used entries are deleted
+    until the size of the outputs is at most 'max_size' bytes. The processes applying filters (see
+    filter_in_process()) only add entries, each with a single connection to the database that it keeps until it exits.
+    """
+
+    def __init__(self, filename: Path, max_size: int) -> None:
+        """:param filename: The full filename of the database file.
+        :param max_size: The maximum size of the outputs kept in the cache, in bytes.
+        """
+        self.filename = filename
+        self.max_size = max_size
+        self.lock = threading.Lock()
+        self.db: sqlite3.Connection | None = None
+
+    def __reduce__(self) -> tuple[Any, ...]:
+        """Pickle without the database connection, so that each process applying filters (see filter_in_process())
+        opens its own, once, instead of one for every job submitted to it.
+        """
+        return _process_filter_cache, (self.filename, self.max_size)
+
+    @staticmethod
+    def digest(data: str | bytes, mime_type: str) -> str:
+        """Return the digest of the input of a filter.
+
+        :param data: The data.
+        :param mime_type: The media type (fka MIME type) of the data.
+        :returns: The hexadecimal digest.
+        """
+        h = hashlib.blake2b(mime_type.encode(), digest_size=20)
+        h.update(b'\0' if isinstance(data, str) else b'\1')
+        h.update(data.encode(errors='surrogatepass') if isinstance(data, str) else data)
+        return h.hexdigest()
+
+    def _connect(self) -> sqlite3.Connection:
+        if self.db is None:
+            self.filename.parent.mkdir(parents=True, exist_ok=True)
+            self.db = sqlite3.connect(self.filename, check_same_thread=False, isolation_level=None)
+            self.db.execute('PRAGMA journal_mode = WAL')
+            self.db.execute(
+                'CREATE TABLE IF NOT EXISTS filter_cache (guid TEXT, step TEXT, input TEXT, data, mime_type TEXT, '
+                'job_changes TEXT, size INTEGER, used REAL, PRIMARY KEY (guid, step))'
+            )
+            logger.info(f'Using filter cache at {self.filename}')
+        return self.db
+
+    def load(self, guid: str, step: str, input_digest: str) -> tuple[str | bytes, str, dict[str, Any]] | None:
+        """Return the output of a filter of a job if it was last applied to the same input.
+
+        :param guid: The guid of the job.
+        :param step: The digest of the position and specification of the filter in the job's chain.
+        :param input_digest: The digest of the input of the filter (see digest()).
+        :returns: The output data, its media type and the job's attributes changed by the filter, or None.
+        """
+        with self.lock:
+            db = self._connect()
+            row = db.execute(
+                'SELECT data, mime_type, job_changes FROM filter_cache WHERE guid = ? AND step = ? AND input = ?',
+                (guid, step, input_digest),
+            ).fetchone()
+            if row is None:
+                return None
+            db.execute('UPDATE filter_cache SET used = ? WHERE guid = ? AND step = ?', (time.time(), guid, step))
+        return row[0], row[1], json.loads(row[2])
+
+    def save(
+        self,
+        guid: str,
+        step: str,
+        input_digest: str,
+        data: str | bytes,
+        mime_type: str,
+        job_changes: dict[str, Any],
+    ) -> None:
+        """Save the output of a filter of a job, replacing the previous one.
+
+        :param guid: The guid of the job.
+        :param step: The digest of the position and specification of the filter in the job's chain.
+        :param input_digest: The digest of the input of the filter (see digest()).
+        :param data: The output data.
+        :param mime_type: The media type (fka MIME type) of the output data.
+        :param job_changes: The job's attributes changed by the filter.
+        """
+        with self.lock:
+            self._connect().execute(
+                'INSERT OR REPLACE INTO filter_cache VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                (guid, step, input_digest, data, mime_type, json.dumps(job_changes), len(data), time.time()),
+            )
+
+    def evict(self) -> int:
+        """Delete the least recently used entries until the size of the outputs is at most 'max_size' bytes.
+
+        :returns: The number of entries deleted.
+        """
+        with self.lock:
+            db = self._connect()
+            excess = (db.execute('SELECT SUM(size) FROM filter_cache').fetchone()[0] or 0) - self.max_size
+            if excess <= 0:
+                return 0
+            rows = db.execute('SELECT guid, step, size FROM filter_cache ORDER BY used').fetchall()
+            evicted = []
+            for guid, step, size in rows:
+                evicted.append((guid, step))
+                excess -= size
+                if excess <= 0:
+                    break
+            db.executemany('DELETE FROM filter_cache WHERE guid = ? AND step = ?', evicted)
+        logger.info(f'Evicted {len(evicted)} entries from the filter cache')
+        return len(evicted)
+
+    def close(self) -> None:
+        """Evict the least recently used entries (see evict()), also those saved by the processes applying filters,
+        and close the database. The database is not created if it does not exist.
+        """
+        if self.db is None and not self.filename.is_file():
+            return
+        self.evict()
+        with self.lock:
+            if self.db is not None:
+                self.db.close()
+                self.db = None
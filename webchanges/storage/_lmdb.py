@@ -0,0 +1,545 @@
+"""LMDB snapshot storage."""
+
+# The code below is subject to the license contained in the LICENSE.md file, which is part of the source code.
+
+from __future__ import annotations
+
+import logging
+import struct
+import threading
+from contextlib import contextmanager
+from typing import TYPE_CHECKING, Any, Callable, Iterable, Iterator, TypeVar
+
+import msgpack
+
+from webchanges.handler import ErrorData, Snapshot
+from webchanges.storage._ssdb import SsdbStorage
+
+try:
+    import lmdb
+except ImportError as e:  # pragma: no cover
+    lmdb = str(e)  # ty:ignore[invalid-assignment]
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar('T')
+
+
+class SsdbLMDBStorage(SsdbStorage):
+    """Handles storage of the snapshots in a memory-mapped LMDB database in the 'filename' file using the lmdb and
+    msgpack packages.
+
+    Each snapshot is a record whose key is the guid, a NUL byte, the timestamp encoded so that it sorts bytewise and a
+    4-byte sequence number (to keep snapshots with identical timestamps), and whose value is the same msgpack blob
+    (with keys 'd', 't', 'e', 'm' and 'err') used by the sqlite3 engine plus the timestamp in key 'ts'. The records of
+    a guid are therefore contiguous and in chronological order, and every lookup is a B+tree seek followed by a walk
+    of the cursor, without any index to maintain.
+
+    Reads run in LMDB read-only transactions, which see a consistent snapshot of the database and run concurrently
+    in any number of threads (a lock is only taken to count the transactions, see _begin()). As with the sqlite3
+    engine, snapshots saved by 'save()' (unless temporary=False) are queued in memory and written by 'flush()' in a
+    single write transaction once the queue reaches 'checkpoint_rows' entries or 'checkpoint_bytes' bytes, and by
+    'close()'.
+
+    The memory map starts at 'map_size' bytes (or the size of the database, if larger), as on some platforms (e.g.
+    Windows) the file is as large as the map, and is doubled whenever a write transaction fills it (see _write()).
+
+    To migrate from another database engine, pass its 'backup()' to 'restore()', e.g.
+    ``SsdbLMDBStorage(lmdb_file).restore(SsdbSQLite3Storage(sqlite3_file).backup())``.
+    """
+
+    checkpoint_rows = 50  # maximum number of snapshots queued before a checkpoint
+    checkpoint_bytes = 16 * 1024 * 1024  # maximum size of the (packed) snapshots queued before a checkpoint
+    map_size = 64 * 1024 * 1024  # initial size of the memory map, doubled when full
+    max_readers = 512  # maximum number of concurrent read transactions (i.e. reading threads)
+    restore_batch_size = 1_000  # number of records written (and read by backup()) per transaction
+
+    def __init__(self, filename: Path, max_snapshots: int = 4) -> None:
+        """:param filename: The full filename of the database file.
+        :param max_snapshots: The maximum number of snapshots to retain in the database for each 'guid'.
+        """
+        super().__init__(filename)
+
+        if isinstance(lmdb, str):
+            raise ImportError(f"Python package 'lmdb' cannot be imported.\n{lmdb}")
+
+        self.max_snapshots = max_snapshots
+        self.filename.parent.mkdir(parents=True, exist_ok=True)
+        self.env = lmdb.open(
+            str(self.filename),
+            map_size=self.map_size,
+            subdir=False,
+            max_dbs=1,
+            max_readers=self.max_readers,
+        )
+        self._db = self.env.open_db(b'snapshots')
+        # The number of transactions in progress, as the map cannot be resized while there are any (see _grow())
+        self._transactions = 0
+        self._resizing = False
+        self._transactions_changed = threading.Condition()
+        self.temp_lock = threading.RLock()
+        self._pending: list[tuple[str, float, bytes]] = []
+        self._pending_bytes = 0
+        # The keys of the snapshots of the write-behind queue already checkpointed, by guid (see delete_latest())
+        self._checkpointed: dict[str, list[bytes]] = {}
+        logger.info(f'Using lmdb {".".join(map(str, lmdb.version()))} database file {self.filename}')
+
+    @staticmethod
+    def _prefix(guid: str) -> bytes:
+        return guid.encode() + b'\x00'
+
+    @staticmethod
+    def _timestamp_key(timestamp: float) -> bytes:
+        """Encode a timestamp into 8 bytes that sort bytewise in the same order as the float values."""
+        bits = struct.unpack('>Q', struct.pack('>d', timestamp))[0]
+        return struct.pack('>Q', bits ^ 0xFFFFFFFFFFFFFFFF if bits >> 63 else bits | 1 << 63)
+
+    @staticmethod
+    def _to_snapshot(r: dict[str, Any]) -> Snapshot:
+        return Snapshot(r['d'], r['ts'], r['t'], r['e'], r.get('m', ''), r.get('err', {}))
+
+    @staticmethod
+    def _iter_reverse(cursor: lmdb.Cursor, prefix: bytes, start: bytes | None = None) -> Iterator[tuple[Any, Any]]:
+        """Yield the (key, value) records whose keys start with 'prefix', most recent first.
+
+        :param cursor: A cursor (of a transaction opened with buffers=True to read values from the memory map).
+        :param prefix: The key prefix of the guid.
+        :param start: If set, start from the last key lower than 'start' rather than from the last key of the guid.
+        """
+        if cursor.set_range(start or prefix[:-1] + b'\x01'):
+            found = cursor.prev()
+        else:
+            found = cursor.last()
+        while found and cursor.key()[: len(prefix)] == prefix:
+            yield cursor.item()
+            found = cursor.prev()
+
+    @contextmanager
+    def _begin(self, write: bool = False, buffers: bool = False) -> Iterator[lmdb.Transaction]:
+        """Run a transaction, counted so that the memory map is not resized while it is in progress.
+
+        :param write: Whether the transaction writes to the database.
+        :param buffers: Whether values are read as buffers (memoryviews) of the memory map rather than bytes.
+        """
+        with self._transactions_changed:
+            self._transactions_changed.wait_for(lambda: not self._resizing)
+            self._transactions += 1
+        try:
+            with self.env.begin(db=self._db, write=write, buffers=buffers) as txn:
+                yield txn
+        finally:
+            with self._transactions_changed:
+                self._transactions -= 1
+                self._transactions_changed.notify_all()
+
+    def _grow(self, map_size: int) -> None:
+        """Double the size of the memory map (unless another thread already grew it beyond 'map_size'), once all the
+        transactions in progress have ended.
+
+        :param map_size: The size of the map that was full.
+        """
+        with self._transactions_changed:
+            self._transactions_changed.wait_for(lambda: not self._resizing)
+            self._resizing = True
+            try:
+                self._transactions_changed.wait_for(lambda: not self._transactions)
+                if self.env.info()['map_size'] <= map_size:
+                    self.env.set_mapsize(map_size * 2)
+                    logger.info(f'Grew the memory map of lmdb database file {self.filename} to {map_size * 2:,} bytes')
+            finally:
+                self._resizing = False
+                self._transactions_changed.notify_all()
+
+    def _write(self, func: Callable[[lmdb.Transaction], T]) -> T:
+        """Run a function in a write transaction, growing the memory map and running it again if the map is full.
+
+        :param func: The function, called with the transaction.
+        :returns: The result of the function.
+        """
+        while True:
+            map_size = self.env.info()['map_size']
+            try:
+                with self._begin(write=True) as txn:
+                    return func(txn)
+            except lmdb.MapFullError:
+                self._grow(map_size)
+
+    def _put(self, txn: lmdb.Transaction, guid: str, timestamp: float, packed_data: bytes) -> bytes:
+        """Write a record, bumping the sequence number if a snapshot with the same timestamp already exists.
+
+        :returns: The key of the record.
+        """
+        key = self._prefix(guid) + self._timestamp_key(timestamp)
+        seq = 0
+        while not txn.put(key + struct.pack('>I', seq), packed_data, overwrite=False):
+            seq += 1
+        return key + struct.pack('>I', seq)
+
+    def _delete_keys(self, keys: Iterable[bytes]) -> int:
+        keys = list(keys)
+        return self._write(lambda txn: sum(txn.delete(key) for key in keys))
+
+    def _guid_keys(self, guid: str) -> list[bytes]:
+        """Return the keys of a 'guid', most recent first."""
+        with self._begin() as txn:
+            return [key for key, _ in self._iter_reverse(txn.cursor(), self._prefix(guid))]
+
+    def _put_batch(self, rows: list[tuple[str, float, bytes]]) -> list[bytes]:
+        """Write (guid, timestamp, packed_data) rows in a single write transaction.
+
+        :returns: The keys of the records.
+        """
+        return self._write(
+            lambda txn: [self._put(txn, guid, timestamp, packed_data) for guid, timestamp, packed_data in rows]
+        )
+
+    def flush(self) -> None:
+        """Write (checkpoint) the snapshots in the write-behind queue to the database in a single transaction."""
+        with self.temp_lock:
+            rows = self._pending
+            self._pending = []
+            self._pending_bytes = 0
+            if not rows:
+                return
+            for (guid, _, _), key in zip(rows, self._put_batch(rows)):
+                self._checkpointed.setdefault(guid, []).append(key)
+            logger.debug(f'Checkpointed {len(rows)} new snapshots to lmdb database')
+
+    def close(self) -> None:
+        """Writes the remaining queued snapshots to the database, purges old entries if required, and closes the
+        database.
+        """
+        self.flush()
+        if self.max_snapshots:
+            num_del = self.keep_latest(self.max_snapshots)
+            logger.debug(f'Keeping no more than {self.max_snapshots} snapshots per job: purged {num_del} older entries')
+        self.env.close()
+        logger.info(f'Closed lmdb database file {self.filename}')
+        del self.env
+
+    def get_guids(self) -> list[str]:
+        """Lists the unique 'guid's contained in the database, seeking from one guid to the next.
+
+        :returns: A list of guids.
+        """
+        guids = []
+        with self._begin() as txn:
+            cursor = txn.cursor()
+            found = cursor.first()
+            while found:
+                guid = cursor.key().split(b'\x00', 1)[0]
+                guids.append(guid.decode())
+                found = cursor.set_range(guid + b'\x01')
+        return guids
+
+    def load(self, guid: str) -> Snapshot:
+        """Return the most recent entry matching a 'guid'.
+
+        :param guid: The guid.
+
+        :returns: A Snapshot (empty if there are no entries).
+        """
+        with self._begin(buffers=True) as txn:
+            for _, value in self._iter_reverse(txn.cursor(), self._prefix(guid)):
+                return self._to_snapshot(msgpack.unpackb(value))
+        return Snapshot('', 0, 0, '', '', {})
+
+    def get_snapshot_at(self, guid: str, timestamp: float) -> Snapshot:
+        """Return the entry for a 'guid' that was the most recent one at 'timestamp' (a single B+tree seek).
+
+        :param guid: The guid.
+        :param timestamp: The timestamp.
+
+        :returns: The Snapshot, or an empty one if no entry is as old as 'timestamp'.
+        """
+        prefix = self._prefix(guid)
+        start = prefix + self._timestamp_key(timestamp) + b'\xff' * 5  # after all keys with this timestamp
+        with self._begin(buffers=True) as txn:
+            for _, value in self._iter_reverse(txn.cursor(), prefix, start):
+                return self._to_snapshot(msgpack.unpackb(value))
+        return Snapshot('', 0, 0, '', '', {})
+
+    def get_history_data(self, guid: str, count: int | None = None) -> dict[str | bytes, float]:
+        """Return max 'count' (None = all) records of data and timestamp of **successful** runs for a 'guid'.
+
+        :param guid: The guid.
+        :param count: The maximum number of entries to return; if None return all.
+
+        :returns: A dict (key: value)
+            WHERE
+
+            - key is the snapshot data;
+            - value is the most recent timestamp for such snapshot.
+        """
+        if count is not None and count < 1:
+            return {}
+
+        history: dict[str | bytes, float] = {}
+        with self._begin(buffers=True) as txn:
+            for _, value in self._iter_reverse(txn.cursor(), self._prefix(guid)):
+                r = msgpack.unpackb(value)
+                if not r['t'] and r['d'] not in history:
+                    history[r['d']] = r['ts']
+                    if count is not None and len(history) >= count:
+                        break
+        return history
+
+    def get_history_snapshots(self, guid: str, count: int | None = None) -> list[Snapshot]:
+        """Return max 'count' (None = all) entries of all data (including from error runs) saved for a 'guid'.
+
+        :param guid: The guid.
+        :param count: The maximum number of entries to return; if None return all.
+
+        :returns: A list of Snapshots, most recent first.
+        """
+        if count is not None and count < 1:
+            return []
+
+        history: list[Snapshot] = []
+        with self._begin(buffers=True) as txn:
+            for _, value in self._iter_reverse(txn.cursor(), self._prefix(guid)):
+                history.append(self._to_snapshot(msgpack.unpackb(value)))
+                if count is not None and len(history) >= count:
+                    break
+        return history
+
+    def save(
+        self,
+        *args: Any,
+        guid: str,
+        snapshot: Snapshot,
+        temporary: bool | None = True,
+        **kwargs: Any,
+    ) -> None:
+        """Save the data from a job.
+
+        By default, it is added to the write-behind queue, which is checkpointed to the database once it's large
+        enough. Call flush() or close() to write all queued snapshots.
+
+        :param guid: The guid.
+        :param snapshot: The Snapshot.
+        :param temporary: If true, added to the write-behind queue (default); otherwise written immediately.
+        """
+        c = {
+            'd': snapshot.data,
+            't': snapshot.tries,
+            'e': snapshot.etag,
+            'm': snapshot.mime_type,
+            'err': snapshot.error_data,
+            'ts': snapshot.timestamp,
+        }
+        packed_data = msgpack.packb(c)
+        if temporary:
+            with self.temp_lock:
+                self._pending.append((guid, snapshot.timestamp, packed_data))
+                self._pending_bytes += len(packed_data)
+                if len(self._pending) >= self.checkpoint_rows or self._pending_bytes >= self.checkpoint_bytes:
+                    self.flush()
+        else:
+            self._write(lambda txn: self._put(txn, guid, snapshot.timestamp, packed_data))
+
+    def backup(self, history: bool = False) -> Iterator[tuple[str, str | bytes, float, int, str, str, ErrorData]]:
+        """Return the most recent entry for each 'guid', or all of its entries.
+
+        With history, the records are read in key order (i.e. by guid and chronologically) one page of
+        'restore_batch_size' records per read transaction, resuming after the last key read.
+
+        :param history: If true, return all the entries of each 'guid', oldest first, rather than the most recent one.
+
+        :returns: A generator of tuples, each consisting of (guid, data, timestamp, tries, etag, mime_type, error_data)
+        """
+        if not history:
+            yield from super().backup()
+            return
+
+        self.flush()
+        last_key = None
+        while True:
+            page = []
+            with self._begin() as txn:
+                cursor = txn.cursor()
+                found = cursor.set_range(last_key + b'\x00') if last_key else cursor.first()
+                while found and len(page) < self.restore_batch_size:
+                    page.append(cursor.item())
+                    found = cursor.next()
+            if not page:
+                return
+            for key, value in page:
+                r = msgpack.unpackb(value)
+                guid = key.split(b'\x00', 1)[0].decode()
+                yield guid, r['d'], r['ts'], r['t'], r['e'], r.get('m', ''), r.get('err', {})
+            last_key = page[-1][0]
+
+    def restore(self, entries: Iterable[tuple[str, str | bytes, float, int, str, str, ErrorData]]) -> None:
+        """Save multiple entries into the database, using one write transaction per 'restore_batch_size' entries.
+
+        :param entries: An iterator of tuples WHERE each consists of (guid, data, timestamp, tries, etag, mime_type,
+           error_data)
+        """
+        batch: list[tuple[str, float, bytes]] = []
+        for guid, data, timestamp, tries, etag, mime_type, error_data in entries:
+            c = {'d': data, 't': tries, 'e': etag, 'm': mime_type, 'err': error_data, 'ts': timestamp}
+            batch.append((guid, timestamp, msgpack.packb(c)))
+            if len(batch) >= self.restore_batch_size:
+                self._put_batch(batch)
+                batch = []
+        if batch:
+            self._put_batch(batch)
+
+    def delete(self, guid: str) -> None:
+        """Delete all entries matching a 'guid'.
+
+        :param guid: The guid.
+        """
+        self._delete_keys(self._guid_keys(guid))
+
+    def delete_latest(
+        self,
+        guid: str,
+        delete_entries: int = 1,
+        temporary: bool | None = False,
+        **kwargs: Any,
+    ) -> int:
+        """For the given 'guid', delete the latest 'delete_entries' number of entries and keep all other (older) ones.
+
+        :param guid: The guid.
+        :param delete_entries: The number of most recent entries to delete.
+        :param temporary: If True, delete only entries saved in this run to the write-behind queue, whether still
+           queued or already checkpointed; otherwise, delete from all entries (default).
+
+        :returns: Number of records deleted.
+        """
+        if temporary:
+            num_del = 0
+            with self.temp_lock:
+                for i in range(len(self._pending) - 1, -1, -1):
+                    if num_del >= delete_entries:
+                        break
+                    if self._pending[i][0] == guid:
+                        self._pending_bytes -= len(self._pending.pop(i)[2])
+                        num_del += 1
+                checkpointed = self._checkpointed.get(guid, [])
+                keys = []
+                while checkpointed and num_del + len(keys) < delete_entries:
+                    keys.append(checkpointed.pop())
+                if keys:
+                    num_del += self._delete_keys(keys)
+            return num_del
+
+        return self._delete_keys(self._guid_keys(guid)[:delete_entries])
+
+    def delete_all(self) -> int:
+        """Delete all entries; used for testing only.
+
+        :returns: Number of records deleted.
+        """
+
+        def drop(txn: lmdb.Transaction) -> int:
+            num_del = txn.stat(self._db)['entries']
+            txn.drop(self._db, delete=False)
+            return num_del
+
+        return self._write(drop)
+
+    def clean(self, guid: str, keep_entries: int = 1) -> int:
+        """For the given 'guid', keep only the latest 'keep_entries' number of entries and delete all other (older)
+        ones. To delete older entries from all guids, use clean_all() instead.
+
+        :param guid: The guid.
+        :param keep_entries: Number of entries to keep after deletion.
+
+        :returns: Number of records deleted.
+        """
+        return self._delete_keys(self._guid_keys(guid)[keep_entries:])
+
+    def clean_all(self, keep_entries: int = 1) -> int:
+        """Delete all older entries for each 'guid' (keep only keep_entries).
+
+        :returns: Number of records deleted.
+        """
+        return self.keep_latest(keep_entries)
+
+    def keep_latest(self, keep_entries: int = 1) -> int:
+        """Delete all older entries keeping only the 'keep_num' per guid, in a single pass over the database.
+
+        :param keep_entries: Number of entries to keep after deletion.
+
+        :returns: Number of records deleted.
+        """
+
+        def delete_older(txn: lmdb.Transaction) -> int:
+            num_del = 0
+            cursor = txn.cursor()
+            found = cursor.last()
+            prefix = b''
+            kept = 0
+            while found:
+                key = cursor.key()
+                if not prefix or not key.startswith(prefix):
+                    prefix = key.split(b'\x00', 1)[0] + b'\x00'
+                    kept = 0
+                if kept < keep_entries:
+                    kept += 1
+                    found = cursor.prev()
+                else:
+                    cursor.delete()  # moves the cursor to the following record
+                    num_del += 1
+                    found = cursor.prev()
+            return num_del
+
+        return self._write(delete_older)
+
+    def move(self, guid: str, new_guid: str) -> int:
+        """Moves the entries of 'guid' to 'new_guid'.
+
+        If there are existing records with 'new_guid', they will not be overwritten and the job histories will be
+        merged.
+
+        :returns: Number of records moved.
+        """
+        if guid == new_guid:
+            return 0
+        prefix = self._prefix(guid)
+        new_prefix = self._prefix(new_guid)
+        keys = self._guid_keys(guid)
+
+        def move_keys(txn: lmdb.Transaction) -> None:
+            for key in keys:
+                value = txn.pop(key)
+                key_suffix = key[len(prefix) : -4]
+                seq = 0
+                while not txn.put(new_prefix + key_suffix + struct.pack('>I', seq), value, overwrite=False):
+                    seq += 1
+
+        self._write(move_keys)
+        return len(keys)
+
+    def rollback(self, timestamp: float, count: bool = False) -> int:
+        """Rollback database to the entries present at timestamp.
+
+        :param timestamp: The timestamp.
+        :param count: If set to true, only count the number that would be deleted without doing so.
+
+        :returns: Number of records deleted (or to be deleted).
+        """
+        timestamp_key = self._timestamp_key(timestamp) + b'\xff' * 5
+        keys = []
+        guids = self.get_guids()  # before the transaction, as one started within it would wait for any resizing
+        with self._begin() as txn:
+            cursor = txn.cursor()
+            for guid in guids:
+                prefix = self._prefix(guid)
+                found = cursor.set_range(prefix + timestamp_key)
+                while found and cursor.key().startswith(prefix):
+                    keys.append(cursor.key())
+                    found = cursor.next()
+        if count:
+            return len(keys)
+        return self._delete_keys(keys)
+
+    def flushdb(self) -> None:
+        """Delete all entries of the database.  Use with care, there is no undo!"""
+        self.delete_all()
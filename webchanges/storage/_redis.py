@@ -5,11 +5,12 @@
 from __future__ import annotations
 
 import logging
-from typing import TYPE_CHECKING, Any
+import threading
+from typing import TYPE_CHECKING, Any, Iterable, Iterator
 
 import msgpack
 
-from webchanges.handler import Snapshot
+from webchanges.handler import ErrorData, Snapshot
 from webchanges.storage._ssdb import SsdbStorage
 
 try:
@@ -24,49 +25,118 @@ logger = logging.getLogger(__name__)
 
 
 class SsdbRedisStorage(SsdbStorage):
-    """Class for storing snapshots using redis."""
-
-    def __init__(self, filename: str | Path) -> None:
+    """Class for storing snapshots using redis.
+
+    The snapshots of each 'guid' are stored, most recent first, in a list with key 'guid:<guid>'. Histories are read
+    with LRANGE pages instead of one LINDEX round-trip per entry, keys are enumerated with the non-blocking SCAN, and
+    multi-guid loads and saves are sent as a single pipeline. Lists are trimmed to 'max_snapshots' entries on save,
+    except by the saves of a run (temporary=True), which keep one more entry, so that the snapshot of the run can be
+    deleted by 'delete_latest()' without losing the oldest one; these lists are trimmed by 'close()'.
+    """
+
+    pipeline_size = 1000  # maximum number of commands sent in a single pipeline
+    history_page_size = 100  # number of entries read by each LRANGE when paging through a history
+
+    def __init__(self, filename: str | Path, max_snapshots: int = 4) -> None:
+        """:param filename: The URI of the Redis database.
+        :param max_snapshots: The maximum number of snapshots to retain in the database for each 'guid' (0 for
+           unlimited).
+        """
         super().__init__(filename)
 
         if isinstance(redis, str):
             raise ImportError(f"Python package 'redis' cannot be imported.\n{redis}")
 
+        self.max_snapshots = max_snapshots
         self.db = redis.from_url(str(filename))
+        self._untrimmed: set[str] = set()  # the guids saved by the run, whose lists are trimmed by close()
+        self._untrimmed_lock = threading.Lock()
         logger.info(f'Using {self.filename} for database')
 
     @staticmethod
     def _make_key(guid: str) -> str:
         return 'guid:' + guid
 
+    @staticmethod
+    def _to_snapshot(r: dict[str, Any]) -> Snapshot:
+        return Snapshot(
+            r['data'],
+            r['timestamp'],
+            r['tries'],
+            r['etag'],
+            r.get('mime_type', ''),
+            r.get('error_data', r.get('err_data', {})),
+        )
+
+    @staticmethod
+    def _pack(snapshot: Snapshot) -> bytes:
+        r = {
+            'data': snapshot.data,
+            'timestamp': snapshot.timestamp,
+            'tries': snapshot.tries,
+            'etag': snapshot.etag,
+            'mime_type': snapshot.mime_type,
+            'error_data': snapshot.error_data,
+        }
+        return msgpack.packb(r)
+
+    def _iter_history(self, guid: str, page_size: int) -> Iterator[dict[str, Any]]:
+        """Yield the unpacked entries of a 'guid', most recent first, reading them 'page_size' at a time."""
+        key = self._make_key(guid)
+        start = 0
+        while True:
+            page = self.db.lrange(key, start, start + page_size - 1)
+            for packed_data in page:
+                yield msgpack.unpackb(packed_data)
+            if len(page) < page_size:
+                return
+            start += page_size
+
     def close(self) -> None:
+        if self.max_snapshots:
+            with self._untrimmed_lock:
+                guids = list(self._untrimmed)
+                self._untrimmed.clear()
+            for i in range(0, len(guids), self.pipeline_size):
+                pipe = self.db.pipeline(transaction=False)
+                for guid in guids[i : i + self.pipeline_size]:
+                    pipe.ltrim(self._make_key(guid), 0, self.max_snapshots - 1)
+                pipe.execute()
         self.db.connection_pool.disconnect()
         del self.db
 
     def get_guids(self) -> list[str]:
-        return [guid[5:].decode() for guid in self.db.keys('guid:*')]
+        return [key[5:].decode() for key in self.db.scan_iter(match='guid:*', count=self.pipeline_size)]
 
     def load(self, guid: str) -> Snapshot:
-        key = self._make_key(guid)
-        data = self.db.lindex(key, 0)
-
+        data = self.db.lindex(self._make_key(guid), 0)
         if data:
-            r = msgpack.unpackb(data)
-            return Snapshot(
-                r['data'], r['timestamp'], r['tries'], r['etag'], r.get('mime_type', ''), r.get('err_data', {})
-            )
+            return self._to_snapshot(msgpack.unpackb(data))
 
         return Snapshot('', 0, 0, '', '', {})
 
+    def load_many(self, guids: Iterable[str]) -> Iterator[tuple[str, Snapshot]]:
+        """Return the most recent entry of each of the 'guids', using one pipeline per 'pipeline_size' guids.
+
+        :param guids: The guids.
+
+        :returns: A generator of (guid, Snapshot) tuples.
+        """
+        guids = list(guids)
+        for i in range(0, len(guids), self.pipeline_size):
+            chunk = guids[i : i + self.pipeline_size]
+            pipe = self.db.pipeline(transaction=False)
+            for guid in chunk:
+                pipe.lindex(self._make_key(guid), 0)
+            for guid, data in zip(chunk, pipe.execute()):
+                yield guid, self._to_snapshot(msgpack.unpackb(data)) if data else Snapshot('', 0, 0, '', '', {})
+
     def get_history_data(self, guid: str, count: int | None = None) -> dict[str | bytes, float]:
         if count is not None and count < 1:
             return {}
 
         history = {}
-        key = self._make_key(guid)
-        for i in range(self.db.llen(key)):
-            r = self.db.lindex(key, i)
-            c = msgpack.unpackb(r)
+        for c in self._iter_history(guid, count or self.history_page_size):
             if (c['tries'] == 0 or c['tries'] is None) and c['data'] not in history:
                 history[c['data']] = c['timestamp']
                 if count is not None and len(history) >= count:
@@ -78,37 +148,57 @@ class SsdbRedisStorage(SsdbStorage):
             return []
 
         history: list[Snapshot] = []
-        key = self._make_key(guid)
-        for i in range(self.db.llen(key)):
-            r = self.db.lindex(key, i)
-            c = msgpack.unpackb(r)
+        for c in self._iter_history(guid, count or self.history_page_size):
             if c['tries'] == 0 or c['tries'] is None:
-                history.append(
-                    Snapshot(
-                        c['data'],
-                        c['timestamp'],
-                        c['tries'],
-                        c['etag'],
-                        c.get('mime_type', ''),
-                        c.get('error_data', {}),
-                    )
-                )
+                history.append(self._to_snapshot(c))
                 if count is not None and len(history) >= count:
                     break
         return history
 
-    def save(self, *args: Any, guid: str, snapshot: Snapshot, **kwargs: Any) -> None:
-        r = {
-            'data': snapshot.data,
-            'timestamp': snapshot.timestamp,
-            'tries': snapshot.tries,
-            'etag': snapshot.etag,
-            'mime_type': snapshot.mime_type,
-            'error_data': snapshot.error_data,
-        }
-        packed_data = msgpack.packb(r)
+    def _pipe_save(self, pipe: redis.client.Pipeline, guid: str, snapshot: Snapshot, extra: int = 0) -> None:
+        """Queue in 'pipe' the commands saving a snapshot and trimming the list to 'max_snapshots' (plus 'extra')
+        entries.
+        """
+        packed_data = self._pack(snapshot)
         if packed_data:
-            self.db.lpush(self._make_key(guid), packed_data)
+            key = self._make_key(guid)
+            pipe.lpush(key, packed_data)
+            if self.max_snapshots:
+                pipe.ltrim(key, 0, self.max_snapshots - 1 + extra)
+
+    def save(self, *args: Any, guid: str, snapshot: Snapshot, temporary: bool = True, **kwargs: Any) -> None:
+        pipe = self.db.pipeline(transaction=False)
+        if temporary and self.max_snapshots:
+            # keep one more entry until close(), in case the snapshot is deleted by delete_latest()
+            self._pipe_save(pipe, guid, snapshot, extra=1)
+            with self._untrimmed_lock:
+                self._untrimmed.add(guid)
+        else:
+            self._pipe_save(pipe, guid, snapshot)
+        pipe.execute()
+
+    def restore(self, entries: Iterable[tuple[str, str | bytes, float, int, str, str, ErrorData]]) -> None:
+        """Save multiple entries into the database, using one pipeline per 'pipeline_size' entries.
+
+        :param entries: An iterator of tuples WHERE each consists of (guid, data, timestamp, tries, etag, mime_type)
+        """
+        pipe = self.db.pipeline(transaction=False)
+        for i, (guid, data, timestamp, tries, etag, mime_type, error_data) in enumerate(entries, start=1):
+            self._pipe_save(pipe, guid, Snapshot(data, timestamp, tries, etag, mime_type, error_data))
+            if not i % self.pipeline_size:
+                pipe.execute()
+        pipe.execute()
+
+    def backup(self, history: bool = False) -> Iterator[tuple[str, str | bytes, float, int, str, str, ErrorData]]:
+        if history:
+            # all the entries as stored, including those of errors (which get_history_snapshots() skips)
+            for guid in self.get_guids():
+                for r in reversed(list(self._iter_history(guid, self.history_page_size))):
+                    data, timestamp, tries, etag, mime_type, error_data = self._to_snapshot(r)
+                    yield guid, data, timestamp, tries, etag, mime_type, error_data
+            return
+        for guid, (data, timestamp, tries, etag, mime_type, error_data) in self.load_many(self.get_guids()):
+            yield guid, data, timestamp, tries, etag, mime_type, error_data
 
     def delete(self, guid: str) -> None:
         self.db.delete(self._make_key(guid))
@@ -137,15 +227,16 @@ class SsdbRedisStorage(SsdbStorage):
         raise NotImplementedError('This method is not implemented for Redis.')
 
     def clean(self, guid: str, keep_entries: int = 1) -> int:
-        if keep_entries != 1:
-            raise NotImplementedError('Only keeping latest 1 entry is supported.')
-
         key = self._make_key(guid)
-        i = self.db.llen(key)
-        if self.db.ltrim(key, 0, 0):
-            return i - self.db.llen(key)
-
-        return 0
+        pipe = self.db.pipeline()
+        pipe.llen(key)
+        if keep_entries > 0:
+            pipe.ltrim(key, 0, keep_entries - 1)
+        else:
+            pipe.delete(key)
+        pipe.llen(key)
+        before, _, after = pipe.execute()
+        return before - after
 
     def move(self, guid: str, new_guid: str) -> int:
         if guid == new_guid:
@@ -5,30 +5,64 @@
 from __future__ import annotations
 
 import logging
+import os
+import queue
 import sqlite3
 import sys
 import threading
-from typing import TYPE_CHECKING, Any
+import time
+from contextlib import contextmanager
+from typing import TYPE_CHECKING, Any, Iterable, Iterator, Literal
 
 import msgpack
 
 from webchanges import __project_name__
-from webchanges.handler import Snapshot
+from webchanges.handler import ErrorData, Snapshot
 from webchanges.storage._ssdb import SsdbStorage
 
 if TYPE_CHECKING:
     from pathlib import Path
 
+try:
+    import psutil
+except ImportError as e:  # pragma: no cover
+    psutil = str(e)  # ty:ignore[invalid-assignment]
+
 logger = logging.getLogger(__name__)
 
 
+def _process_running(pid: int | None) -> bool:
+    """Return whether another process with the given process ID is running (False if it cannot be determined, i.e.
+    for runs saved before the process ID was recorded, and on Windows without psutil).
+
+    :param pid: The process ID.
+    :returns: Whether the process is running.
+    """
+    if pid is None or pid == os.getpid():
+        return False
+    if not isinstance(psutil, str):
+        return psutil.pid_exists(pid)
+    if os.name == 'nt':  # pragma: no cover
+        return False  # os.kill() would terminate the process
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:  # running under another user
+        return True
+    return True
+
+
 class SsdbSQLite3Storage(SsdbStorage):
     """Handles storage of the snapshot as a SQLite database in the 'filename' file using Python's built-in sqlite3
     module and the msgpack package.
 
-    A temporary database is created by __init__ and will be written by the 'save()' function (unless temporary=False).
-    This data will be written to the permanent one by the 'close()' function, which is called at the end of program
-    execution.
+    Snapshots saved by the 'save()' function (unless temporary=False) are queued in memory and written to the database
+    in batches ('checkpoints') during the run, whenever the queue reaches 'checkpoint_rows' entries or
+    'checkpoint_bytes' bytes or 'checkpoint_interval' seconds have elapsed since the last one, and by the 'close()'
+    function, which is called at the end of program execution. This bounds memory use, and if the process is killed
+    only the snapshots still in the queue are lost. All snapshots written by a run are tagged with its run ID so that
+    the run can be rolled back as a unit with 'rollback_run()'.
 
     The database contains the 'webchanges' table with the following columns:
 
@@ -36,13 +70,33 @@ class SsdbSQLite3Storage(SsdbStorage):
     * timestamp: the Unix timestamp of when then the snapshot was taken; indexed
     * msgpack_data: a msgpack blob containing 'data', 'tries', 'etag' and 'mime_type' in a dict of keys 'd', 't',
       'e' and 'm'
+    * run_id: the ID of the run that saved the snapshot (NULL if saved outside a run, e.g. by 'restore()')
+
+    and the 'runs' table with the 'run_id', the 'started' and 'finished' Unix timestamps and the 'pid' of the process of
+    each run (a NULL 'finished' denotes a run that is in progress or, if its process is no longer running, that was
+    interrupted).
+
+    File databases are opened in WAL journal mode: all writes go through the single writer connection (serialized by
+    'lock'), while reads are served by a pool of read-only connections, one per concurrently reading thread, so that
+    'load()' calls from the worker threads run in parallel instead of queueing behind each other. In-memory databases
+    cannot be shared across connections and are always read through the writer connection.
+
+    Databases use incremental auto-vacuum: maintenance operations (e.g. 'clean()', 'clean_all()') only delete rows,
+    and the freed pages are released once at the end with 'vacuum()', up to 'incremental_vacuum_pages' pages at a
+    time, instead of rebuilding the whole file with a full VACUUM.
     """
 
+    checkpoint_rows = 50  # maximum number of snapshots queued before a checkpoint
+    checkpoint_bytes = 16 * 1024 * 1024  # maximum size of the (packed) snapshots queued before a checkpoint
+    checkpoint_interval = 10.0  # maximum number of seconds between checkpoints
+    incremental_vacuum_pages = 25_000  # maximum number of free pages released by each incremental vacuum
+    restore_batch_size = 1_000  # number of rows written (and read by backup()) per transaction
+
     def __init__(self, filename: Path, max_snapshots: int = 4) -> None:
         """:param filename: The full filename of the database file
         :param max_snapshots: The maximum number of snapshots to retain in the database for each 'guid'
         """
-        # Opens the database file and, if new, creates a table and index.
+        # Opens the database file and, if new, creates the tables and index.
 
         self.max_snapshots = max_snapshots
 
@@ -58,15 +112,17 @@ class SsdbSQLite3Storage(SsdbStorage):
         logger.info(f'Using sqlite3 {sqlite3.sqlite_version} database at {filename}')
         self.cur = self.db.cursor()
         self.cur.execute('PRAGMA temp_store = MEMORY;')
-        tables = self._execute("SELECT name FROM sqlite_master WHERE type='table';").fetchone()
+        self.in_memory = str(filename) == ':memory:'
+        self._configure_connection()
+        tables = {row[0] for row in self._execute("SELECT name FROM sqlite_master WHERE type='table';")}
 
         def _initialize_table() -> None:
             logger.debug('Initializing sqlite3 database')
-            self._execute('CREATE TABLE webchanges (uuid TEXT, timestamp REAL, msgpack_data BLOB)')
+            self._execute('CREATE TABLE webchanges (uuid TEXT, timestamp REAL, msgpack_data BLOB, run_id INTEGER)')
             self._execute('CREATE INDEX idx_uuid_time ON webchanges(uuid, timestamp)')
             self.db.commit()
 
-        if tables == ('CacheEntry',):
+        if tables == {'CacheEntry'}:
             logger.info("Found legacy 'minidb' database to convert")
 
             # Found a minidb legacy database; close it, rename it for migration and create new sqlite3 one
@@ -89,19 +145,96 @@ class SsdbSQLite3Storage(SsdbStorage):
             self.filename.replace(minidb_filename)
             self.db = sqlite3.connect(filename, check_same_thread=False)
             self.cur = self.db.cursor()
+            self._configure_connection()
             _initialize_table()
             # Migrate the minidb legacy database renamed above
             self.migrate_from_minidb(minidb_filename)
-        elif tables != ('webchanges',):
+        elif 'webchanges' not in tables:
             _initialize_table()
+        self._upgrade_schema()
 
-        # Create temporary database in memory for writing during execution (fault tolerance)
-        logger.debug('Creating temp sqlite3 database file in memory')
+        # Pool of read-only connections (file databases only); connections are created on demand, so the pool grows to
+        # the number of threads reading concurrently
+        self._readers: queue.SimpleQueue[sqlite3.Connection] = queue.SimpleQueue()
+        self._all_readers: list[sqlite3.Connection] = []
+
+        # Write-behind queue of (uuid, timestamp, msgpack_data) rows saved during the run; the run ID is assigned on
+        # the first checkpoint
         self.temp_lock = threading.RLock()
-        self.temp_db = sqlite3.connect(':memory:', check_same_thread=False)
-        self.temp_cur = self.temp_db.cursor()
-        self._temp_execute('CREATE TABLE webchanges (uuid TEXT, timestamp REAL, msgpack_data BLOB)')
-        self.temp_db.commit()
+        self._pending: list[tuple[str, float, bytes]] = []
+        self._pending_bytes = 0
+        self._last_checkpoint = time.monotonic()
+        self.run_id: int | None = None
+
+    def _upgrade_schema(self) -> None:
+        """Add the 'run_id' column and 'runs' table to databases created by earlier versions, and warn about any runs
+        that were interrupted before completion, i.e. not finished and whose process is no longer running (the runs of
+        other processes still in progress are left alone).
+        """
+        columns = {row[1] for row in self._execute('PRAGMA table_info(webchanges)')}
+        if 'run_id' not in columns:
+            logger.info("Adding 'run_id' column to sqlite3 database")
+            self._execute('ALTER TABLE webchanges ADD COLUMN run_id INTEGER')
+        self._execute(
+            'CREATE TABLE IF NOT EXISTS runs (run_id INTEGER PRIMARY KEY, started REAL, finished REAL, pid INTEGER)'
+        )
+        if 'pid' not in {row[1] for row in self._execute('PRAGMA table_info(runs)')}:
+            self._execute('ALTER TABLE runs ADD COLUMN pid INTEGER')
+        self.db.commit()
+
+        unfinished = self._execute('SELECT run_id, started, pid FROM runs WHERE finished IS NULL').fetchall()
+        interrupted = [(run_id, started) for run_id, started, pid in unfinished if not _process_running(pid)]
+        for run_id, started in interrupted:
+            logger.warning(
+                f'Found snapshots saved by run {run_id} started at {time.ctime(started)}, which did not complete; to '
+                f'discard them, run with --rollback-run {run_id}'
+            )
+        if interrupted:
+            self.cur.executemany(
+                'UPDATE runs SET finished = started WHERE run_id = ? AND finished IS NULL',
+                ((run_id,) for run_id, _ in interrupted),
+            )
+            self.db.commit()
+
+    def _configure_connection(self) -> None:
+        """Set incremental auto-vacuum (only effective for new databases, as it must precede the writing of the file
+        header) and switch file databases to write-ahead logging, which allows readers to run concurrently with the
+        writer. 'synchronous = NORMAL' is durable in WAL mode except for the last transactions on power loss.
+        """
+        self.cur.execute('PRAGMA auto_vacuum = INCREMENTAL;')
+        if self.in_memory:
+            return
+        journal_mode = self.cur.execute('PRAGMA journal_mode = WAL;').fetchone()[0]
+        if journal_mode.lower() != 'wal':
+            logger.warning(f'Could not set sqlite3 database to WAL journal mode; using {journal_mode}')
+        self.cur.execute('PRAGMA synchronous = NORMAL;')
+
+    @contextmanager
+    def _reader(self) -> Iterator[sqlite3.Cursor]:
+        """Context manager yielding a cursor for reading from the permanent database.
+
+        For file databases, a read-only connection is taken from the pool (or a new one is opened) and returned to the
+        pool on exit, so concurrent readers don't contend for 'lock'. For in-memory databases, the cursor of the writer
+        connection is used under 'lock'.
+
+        :returns: A cursor.
+        """
+        if self.in_memory:
+            with self.lock:
+                yield self.cur
+            return
+
+        try:
+            conn = self._readers.get_nowait()
+        except queue.Empty:
+            conn = sqlite3.connect(f'{self.filename.resolve().as_uri()}?mode=ro', uri=True, check_same_thread=False)
+            with self.lock:
+                self._all_readers.append(conn)
+            logger.debug(f'Opened read-only sqlite3 connection #{len(self._all_readers)}')
+        try:
+            yield conn.cursor()
+        finally:
+            self._readers.put(conn)
 
     def _execute(self, sql: str, args: tuple | None = None) -> sqlite3.Cursor:
         """Execute SQL command on main database"""
@@ -111,37 +244,49 @@ class SsdbSQLite3Storage(SsdbStorage):
         logger.debug(f"Executing (perm) '{sql}' with {args}")
         return self.cur.execute(sql, args)
 
-    def _temp_execute(self, sql: str, args: tuple | None = None) -> sqlite3.Cursor:
-        """Execute SQL command on temp database."""
-        if args is None:
-            logger.debug(f"Executing (temp) '{sql}'")
-            return self.temp_cur.execute(sql)
-        logger.debug(f"Executing (temp) '{sql}' with {args[:2]}...")
-        return self.temp_cur.execute(sql, args)
-
-    def _copy_temp_to_permanent(self, delete: bool = False) -> None:
-        """Copy contents of temporary database to permanent one.
+    def _insert_batch(self, rows: list[tuple[str, float, bytes]]) -> None:
+        """Insert (uuid, timestamp, msgpack_data) rows in a single transaction."""
+        with self.lock:
+            self.cur.executemany('INSERT INTO webchanges (uuid, timestamp, msgpack_data) VALUES (?, ?, ?)', rows)
+            self.db.commit()
+        logger.debug(f'Restored {len(rows)} snapshots to sqlite3 database')
 
-        :param delete: also delete contents of temporary cache (used for testing)
-        """
-        logger.debug('Saving new snapshots to permanent sqlite3 database')
+    def flush(self) -> None:
+        """Write (checkpoint) the snapshots in the write-behind queue to the database in a single transaction."""
         with self.temp_lock:
+            rows = self._pending
+            self._pending = []
+            self._pending_bytes = 0
+            self._last_checkpoint = time.monotonic()
+            if not rows:
+                return
+            # the run starts no later than its first snapshot, which is timestamped before the job retrieves its data
+            started = min(time.time(), *(row[1] for row in rows))
             with self.lock:
-                for row in self._temp_execute('SELECT * FROM webchanges').fetchall():
-                    self._execute('INSERT INTO webchanges VALUES (?, ?, ?)', row)
+                if self.run_id is None:
+                    self._execute('INSERT INTO runs (started, pid) VALUES (?, ?)', (started, os.getpid()))
+                    self.run_id = self.cur.lastrowid
+                    logger.debug(f'Started run {self.run_id} in sqlite3 database')
+                else:
+                    self._execute(
+                        'UPDATE runs SET started = MIN(started, ?) WHERE run_id = ?', (started, self.run_id)
+                    )
+                self.cur.executemany(
+                    'INSERT INTO webchanges (uuid, timestamp, msgpack_data, run_id) VALUES (?, ?, ?, ?)',
+                    ((*row, self.run_id) for row in rows),
+                )
                 self.db.commit()
-            if delete:
-                self._temp_execute('DELETE FROM webchanges')
+            logger.debug(f'Checkpointed {len(rows)} new snapshots to sqlite3 database')
 
     def close(self) -> None:
-        """Writes the temporary database to the permanent one, purges old entries if required, and closes all database
-        connections.
+        """Writes the remaining queued snapshots to the database, marks the run as finished, purges old entries if
+        required, and closes all database connections.
         """
-        self._copy_temp_to_permanent()
-        with self.temp_lock:
-            self.temp_db.close()
-            logger.debug('Cleaning up the permanent sqlite3 database and closing the connection')
+        self.flush()
+        logger.debug('Cleaning up the permanent sqlite3 database and closing the connection')
         with self.lock:
+            if self.run_id is not None:
+                self._execute('UPDATE runs SET finished = ? WHERE run_id = ?', (time.time(), self.run_id))
             if self.max_snapshots:
                 num_del = self.keep_latest(self.max_snapshots)
                 logger.debug(
@@ -149,11 +294,13 @@ class SsdbSQLite3Storage(SsdbStorage):
                 )
             else:
                 self.db.commit()
+            for conn in self._all_readers:
+                conn.close()
             self.db.close()
             logger.info(f'Closed main sqlite3 database file {self.filename}')
-        del self.temp_cur
-        del self.temp_db
         del self.temp_lock
+        del self._readers
+        del self._all_readers
         del self.cur
         del self.db
         del self.lock
@@ -163,11 +310,8 @@ class SsdbSQLite3Storage(SsdbStorage):
 
         :returns: A list of guids.
         """
-        with self.lock:
-            self.cur.row_factory = lambda cursor, row: row[0]
-            guids = self._execute('SELECT DISTINCT uuid FROM webchanges').fetchall()
-            self.cur.row_factory = None
-        return guids
+        with self._reader() as cur:
+            return [row[0] for row in cur.execute('SELECT DISTINCT uuid FROM webchanges')]
 
     def load(self, guid: str) -> Snapshot:
         """Return the most recent entry matching a 'guid'.
@@ -182,8 +326,8 @@ class SsdbSQLite3Storage(SsdbStorage):
             - tries is the number of tries;
             - etag is the ETag.
         """
-        with self.lock:
-            row = self._execute(
+        with self._reader() as cur:
+            row = cur.execute(
                 'SELECT msgpack_data, timestamp FROM webchanges WHERE uuid = ? ORDER BY timestamp DESC LIMIT 1',
                 (guid,),
             ).fetchone()
@@ -209,8 +353,8 @@ class SsdbSQLite3Storage(SsdbStorage):
         if count is not None and count < 1:
             return {}
 
-        with self.lock:
-            rows = self._execute(
+        with self._reader() as cur:
+            rows = cur.execute(
                 'SELECT msgpack_data, timestamp FROM webchanges WHERE uuid = ? ORDER BY timestamp DESC', (guid,)
             ).fetchall()
         history = {}
@@ -240,8 +384,8 @@ class SsdbSQLite3Storage(SsdbStorage):
         if count is not None and count < 1:
             return []
 
-        with self.lock:
-            rows = self._execute(
+        with self._reader() as cur:
+            rows = cur.execute(
                 'SELECT msgpack_data, timestamp FROM webchanges WHERE uuid = ? ORDER BY timestamp DESC', (guid,)
             ).fetchall()
         history: list[Snapshot] = []
@@ -253,6 +397,27 @@ class SsdbSQLite3Storage(SsdbStorage):
                     break
         return history
 
+    def get_snapshot_at(self, guid: str, timestamp: float) -> Snapshot:
+        """Return the entry for a 'guid' that was the most recent one at 'timestamp' (a single index search).
+
+        :param guid: The guid.
+        :param timestamp: The timestamp.
+
+        :returns: The Snapshot, or an empty one if no entry is as old as 'timestamp'.
+        """
+        with self._reader() as cur:
+            row = cur.execute(
+                'SELECT msgpack_data, timestamp FROM webchanges WHERE uuid = ? AND timestamp <= ? '
+                'ORDER BY timestamp DESC LIMIT 1',
+                (guid, timestamp),
+            ).fetchone()
+        if row:
+            msgpack_data, timestamp = row
+            r = msgpack.unpackb(msgpack_data)
+            return Snapshot(r['d'], timestamp, r['t'], r['e'], r.get('m', ''), r.get('err', {}))
+
+        return Snapshot('', 0, 0, '', '', {})
+
     def save(
         self,
         *args: Any,
@@ -263,8 +428,8 @@ class SsdbSQLite3Storage(SsdbStorage):
     ) -> None:
         """Save the data from a job.
 
-        By default, it is saved into the temporary database. Call close() to transfer the contents of the temporary
-        database to the permanent one.
+        By default, it is added to the write-behind queue, which is checkpointed to the database once it's large or old
+        enough. Call flush() or close() to write all queued snapshots.
 
         Note: the logic is such that any attempts that end in an exception will have tries >= 1, and we replace the data
         with the one from the most recent successful attempt.
@@ -274,7 +439,7 @@ class SsdbSQLite3Storage(SsdbStorage):
         :param timestamp: The timestamp.
         :param tries: The number of tries.
         :param etag: The ETag (could be empty string).
-        :param temporary: If true, saved to temporary database (default).
+        :param temporary: If true, added to the write-behind queue (default); otherwise written immediately.
         """
         c = {
             'd': snapshot.data,
@@ -286,13 +451,75 @@ class SsdbSQLite3Storage(SsdbStorage):
         msgpack_data = msgpack.packb(c)
         if temporary:
             with self.temp_lock:
-                self._temp_execute('INSERT INTO webchanges VALUES (?, ?, ?)', (guid, snapshot.timestamp, msgpack_data))
-                # we do not commit to temporary as it's being used as write-only (we commit at the end)
+                self._pending.append((guid, snapshot.timestamp, msgpack_data))
+                self._pending_bytes += len(msgpack_data)
+                if (
+                    len(self._pending) >= self.checkpoint_rows
+                    or self._pending_bytes >= self.checkpoint_bytes
+                    or time.monotonic() - self._last_checkpoint >= self.checkpoint_interval
+                ):
+                    self.flush()
         else:
             with self.lock:
-                self._execute('INSERT INTO webchanges VALUES (?, ?, ?)', (guid, snapshot.timestamp, msgpack_data))
+                self._execute(
+                    'INSERT INTO webchanges (uuid, timestamp, msgpack_data) VALUES (?, ?, ?)',
+                    (guid, snapshot.timestamp, msgpack_data),
+                )
                 self.db.commit()
 
+    def backup(self, history: bool = False) -> Iterator[tuple[str, str | bytes, float, int, str, str, ErrorData]]:
+        """Return the most recent entry for each 'guid', or all of its entries.
+
+        With history, the table is streamed in (uuid, timestamp) index order one page of 'restore_batch_size' rows at
+        a time (resuming after the last row read), so memory use is bounded and no connection is held between pages.
+
+        :param history: If true, return all the entries of each 'guid', oldest first, rather than the most recent one.
+
+        :returns: A generator of tuples, each consisting of (guid, data, timestamp, tries, etag, mime_type, error_data)
+        """
+        if not history:
+            yield from super().backup()
+            return
+
+        self.flush()
+        last: tuple[str, float, int] | None = None
+        while True:
+            with self._reader() as cur:
+                if last is None:
+                    rows = cur.execute(
+                        'SELECT uuid, timestamp, ROWID, msgpack_data FROM webchanges '
+                        'ORDER BY uuid, timestamp, ROWID LIMIT ?',
+                        (self.restore_batch_size,),
+                    ).fetchall()
+                else:
+                    rows = cur.execute(
+                        'SELECT uuid, timestamp, ROWID, msgpack_data FROM webchanges '
+                        'WHERE (uuid, timestamp, ROWID) > (?, ?, ?) ORDER BY uuid, timestamp, ROWID LIMIT ?',
+                        (*last, self.restore_batch_size),
+                    ).fetchall()
+            if not rows:
+                return
+            for guid, timestamp, _, msgpack_data in rows:
+                r = msgpack.unpackb(msgpack_data)
+                yield guid, r['d'], timestamp, r['t'], r['e'], r.get('m', ''), r.get('err', {})
+            last = rows[-1][:3]
+
+    def restore(self, entries: Iterable[tuple[str, str | bytes, float, int, str, str, ErrorData]]) -> None:
+        """Save multiple entries into the database, committing one transaction per 'restore_batch_size' entries.
+
+        :param entries: An iterator of tuples WHERE each consists of (guid, data, timestamp, tries, etag, mime_type,
+           error_data)
+        """
+        batch: list[tuple[str, float, bytes]] = []
+        for guid, data, timestamp, tries, etag, mime_type, error_data in entries:
+            c = {'d': data, 't': tries, 'e': etag, 'm': mime_type, 'err': error_data}
+            batch.append((guid, timestamp, msgpack.packb(c)))
+            if len(batch) >= self.restore_batch_size:
+                self._insert_batch(batch)
+                batch = []
+        if batch:
+            self._insert_batch(batch)
+
     def delete(self, guid: str) -> None:
         """Delete all entries matching a 'guid'.
 
@@ -313,23 +540,34 @@ class SsdbSQLite3Storage(SsdbStorage):
 
         :param guid: The guid.
         :param delete_entries: The number of most recent entries to delete.
-        :param temporary: If False, deleted from permanent database (default).
+        :param temporary: If True, delete only entries saved during this run (queued or already checkpointed);
+           otherwise, delete from all entries (default).
 
         :returns: Number of records deleted.
         """
         if temporary:
+            num_del = 0
             with self.temp_lock:
-                self._temp_execute(
-                    'DELETE FROM webchanges '
-                    'WHERE ROWID IN ( '
-                    '    SELECT ROWID FROM webchanges '
-                    '    WHERE uuid = ? '
-                    '    ORDER BY timestamp DESC '
-                    '    LIMIT ? '
-                    ')',
-                    (guid, delete_entries),
-                )
-                num_del: int = self._execute('SELECT changes()').fetchone()[0]
+                for i in range(len(self._pending) - 1, -1, -1):
+                    if num_del >= delete_entries:
+                        break
+                    if self._pending[i][0] == guid:
+                        self._pending_bytes -= len(self._pending.pop(i)[2])
+                        num_del += 1
+                if num_del < delete_entries and self.run_id is not None:
+                    with self.lock:
+                        self._execute(
+                            'DELETE FROM webchanges '
+                            'WHERE ROWID IN ( '
+                            '    SELECT ROWID FROM webchanges '
+                            '    WHERE uuid = ? AND run_id = ? '
+                            '    ORDER BY timestamp DESC '
+                            '    LIMIT ? '
+                            ')',
+                            (guid, self.run_id, delete_entries - num_del),
+                        )
+                        num_del += self._execute('SELECT changes()').fetchone()[0]
+                        self.db.commit()
         else:
             with self.lock:
                 self._execute(
@@ -382,7 +620,6 @@ class SsdbSQLite3Storage(SsdbStorage):
             )
             num_del: int = self._execute('SELECT changes()').fetchone()[0]
             self.db.commit()
-            self._execute('VACUUM')
         return num_del
 
     def move(self, guid: str, new_guid: str) -> int:
@@ -396,13 +633,9 @@ class SsdbSQLite3Storage(SsdbStorage):
         total_searched = 0
         if guid != new_guid:
             with self.lock:
-                self._execute(
-                    'UPDATE webchanges SET uuid = REPLACE(uuid, ?, ?)',
-                    (guid, new_guid),
-                )
+                self._execute('UPDATE webchanges SET uuid = ? WHERE uuid = ?', (new_guid, guid))
                 total_searched = self._execute('SELECT changes()').fetchone()[0]
                 self.db.commit()
-                self._execute('VACUUM')
 
         return total_searched
 
@@ -439,9 +672,34 @@ class SsdbSQLite3Storage(SsdbStorage):
                 )
             num_del: int = self._execute('SELECT changes()').fetchone()[0]
             self.db.commit()
-            self._execute('VACUUM')
         return num_del
 
+    def vacuum(self, mode: Literal['incremental', 'full'] = 'incremental') -> None:
+        """Reclaim the space freed by deleted snapshots.
+
+        Databases created by earlier versions without incremental auto-vacuum are converted with a one-time full
+        VACUUM.
+
+        :param mode: 'incremental' to release up to 'incremental_vacuum_pages' free pages, or 'full' to rebuild (and
+           therefore defragment) the whole database file.
+        """
+        with self.lock:
+            self.db.commit()
+            auto_vacuum = self._execute('PRAGMA auto_vacuum').fetchone()[0]
+            if mode == 'full' or auto_vacuum != 2:  # 2 is INCREMENTAL
+                if mode != 'full':
+                    logger.info('Converting sqlite3 database to incremental auto-vacuum with a one-time full VACUUM')
+                self._execute('PRAGMA auto_vacuum = INCREMENTAL')
+                self._execute('VACUUM')
+                return
+            free_pages = self._execute('PRAGMA freelist_count').fetchone()[0]
+            # The pragma frees one page per step, which only executescript() runs to completion
+            self.cur.executescript(f'PRAGMA incremental_vacuum({self.incremental_vacuum_pages});')
+            logger.debug(
+                f'Incremental vacuum released {free_pages - self._execute("PRAGMA freelist_count").fetchone()[0]} of '
+                f'{free_pages} free pages'
+            )
+
     def keep_latest(self, keep_entries: int = 1) -> int:
         """Delete all older entries keeping only the 'keep_num' per guid.
 
@@ -476,24 +734,57 @@ class SsdbSQLite3Storage(SsdbStorage):
 
         :returns: Number of records deleted (or to be deleted).
         """
-        command = 'SELECT COUNT(*)' if count else 'DELETE'
+        # Only the snapshots newer than timestamp are deleted; rather than scanning the whole table, a loose index scan
+        # of idx_uuid_time enumerates the guids (one index seek each) and each guid's newer entries are range-searched
+        guid_entries_after = (
+            'WITH RECURSIVE guids(uuid) AS ( '
+            '    SELECT MIN(uuid) FROM webchanges '
+            '    UNION ALL '
+            '    SELECT (SELECT MIN(uuid) FROM webchanges WHERE uuid > guids.uuid) FROM guids '
+            '    WHERE guids.uuid IS NOT NULL '
+            ') '
+            'SELECT webchanges.ROWID FROM guids '
+            'JOIN webchanges ON webchanges.uuid = guids.uuid AND webchanges.timestamp > ?'
+        )
         with self.lock:
+            if count:
+                return self._execute(
+                    f'SELECT COUNT(*) FROM ( {guid_entries_after} )',  # noqa: S608 Possible SQL injection
+                    (timestamp,),
+                ).fetchone()[0]
             self._execute(
-                f'{command} '  # noqa: S608 Possible SQL injection
-                'FROM webchanges '
-                'WHERE EXISTS ( '
-                '     SELECT 1 '
-                '     FROM webchanges AS w '
-                '     WHERE w.uuid = webchanges.uuid '
-                '     AND webchanges.timestamp > ? '
-                '     AND w.timestamp > ? '
-                ')',
-                (timestamp, timestamp),
+                f'DELETE FROM webchanges WHERE ROWID IN ( {guid_entries_after} )',  # noqa: S608 Possible SQL injection
+                (timestamp,),
             )
             num_del: int = self._execute('SELECT changes()').fetchone()[0]
             self.db.commit()
         return num_del
 
+    def rollback_run(self, run_id: int | None = None) -> int:
+        """Delete all snapshots saved by a run.
+
+        :param run_id: The run ID; if None, the current run (including any snapshots still queued).
+
+        :returns: Number of records deleted.
+        """
+        with self.temp_lock:
+            num_del = 0
+            if run_id is None:
+                num_del = len(self._pending)
+                self._pending = []
+                self._pending_bytes = 0
+                run_id = self.run_id
+                if run_id is None:
+                    return num_del
+            with self.lock:
+                self._execute('DELETE FROM webchanges WHERE run_id = ?', (run_id,))
+                num_del += self._execute('SELECT changes()').fetchone()[0]
+                self._execute('DELETE FROM runs WHERE run_id = ?', (run_id,))
+                self.db.commit()
+                if run_id == self.run_id:
+                    self.run_id = None
+        return num_del
+
     def migrate_from_minidb(self, minidb_filename: str | Path) -> None:
         """Migrate the data of a legacy minidb database to the current database.
 
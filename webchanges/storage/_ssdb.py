@@ -4,12 +4,15 @@
 
 from __future__ import annotations
 
+import json
 import logging
 import os
+import re
+import threading
 from abc import abstractmethod
 from datetime import datetime
 from pathlib import Path
-from typing import Any, Iterable, Iterator
+from typing import Any, Iterable, Iterator, Literal
 
 from webchanges.handler import ErrorData, Snapshot
 from webchanges.storage._base import BaseFileStorage
@@ -40,6 +43,20 @@ class SsdbStorage(BaseFileStorage):
     def get_history_snapshots(self, guid: str, count: int | None = None) -> list[Snapshot]:
         pass
 
+    def get_snapshot_at(self, guid: str, timestamp: float) -> Snapshot:
+        """Return the entry for a 'guid' that was the most recent one at 'timestamp'. Database engines that can do so
+        override this with an indexed lookup.
+
+        :param guid: The guid.
+        :param timestamp: The timestamp.
+
+        :returns: The Snapshot, or an empty one if no entry is as old as 'timestamp'.
+        """
+        for snapshot in self.get_history_snapshots(guid):
+            if snapshot.timestamp <= timestamp:
+                return snapshot
+        return Snapshot('', 0, 0, '', '', {})
+
     @abstractmethod
     def save(self, *args: Any, guid: str, snapshot: Snapshot, **kwargs: Any) -> None:
         pass
@@ -95,14 +112,20 @@ class SsdbStorage(BaseFileStorage):
         :raises: NotImplementedError for those classes where this method is not implemented.
         """
 
-    def backup(self) -> Iterator[tuple[str, str | bytes, float, int, str, str, ErrorData]]:
-        """Return the most recent entry for each 'guid'.
+    def backup(self, history: bool = False) -> Iterator[tuple[str, str | bytes, float, int, str, str, ErrorData]]:
+        """Return the most recent entry for each 'guid', or all of its entries.
+
+        :param history: If true, return all the entries of each 'guid', oldest first, rather than the most recent one.
 
-        :returns: A generator of tuples, each consisting of (guid, data, timestamp, tries, etag, mime_type)
+        :returns: A generator of tuples, each consisting of (guid, data, timestamp, tries, etag, mime_type, error_data)
         """
         for guid in self.get_guids():
-            data, timestamp, tries, etag, mime_type, error_data = self.load(guid)
-            yield guid, data, timestamp, tries, etag, mime_type, error_data
+            if history:
+                for data, timestamp, tries, etag, mime_type, error_data in reversed(self.get_history_snapshots(guid)):
+                    yield guid, data, timestamp, tries, etag, mime_type, error_data
+            else:
+                data, timestamp, tries, etag, mime_type, error_data = self.load(guid)
+                yield guid, data, timestamp, tries, etag, mime_type, error_data
 
     def restore(self, entries: Iterable[tuple[str, str | bytes, float, int, str, str, ErrorData]]) -> None:
         """Save multiple entries into the database.
@@ -115,26 +138,38 @@ class SsdbStorage(BaseFileStorage):
             )
             self.save(guid=guid, snapshot=new_snapshot, temporary=False)
 
-    def gc(self, known_guids: Iterable[str], keep_entries: int = 1) -> None:
+    def gc(
+        self,
+        known_guids: Iterable[str],
+        keep_entries: int = 1,
+        vacuum: Literal['incremental', 'full'] = 'incremental',
+    ) -> None:
         """Garbage collect the database: delete all guids not included in known_guids and keep only last n snapshot for
         the others.
 
         :param known_guids: The guids to keep.
         :param keep_entries: Number of entries to keep after deletion for the guids to keep.
+        :param vacuum: The vacuum mode used once all deletions are done (see vacuum()).
         """
         for guid in set(self.get_guids()) - set(known_guids):
             print(f'Deleting job {guid} (no longer being tracked).')
             self.delete(guid)
-        self.clean_ssdb(known_guids, keep_entries)
-
-    def clean_ssdb(self, known_guids: Iterable[str], keep_entries: int = 1) -> None:
+        self.clean_ssdb(known_guids, keep_entries, vacuum)
+
+    def clean_ssdb(
+        self,
+        known_guids: Iterable[str],
+        keep_entries: int = 1,
+        vacuum: Literal['incremental', 'full'] = 'incremental',
+    ) -> None:
         """Convenience function to clean the cache.
 
         If self.clean_all is present, runs clean_all(). Otherwise, runs clean() on all known_guids, one at a time.
-        Prints the number of snapshots deleted.
+        Prints the number of snapshots deleted and vacuums the database once at the end.
 
         :param known_guids: An iterable of guids
         :param keep_entries: Number of entries to keep after deletion.
+        :param vacuum: The vacuum mode (see vacuum()).
         """
         if hasattr(self, 'clean_all'):
             count = self.clean_all(keep_entries)  # ty:ignore[call-non-callable]
@@ -145,6 +180,15 @@ class SsdbStorage(BaseFileStorage):
                 count = self.clean(guid, keep_entries)
                 if count:
                     print(f'Deleted {count} old snapshots of {guid}.')
+        self.vacuum(vacuum)
+
+    def vacuum(self, mode: Literal['incremental', 'full'] = 'incremental') -> None:
+        """Reclaim the space freed by deleted snapshots. Called once after maintenance operations; does nothing unless
+        implemented by the database engine.
+
+        :param mode: 'incremental' to release a bounded amount of free space cheaply, or 'full' to rebuild (and
+           therefore defragment) the whole database.
+        """
 
     @abstractmethod
     def flushdb(self) -> None:
@@ -152,92 +196,255 @@ class SsdbStorage(BaseFileStorage):
 
 
 class SsdbDirStorage(SsdbStorage):
-    """Class for snapshots stored as individual textual files in a directory 'dirname'."""
-
-    def __init__(self, dirname: str | Path) -> None:
+    """Class for snapshots stored as individual textual files in a directory 'dirname'.
+
+    The snapshots of a 'guid' (a hash) are saved in the two-level sharded directory '<guid[:2]>/<guid[2:4]>/' as
+    files named '<guid>.<n>', where 'n' increases with each snapshot saved, and up to 'max_snapshots' of them are
+    kept. Files are written to a temporary file that then replaces the target, so a crash never leaves a truncated
+    snapshot behind, and the files of deleted snapshots are only removed once the index no longer listing them has
+    been written, so that the index on disk never lists a missing file. The index file '.index.json' lists for each guid its snapshots (most recent first) with their
+    timestamp, tries, ETag, media type and error data, so that 'get_guids()' and 'load()' need neither a directory
+    scan nor a 'stat' call; it is rewritten (atomically, and flushed to disk) by 'flush()' and 'close()'. If the index
+    is missing, it is rebuilt from the files, and the flat files '<guid>' of earlier versions are moved into their
+    shard.
+    """
+
+    index_name = '.index.json'
+    index_version = 1
+    _legacy_guid = re.compile(r'[0-9a-f]{40}')
+    _snapshot_file = re.compile(r'(.+)\.(\d+)')
+
+    def __init__(self, dirname: str | Path, max_snapshots: int = 4) -> None:
+        """:param dirname: The directory where the snapshots are stored.
+        :param max_snapshots: The maximum number of snapshots to retain for each 'guid' (0 for unlimited).
+        """
         super().__init__(dirname)
         self.filename.mkdir(parents=True, exist_ok=True)  # using the attr filename because it is a Path (confusing!)
+        self.max_snapshots = max_snapshots
+        self.lock = threading.RLock()
+        self._dirty = False
+        self._unlinks: set[Path] = set()  # the files of deleted snapshots, removed by flush() once the index is written
+        # guid -> list of [n, timestamp, tries, etag, mime_type, is_bytes, error_data], most recent first
+        self._index: dict[str, list[list[Any]]] = self._load_index()
         logger.info(f'Using directory {self.filename} to store snapshot data as individual text files')
 
-    def close(self) -> None:
-        # Nothing to close
-        return
+    def _get_filename(self, guid: str, n: int) -> Path:
+        return self.filename.joinpath(guid[:2], guid[2:4], f'{guid}.{n}')  # filename is a dir (confusing!)
 
-    def _get_filename(self, guid: str) -> Path:
-        return self.filename.joinpath(guid)  # filename is a dir (confusing!)
+    @staticmethod
+    def _write_atomic(path: Path, data: str | bytes, mtime: float | None = None, fsync: bool = False) -> None:
+        """Write 'data' to a temporary file in the same directory and then rename it to 'path'.
 
-    def get_guids(self) -> list[str]:
-        return [filename.name for filename in self.filename.iterdir()]
-
-    def load(self, guid: str) -> Snapshot:
-        filename = self._get_filename(guid)
-        if not filename.is_file():
+        :param path: The path of the file.
+        :param data: The data.
+        :param mtime: The modification time to set, if any.
+        :param fsync: Whether to flush the file, and then its directory, to disk, so that the new file survives a power
+           loss (as the index must match the snapshot files).
+        """
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(f'{path.name}.{os.getpid()}.{threading.get_ident()}.tmp')
+        with tmp_path.open('wb' if isinstance(data, bytes) else 'w') as f:
+            f.write(data)
+            if fsync:
+                f.flush()
+                os.fsync(f.fileno())
+        if mtime is not None:
+            os.utime(tmp_path, times=(datetime.now().timestamp(), mtime))  # noqa: DTZ005
+        os.replace(tmp_path, path)
+        if fsync and os.name != 'nt':  # directories cannot be opened on Windows
+            dir_fd = os.open(path.parent, os.O_RDONLY)
+            try:
+                os.fsync(dir_fd)
+            finally:
+                os.close(dir_fd)
+
+    def _load_index(self) -> dict[str, list[list[Any]]]:
+        try:
+            index = json.loads(self.filename.joinpath(self.index_name).read_text())
+            if index.get('version') == self.index_version:
+                return index['guids']
+            logger.warning(f'Ignoring index file of unknown version {index.get("version")} in {self.filename}')
+        except FileNotFoundError:
+            pass
+        except (ValueError, AttributeError, KeyError) as e:
+            logger.warning(f'Ignoring corrupt index file in {self.filename}: {e}')
+        return self._rebuild_index()
+
+    def _rebuild_index(self) -> dict[str, list[list[Any]]]:
+        """Rebuild the index from the snapshot files (timestamps are taken from their modification times), moving any
+        flat files saved by earlier versions into their shard.
+        """
+        index: dict[str, list[list[Any]]] = {}
+        for entry in os.scandir(self.filename):
+            if entry.is_file() and self._legacy_guid.fullmatch(entry.name):
+                mtime = entry.stat().st_mtime
+                new_path = self._get_filename(entry.name, 1)
+                new_path.parent.mkdir(parents=True, exist_ok=True)
+                os.replace(entry.path, new_path)
+                index[entry.name] = [[1, mtime, 0, '', '', False, {}]]
+            elif entry.is_dir() and len(entry.name) == 2:
+                for path in Path(entry.path).glob('*/*'):
+                    match = self._snapshot_file.fullmatch(path.name)
+                    if match and path.is_file():
+                        guid, n = match.group(1), int(match.group(2))
+                        index.setdefault(guid, []).append([n, path.stat().st_mtime, 0, '', '', False, {}])
+        for versions in index.values():
+            versions.sort(reverse=True)
+        if index:
+            logger.info(f'Rebuilt the index of the {len(index)} jobs with snapshots in {self.filename}')
+            self._dirty = True
+        return index
+
+    def _delete_versions(self, guid: str, versions: Iterable[list[Any]]) -> int:
+        """Schedule the removal of the files of versions deleted from the index (see flush())."""
+        num_del = 0
+        for version in versions:
+            self._unlinks.add(self._get_filename(guid, version[0]))
+            num_del += 1
+        return num_del
+
+    def _read(self, guid: str, version: list[Any]) -> Snapshot:
+        n, timestamp, tries, etag, mime_type, is_bytes, error_data = version
+        filename = self._get_filename(guid, n)
+        try:
+            if is_bytes:
+                data: str | bytes = filename.read_bytes()
+            else:
+                try:
+                    data = filename.read_text()
+                except UnicodeDecodeError:
+                    data = filename.read_text(errors='ignore')
+                    logger.warning(f'Found and ignored Unicode-related errors when retrieving saved snapshot {guid}')
+        except FileNotFoundError:
+            logger.warning(f'Snapshot file {filename} listed in the index is missing')
             return Snapshot('', 0, 0, '', '', {})
+        return Snapshot(data, timestamp, tries, etag, mime_type, error_data)
+
+    def flush(self) -> None:
+        """Write the index file if it has changed, and then remove the files of the snapshots deleted."""
+        with self.lock:
+            if self._dirty:
+                index = {'version': self.index_version, 'guids': self._index}
+                self._write_atomic(
+                    self.filename.joinpath(self.index_name), json.dumps(index, separators=(',', ':')), fsync=True
+                )
+                self._dirty = False
+            for path in self._unlinks:
+                path.unlink(missing_ok=True)
+            self._unlinks.clear()
 
-        try:
-            data = filename.read_text()
-        except UnicodeDecodeError:
-            data = filename.read_text(errors='ignore')
-            logger.warning(f'Found and ignored Unicode-related errors when retrieving saved snapshot {guid}')
+    def close(self) -> None:
+        self.flush()
 
-        timestamp = filename.stat().st_mtime
+    def get_guids(self) -> list[str]:
+        with self.lock:
+            return list(self._index)
 
-        return Snapshot(data, timestamp, 0, '', '', {})
+    def load(self, guid: str) -> Snapshot:
+        with self.lock:
+            versions = self._index.get(guid)
+            version = versions[0] if versions else None
+        if version is None:
+            return Snapshot('', 0, 0, '', '', {})
+        return self._read(guid, version)
 
     def get_history_data(self, guid: str, count: int | None = None) -> dict[str | bytes, float]:
         if count is not None and count < 1:
             return {}
-        snapshot = self.load(guid)
-        return {snapshot.data: snapshot.timestamp} if snapshot.data and snapshot.timestamp else {}
+        with self.lock:
+            versions = list(self._index.get(guid, []))
+        history: dict[str | bytes, float] = {}
+        for version in versions:
+            if not version[2]:  # tries
+                snapshot = self._read(guid, version)
+                if snapshot.timestamp and snapshot.data not in history:
+                    history[snapshot.data] = snapshot.timestamp
+                    if count is not None and len(history) >= count:
+                        break
+        return history
 
     def get_history_snapshots(self, guid: str, count: int | None = None) -> list[Snapshot]:
         if count is not None and count < 1:
             return []
-        snapshot = self.load(guid)
-        return [snapshot] if snapshot.data and snapshot.timestamp else []
+        with self.lock:
+            versions = list(self._index.get(guid, []))
+        history = [self._read(guid, version) for version in versions[:count]]
+        return [snapshot for snapshot in history if snapshot.timestamp]
+
+    def backup(self, history: bool = False) -> Iterator[tuple[str, str | bytes, float, int, str, str, ErrorData]]:
+        if not history:
+            yield from super().backup()
+            return
+        # all the entries listed in the index, including those without a timestamp (which get_history_snapshots()
+        # skips), except those whose file is missing
+        with self.lock:
+            index = {guid: list(versions) for guid, versions in self._index.items()}
+        for guid, versions in index.items():
+            for version in reversed(versions):
+                if self._get_filename(guid, version[0]).is_file():
+                    data, timestamp, tries, etag, mime_type, error_data = self._read(guid, version)
+                    yield guid, data, timestamp, tries, etag, mime_type, error_data
 
     def save(self, *args: Any, guid: str, snapshot: Snapshot, **kwargs: Any) -> None:
-        # ETag and mime_type are ignored
-        filename = self._get_filename(guid)
-        with filename.open('w+') as fp:
-            fp.write(str(snapshot.data))
-        os.utime(filename, times=(datetime.now().timestamp(), snapshot.timestamp))  # noqa: DTZ005
+        with self.lock:
+            versions = self._index.get(guid, [])
+            n = versions[0][0] + 1 if versions else 1
+            while self._get_filename(guid, n) in self._unlinks:  # a deleted snapshot still listed in the index on disk
+                n += 1
+        is_bytes = isinstance(snapshot.data, bytes)
+        self._write_atomic(self._get_filename(guid, n), snapshot.data, snapshot.timestamp)
+        version = [n, snapshot.timestamp, snapshot.tries, snapshot.etag, snapshot.mime_type, is_bytes]
+        with self.lock:
+            versions = self._index.setdefault(guid, [])
+            versions.insert(0, [*version, snapshot.error_data])
+            if self.max_snapshots and len(versions) > self.max_snapshots:
+                self._delete_versions(guid, versions[self.max_snapshots :])
+                del versions[self.max_snapshots :]
+            self._dirty = True
 
     def delete(self, guid: str) -> None:
-        filename = self._get_filename(guid)
-        filename.unlink(missing_ok=True)
+        with self.lock:
+            self._delete_versions(guid, self._index.pop(guid, []))
+            self._dirty = True
 
     def delete_latest(self, guid: str, delete_entries: int = 1, **kwargs: Any) -> int:
-        """For the given 'guid', delete the latest entry and keep all other (older) ones.
+        """For the given 'guid', delete only the latest 'delete_entries' entries and keep all other (older) ones.
 
         :param guid: The guid.
         :param delete_entries: The number of most recent entries to delete.
 
-        :raises NotImplementedError: This function is not implemented for 'textfiles' databases.
+        :returns: Number of records deleted.
         """
-        raise NotImplementedError(
-            "Deleting of latest snapshot not supported by 'textfiles' database engine since only one snapshot is "
-            "saved. Delete all snapshots if that's what you are trying to do."
-        )
+        with self.lock:
+            versions = self._index.get(guid, [])
+            num_del = self._delete_versions(guid, versions[:delete_entries])
+            del versions[:delete_entries]
+            if not versions:
+                self._index.pop(guid, None)
+            self._dirty = True
+        return num_del
 
     def delete_all(self) -> int:
         """Delete all entries; used for testing only.
 
-        :raises NotImplementedError: This function is not implemented for 'textfiles' databases.
+        :returns: Number of records deleted.
         """
-        raise NotImplementedError(
-            "Deleting of latest snapshot not supported by 'textfiles' database engine since only one snapshot is "
-            "saved. Delete all snapshots if that's what you are trying to do."
-        )
+        with self.lock:
+            num_del = sum(self._delete_versions(guid, versions) for guid, versions in self._index.items())
+            self._index = {}
+            self._dirty = True
+        return num_del
 
     def clean(self, guid: str, keep_entries: int = 1) -> int:
-        if keep_entries != 1:
-            raise NotImplementedError('Only keeping latest 1 entry is supported.')
-        # We only store the latest version, no need to clean
-        return 0
+        with self.lock:
+            versions = self._index.get(guid, [])
+            num_del = self._delete_versions(guid, versions[keep_entries:])
+            del versions[keep_entries:]
+            self._dirty = True
+        return num_del
 
     def move(self, guid: str, new_guid: str) -> int:
-        """Moves the data from guid to new_guid.
+        """Moves the snapshots of guid to new_guid, merging them with any already saved for new_guid.
 
         :param guid: The guid.
         :param new_guid: The new guid.
@@ -246,19 +453,51 @@ class SsdbDirStorage(SsdbStorage):
         """
         if guid == new_guid:
             return 0
-        old_filepath = Path(self._get_filename(guid))
-        new_filepath = Path(self._get_filename(new_guid))
-        if old_filepath.exists():
-            new_filepath.parent.mkdir(parents=True, exist_ok=True)
-            old_filepath.rename(new_filepath)
-        else:
-            raise ValueError(f'Old snapshot file {old_filepath} does not exist')
-        return 1
+        with self.lock:
+            versions = self._index.pop(guid, None)
+            if not versions:
+                raise ValueError(f'No snapshot files of {guid} exist in {self.filename}')
+            existing = self._index.get(new_guid, [])
+            n = existing[0][0] if existing else 0
+            merged = sorted(
+                [(version, guid) for version in versions] + [(version, new_guid) for version in existing],
+                key=lambda item: item[0][1],  # timestamp
+            )
+            new_versions = []
+            for version, old_guid in merged:
+                n += 1
+                while self._get_filename(new_guid, n) in self._unlinks:
+                    n += 1
+                new_path = self._get_filename(new_guid, n)
+                new_path.parent.mkdir(parents=True, exist_ok=True)
+                os.replace(self._get_filename(old_guid, version[0]), new_path)
+                new_versions.insert(0, [n, *version[1:]])
+            self._index[new_guid] = new_versions
+            self._dirty = True
+        return len(versions)
+
+    def rollback(self, timestamp: float, count: bool = False) -> int:
+        """Rolls back the database to timestamp.
+
+        :param timestamp: The timestamp.
+        :param count: If set to true, only count the number that would be deleted without doing so.
 
-    def rollback(self, timestamp: float) -> None:
-        raise NotImplementedError("'textfiles' databases cannot be rolled back as new snapshots overwrite old ones")
+        :returns: Number of records deleted (or to be deleted).
+        """
+        num_del = 0
+        with self.lock:
+            for guid, versions in list(self._index.items()):
+                newer = [version for version in versions if version[1] > timestamp]
+                num_del += len(newer)
+                if newer and not count:
+                    self._delete_versions(guid, newer)
+                    if len(newer) == len(versions):
+                        del self._index[guid]
+                    else:
+                        del versions[: len(newer)]
+                    self._dirty = True
+        return num_del
 
     def flushdb(self) -> None:
-        for file in self.filename.iterdir():
-            if file.is_file():
-                file.unlink()
+        self.delete_all()
+        self.flush()
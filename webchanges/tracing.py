@@ -0,0 +1,211 @@
+"""Tracing of a run: spans of the run, of its jobs and their stages, and of the reporters, exported in the JSON
+encoding of the OpenTelemetry protocol (OTLP) so that they can be examined with tools such as Jaeger."""
+
+# The code below is subject to the license contained in the LICENSE.md file, which is part of the source code.
+
+from __future__ import annotations
+
+import contextlib
+import json
+import logging
+import os
+import threading
+import time
+from contextvars import ContextVar
+from typing import TYPE_CHECKING, Any, Iterator
+
+from webchanges import __project_name__, __version__
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+try:
+    import httpx
+except ImportError:  # pragma: no cover
+    httpx = None  # ty:ignore[invalid-assignment]
+
+logger = logging.getLogger(__name__)
+
+# The span of the current context (e.g. the reporter running), parent of the spans started without one
+_current_span: ContextVar[Span | None] = ContextVar('current_span', default=None)
+
+
+def current_span() -> Span | None:
+    """Returns the span of the current context (see Tracer.span()), if any."""
+    return _current_span.get()
+
+
+class Span:
+    """An operation of the run, from its start to its end (in nanoseconds since the epoch)."""
+
+    __slots__ = ('attributes', 'end_time', 'error', 'name', 'parent', 'span_id', 'start_time')
+
+    def __init__(
+        self, name: str, parent: Span | None, attributes: dict[str, Any] | None = None, start_time: int | None = None
+    ) -> None:
+        """:param name: The name of the span.
+        :param parent: The parent span, or None for the root span of the run.
+        :param attributes: The attributes of the span (str, bool, int or float values).
+        :param start_time: The start of the span in nanoseconds since the epoch (default: now).
+        """
+        self.name = name
+        self.parent = parent
+        self.attributes = attributes or {}
+        self.span_id = os.urandom(8).hex()
+        self.start_time = time.time_ns() if start_time is None else start_time
+        self.end_time: int | None = None
+        self.error: str | None = None
+
+    def end(self) -> None:
+        """Ends the span now."""
+        self.end_time = time.time_ns()
+
+    def otlp(self, trace_id: str) -> dict[str, Any]:
+        """Returns the span in the JSON encoding of OTLP.
+
+        :param trace_id: The id of the trace.
+        :returns: The span.
+        """
+        span: dict[str, Any] = {
+            'traceId': trace_id,
+            'spanId': self.span_id,
+            'name': self.name,
+            'kind': 1,  # SPAN_KIND_INTERNAL
+            'startTimeUnixNano': str(self.start_time),
+            'endTimeUnixNano': str(self.end_time or time.time_ns()),
+            'attributes': otlp_attributes(self.attributes),
+        }
+        if self.parent is not None:
+            span['parentSpanId'] = self.parent.span_id
+        if self.error is not None:
+            span['status'] = {'code': 2, 'message': self.error}  # STATUS_CODE_ERROR
+        return span
+
+
+def otlp_attributes(attributes: dict[str, Any]) -> list[dict[str, Any]]:
+    """Returns attributes in the JSON encoding of OTLP.
+
+    :param attributes: The attributes (str, bool, int or float values; others are converted to str).
+    :returns: The list of key-values.
+    """
+    key_values = []
+    for key, value in attributes.items():
+        if isinstance(value, bool):
+            any_value: dict[str, Any] = {'boolValue': value}
+        elif isinstance(value, int):
+            any_value = {'intValue': str(value)}
+        elif isinstance(value, float):
+            any_value = {'doubleValue': value}
+        else:
+            any_value = {'stringValue': str(value)}
+        key_values.append({'key': key, 'value': any_value})
+    return key_values
+
+
+class Tracer:
+    """Collects the spans of a run, under a root span started with the tracer and ended by finish().
+
+    Spans are started with span(), which makes the span the parent of those started within its context (e.g. the diffs
+    generated by a reporter), or with start_span() and explicit parents (e.g. the stages of jobs, see JobState.timed()),
+    as the jobs run in their own threads.
+    """
+
+    def __init__(self) -> None:
+        self.trace_id = os.urandom(16).hex()
+        self.root = Span('run', None)
+        self.spans: list[Span] = [self.root]
+        self.lock = threading.Lock()
+
+    def start_span(
+        self, name: str, parent: Span | None, attributes: dict[str, Any] | None = None, start_time: int | None = None
+    ) -> Span:
+        """Starts a span, to be ended with Span.end().
+
+        :param name: The name of the span.
+        :param parent: The parent span; if None, the span of the current context, if any, else the root span.
+        :param attributes: The attributes of the span.
+        :param start_time: The start of the span in nanoseconds since the epoch (default: now).
+        :returns: The span.
+        """
+        if parent is None:
+            parent = _current_span.get() or self.root
+        span = Span(name, parent, attributes, start_time)
+        with self.lock:
+            self.spans.append(span)
+        return span
+
+    @contextlib.contextmanager
+    def span(self, name: str, attributes: dict[str, Any] | None = None) -> Iterator[Span]:
+        """Context manager of a span that is the span of the current context for the duration of its body.
+
+        :param name: The name of the span.
+        :param attributes: The attributes of the span.
+        :returns: The span.
+        """
+        span = self.start_span(name, None, attributes)
+        token = _current_span.set(span)
+        try:
+            yield span
+        except BaseException as e:
+            span.error = f'{type(e).__name__}: {e}'
+            raise
+        finally:
+            _current_span.reset(token)
+            span.end()
+
+    def adopt(self, spans: list[Span], parent: Span) -> None:
+        """Adds the spans recorded by the Tracer of another process (e.g. one applying filters, see
+        filter_in_process()), those that were children of its root span becoming children of 'parent'.
+
+        :param spans: The spans, without the root span of the other Tracer.
+        :param parent: The new parent of the children of the root span of the other Tracer.
+        """
+        for span in spans:
+            if span.parent is not None and span.parent.parent is None:
+                span.parent = parent
+        with self.lock:
+            self.spans.extend(spans)
+
+    def finish(self) -> None:
+        """Ends the root span of the run."""
+        self.root.end()
+
+    def otlp(self) -> dict[str, Any]:
+        """Returns the trace in the JSON encoding of OTLP (an ExportTraceServiceRequest).
+
+        :returns: A JSON-serializable dict.
+        """
+        with self.lock:
+            spans = [span.otlp(self.trace_id) for span in self.spans]
+        resource = {'service.name': __project_name__, 'service.version': __version__}
+        return {
+            'resourceSpans': [
+                {
+                    'resource': {'attributes': otlp_attributes(resource)},
+                    'scopeSpans': [{'scope': {'name': __project_name__, 'version': __version__}, 'spans': spans}],
+                }
+            ]
+        }
+
+    def write(self, filename: Path) -> None:
+        """Writes the trace to a file as OTLP JSON.
+
+        :param filename: The path of the file.
+        """
+        filename.write_text(json.dumps(self.otlp(), separators=(',', ':')))
+        logger.info(f'Wrote the trace of the run ({len(self.spans)} spans) to {filename}')
+
+    def export(self, endpoint: str, timeout: float = 10) -> None:
+        """Sends the trace to an OTLP/HTTP endpoint as JSON, e.g. http://localhost:4318/v1/traces for an
+        OpenTelemetry Collector or Jaeger running locally.
+
+        :param endpoint: The URL of the endpoint.
+        :param timeout: The timeout in seconds.
+        :raises ImportError: If httpx is not installed.
+        :raises httpx.HTTPError: If the trace could not be sent.
+        """
+        if httpx is None:
+            raise ImportError("Python package 'httpx' cannot be imported; cannot send the trace to an OTLP endpoint.")
+        response = httpx.post(endpoint, json=self.otlp(), timeout=timeout)
+        response.raise_for_status()
+        logger.info(f'Sent the trace of the run ({len(self.spans)} spans) to {endpoint}')
@@ -6,6 +6,7 @@ from __future__ import annotations
 import getpass
 import importlib.machinery
 import importlib.util
+import json
 import logging
 import os
 import re
@@ -13,10 +14,11 @@ import shlex
 import stat
 import subprocess
 import sys
+import sysconfig
 import textwrap
 from math import floor, log10
 from os import PathLike
-from typing import TYPE_CHECKING, Any, Callable, Iterable, Match
+from typing import TYPE_CHECKING, Any, Callable, Iterable, Literal, Match
 
 from markdown2 import Markdown
 
@@ -38,6 +40,11 @@ if httpx is not None:
     except ImportError:  # pragma: no cover
         h2 = None  # ty:ignore[invalid-assignment]
 
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None  # ty:ignore[invalid-assignment]
+
 try:
     from packaging.version import parse as parse_version
 except ImportError:  # pragma: no cover
@@ -65,7 +72,11 @@ def lazy_import(fullname: str) -> ModuleType | None:
 
 
 class TrackSubClasses(type):
-    """A metaclass that stores subclass name-to-class mappings in the base class."""
+    """A metaclass that stores subclass name-to-class mappings in the base class.
+
+    A base class can also keep its own index of its subclasses in a '__subclass_index__' attribute, an object whose
+    add() method is called with every new subclass (see e.g. FilterBase).
+    """
 
     # __subclasses__ gets redefined from default "Callable[[_TT], list[_TT]]
     __subclasses__: dict[str, TrackSubClasses]
@@ -137,6 +148,12 @@ class TrackSubClasses(type):
 
         super().__init__(name, bases, namespace, **kwargs)
 
+        for base in cls.__mro__[1:]:
+            subclass_index = base.__dict__.get('__subclass_index__')
+            if subclass_index is not None:
+                subclass_index.add(cls)
+                break
+
 
 def edit_file(filename: str | bytes | PathLike) -> None:
     """Opens the editor to edit a file.
@@ -374,6 +391,44 @@ def dur_text(duration: float) -> str:
     return f'{m:.0f}:{s:02.0f}'
 
 
+# maps the digits to '0' and the other bytes, except the decimal point, to ' ' (see json_loads())
+_DIGIT_RUNS = bytes(0x30 if 0x30 <= i <= 0x39 else i if i == 0x2E else 0x20 for i in range(256))
+
+
+def json_loads(data: str | bytes) -> Any:  # noqa: ANN401 Dynamically typed expressions Any are disallowed
+    """Deserializes JSON data like json.loads(), but faster with orjson if it is installed.
+
+    orjson is only used when its result is the same: not when the data has an integer of 19 or more digits (which
+    orjson converts to a float if it does not fit in 64 bits), and json.loads() is called when orjson rejects the data
+    (e.g. NaN, lone surrogates or encodings other than UTF-8) so that the same exception is raised.
+
+    :param data: The JSON data.
+    :returns: The deserialized data.
+    :raises json.JSONDecodeError: If the data is not valid JSON.
+    """
+    if orjson is not None:
+        try:
+            utf8 = data.encode() if isinstance(data, str) else data
+            if b' ' + b'0' * 19 not in b' ' + utf8.translate(_DIGIT_RUNS):
+                return orjson.loads(utf8)
+        except (UnicodeEncodeError, orjson.JSONDecodeError):
+            pass
+    return json.loads(data)
+
+
+def gil_status() -> Literal['enabled', 'disabled', 're-enabled']:
+    """Returns whether the global interpreter lock (GIL) is in effect, i.e. whether threads (e.g. those running jobs and
+    their filters) can execute Python code in parallel.
+
+    :returns: 'enabled' in a standard build of Python, 'disabled' in a free-threaded one (e.g. python3.14t), or
+       're-enabled' in a free-threaded build in which the GIL was enabled again (by the PYTHON_GIL=1 environment
+       variable or the import of an extension module that does not support running without it).
+    """
+    if sysconfig.get_config_var('Py_GIL_DISABLED') != 1:
+        return 'enabled'
+    return 're-enabled' if sys._is_gil_enabled() else 'disabled'  # ty:ignore[unresolved-attribute]
+
+
 def file_ownership_checks(filename: Path) -> list[str]:
     """Check security of file and its directory.
 
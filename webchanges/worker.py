@@ -6,16 +6,18 @@ from __future__ import annotations
 
 import gc
 import logging
+import multiprocessing
 import os
 import random
 import urllib.parse
-from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
 from contextlib import ExitStack
 from typing import TYPE_CHECKING, Iterable
 
 from webchanges.command import UrlwatchCommand
 from webchanges.handler import JobState
-from webchanges.jobs import NotModifiedError, TransientHTTPError
+from webchanges.jobs import NotModifiedError, ShellJob, TransientHTTPError
+from webchanges.util import gil_status
 
 try:
     import psutil
@@ -24,12 +26,47 @@ except ImportError as e:  # pragma: no cover
 
 # https://stackoverflow.com/questions/39740632
 if TYPE_CHECKING:
+    from concurrent.futures import Future
+    from pathlib import Path
+
     from webchanges.jobs import JobBase
     from webchanges.main import Urlwatch
 
 logger = logging.getLogger(__name__)
 
 
+def load_hooks_files(hooks_files: list[Path]) -> None:
+    """Initializer of the processes applying filters (see run_jobs()), which are started afresh: import the hooks
+    files, so that the filters and jobs they define are available.
+
+    :param hooks_files: The hooks files.
+    """
+    from webchanges.cli import load_hooks
+
+    for hooks_file in hooks_files:
+        load_hooks(hooks_file)
+
+
+def filter_executor(urlwatcher: Urlwatch) -> Executor | None:
+    """Return the pool of processes in which to apply the filters of jobs, if requested with --filter-processes.
+
+    The processes are spawned (rather than forked from this multithreaded process) and import the hooks files.
+
+    :param urlwatcher: The :py:class:`Urlwatch` orchestrator.
+    :returns: The ProcessPoolExecutor, or None to apply the filters in the threads running the jobs.
+    """
+    processes = getattr(urlwatcher.urlwatch_config, 'filter_processes', None)
+    if not processes:
+        return None
+    logger.debug(f'Applying filters in {processes} processes')
+    return ProcessPoolExecutor(
+        max_workers=processes,
+        mp_context=multiprocessing.get_context('spawn'),
+        initializer=load_hooks_files,
+        initargs=(urlwatcher.urlwatch_config.hooks_files,),
+    )
+
+
 def run_jobs(urlwatcher: Urlwatch, read_only: bool = False) -> None:
     """Process (run) jobs in parallel.
 
@@ -73,25 +110,51 @@ def run_jobs(urlwatcher: Urlwatch, read_only: bool = False) -> None:
         stack: ExitStack,
         jobs: Iterable[JobBase],
         max_workers: int | None = None,
+        processes: Executor | None = None,
+        command_workers: int | None = None,
     ) -> None:
         """Runs the jobs in parallel.
 
         :param stack: The context manager.
         :param jobs: The jobs to run.
         :param max_workers: The number of maximum workers for ThreadPoolExecutor.
+        :param processes: The pool of processes in which to apply the filters (see filter_executor()), if any.
+        :param command_workers: The number of maximum workers for the ThreadPoolExecutor running command jobs (so that
+           they don't take the threads of the other jobs); defaults to the number of CPUs.
         :return: None
         """
         executor = ThreadPoolExecutor(max_workers=max_workers)
+        command_executor: ThreadPoolExecutor | None = None
+        filter_cache = urlwatcher.filter_cache
+        profile = urlwatcher.report.timings is not None
+        tracer = urlwatcher.report.tracer
 
         # launch future to retrieve if new version is available
         if urlwatcher.report.new_release_future is None:
             urlwatcher.report.new_release_future = executor.submit(urlwatcher.get_new_release_version)
 
+        futures: list[Future[JobState]] = []
+        for job in jobs:
+            job_executor = executor
+            if isinstance(job, ShellJob):
+                if command_executor is None:
+                    command_executor = stack.enter_context(
+                        ThreadPoolExecutor(max_workers=command_workers or os.cpu_count(), thread_name_prefix='command')
+                    )
+                job_executor = command_executor
+            futures.append(
+                job_executor.submit(
+                    stack.enter_context(
+                        JobState(urlwatcher.ssdb_storage, job, filter_cache, processes, profile, tracer)
+                    ).process,
+                    headless=not urlwatcher.urlwatch_config.no_headless,
+                )
+            )
+
         job_state: JobState
-        for job_state in executor.map(
-            lambda jobstate: jobstate.process(headless=not urlwatcher.urlwatch_config.no_headless),
-            (stack.enter_context(JobState(urlwatcher.ssdb_storage, job)) for job in jobs),
-        ):
+        for job_state in (future.result() for future in futures):
+            if profile:
+                urlwatcher.report.profiled_job_states.append(job_state)
             max_tries = 0 if not job_state.job.max_tries else job_state.job.max_tries
             # tries is incremented by JobState.process when an exception (including 304) is encountered.
 
@@ -187,7 +250,19 @@ def run_jobs(urlwatcher: Urlwatch, read_only: bool = False) -> None:
 
     jobs = insert_delay(jobs)
 
+    gil = gil_status()
+    logger.debug(f'Global interpreter lock (GIL) {gil}')
+    if gil == 're-enabled':
+        logger.warning(
+            'Running on free-threaded Python but the GIL was re-enabled (e.g. by an extension module not supporting '
+            'free threading), so filters of different jobs will not run in parallel; set the environment variable '
+            'PYTHON_GIL=0 to keep it disabled'
+        )
+
     with ExitStack() as stack:  # This code is also present in command.list_error_jobs (change there too!)
+        processes = filter_executor(urlwatcher)
+        if processes is not None:
+            stack.enter_context(processes)
         # run non-BrowserJob jobs first
         jobs_to_run = [job for job in jobs if not job.__is_browser__]
         if jobs_to_run:
@@ -195,7 +270,13 @@ def run_jobs(urlwatcher: Urlwatch, read_only: bool = False) -> None:
                 "Running jobs that do not require Chrome (without 'use_browser: true') in parallel with Python's "
                 'default max_workers.'
             )
-            job_runner(stack, jobs_to_run, urlwatcher.urlwatch_config.max_workers)
+            job_runner(
+                stack,
+                jobs_to_run,
+                urlwatcher.urlwatch_config.max_workers,
+                processes,
+                getattr(urlwatcher.urlwatch_config, 'command_workers', None),
+            )
         else:
             logger.debug("Found no jobs that do not require Chrome (i.e. without 'use_browser: true').")
 
@@ -214,7 +295,7 @@ def run_jobs(urlwatcher: Urlwatch, read_only: bool = False) -> None:
                 f"Running jobs that require Chrome (i.e. with 'use_browser: true') in parallel with {max_workers} "
                 f'max_workers.'
             )
-            job_runner(stack, jobs_to_run, max_workers)
+            job_runner(stack, jobs_to_run, max_workers, processes)
         else:
             logger.debug("Found no jobs that require Chrome (i.e. with 'use_browser: true').")
 